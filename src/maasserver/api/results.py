@@ -14,7 +14,7 @@ from maasserver.api.utils import get_optional_list, get_optional_param
 from maasserver.models import Node
 from maasserver.permissions import NodePermission
 from metadataserver.enum import SCRIPT_STATUS
-from metadataserver.models import ScriptResult
+from metadataserver.models import ScriptOutput, ScriptResult
 
 
 class NodeResultsHandler(OperationsHandler):
@@ -85,16 +85,22 @@ class NodeResultsHandler(OperationsHandler):
                 and script_set.result_type != result_type
             ):
                 continue
-            for script_result in script_set.scriptresult_set.filter(
-                status__in=(
-                    SCRIPT_STATUS.PASSED,
-                    SCRIPT_STATUS.FAILED,
-                    SCRIPT_STATUS.TIMEDOUT,
-                    SCRIPT_STATUS.ABORTED,
+            script_results = [
+                script_result
+                for script_result in script_set.scriptresult_set.filter(
+                    status__in=(
+                        SCRIPT_STATUS.PASSED,
+                        SCRIPT_STATUS.FAILED,
+                        SCRIPT_STATUS.TIMEDOUT,
+                        SCRIPT_STATUS.ABORTED,
+                    )
                 )
-            ):
-                if names is not None and script_result.name not in names:
-                    continue
+                if names is None or script_result.name in names
+            ]
+            ScriptOutput.objects.load_outputs(
+                script_results, ["output", "stdout", "stderr"]
+            )
+            for script_result in script_results:
                 # MAAS stores stdout, stderr, and the combined output. The
                 # metadata API determine which field uploaded data should go
                 # into based on the extention of the uploaded file. .out goes
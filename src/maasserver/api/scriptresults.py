@@ -14,7 +14,7 @@ import tarfile
 import time
 
 from django.core.exceptions import ValidationError
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from formencode.validators import Bool, String, StringBool
 from piston3.utils import rc
@@ -24,7 +24,7 @@ from maasserver.api.utils import get_optional_param
 from maasserver.exceptions import MAASAPIValidationError
 from maasserver.models import Node
 from maasserver.permissions import NodePermission
-from metadataserver.models import ScriptSet
+from metadataserver.models import ScriptOutput, ScriptSet
 from metadataserver.models.script import translate_hardware_type
 from metadataserver.models.scriptset import translate_result_type
 
@@ -37,6 +37,16 @@ def fmt_time(dt):
         return format_datetime(dt)
 
 
+# The outputs that are downloaded for each "output" parameter.
+DOWNLOAD_OUTPUT_NAMES = {
+    "combined": ["output"],
+    "stdout": ["stdout"],
+    "stderr": ["stderr"],
+    "result": ["result"],
+    "all": ["output", "stdout", "stderr", "result"],
+}
+
+
 def filter_script_results(script_set, filters, hardware_type=None):
     if filters is None:
         script_results = list(script_set)
@@ -218,9 +228,12 @@ class NodeScriptResultHandler(OperationsHandler):
     @classmethod
     def results(cls, script_set):
         results = []
-        for script_result in filter_script_results(
+        script_results = filter_script_results(
             script_set, script_set.filters, script_set.hardware_type
-        ):
+        )
+        if script_set.include_output:
+            ScriptOutput.objects.load_outputs(script_results)
+        for script_result in script_results:
             # Don't show password parameter values over the API.
             for parameter in script_result.parameters.values():
                 if (
@@ -431,9 +444,29 @@ class NodeScriptResultHandler(OperationsHandler):
                 raise MAASAPIValidationError(e)
 
         bin_regex = re.compile(r".+\.tar(\..+)?")
-        for script_result in filter_script_results(
+        script_results = filter_script_results(
             script_set, filters, hardware_type
-        ):
+        )
+        output_names = DOWNLOAD_OUTPUT_NAMES.get(output, [])
+        if filetype == "txt" and len(script_results) == 1:
+            names = [
+                "output"
+                if bin_regex.search(script_results[0].name) is not None
+                else name
+                for name in output_names
+            ]
+            if len(names) == 1:
+                # Stream the output without reading all of it into memory.
+                # This allows large results to be piped.
+                script_output = ScriptOutput.objects.filter(
+                    script_result=script_results[0], name=names[0]
+                ).first()
+                return StreamingHttpResponse(
+                    [] if script_output is None else script_output.stream(),
+                    content_type="application/binary",
+                )
+        ScriptOutput.objects.load_outputs(script_results, output_names)
+        for script_result in script_results:
             mtime = time.mktime(script_result.updated.timetuple())
             if bin_regex.search(script_result.name) is not None:
                 # Binary files only have one output
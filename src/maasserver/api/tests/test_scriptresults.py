@@ -869,7 +869,9 @@ class TestNodeScriptResultAPI(APITestCase.ForUser):
             {"op": "download", "filter": script_result.id},
         )
         self.assertThat(response, HasStatusCode(http.client.OK))
-        self.assertEqual(script_result.output, response.content)
+        self.assertEqual(
+            script_result.output, b"".join(response.streaming_content)
+        )
 
     def test_download_filetype_txt(self):
         script_set = self.make_scriptset()
@@ -880,7 +882,9 @@ class TestNodeScriptResultAPI(APITestCase.ForUser):
             {"op": "download", "filetype": "txt", "filters": script_result.id},
         )
         self.assertThat(response, HasStatusCode(http.client.OK))
-        self.assertEqual(script_result.output, response.content)
+        self.assertEqual(
+            script_result.output, b"".join(response.streaming_content)
+        )
 
     def test_download_filetype_tar_xz(self):
         script_set = self.make_scriptset()
@@ -935,7 +939,9 @@ class TestNodeScriptResultAPI(APITestCase.ForUser):
             },
         )
         self.assertThat(response, HasStatusCode(http.client.OK))
-        self.assertEqual(script_result.output, response.content)
+        self.assertEqual(
+            script_result.output, b"".join(response.streaming_content)
+        )
 
     def test_download_output_stdout(self):
         script_set = self.make_scriptset()
@@ -946,7 +952,9 @@ class TestNodeScriptResultAPI(APITestCase.ForUser):
             {"op": "download", "filter": script_result.id, "output": "stdout"},
         )
         self.assertThat(response, HasStatusCode(http.client.OK))
-        self.assertEqual(script_result.stdout, response.content)
+        self.assertEqual(
+            script_result.stdout, b"".join(response.streaming_content)
+        )
 
     def test_download_output_stderr(self):
         script_set = self.make_scriptset()
@@ -957,7 +965,9 @@ class TestNodeScriptResultAPI(APITestCase.ForUser):
             {"op": "download", "filter": script_result.id, "output": "stderr"},
         )
         self.assertThat(response, HasStatusCode(http.client.OK))
-        self.assertEqual(script_result.stderr, response.content)
+        self.assertEqual(
+            script_result.stderr, b"".join(response.streaming_content)
+        )
 
     def test_download_output_result(self):
         script_set = self.make_scriptset()
@@ -968,7 +978,9 @@ class TestNodeScriptResultAPI(APITestCase.ForUser):
             {"op": "download", "filter": script_result.id, "output": "result"},
         )
         self.assertThat(response, HasStatusCode(http.client.OK))
-        self.assertEqual(script_result.result, response.content)
+        self.assertEqual(
+            script_result.result, b"".join(response.streaming_content)
+        )
 
     def test_download_output_all(self):
         script_set = self.make_scriptset()
@@ -1079,7 +1091,9 @@ class TestNodeScriptResultAPI(APITestCase.ForUser):
             },
         )
         self.assertThat(response, HasStatusCode(http.client.OK))
-        self.assertEqual(script_result.output, response.content)
+        self.assertEqual(
+            script_result.output, b"".join(response.streaming_content)
+        )
 
     def test_download_shows_results_from_all_disks(self):
         # Regression test for #LP:1755060
@@ -24,7 +24,7 @@ import time
 
 from django.db import connection, connections
 from django.db.utils import load_backend
-from django.http import HttpResponse, StreamingHttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from pkg_resources import parse_version
 from simplestreams import util as sutil
 from simplestreams.mirrors import BasicMirrorWriter, UrlMirrorReader
@@ -55,6 +55,7 @@ from maasserver.enum import (
 from maasserver.eventloop import services
 from maasserver.exceptions import MAASAPINotFound
 from maasserver.fields import LargeObjectFile
+from maasserver.largefilecache import largefile_cache
 from maasserver.models import (
     BootResource,
     BootResourceFile,
@@ -360,13 +361,103 @@ class SimpleStreamsHandler:
             rfile = resource_set.files.get(filename=filename)
         except BootResourceFile.DoesNotExist:
             raise MAASAPINotFound()
+        largefile = rfile.largefile
+        path = largefile_cache.get_file_path(largefile.sha256)
+        if path is not None:
+            return get_file_response(request, path)
+        # Not cached yet, so stream the content from the database, caching it
+        # along the way if it is complete. Any range requested is ignored,
+        # which HTTP allows; a client resuming will get the range from the
+        # cache next time.
+        stream = ConnectionWrapper(largefile.content)
+        if largefile.complete:
+            stream = largefile_cache.cache_stream(
+                largefile.sha256, largefile.total_size, stream
+            )
         response = StreamingHttpResponse(
-            ConnectionWrapper(rfile.largefile.content),
-            content_type="application/octet-stream",
+            stream, content_type="application/octet-stream"
         )
         return response
 
 
+def parse_range_header(header, size):
+    """Parse the value of a HTTP Range header for content of `size` bytes.
+
+    Only a single range of bytes is supported.
+
+    :return: A tuple of `(start, end)`, where `end` is inclusive, or None to
+        send all of the content.
+    :raise ValueError: If the range cannot be satisfied.
+    """
+    if header is None:
+        return None
+    unit, _, ranges = header.partition("=")
+    if unit.strip() != "bytes" or "," in ranges:
+        return None
+    start, _, end = ranges.strip().partition("-")
+    try:
+        if start == "":
+            # The last `end` bytes.
+            start, end = max(size - int(end), 0), size - 1
+        elif end == "":
+            start, end = int(start), size - 1
+        else:
+            start, end = int(start), min(int(end), size - 1)
+    except ValueError:
+        # Not a valid range, so it is ignored.
+        return None
+    if start < 0 or start > end:
+        raise ValueError("Range cannot be satisfied: %s" % header)
+    return start, end
+
+
+# How much of a cached file is read at a time when serving it.
+FILE_BLOCK_SIZE = 1024 * 1024
+
+
+def read_file_range(path, start, length, block_size=FILE_BLOCK_SIZE):
+    """Yield `length` bytes from `path`, starting at `start`."""
+    with open(path, "rb") as stream:
+        stream.seek(start)
+        while length > 0:
+            data = stream.read(min(length, block_size))
+            if len(data) == 0:
+                break
+            length -= len(data)
+            yield data
+
+
+def get_file_response(request, path):
+    """Return a response with the content of the file at `path`.
+
+    A single range of bytes can be requested with a Range header.
+    """
+    size = os.path.getsize(path)
+    try:
+        byte_range = parse_range_header(request.META.get("HTTP_RANGE"), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = "bytes */%d" % size
+        return response
+    if byte_range is None:
+        response = FileResponse(
+            open(path, "rb"), content_type="application/octet-stream"
+        )
+        response.block_size = FILE_BLOCK_SIZE
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            read_file_range(path, start, length),
+            status=206,
+            content_type="application/octet-stream",
+        )
+        response["Content-Range"] = "bytes %d-%d/%d" % (start, end, size)
+        response["Content-Length"] = str(length)
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
 def simplestreams_stream_handler(request, filename):
     handler = SimpleStreamsHandler()
     return handler.streams_handler(request, filename)
@@ -1502,6 +1593,12 @@ def stop_import_resources():
 IMPORT_RESOURCES_SERVICE_PERIOD = timedelta(hours=1)
 
 
+@transactional
+def prune_largefile_cache():
+    """Remove content from the cache that no `LargeFile` has any more."""
+    largefile_cache.prune(LargeFile.objects.values_list("sha256", flat=True))
+
+
 class ImportResourcesService(TimerService):
     """Service to periodically import boot resources.
 
@@ -1528,6 +1625,8 @@ class ImportResourcesService(TimerService):
         d = deferToDatabase(transactional(determine_auto))
         d.addCallback(self.import_resources_if_configured)
         d.addErrback(log.err, "Failure importing boot resources.")
+        d.addCallback(lambda _: deferToDatabase(prune_largefile_cache))
+        d.addErrback(log.err, "Failure pruning cached boot resources.")
         return d
 
     def import_resources_if_configured(self, auto):
@@ -0,0 +1,73 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""RPC helpers relating to boot configs."""
+
+
+from twisted.internet import reactor
+from twisted.internet.defer import DeferredList
+from twisted.protocols.amp import UnhandledCommand
+
+from maasserver.rpc import getAllClients
+from provisioningserver.logger import LegacyLogger
+from provisioningserver.rpc.cluster import InvalidateBootConfigs
+from provisioningserver.utils.twisted import asynchronous, suppress
+
+log = LegacyLogger()
+
+
+@asynchronous
+def invalidate_boot_configs(system_ids):
+    """Have all rack controllers forget the boot configs for `system_ids`.
+
+    Rack controllers that do not cache boot configs don't support
+    `InvalidateBootConfigs`; that's not an error.
+    """
+    system_ids = list(system_ids)
+
+    def invalidate(client):
+        d = client(InvalidateBootConfigs, system_ids=system_ids)
+        d.addErrback(suppress, UnhandledCommand)
+        d.addErrback(
+            log.err,
+            "Failed to invalidate boot configs on rack controller %s."
+            % client.ident,
+        )
+        return d
+
+    return DeferredList(map(invalidate, getAllClients()))
+
+
+class BootConfigInvalidator:
+    """Invalidate boot configs shortly, in batches.
+
+    Status changes often come in bursts, e.g. when many machines are
+    deployed at once, so rather than have all rack controllers invalidate
+    each node's boot configs separately, the nodes are gathered for
+    `delay` seconds and invalidated in one go.
+    """
+
+    delay = 1
+
+    def __init__(self, clock=reactor):
+        self.clock = clock
+        self.system_ids = set()
+        self.call = None
+
+    @asynchronous
+    def invalidate_soon(self, system_ids):
+        """Invalidate the boot configs for `system_ids` soon.
+
+        This returns straight away, without waiting for rack controllers.
+        """
+        self.system_ids.update(system_ids)
+        if self.call is None:
+            self.call = self.clock.callLater(self.delay, self.invalidate)
+
+    def invalidate(self):
+        self.call = None
+        system_ids, self.system_ids = self.system_ids, set()
+        return invalidate_boot_configs(sorted(system_ids))
+
+
+invalidate_boot_configs_soon = BootConfigInvalidator().invalidate_soon
@@ -0,0 +1,92 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for :py:mod:`maasserver.clusterrpc.boot_config`."""
+
+
+from unittest.mock import Mock
+
+from twisted.internet.defer import fail, inlineCallbacks, succeed
+from twisted.internet.task import Clock
+from twisted.protocols.amp import UnhandledCommand
+
+from maasserver.clusterrpc import boot_config as boot_config_module
+from maasserver.clusterrpc.boot_config import (
+    BootConfigInvalidator,
+    invalidate_boot_configs,
+)
+from maastesting.factory import factory
+from maastesting.testcase import MAASTestCase, MAASTwistedRunTest
+from maastesting.twisted import TwistedLoggerFixture
+from provisioningserver.rpc.cluster import InvalidateBootConfigs
+
+
+class TestInvalidateBootConfigs(MAASTestCase):
+
+    run_tests_with = MAASTwistedRunTest.make_factory(timeout=5)
+
+    def make_client(self, result):
+        client = Mock()
+        client.ident = factory.make_name("system_id")
+        client.return_value = result
+        return client
+
+    @inlineCallbacks
+    def test_calls_InvalidateBootConfigs_on_all_clients(self):
+        clients = [self.make_client(succeed({})) for _ in range(3)]
+        self.patch(boot_config_module, "getAllClients").return_value = clients
+        system_ids = [factory.make_name("system_id") for _ in range(2)]
+        yield invalidate_boot_configs(iter(system_ids))
+        for client in clients:
+            client.assert_called_once_with(
+                InvalidateBootConfigs, system_ids=system_ids
+            )
+
+    @inlineCallbacks
+    def test_ignores_racks_without_support(self):
+        client = self.make_client(fail(UnhandledCommand()))
+        self.patch(boot_config_module, "getAllClients").return_value = [client]
+        with TwistedLoggerFixture() as logger:
+            yield invalidate_boot_configs(["abc"])
+        self.assertEqual("", logger.output)
+
+    @inlineCallbacks
+    def test_logs_other_failures(self):
+        client = self.make_client(fail(ZeroDivisionError()))
+        self.patch(boot_config_module, "getAllClients").return_value = [client]
+        with TwistedLoggerFixture() as logger:
+            yield invalidate_boot_configs(["abc"])
+        self.assertIn(
+            "Failed to invalidate boot configs on rack controller %s."
+            % client.ident,
+            logger.output,
+        )
+
+
+class TestBootConfigInvalidator(MAASTestCase):
+    def test_invalidate_soon_batches_system_ids(self):
+        mock_invalidate = self.patch(
+            boot_config_module, "invalidate_boot_configs"
+        )
+        clock = Clock()
+        invalidator = BootConfigInvalidator(clock)
+        invalidator.invalidate_soon(["b"])
+        invalidator.invalidate_soon(["a", "b"])
+        mock_invalidate.assert_not_called()
+        clock.advance(invalidator.delay)
+        mock_invalidate.assert_called_once_with(["a", "b"])
+
+    def test_invalidate_soon_starts_a_new_batch_once_invalidated(self):
+        mock_invalidate = self.patch(
+            boot_config_module, "invalidate_boot_configs"
+        )
+        clock = Clock()
+        invalidator = BootConfigInvalidator(clock)
+        invalidator.invalidate_soon(["a"])
+        clock.advance(invalidator.delay)
+        invalidator.invalidate_soon(["b"])
+        clock.advance(invalidator.delay)
+        self.assertEqual(
+            [(["a"],), (["b"],)],
+            [args for args, _ in mock_invalidate.call_args_list],
+        )
@@ -4,7 +4,7 @@
 """Configuration for the MAAS region."""
 
 
-from formencode.validators import Int
+from formencode.validators import Int, OneOf
 
 from provisioningserver.config import (
     Configuration,
@@ -97,6 +97,24 @@ class RegionConfiguration(Configuration, metaclass=RegionConfigurationMeta):
         Int(if_missing=4, accept_python=False, min=1),
     )
 
+    # Status message options.
+    status_flush_interval = ConfigurationOption(
+        "status_flush_interval",
+        "How often, in seconds, status messages from nodes that are queued "
+        "are processed.",
+        Int(if_missing=10, accept_python=False, min=1),
+    )
+
+    # Script output options.
+    script_output_store = ConfigurationOption(
+        "script_output_store",
+        "Where the output of scripts run on nodes is stored: in the "
+        "database, or in a directory on the region. The directory can only "
+        "be used by deployments with a single region, or where the "
+        "directory is shared by all regions.",
+        OneOf(["database", "directory"], if_missing="database"),
+    )
+
     # Debug options.
     debug = ConfigurationOption(
         "debug",
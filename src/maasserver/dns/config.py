@@ -5,7 +5,9 @@
 
 
 from collections import defaultdict
+import re
 
+import attr
 from django.conf import settings
 from netaddr import IPAddress
 
@@ -18,12 +20,15 @@ from maasserver.dns.zonegenerator import (
 from maasserver.enum import IPADDRESS_TYPE, RDNS_MODE
 from maasserver.models.config import Config
 from maasserver.models.dnspublication import DNSPublication
+from maasserver.models.dnsresource import DNSResource
 from maasserver.models.domain import Domain
-from maasserver.models.node import RackController
+from maasserver.models.node import Node, RackController
+from maasserver.models.staticipaddress import StaticIPAddress
 from maasserver.models.subnet import Subnet
 from provisioningserver.dns.actions import (
     bind_reload,
     bind_reload_with_retries,
+    bind_reload_zones,
     bind_write_configuration,
     bind_write_options,
     bind_write_zones,
@@ -123,6 +128,185 @@ def dns_update_all_zones(reload_retry=False, reload_timeout=2):
     return serial, reloaded, [domain.name for domain in domains]
 
 
+# Publication reasons, as written by the `sys_dns_*` triggers, that only
+# affect some of the zones. Any other reason requires a full rebuild.
+DNS_REASON_IP = re.compile(
+    r"^ip (?P<ip>\S+) (?:allocated|released|alloc_type changed to \S+|"
+    r"changed to (?P<new_ip>\S+)|"
+    r"(?:connected to|disconnected from) (?P<hostname>\S+) on \S+|"
+    r"(?:linked to|unlinked from) resource \S+ on zone (?P<domain>\S+))$"
+)
+DNS_REASON_HOSTNAME = re.compile(
+    r"^node \S+ changed hostname to (?P<hostname>\S+)$"
+)
+DNS_REASON_RESOURCE = re.compile(
+    r"^zone (?P<domain>\S+) (?P<action>added|removed|updated) "
+    r"resource (?P<name>\S+)$"
+)
+DNS_REASON_DNSDATA = re.compile(
+    r"^(?:added \S+ to|updated \S+ in|removed \S+ from) resource \S+ "
+    r"on zone (?P<domain>\S+)$"
+)
+
+
+@attr.s
+class DirtyZones:
+    """The zones affected by a run of DNS publications."""
+
+    # Names of the forward zones that need to be regenerated.
+    domains = attr.ib(factory=set)
+
+    # Subnets whose reverse zones need to be regenerated.
+    subnets = attr.ib(factory=set)
+
+    def add_ip(self, ip):
+        """Mark the reverse zones that `ip` can appear in as dirty."""
+        self.subnets.update(Subnet.objects.raw_subnets_containing_ip(ip))
+
+    def add_domains_for_ip(self, ip):
+        """Mark the forward zones that currently reference `ip` as dirty.
+
+        :return: True if any forward zone references `ip`.
+        """
+        domains = set(
+            Node.objects.filter(
+                interface__ip_addresses__ip=ip,
+                interface__ip_addresses__temp_expires_on__isnull=True,
+            ).values_list("domain__name", flat=True)
+        )
+        domains.update(
+            DNSResource.objects.filter(ip_addresses__ip=ip).values_list(
+                "domain__name", flat=True
+            )
+        )
+        self.domains.update(domains)
+        return len(domains) != 0
+
+
+def get_dirty_zones(since_serial, serial):
+    """Work out which zones changed between `since_serial` and `serial`.
+
+    The reasons recorded in each `DNSPublication` by the DNS triggers are
+    mapped onto the forward and reverse zones they affect.
+
+    :return: A `DirtyZones`, or `None` if a full rebuild is required: the
+        publications have been garbage collected, the serial has cycled, or
+        one of the changes affects more than individual records.
+    """
+    since_serial, serial = int(since_serial), int(serial)
+    if serial < since_serial:
+        return None
+    reasons = list(
+        DNSPublication.objects.filter(
+            serial__gt=since_serial, serial__lte=serial
+        ).values_list("source", flat=True)
+    )
+    if len(reasons) != serial - since_serial:
+        # Some of the publications are gone, or were rolled back and the
+        # sequence skipped a number; either way we can't be sure.
+        return None
+
+    dirty = DirtyZones()
+    all_domains = False
+    for reason in reasons:
+        match = DNS_REASON_IP.match(reason)
+        if match is not None:
+            ips = [match.group("ip")]
+            if match.group("new_ip") is not None:
+                ips.append(match.group("new_ip"))
+            for ip in ips:
+                dirty.add_ip(ip)
+            if match.group("domain") is not None:
+                dirty.domains.add(match.group("domain"))
+            elif match.group("hostname") is not None:
+                dirty.domains.update(
+                    Node.objects.filter(
+                        hostname=match.group("hostname")
+                    ).values_list("domain__name", flat=True)
+                )
+            elif not any([dirty.add_domains_for_ip(ip) for ip in ips]):
+                # A released address is no longer linked to anything, so
+                # the zone it was published in is unknown.
+                all_domains = True
+            continue
+        match = DNS_REASON_HOSTNAME.match(reason)
+        if match is not None:
+            nodes = Node.objects.filter(hostname=match.group("hostname"))
+            dirty.domains.update(nodes.values_list("domain__name", flat=True))
+            for ip in StaticIPAddress.objects.filter(
+                interface__node__in=nodes, ip__isnull=False
+            ).values_list("ip", flat=True):
+                dirty.add_ip(ip)
+            continue
+        match = DNS_REASON_RESOURCE.match(reason)
+        if match is not None:
+            dirty.domains.add(match.group("domain"))
+            if match.group("action") == "updated":
+                # A renamed resource changes its PTR records.
+                for ip in StaticIPAddress.objects.filter(
+                    dnsresource__name=match.group("name"),
+                    dnsresource__domain__name=match.group("domain"),
+                    ip__isnull=False,
+                ).values_list("ip", flat=True):
+                    dirty.add_ip(ip)
+            continue
+        match = DNS_REASON_DNSDATA.match(reason)
+        if match is not None:
+            dirty.domains.add(match.group("domain"))
+            continue
+        return None
+    if all_domains:
+        dirty.domains.update(
+            Domain.objects.filter(authoritative=True).values_list(
+                "name", flat=True
+            )
+        )
+    return dirty
+
+
+def dns_update_dirty_zones(since_serial, reload_timeout=2):
+    """Update the zone files changed since `since_serial` was published.
+
+    Only the zones affected by the intervening publications are rewritten
+    and reloaded with `rndc reload <zone>`; BIND's configuration is left
+    alone. Falls back to `dns_update_all_zones` when the set of affected
+    zones can't be determined.
+
+    :param since_serial: The serial of the last successful publication.
+    :return: The same as `dns_update_all_zones`, but the list of domain names
+        only includes those that were rewritten with the new serial.
+    """
+    if not is_dns_enabled():
+        return
+
+    serial = current_zone_serial()
+    dirty = get_dirty_zones(since_serial, serial)
+    if dirty is None:
+        return dns_update_all_zones(reload_timeout=reload_timeout)
+
+    domains = Domain.objects.filter(authoritative=True, name__in=dirty.domains)
+    subnets = Subnet.objects.exclude(rdns_mode=RDNS_MODE.DISABLED)
+    default_ttl = Config.objects.get_config("default_dns_ttl")
+    zones = ZoneGenerator(
+        domains,
+        subnets,
+        default_ttl,
+        serial,
+        dirty_subnets=[
+            subnet
+            for subnet in dirty.subnets
+            if subnet.rdns_mode != RDNS_MODE.DISABLED
+        ],
+    ).as_list()
+    bind_write_zones(zones)
+
+    zone_names = [
+        zone_info.zone_name for zone in zones for zone_info in zone.zone_info
+    ]
+    reloaded = bind_reload_zones(zone_names) if zone_names else True
+    return serial, reloaded, [domain.name for domain in domains]
+
+
 def get_upstream_dns():
     """Return the IP addresses of configured upstream DNS servers.
 
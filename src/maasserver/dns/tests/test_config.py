@@ -27,7 +27,9 @@ from maasserver.dns.config import (
     current_zone_serial,
     dns_force_reload,
     dns_update_all_zones,
+    dns_update_dirty_zones,
     forward_domains_to_forwarded_zones,
+    get_dirty_zones,
     get_internal_domain,
     get_resource_name_for_subnet,
     get_trusted_acls,
@@ -103,6 +105,109 @@ class TestDNSUtilities(MAASServerTestCase):
         )
 
 
+class TestGetDirtyZones(MAASServerTestCase):
+    def publish(self, *reasons):
+        since = DNSPublication.objects.get_most_recent().serial
+        for reason in reasons:
+            DNSPublication(source=reason).save()
+        return since, DNSPublication.objects.get_most_recent().serial
+
+    def make_node_with_ip(self, domain=None):
+        subnet = factory.make_Subnet(cidr=str(factory.make_ipv4_network(24)))
+        node = factory.make_Node(interface=True, domain=domain)
+        static_ip = factory.make_StaticIPAddress(
+            alloc_type=IPADDRESS_TYPE.AUTO,
+            ip=factory.pick_ip_in_Subnet(subnet),
+            subnet=subnet,
+            interface=node.get_boot_interface(),
+        )
+        return node, static_ip
+
+    def test_returns_empty_when_nothing_published(self):
+        DNSPublication(source=factory.make_name("reason")).save()
+        serial = DNSPublication.objects.get_most_recent().serial
+        dirty = get_dirty_zones(serial, serial)
+        self.assertEqual((set(), set()), (dirty.domains, dirty.subnets))
+
+    def test_returns_None_for_unknown_reason(self):
+        self.assertIsNone(get_dirty_zones(*self.publish("Force reload")))
+
+    def test_returns_None_when_serial_cycled(self):
+        since, serial = self.publish("added zone foo")
+        self.assertIsNone(get_dirty_zones(serial, since))
+
+    def test_returns_None_when_publications_collected(self):
+        since, serial = self.publish(
+            "zone foo added resource bar", "zone foo added resource baz"
+        )
+        DNSPublication.objects.filter(serial=serial - 1).delete()
+        self.assertIsNone(get_dirty_zones(since, serial))
+
+    def test_ip_connected_marks_node_domain_and_subnet(self):
+        domain = factory.make_Domain()
+        node, static_ip = self.make_node_with_ip(domain=domain)
+        dirty = get_dirty_zones(
+            *self.publish(
+                "ip %s connected to %s on eth0" % (static_ip.ip, node.hostname)
+            )
+        )
+        self.assertEqual({domain.name}, dirty.domains)
+        self.assertEqual({static_ip.subnet}, dirty.subnets)
+
+    def test_ip_allocated_marks_domains_referencing_ip(self):
+        domain = factory.make_Domain()
+        node, static_ip = self.make_node_with_ip(domain=domain)
+        dirty = get_dirty_zones(
+            *self.publish("ip %s allocated" % static_ip.ip)
+        )
+        self.assertEqual({domain.name}, dirty.domains)
+        self.assertEqual({static_ip.subnet}, dirty.subnets)
+
+    def test_ip_released_marks_all_authoritative_domains(self):
+        factory.make_Domain()
+        factory.make_Domain(authoritative=False)
+        subnet = factory.make_Subnet()
+        ip = factory.pick_ip_in_Subnet(subnet)
+        dirty = get_dirty_zones(*self.publish("ip %s released" % ip))
+        self.assertEqual(
+            set(
+                Domain.objects.filter(authoritative=True).values_list(
+                    "name", flat=True
+                )
+            ),
+            dirty.domains,
+        )
+        self.assertEqual({subnet}, dirty.subnets)
+
+    def test_ip_linked_to_resource_marks_zone(self):
+        subnet = factory.make_Subnet()
+        ip = factory.pick_ip_in_Subnet(subnet)
+        dirty = get_dirty_zones(
+            *self.publish("ip %s linked to resource foo on zone bar" % ip)
+        )
+        self.assertEqual({"bar"}, dirty.domains)
+        self.assertEqual({subnet}, dirty.subnets)
+
+    def test_hostname_change_marks_node_domain_and_subnets(self):
+        domain = factory.make_Domain()
+        node, static_ip = self.make_node_with_ip(domain=domain)
+        dirty = get_dirty_zones(
+            *self.publish(
+                "node %s changed hostname to %s"
+                % (factory.make_name("old"), node.hostname)
+            )
+        )
+        self.assertEqual({domain.name}, dirty.domains)
+        self.assertEqual({static_ip.subnet}, dirty.subnets)
+
+    def test_dnsdata_change_marks_zone_only(self):
+        dirty = get_dirty_zones(
+            *self.publish("added TXT to resource foo on zone bar")
+        )
+        self.assertEqual({"bar"}, dirty.domains)
+        self.assertEqual(set(), dirty.subnets)
+
+
 class TestDNSServer(MAASServerTestCase):
     """A base class to perform real-world DNS-related tests.
 
@@ -431,6 +536,54 @@ class TestDNSConfigModifications(TestDNSServer):
         )
 
 
+class TestDNSUpdateDirtyZones(TestDNSServer):
+    def test_falls_back_to_full_update(self):
+        self.patch(settings, "DNS_CONNECT", True)
+        dns_update_all_zones = self.patch_autospec(
+            dns_config_module, "dns_update_all_zones"
+        )
+        since = DNSPublication.objects.get_most_recent().serial
+        dns_force_reload()
+        dns_update_dirty_zones(since, reload_timeout=RELOAD_TIMEOUT)
+        self.assertThat(
+            dns_update_all_zones,
+            MockCalledOnceWith(reload_timeout=RELOAD_TIMEOUT),
+        )
+
+    def test_updates_only_dirty_zones(self):
+        self.patch(settings, "DNS_CONNECT", True)
+        domain = factory.make_Domain()
+        other_domain = factory.make_Domain()
+        subnet = factory.make_Subnet(cidr=str(factory.make_ipv4_network(24)))
+        dns_update_all_zones(reload_timeout=RELOAD_TIMEOUT)
+        since = DNSPublication.objects.get_most_recent().serial
+        node, static = self.create_node_with_static_ip(
+            domain=domain, subnet=subnet
+        )
+        bind_reload_zones = self.patch(dns_config_module, "bind_reload_zones")
+        bind_reload_zones.return_value = True
+        serial, reloaded, domains = dns_update_dirty_zones(since)
+        self.assertTrue(reloaded)
+        self.assertEqual([domain.name], domains)
+        [zone_names] = bind_reload_zones.call_args[0]
+        self.assertIn(domain.name, zone_names)
+        self.assertNotIn(other_domain.name, zone_names)
+        reverse_zone = IPAddress(static.ip).reverse_dns.split(".", 1)[1]
+        self.assertIn(reverse_zone.rstrip("."), zone_names)
+
+    def test_reloads_dirty_zones_in_bind(self):
+        self.patch(settings, "DNS_CONNECT", True)
+        domain = factory.make_Domain()
+        subnet = factory.make_Subnet(cidr=str(factory.make_ipv4_network(24)))
+        dns_update_all_zones(reload_timeout=RELOAD_TIMEOUT)
+        since = DNSPublication.objects.get_most_recent().serial
+        node, static = self.create_node_with_static_ip(
+            domain=domain, subnet=subnet
+        )
+        dns_update_dirty_zones(since)
+        self.assertDNSMatches(node.hostname, domain.name, static.ip)
+
+
 class TestDNSDynamicIPAddresses(TestDNSServer):
     """Allocated nodes with IP addresses in the dynamic range get a DNS
     record.
@@ -350,6 +350,25 @@ class TestZoneGenerator(MAASServerTestCase):
         )
         self.assertEqual(default_ttl, zonegen.default_ttl)
 
+    def test_fetches_domain_mappings_together(self):
+        domains = [factory.make_Domain() for _ in range(3)]
+        subnet = factory.make_Subnet(cidr=str(IPNetwork("10/29").cidr))
+        self.patch(zonegenerator, "get_hostname_ip_mapping").return_value = {}
+        self.patch(
+            zonegenerator, "get_hostname_dnsdata_mapping"
+        ).return_value = {}
+        ZoneGenerator(
+            domains, subnet, serial=random.randint(0, 65535)
+        ).as_list()
+        # Only the reverse mappings are looked up one by one.
+        self.assertThat(
+            zonegenerator.get_hostname_ip_mapping,
+            MockCalledOnceWith(subnet),
+        )
+        self.assertThat(
+            zonegenerator.get_hostname_dnsdata_mapping, MockNotCalled()
+        )
+
     def test_yields_forward_and_reverse_zone(self):
         default_domain = Domain.objects.get_default_domain().name
         domain = factory.make_Domain(name="henry")
@@ -786,6 +805,71 @@ class TestZoneGenerator(MAASServerTestCase):
             MatchesSetwise(*expected_zones),
         )
 
+    def test_dirty_subnets_limits_reverse_zones(self):
+        default_domain = Domain.objects.get_default_domain().name
+        domain = factory.make_Domain()
+        subnet1 = factory.make_Subnet(cidr="10.0.0.0/24")
+        subnet2 = factory.make_Subnet(cidr="10.0.1.0/24")
+        self.assertThat(
+            ZoneGenerator(
+                domain,
+                [subnet1, subnet2],
+                serial=random.randint(0, 65535),
+                dirty_subnets=[subnet2],
+            ).as_list(),
+            MatchesSetwise(
+                forward_zone(domain.name),
+                reverse_zone(default_domain, "10.0.1.0/24"),
+            ),
+        )
+
+    def test_dirty_subnets_still_consumes_rfc2317_glue(self):
+        default_domain = Domain.objects.get_default_domain().name
+        subnet1 = factory.make_Subnet(
+            cidr="10.0.0.0/29", rdns_mode=RDNS_MODE.RFC2317
+        )
+        subnet2 = factory.make_Subnet(cidr="10.0.0.0/24")
+        zones = ZoneGenerator(
+            [],
+            [subnet1, subnet2],
+            serial=random.randint(0, 65535),
+            dirty_subnets=[subnet2],
+        ).as_list()
+        self.assertThat(
+            zones, MatchesSetwise(reverse_zone(default_domain, "10.0.0.0/24"))
+        )
+        self.assertEqual({IPNetwork("10.0.0.0/29")}, zones[0]._rfc2317_ranges)
+
+    def test_dirty_subnets_yields_glue_network_of_dirty_subnet(self):
+        default_domain = Domain.objects.get_default_domain().name
+        subnet = factory.make_Subnet(
+            cidr="10.0.0.0/29", rdns_mode=RDNS_MODE.RFC2317
+        )
+        self.assertThat(
+            ZoneGenerator(
+                [],
+                [subnet],
+                serial=random.randint(0, 65535),
+                dirty_subnets=[subnet],
+            ).as_list(),
+            MatchesSetwise(
+                reverse_zone(default_domain, "10.0.0.0/29"),
+                reverse_zone(default_domain, "10.0.0.0/24"),
+            ),
+        )
+
+    def test_empty_dirty_subnets_yields_no_reverse_zones(self):
+        subnet = factory.make_Subnet()
+        self.assertEqual(
+            [],
+            ZoneGenerator(
+                [],
+                [subnet],
+                serial=random.randint(0, 65535),
+                dirty_subnets=[],
+            ).as_list(),
+        )
+
     def test_yields_internal_forward_zones(self):
         default_domain = Domain.objects.get_default_domain()
         subnet = factory.make_Subnet(cidr=str(IPNetwork("10/29").cidr))
@@ -4,6 +4,7 @@
 """DNS zone generator."""
 
 
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
 from collections.abc import Iterable, Sequence
 from itertools import chain
@@ -25,6 +26,7 @@ from maasserver.server_address import get_maas_facing_server_addresses
 from provisioningserver.dns.zoneconfig import (
     DNSForwardZoneConfig,
     DNSReverseZoneConfig,
+    IPIndexedMapping,
 )
 
 
@@ -201,12 +203,20 @@ class ZoneGenerator:
         default_ttl=None,
         serial=None,
         internal_domains=None,
+        dirty_subnets=None,
     ):
         """
         :param serial: A serial number to reuse when creating zones in bulk.
+        :param dirty_subnets: Optional collection of subnets for which reverse
+            zones should be generated. All of `subnets` are still taken into
+            account for RFC2317 glue and overlapping networks, but zones for
+            other subnets are not yielded. Defaults to all of `subnets`.
         """
         self.domains = sequence(domains)
         self.subnets = sequence(subnets)
+        self.dirty_subnets = (
+            None if dirty_subnets is None else sequence(dirty_subnets)
+        )
         if default_ttl is None:
             self.default_ttl = Config.objects.get_config("default_dns_ttl")
         else:
@@ -218,14 +228,32 @@ class ZoneGenerator:
             self.internal_domains = []
 
     @staticmethod
-    def _get_mappings():
-        """Return a lazily evaluated mapping dict."""
-        return lazydict(get_hostname_ip_mapping)
+    def _get_mappings(domains=()):
+        """Return a lazily evaluated mapping dict.
+
+        The mappings for `domains` are fetched up front, together.
+        """
+        mappings = lazydict(get_hostname_ip_mapping)
+        mappings.update(
+            StaticIPAddress.objects.get_hostname_ip_mapping_for_domains(
+                domains
+            )
+        )
+        return mappings
 
     @staticmethod
-    def _get_rrset_mappings():
-        """Return a lazily evaluated mapping dict."""
-        return lazydict(get_hostname_dnsdata_mapping)
+    def _get_rrset_mappings(domains=()):
+        """Return a lazily evaluated mapping dict.
+
+        The mappings for `domains` are fetched up front, together.
+        """
+        rrset_mappings = lazydict(get_hostname_dnsdata_mapping)
+        rrset_mappings.update(
+            DNSData.objects.get_hostname_dnsdata_mapping_for_domains(
+                domains, with_ids=False
+            )
+        )
+        return rrset_mappings
 
     @staticmethod
     def _gen_forward_zones(
@@ -329,11 +357,18 @@ class ZoneGenerator:
 
     @staticmethod
     def _gen_reverse_zones(
-        subnets, serial, ns_host_name, mappings, default_ttl
+        subnets, serial, ns_host_name, mappings, default_ttl, dirty=None
     ):
-        """Generator of reverse zones, sorted by network."""
+        """Generator of reverse zones, sorted by network.
+
+        :param dirty: If not None, only zones for these subnets, and the
+            RFC2317 glue networks covering them, are generated.
+        """
 
         subnets = set(subnets)
+        if dirty is not None:
+            dirty = set(dirty)
+            dirty_networks = {IPNetwork(subnet.cidr) for subnet in dirty}
         # Generate the list of parent networks for rfc2317 glue.  Note that we
         # need to handle the case where we are controlling both the small net
         # and a bigger network containing the /24, not just a /24 network.
@@ -359,9 +394,33 @@ class ZoneGenerator:
                     rfc2317_glue.setdefault(basenet, set()).add(network)
 
         # Since get_hostname_ip_mapping(Subnet) ignores Subnet.id, so we can
-        # just do it once and be happy.  LP#1600259
-        if len(subnets):
-            mappings["reverse"] = mappings[Subnet.objects.first()]
+        # just do it once and be happy.  LP#1600259  It is indexed by address
+        # so that each zone only has to look at the addresses within it.
+        if len(subnets) and (dirty is None or len(dirty)):
+            mappings["reverse"] = IPIndexedMapping(
+                mappings[Subnet.objects.first()]
+            )
+
+        # Only the more specific subnets nested within a subnet change its
+        # reverse zones (see DNSReverseZoneConfig.compose_zone_info), so find
+        # those by bisecting the networks sorted by their first address,
+        # rather than excluding every other subnet.
+        networks = sorted(
+            (IPNetwork(subnet.cidr) for subnet in subnets),
+            key=lambda network: (network.version, network.first),
+        )
+        network_keys = [
+            (network.version, network.first) for network in networks
+        ]
+
+        def get_nested_networks(network):
+            start = bisect_left(network_keys, (network.version, network.first))
+            end = bisect_right(network_keys, (network.version, network.last))
+            return {
+                other
+                for other in networks[start:end]
+                if other.prefixlen > network.prefixlen
+            }
 
         # For each of the zones that we are generating (one or more per
         # subnet), compile the zone from:
@@ -386,19 +445,6 @@ class ZoneGenerator:
                 )
                 continue
 
-            # 1. Figure out the dynamic ranges.
-            dynamic_ranges = [
-                ip_range.netaddr_iprange
-                for ip_range in subnet.get_dynamic_ranges()
-            ]
-
-            # 2. Start with the map of all of the nodes, including all
-            # DNSResource-associated addresses.  We will prune this to just
-            # entries for the subnet when we actually generate the zonefile.
-            # If we get here, then we have subnets, so we noticed that above
-            # and created mappings['reverse'].  LP#1600259
-            mapping = mappings["reverse"]
-
             # Use the default_domain as the name for the NS host in the reverse
             # zones.  If this network is actually a parent rfc2317 glue
             # network, then we need to generate the glue records.
@@ -419,6 +465,24 @@ class ZoneGenerator:
                 del rfc2317_glue[network]
             else:
                 glue = set()
+            if dirty is not None and subnet not in dirty:
+                # The glue has been consumed above, so that it does not
+                # turn up below, but this zone does not need rewriting.
+                continue
+
+            # 1. Figure out the dynamic ranges.
+            dynamic_ranges = [
+                ip_range.netaddr_iprange
+                for ip_range in subnet.get_dynamic_ranges()
+            ]
+
+            # 2. Start with the map of all of the nodes, including all
+            # DNSResource-associated addresses.  We will prune this to just
+            # entries for the subnet when we actually generate the zonefile.
+            # If we get here, then we have subnets, so we noticed that above
+            # and created mappings['reverse'].  LP#1600259
+            mapping = mappings["reverse"]
+
             yield DNSReverseZoneConfig(
                 ns_host_name,
                 serial=serial,
@@ -428,12 +492,12 @@ class ZoneGenerator:
                 network=IPNetwork(subnet.cidr),
                 dynamic_ranges=dynamic_ranges,
                 rfc2317_ranges=glue,
-                exclude=set(
-                    IPNetwork(s.cidr) for s in subnets if s is not subnet
-                ),
+                exclude=get_nested_networks(network),
             )
         # Now provide any remaining rfc2317 glue networks.
         for network, ranges in rfc2317_glue.items():
+            if dirty is not None and dirty_networks.isdisjoint(ranges):
+                continue
             yield DNSReverseZoneConfig(
                 ns_host_name,
                 serial=serial,
@@ -457,9 +521,9 @@ class ZoneGenerator:
         # we get to this point, we really need one.
         assert not (self.serial is None), "No serial number specified."
 
-        mappings = self._get_mappings()
+        mappings = self._get_mappings(self.domains)
         ns_host_name = self.default_domain.name
-        rrset_mappings = self._get_rrset_mappings()
+        rrset_mappings = self._get_rrset_mappings(self.domains)
         serial = self.serial
         default_ttl = self.default_ttl
         return chain(
@@ -473,7 +537,12 @@ class ZoneGenerator:
                 self.internal_domains,
             ),
             self._gen_reverse_zones(
-                self.subnets, serial, ns_host_name, mappings, default_ttl
+                self.subnets,
+                serial,
+                ns_host_name,
+                mappings,
+                default_ttl,
+                dirty=self.dirty_subnets,
             ),
         )
 
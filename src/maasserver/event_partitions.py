@@ -0,0 +1,180 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Maintenance of the monthly partitions of the event table.
+
+`maasserver_event` is partitioned by the month in which events were
+created, in tables named `maasserver_event_pYYYYMM`. Events that don't
+fall into any of those go into `maasserver_event_default`. Partitions are
+created ahead of time, and once all of the events in a partition are older
+than the `event_retention_days` config, the partition is dropped as a
+whole, rather than deleting its events one by one.
+"""
+
+__all__ = [
+    "drop_expired_event_partitions",
+    "ensure_event_partitions",
+    "EventPartitionService",
+    "get_event_partitions",
+]
+
+from datetime import date, datetime, timedelta
+import re
+
+from django.db import connection
+from twisted.application.internet import TimerService
+
+from maasserver.models import Config
+from maasserver.utils.orm import transactional
+from maasserver.utils.threads import deferToDatabase
+from provisioningserver.logger import LegacyLogger
+from provisioningserver.utils.twisted import synchronous
+
+log = LegacyLogger()
+
+PARTITION_NAME_RE = re.compile(r"^maasserver_event_p(\d{4})(\d{2})$")
+
+DEFAULT_PARTITION = "maasserver_event_default"
+
+# How many months after the current one to create partitions for.
+MONTHS_AHEAD = 2
+
+
+def _add_months(month, count):
+    """Return the first day of the month `count` months after `month`."""
+    months = month.year * 12 + month.month - 1 + count
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def get_partition_name(month):
+    return "maasserver_event_p%04d%02d" % (month.year, month.month)
+
+
+def get_event_partitions():
+    """Return a dict mapping the name of each monthly partition to its month.
+
+    The month is given as a `date` for its first day.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+            JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+            WHERE parent.relname = 'maasserver_event'
+            """
+        )
+        names = [name for name, in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME_RE.match(name)
+        if match is not None:
+            year, month = match.groups()
+            partitions[name] = date(int(year), int(month), 1)
+    return partitions
+
+
+def ensure_event_partitions(today=None):
+    """Create the partitions for this month and the next `MONTHS_AHEAD`.
+
+    Events that were already written to the default partition for one of
+    those months are moved into the new partition.
+
+    :return: The names of the partitions that were created.
+    """
+    if today is None:
+        today = date.today()
+    this_month = today.replace(day=1)
+    existing = get_event_partitions()
+    # The partition that the event table was migrated into covers all time
+    # before its upper bound, so nothing is created before that.
+    latest = max(existing.values(), default=None)
+    created = []
+    with connection.cursor() as cursor:
+        for count in range(MONTHS_AHEAD + 1):
+            month = _add_months(this_month, count)
+            if latest is not None and month <= latest:
+                continue
+            name = get_partition_name(month)
+            start, end = month.isoformat(), _add_months(month, 1).isoformat()
+            cursor.execute(
+                "CREATE TABLE %s (LIKE maasserver_event INCLUDING DEFAULTS)"
+                % name
+            )
+            cursor.execute(
+                """
+                WITH moved AS (
+                    DELETE FROM %s
+                    WHERE created >= %%s AND created < %%s
+                    RETURNING *
+                )
+                INSERT INTO %s SELECT * FROM moved
+                """
+                % (DEFAULT_PARTITION, name),
+                [start, end],
+            )
+            cursor.execute(
+                """
+                ALTER TABLE maasserver_event ATTACH PARTITION %s
+                FOR VALUES FROM (%%s) TO (%%s)
+                """
+                % name,
+                [start, end],
+            )
+            created.append(name)
+    return created
+
+
+def drop_expired_event_partitions(retention_days, today=None):
+    """Drop the partitions of events older than `retention_days`.
+
+    A partition is only dropped once all of its events are past retention.
+    Expired events in the default partition are deleted.
+
+    :return: The names of the partitions that were dropped.
+    """
+    if retention_days <= 0:
+        return []
+    if today is None:
+        today = date.today()
+    cutoff = today - timedelta(days=retention_days)
+    dropped = []
+    with connection.cursor() as cursor:
+        for name, month in sorted(get_event_partitions().items()):
+            if _add_months(month, 1) <= cutoff:
+                cursor.execute(
+                    "ALTER TABLE maasserver_event DETACH PARTITION %s" % name
+                )
+                cursor.execute("DROP TABLE %s" % name)
+                dropped.append(name)
+        cursor.execute(
+            "DELETE FROM %s WHERE created < %%s" % DEFAULT_PARTITION,
+            [datetime.combine(cutoff, datetime.min.time())],
+        )
+    return dropped
+
+
+def maintain_event_partitions():
+    """Create upcoming event partitions, and drop expired ones."""
+    created = ensure_event_partitions()
+    dropped = drop_expired_event_partitions(
+        Config.objects.get_config("event_retention_days")
+    )
+    if created:
+        log.msg("Created event partitions: %s" % ", ".join(created))
+    if dropped:
+        log.msg("Dropped expired event partitions: %s" % ", ".join(dropped))
+
+
+class EventPartitionService(TimerService):
+    """Service to periodically maintain the partitions of the event table.
+
+    This will run immediately when it's started, then once again each
+    day, though the interval can be overridden by passing it to the
+    constructor.
+    """
+
+    def __init__(self, interval=(24 * 60 * 60)):
+        maintain = synchronous(transactional(maintain_event_partitions))
+        super().__init__(interval, deferToDatabase, maintain)
@@ -81,6 +81,18 @@ def make_NonceCleanupService():
     return nonces_cleanup.NonceCleanupService()
 
 
+def make_EventPartitionService():
+    from maasserver import event_partitions
+
+    return event_partitions.EventPartitionService()
+
+
+def make_ScriptOutputPruneService():
+    from metadataserver import outputstore
+
+    return outputstore.ScriptOutputPruneService()
+
+
 def make_DNSPublicationGarbageService():
     from maasserver.dns import publication
 
@@ -129,10 +141,13 @@ def make_RackControllerService(ipcWorker, postgresListener):
     return RackControllerService(ipcWorker, postgresListener)
 
 
-def make_StatusWorkerService(dbtasks):
+def make_StatusWorkerService():
+    from maasserver.config import RegionConfiguration
     from metadataserver.api_twisted import StatusWorkerService
 
-    return StatusWorkerService(dbtasks)
+    with RegionConfiguration.open() as config:
+        interval = config.status_flush_interval
+    return StatusWorkerService(interval=interval)
 
 
 def make_ServiceMonitorService():
@@ -163,6 +178,12 @@ def make_ReverseDNSService(postgresListener):
     return ReverseDNSService(postgresListener)
 
 
+def make_SubnetIndexService(postgresListener):
+    from maasserver.regiondservices.subnet_index import SubnetIndexService
+
+    return SubnetIndexService(postgresListener)
+
+
 def make_NetworkTimeProtocolService():
     from maasserver.regiondservices import ntp
 
@@ -284,6 +305,16 @@ class RegionEventLoop:
             "factory": make_NonceCleanupService,
             "requires": [],
         },
+        "event-partitions": {
+            "only_on_master": True,
+            "factory": make_EventPartitionService,
+            "requires": [],
+        },
+        "script-output-prune": {
+            "only_on_master": True,
+            "factory": make_ScriptOutputPruneService,
+            "requires": [],
+        },
         "dns-publication-cleanup": {
             "only_on_master": True,
             "factory": make_DNSPublicationGarbageService,
@@ -344,7 +375,7 @@ class RegionEventLoop:
         "status-worker": {
             "only_on_master": False,
             "factory": make_StatusWorkerService,
-            "requires": ["database-tasks"],
+            "requires": [],
         },
         "networks-monitor": {
             "only_on_master": True,
@@ -366,6 +397,11 @@ class RegionEventLoop:
             "factory": make_RackControllerService,
             "requires": ["ipc-worker", "postgres-listener-worker"],
         },
+        "subnet-index": {
+            "only_on_master": False,
+            "factory": make_SubnetIndexService,
+            "requires": ["postgres-listener-worker"],
+        },
         "ntp": {
             "only_on_master": True,
             "factory": make_NetworkTimeProtocolService,
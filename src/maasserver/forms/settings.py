@@ -744,6 +744,18 @@ CONFIG_ITEMS = {
             "min_value": 1,
         },
     },
+    "event_retention_days": {
+        "default": 0,
+        "form": forms.IntegerField,
+        "form_kwargs": {
+            "required": False,
+            "label": (
+                "The number of days for which events are kept, or 0 to keep "
+                "them forever"
+            ),
+            "min_value": 0,
+        },
+    },
     "subnet_ip_exhaustion_threshold_count": {
         "default": 16,
         "form": forms.IntegerField,
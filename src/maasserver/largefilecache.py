@@ -0,0 +1,193 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Cache of `LargeFile` content on local disk."""
+
+__all__ = ["LargeFileCache", "largefile_cache"]
+
+import hashlib
+import os
+import tempfile
+import time
+
+from provisioningserver.logger import get_maas_logger
+from provisioningserver.path import get_maas_data_path
+
+maaslog = get_maas_logger("largefilecache")
+
+
+class LargeFileCache:
+    """A content-addressed cache of `LargeFile` content on local disk.
+
+    Streaming the content of a `LargeFile` needs a database connection for
+    as long as the download takes. Instead, the content is stored on disk
+    the first time it's streamed, in a file named for its SHA256, and later
+    downloads are served from there without touching the database.
+
+    Content is written to a temporary file and only moved into place once
+    its SHA256 and size have been checked, so a file in the cache is always
+    complete. Several processes can share the same cache.
+    """
+
+    # Temporary files that are older than this, in seconds, are assumed to
+    # have been left behind by a process that died.
+    stale_temporary_age = 24 * 60 * 60
+
+    def __init__(self, path=None):
+        """
+        :param path: The directory of the cache. Defaults to a directory in
+            the MAAS data directory, as it is when the cache is used.
+        """
+        self._path = path
+
+    @property
+    def path(self):
+        if self._path is None:
+            return get_maas_data_path("largefile-cache")
+        else:
+            return self._path
+
+    def get_file_path(self, sha256):
+        """Return the path to the cached content for `sha256`, or None."""
+        path = os.path.join(self.path, sha256)
+        if os.path.isfile(path):
+            return path
+        else:
+            return None
+
+    def cache_stream(self, sha256, size, stream):
+        """Return an iterator over `stream` that also caches its content.
+
+        The content is added to the cache once `stream` has been read to the
+        end, as long as it matches `sha256` and `size`.
+
+        :param stream: An iterator of bytes, as given to
+            `StreamingHttpResponse`. It is closed when the returned iterator
+            is closed.
+        """
+        return CachingStream(self, sha256, size, stream)
+
+    def discard(self, sha256):
+        """Remove the cached content for `sha256`, if there is any."""
+        try:
+            os.remove(os.path.join(self.path, sha256))
+        except FileNotFoundError:
+            pass
+
+    def prune(self, sha256s):
+        """Remove all cached content except for `sha256s`.
+
+        Temporary files are removed too once they are stale.
+        """
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return
+        sha256s = set(sha256s)
+        stale_before = time.time() - self.stale_temporary_age
+        for name in names:
+            path = os.path.join(self.path, name)
+            try:
+                if name.startswith("."):
+                    if os.path.getmtime(path) < stale_before:
+                        os.remove(path)
+                elif name not in sha256s:
+                    os.remove(path)
+            except FileNotFoundError:
+                # Removed by another process.
+                pass
+
+
+class CachingStream:
+    """An iterator over a stream that writes it to a `LargeFileCache`.
+
+    See `LargeFileCache.cache_stream`.
+    """
+
+    def __init__(self, cache, sha256, size, stream):
+        self.cache = cache
+        self.sha256 = sha256
+        self.size = size
+        self.stream = stream
+        self._file = None
+        self._file_path = None
+        self._hash = hashlib.sha256()
+        self._written = 0
+        # Set to False if the content can't be cached.
+        self._caching = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            data = next(self.stream)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._caching:
+            try:
+                self._write(data)
+            except OSError as error:
+                maaslog.warning(
+                    "Unable to cache large file %s: %s" % (self.sha256, error)
+                )
+                self._abandon()
+        return data
+
+    def _write(self, data):
+        if self._file is None:
+            os.makedirs(self.cache.path, exist_ok=True)
+            fd, self._file_path = tempfile.mkstemp(
+                dir=self.cache.path, prefix=".%s-" % self.sha256
+            )
+            self._file = os.fdopen(fd, "wb")
+        self._file.write(data)
+        self._hash.update(data)
+        self._written += len(data)
+
+    def _finish(self):
+        """Move the content into the cache, if it's all there and correct."""
+        if not self._caching or self._file is None:
+            return
+        if (
+            self._written == self.size
+            and self._hash.hexdigest() == self.sha256
+        ):
+            try:
+                self._file.close()
+                os.rename(
+                    self._file_path,
+                    os.path.join(self.cache.path, self.sha256),
+                )
+            except OSError as error:
+                maaslog.warning(
+                    "Unable to cache large file %s: %s" % (self.sha256, error)
+                )
+                self._abandon()
+            else:
+                self._file = None
+                self._caching = False
+        else:
+            self._abandon()
+
+    def _abandon(self):
+        """Stop caching, and remove anything written so far."""
+        self._caching = False
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            try:
+                os.remove(self._file_path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        """Close the stream, dropping the content if it wasn't all read."""
+        self._abandon()
+        close = getattr(self.stream, "close", None)
+        if close is not None:
+            close()
+
+
+largefile_cache = LargeFileCache()
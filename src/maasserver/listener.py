@@ -4,9 +4,10 @@
 """Listens for NOTIFY events from the postgres database."""
 
 
-from collections import defaultdict, deque
+from collections import defaultdict, OrderedDict
 from errno import ENOENT
 import threading
+import time
 
 from django.db import connections
 from django.db.utils import load_backend
@@ -24,6 +25,7 @@ from twisted.logger import Logger
 from twisted.python.failure import Failure
 from zope.interface import implementer
 
+from provisioningserver.prometheus.metrics import PROMETHEUS_METRICS
 from provisioningserver.utils.enum import map_enum
 from provisioningserver.utils.events import EventGroup
 from provisioningserver.utils.twisted import callOut, suppress, synchronous
@@ -75,13 +77,23 @@ class PostgresListenerService(Service):
     HANDLE_NOTIFY_DELAY = 0.5
     CHANNEL_REGISTRAR_DELAY = 0.5
 
+    # The most notifications that each handler is given to process at once.
+    # Queued notifications are held back while a handler is this busy.
+    HANDLER_CONCURRENCY = 10
+
     def __init__(self, alias="default"):
         self.alias = alias
         self.listeners = defaultdict(list)
         self.autoReconnect = False
         self.connection = None
         self.connectionFileno = None
-        self.notifications = deque()
+        # Maps (channel, payload) to the full channel name, including the
+        # action, of the latest notification for it, and when the first one
+        # that hasn't been handled yet was received.
+        self.notifications = OrderedDict()
+        # A semaphore for each handler, to limit how many notifications it
+        # processes at once.
+        self.handlerSemaphores = {}
         self.notifier = task.LoopingCall(self.handleNotifies)
         self.notifierDone = None
         self.connecting = None
@@ -214,6 +226,10 @@ class PostgresListenerService(Service):
         if len(handlers) == 0:
             # Channels have already been registered. Unregister the channel.
             del self.listeners[channel]
+        if not any(
+            handler in handlers for handlers in self.listeners.values()
+        ):
+            self.handlerSemaphores.pop(handler, None)
         self.runChannelRegistrar()
 
     @synchronous
@@ -434,15 +450,36 @@ class PostgresListenerService(Service):
 
         def gen_notifications(notifications):
             while notifications:
-                yield notifications.popleft()
+                (_, payload), (
+                    full_channel,
+                    received,
+                ) = notifications.popitem(last=False)
+                PROMETHEUS_METRICS.update(
+                    "maas_db_notify_queue_depth",
+                    "set",
+                    value=len(notifications),
+                )
+                yield (full_channel, payload), received
 
         return task.coiterate(
-            self.handleNotify(notification, clock=clock)
-            for notification in gen_notifications(self.notifications)
+            self.handleNotify(notification, clock=clock, received=received)
+            for notification, received in gen_notifications(self.notifications)
         )
 
-    def handleNotify(self, notification, clock=reactor):
-        """Process a notify message in the notifications set."""
+    def handleNotify(self, notification, clock=reactor, received=None):
+        """Process a notify message in the notifications set.
+
+        Each handler for the channel is given the notification once it is
+        processing fewer than `HANDLER_CONCURRENCY` others.
+
+        :param received: When the notification was received, by
+            `time.monotonic`, to measure how long it waited to be handled.
+
+        :return: A `Deferred` that fires once every handler has been given
+            the notification, not once they have finished with it, so that
+            notifications are processed concurrently but a slow handler
+            holds the rest back.
+        """
         channel, payload = notification
         try:
             channel, action = self.convertChannel(channel)
@@ -455,29 +492,56 @@ class PostgresListenerService(Service):
         else:
             defers = []
             handlers = self.listeners[channel]
-            # XXX: There could be an arbitrary number of listeners. Should we
-            # limit concurrency here? Perhaps even do one at a time.
             for handler in handlers:
-                d = defer.maybeDeferred(handler, action, payload)
-                d.addErrback(
-                    lambda failure: self.log.failure(
-                        "Failure while handling notification to {channel!r}: "
-                        "{payload!r}",
-                        failure,
-                        channel=channel,
-                        payload=payload,
-                    )
+                semaphore = self.handlerSemaphores.get(handler)
+                if semaphore is None:
+                    semaphore = self.handlerSemaphores[
+                        handler
+                    ] = defer.DeferredSemaphore(self.HANDLER_CONCURRENCY)
+                d = semaphore.acquire()
+                d.addCallback(
+                    self._runHandler,
+                    semaphore,
+                    handler,
+                    channel,
+                    action,
+                    payload,
+                    received,
                 )
                 defers.append(d)
             return defer.DeferredList(defers)
 
+    def _runHandler(
+        self, _, semaphore, handler, channel, action, payload, received
+    ):
+        """Call `handler` with a notification, releasing `semaphore` after."""
+        if received is not None:
+            PROMETHEUS_METRICS.update(
+                "maas_db_notify_processing_lag",
+                "observe",
+                value=time.monotonic() - received,
+                labels={"channel": channel},
+            )
+        d = defer.maybeDeferred(handler, action, payload)
+        d.addErrback(
+            lambda failure: self.log.failure(
+                "Failure while handling notification to {channel!r}: "
+                "{payload!r}",
+                failure,
+                channel=channel,
+                payload=payload,
+            )
+        )
+        d.addBoth(callOut, semaphore.release)
+
     def _process_notifies(self):
-        """Add each notify to to the notifications set.
+        """Add each notify to to the notifications queue.
 
         This removes duplicate notifications when one entity in the database is
         updated multiple times in a short interval. Accumulating notifications
         and allowing the listener to pick them up in batches is imperfect but
-        good enough, and simple.
+        good enough, and simple. The queue is an `OrderedDict`, so a
+        duplicate is found in constant time however long the queue is.
 
         """
         notifies = self.connection.connection.notifies
@@ -501,10 +565,19 @@ class PostgresListenerService(Service):
                     self.unregisterChannel(notify.channel)
             else:
                 # Place non-system messages into the queue to be
-                # processed.
-                notification = (notify.channel, notify.payload)
-                if notification not in self.notifications:
-                    self.notifications.append(notification)
+                # processed. Notifications for the same channel and payload
+                # are coalesced: the latest action is handled, in the place
+                # of the first.
+                channel = notify.channel.split("_", 1)[0]
+                key = (channel, notify.payload)
+                if key in self.notifications:
+                    received = self.notifications[key][1]
+                else:
+                    received = time.monotonic()
+                self.notifications[key] = (notify.channel, received)
+        PROMETHEUS_METRICS.update(
+            "maas_db_notify_queue_depth", "set", value=len(self.notifications)
+        )
         # Delete the contents of the connection's notifies list so
         # that we don't process them a second time.
         del notifies[:]
@@ -0,0 +1,163 @@
+from datetime import date
+
+from django.db import migrations
+
+
+def partition_event_table(apps, schema_editor):
+    """Turn maasserver_event into a table partitioned by month of creation.
+
+    The existing table becomes the partition for everything created up to
+    the end of the current month, so none of its rows have to be copied.
+    Partitions for later months are created, and dropped once they are
+    past retention, by `maasserver.event_partitions`.
+
+    The existing table is given a valid check constraint, primary key and
+    foreign keys that match those of the partitioned table before it's
+    attached, so attaching it doesn't scan it, build an index, or validate
+    foreign keys.
+    """
+    today = date.today()
+    if today.month == 12:
+        next_month = date(today.year + 1, 1, 1)
+    else:
+        next_month = date(today.year, today.month + 1, 1)
+    legacy = "maasserver_event_p%04d%02d" % (today.year, today.month)
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_get_serial_sequence('maasserver_event', 'id')"
+        )
+        [sequence] = cursor.fetchone()
+
+        # Attaching checks that all rows are within the partition, which
+        # a valid constraint saying as much makes unnecessary.
+        cursor.execute(
+            """
+            ALTER TABLE maasserver_event
+            ADD CONSTRAINT maasserver_event_created_check
+            CHECK (created < '%s') NOT VALID
+            """
+            % next_month.isoformat()
+        )
+        cursor.execute(
+            """
+            ALTER TABLE maasserver_event
+            VALIDATE CONSTRAINT maasserver_event_created_check
+            """
+        )
+        # Attaching builds an index for the primary key of the partitioned
+        # table unless the partition has a matching one already.
+        cursor.execute(
+            """
+            CREATE UNIQUE INDEX maasserver_event_id_created
+            ON maasserver_event (id, created)
+            """
+        )
+        cursor.execute(
+            "ALTER TABLE maasserver_event DROP CONSTRAINT maasserver_event_pkey"
+        )
+        cursor.execute(
+            """
+            ALTER TABLE maasserver_event
+            ADD CONSTRAINT maasserver_event_pkey
+            PRIMARY KEY USING INDEX maasserver_event_id_created
+            """
+        )
+
+        cursor.execute(
+            """
+            SELECT indexname, indexdef FROM pg_indexes
+            WHERE tablename = 'maasserver_event'
+            """
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT tgname FROM pg_trigger
+            WHERE tgrelid = 'maasserver_event'::regclass AND NOT tgisinternal
+            """
+        )
+        triggers = [name for name, in cursor.fetchall()]
+
+        # The triggers are defined on the partitioned table, which propagates
+        # them to all partitions, when the region starts. The foreign keys
+        # are defined on it below, and as the existing table's match them,
+        # they're attached to those without being validated again.
+        for name in triggers:
+            cursor.execute('DROP TRIGGER "%s" ON maasserver_event' % name)
+        cursor.execute("ALTER TABLE maasserver_event RENAME TO %s" % legacy)
+        for name, _ in indexes:
+            cursor.execute(
+                'ALTER INDEX "%s" RENAME TO "%s"'
+                % (name, ("%s_%s" % (legacy, name))[:63])
+            )
+
+        cursor.execute(
+            """
+            CREATE TABLE maasserver_event (
+                LIKE %s INCLUDING DEFAULTS
+            ) PARTITION BY RANGE (created)
+            """
+            % legacy
+        )
+        cursor.execute(
+            "ALTER SEQUENCE %s OWNED BY maasserver_event.id" % sequence
+        )
+        # The partition key has to be part of the primary key; ids still
+        # come from the sequence, so they stay unique.
+        cursor.execute(
+            """
+            ALTER TABLE maasserver_event
+            ADD CONSTRAINT maasserver_event_pkey PRIMARY KEY (id, created)
+            """
+        )
+        for name, definition in indexes:
+            if name != "maasserver_event_pkey":
+                cursor.execute(definition)
+        cursor.execute(
+            """
+            ALTER TABLE maasserver_event
+            ADD CONSTRAINT maasserver_event_type_id_fk_maasserver_eventtype_id
+            FOREIGN KEY (type_id) REFERENCES maasserver_eventtype (id)
+            DEFERRABLE INITIALLY DEFERRED
+            """
+        )
+        cursor.execute(
+            """
+            ALTER TABLE maasserver_event
+            ADD CONSTRAINT maasserver_event_node_id_fk_maasserver_node_id
+            FOREIGN KEY (node_id) REFERENCES maasserver_node (id)
+            DEFERRABLE INITIALLY DEFERRED
+            """
+        )
+
+        cursor.execute(
+            """
+            ALTER TABLE maasserver_event ATTACH PARTITION %s
+            FOR VALUES FROM (MINVALUE) TO ('%s')
+            """
+            % (legacy, next_month.isoformat())
+        )
+        cursor.execute(
+            """
+            ALTER TABLE %s DROP CONSTRAINT maasserver_event_created_check
+            """
+            % legacy
+        )
+        cursor.execute(
+            """
+            CREATE TABLE maasserver_event_default
+            PARTITION OF maasserver_event DEFAULT
+            """
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("maasserver", "0255_node_current_config"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_event_table),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+import maasserver.models.cleansave
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("maasserver", "0256_event_partitions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NodeDetailsCache",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "digest",
+                    models.CharField(
+                        blank=True, editable=False, max_length=64
+                    ),
+                ),
+                (
+                    "version",
+                    models.BigIntegerField(default=0, editable=False),
+                ),
+                ("document", models.BinaryField(editable=False, null=True)),
+                (
+                    "tags_version",
+                    models.BigIntegerField(default=0, editable=False),
+                ),
+                (
+                    "node",
+                    models.OneToOneField(
+                        editable=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="details_cache",
+                        to="maasserver.Node",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+            bases=(maasserver.models.cleansave.CleanSave, models.Model),
+        ),
+    ]
@@ -46,6 +46,7 @@ __all__ = [
     "Neighbour",
     "Node",
     "NodeConfig",
+    "NodeDetailsCache",
     "NodeDevice",
     "NodeMetadata",
     "NodeGroupToRackController",
@@ -163,6 +164,7 @@ from maasserver.models.node import (
     RegionController,
 )
 from maasserver.models.nodeconfig import NodeConfig
+from maasserver.models.nodedetailscache import NodeDetailsCache
 from maasserver.models.nodedevice import NodeDevice
 from maasserver.models.nodemetadata import NodeMetadata
 from maasserver.models.notification import Notification
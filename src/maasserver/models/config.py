@@ -102,6 +102,8 @@ def get_default_config():
         "max_node_commissioning_results": 10,
         "max_node_testing_results": 10,
         "max_node_installation_results": 3,
+        # Events.
+        "event_retention_days": 0,
         # Notifications.
         "subnet_ip_exhaustion_threshold_count": 16,
         "release_notifications": True,
@@ -146,6 +146,23 @@ class DNSDataManager(Manager, DNSDataQueriesMixin):
         self, domain, raw_ttl=False, with_ids=True
     ):
         """Return hostname to RRset mapping for this domain."""
+        return self.get_hostname_dnsdata_mapping_for_domains(
+            [domain], raw_ttl=raw_ttl, with_ids=with_ids
+        )[domain]
+
+    def get_hostname_dnsdata_mapping_for_domains(
+        self, domains, raw_ttl=False, with_ids=True
+    ):
+        """Return hostname to RRset mappings for many domains at once.
+
+        This is the same as calling `get_hostname_dnsdata_mapping` for each of
+        the `domains`, but issues a single query.
+
+        :return: a dict of domain: hostname to RRset mapping.
+        """
+        domains = list(domains)
+        if len(domains) == 0:
+            return {}
         cursor = connection.cursor()
         default_ttl = "%d" % Config.objects.get_config("default_dns_ttl")
         if raw_ttl:
@@ -164,7 +181,9 @@ class DNSDataManager(Manager, DNSDataQueriesMixin):
             SELECT
                 dnsresource.id,
                 dnsresource.name,
+                dnsresource.domain_id,
                 domain.name,
+                node.fqdn IS NOT NULL,
                 node.system_id,
                 node.node_type,
                 node.user_id,
@@ -219,13 +238,13 @@ class DNSDataManager(Manager, DNSDataQueriesMixin):
                     )
                 )
             WHERE
-                /* The entries must be in this domain (though node.domain_id
+                /* The entries must be in these domains (though node.domain_id
                  * may be out-of-domain and that's OK.
                  * Additionally, if there is a CNAME and a node, then the node
                  * wins, and we drop the CNAME until the node no longer has the
                  * same name.
                  */
-                (dnsresource.domain_id = %s OR node.fqdn IS NOT NULL) AND
+                (dnsresource.domain_id = ANY(%s) OR node.fqdn IS NOT NULL) AND
                 (dnsdata.rrtype != 'CNAME' OR node.fqdn IS NULL)
             ORDER BY
                 dnsresource.name,
@@ -236,12 +255,20 @@ class DNSDataManager(Manager, DNSDataQueriesMixin):
         # N.B.: The "node.hostname IS NULL" above is actually checking that
         # no node exists with the same name, in order to make sure that we do
         # not spill CNAME and other data.
-        mapping = defaultdict(HostnameRRsetMapping)
-        cursor.execute(sql_query, (domain.id,))
+        mappings = {
+            domain: defaultdict(HostnameRRsetMapping) for domain in domains
+        }
+        mappings_by_id = {
+            domain.id: (domain, mapping)
+            for domain, mapping in mappings.items()
+        }
+        cursor.execute(sql_query, ([domain.id for domain in domains],))
         for (
             dnsresource_id,
-            name,
-            d_name,
+            resource_name,
+            resource_domain_id,
+            resource_d_name,
+            has_node,
             system_id,
             node_type,
             user_id,
@@ -250,27 +277,36 @@ class DNSDataManager(Manager, DNSDataQueriesMixin):
             rrtype,
             rrdata,
         ) in cursor.fetchall():
-            if name == "@" and d_name != domain.name:
-                name, d_name = d_name.split(".", 1)
-                # Since we don't allow more than one label in dnsresource
-                # names, we should never ever be wrong in this assertion.
-                assert (
-                    d_name == domain.name
-                ), "Invalid domain; expected '%s' == '%s'" % (
-                    d_name,
-                    domain.name,
-                )
-            entry = mapping[name]
-            entry.node_type = node_type
-            entry.system_id = system_id
-            entry.user_id = user_id
+            # Apply the WHERE clause above to each of the domains: rows for
+            # nodes belong in all of them, others only in their own.
+            if has_node:
+                targets = mappings.items()
+            else:
+                targets = [mappings_by_id[resource_domain_id]]
             if with_ids:
-                entry.dnsresource_id = dnsresource_id
                 rrtuple = (ttl, rrtype, rrdata, dnsdata_id)
             else:
                 rrtuple = (ttl, rrtype, rrdata)
-            entry.rrset.add(rrtuple)
-        return mapping
+            for domain, mapping in targets:
+                name, d_name = resource_name, resource_d_name
+                if name == "@" and d_name != domain.name:
+                    name, d_name = d_name.split(".", 1)
+                    # Since we don't allow more than one label in dnsresource
+                    # names, we should never ever be wrong in this assertion.
+                    assert (
+                        d_name == domain.name
+                    ), "Invalid domain; expected '%s' == '%s'" % (
+                        d_name,
+                        domain.name,
+                    )
+                entry = mapping[name]
+                entry.node_type = node_type
+                entry.system_id = system_id
+                entry.user_id = user_id
+                if with_ids:
+                    entry.dnsresource_id = dnsresource_id
+                entry.rrset.add(rrtuple)
+        return mappings
 
 
 class DNSData(CleanSave, TimestampedModel):
@@ -0,0 +1,120 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Cache of the merged details of nodes, that tags are evaluated against."""
+
+
+from django.db.models import (
+    BigIntegerField,
+    BinaryField,
+    CASCADE,
+    CharField,
+    Manager,
+    Model,
+    OneToOneField,
+)
+
+from maasserver import DefaultMeta
+from maasserver.models.cleansave import CleanSave
+from provisioningserver.tags import (
+    dump_merged_details,
+    load_merged_details,
+    merge_details,
+)
+
+
+class NodeDetailsCacheManager(Manager):
+    """Manager for `NodeDetailsCache` objects."""
+
+    def refresh(self, nodes, documents=True):
+        """Bring the cached details of `nodes` up to date.
+
+        A node's details are only merged again when the commissioning
+        output they come from has changed, which is found by comparing
+        digests of the output rather than the output itself. The version
+        of a node's details goes up each time they change.
+
+        :param documents: Whether the merged documents are needed. When
+            they aren't, only the versions are brought up to date, and the
+            documents are merged later, when something needs them.
+        :return: A ``{node_id: NodeDetailsCache}`` map.
+        """
+        # Avoid circular imports.
+        from maasserver.models.nodeprobeddetails import (
+            get_probed_details,
+            get_probed_details_digests,
+        )
+
+        nodes = list(nodes)
+        digests = get_probed_details_digests(nodes)
+        caches = self.filter(node_id__in=digests)
+        if not documents:
+            caches = caches.defer("document")
+        caches = {cache.node_id: cache for cache in caches}
+        changed = {}
+        for node in nodes:
+            cache = caches.get(node.id)
+            if cache is None:
+                cache = caches[node.id] = self.model(node=node)
+            if cache.digest != digests[node.id]:
+                cache.digest = digests[node.id]
+                cache.version += 1
+                cache.document = None
+                changed[node.id] = cache
+        if documents:
+            unmerged = [
+                node for node in nodes if caches[node.id].document is None
+            ]
+            if len(unmerged) > 0:
+                probed_details = get_probed_details(unmerged)
+                for node in unmerged:
+                    cache = changed[node.id] = caches[node.id]
+                    cache.set_document(
+                        merge_details(probed_details[node.system_id])
+                    )
+        for cache in changed.values():
+            cache.save()
+        return caches
+
+
+class NodeDetailsCache(CleanSave, Model):
+    """The merged details of a node, as tags are evaluated against.
+
+    :ivar node: The node that the details are of.
+    :ivar digest: A digest of the commissioning output that the details
+        were merged from; see `get_probed_details_digests`.
+    :ivar version: The version of the details, which goes up each time
+        they change.
+    :ivar document: The merged details, serialized and compressed, or None
+        if they haven't been merged since they last changed.
+    :ivar tags_version: The version of the details that all tags were last
+        evaluated against for the node.
+    """
+
+    class Meta(DefaultMeta):
+        """Needed for South to recognize this model."""
+
+    objects = NodeDetailsCacheManager()
+
+    node = OneToOneField(
+        "Node", editable=False, related_name="details_cache", on_delete=CASCADE
+    )
+
+    digest = CharField(max_length=64, editable=False, blank=True)
+
+    version = BigIntegerField(editable=False, default=0)
+
+    document = BinaryField(editable=False, null=True)
+
+    tags_version = BigIntegerField(editable=False, default=0)
+
+    def __str__(self):
+        return "%s@%d" % (self.node_id, self.version)
+
+    def get_document(self):
+        """Return the merged details, as an `etree.ElementTree`."""
+        return load_merged_details(bytes(self.document))
+
+    def set_document(self, doc):
+        """Set the merged details from the `etree.ElementTree` `doc`."""
+        self.document = dump_merged_details(doc)
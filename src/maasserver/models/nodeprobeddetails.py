@@ -9,14 +9,17 @@ topology information derived from LLDP.
 
 __all__ = [
     "get_probed_details",
+    "get_probed_details_digests",
     "get_single_probed_details",
     "script_output_nsmap",
 ]
-import base64
+from hashlib import sha256
 
 from django.db import connection
 
 from metadataserver.enum import SCRIPT_STATUS
+from metadataserver.fields import Bin
+from metadataserver.models import ScriptOutput
 from provisioningserver.refresh.node_info_scripts import (
     LLDP_OUTPUT_NAME,
     LSHW_OUTPUT_NAME,
@@ -44,11 +47,14 @@ def get_single_probed_details(node):
     if script_set is not None:
         # ScriptName only works here because LLDP and LSHW are builtin scripts
         # which are not stored in the Script table.
-        for script_result in script_set.scriptresult_set.filter(
-            status=SCRIPT_STATUS.PASSED, script_name__in=script_output_nsmap
-        ).only(
-            "status", "script_name", "stdout", "script_id", "script_set_id"
-        ):
+        script_results = list(
+            script_set.scriptresult_set.filter(
+                status=SCRIPT_STATUS.PASSED,
+                script_name__in=script_output_nsmap,
+            ).only("status", "script_name", "script_id", "script_set_id")
+        )
+        ScriptOutput.objects.load_outputs(script_results, ["stdout"])
+        for script_result in script_results:
             namespace = script_output_nsmap[script_result.name]
             details_template[namespace] = script_result.stdout
     return details_template
@@ -71,8 +77,7 @@ def get_probed_details(nodes):
         # which are not stored in the Script table.
         sql_query = """
             SELECT
-              script_set.node_id, script_result.script_name,
-              script_result.stdout
+              script_set.node_id, script_result.script_name, script_result.id
             FROM
               metadataserver_scriptresult AS script_result,
               metadataserver_scriptset AS script_set,
@@ -92,9 +97,71 @@ def get_probed_details(nodes):
                 tuple(script_output_nsmap),
             ],
         )
-        for node_id, script_name, stdout in cursor.fetchall():
-            system_id = node_ids[node_id].system_id
-            namespace = script_output_nsmap[script_name]
-            stdout_decoded = base64.b64decode(stdout)
-            ret[system_id][namespace] = stdout_decoded
+        rows = cursor.fetchall()
+    # The output itself is fetched separately, as it may not be stored in
+    # the database.
+    stdouts = {
+        script_output.script_result_id: script_output.read()
+        for script_output in ScriptOutput.objects.filter(
+            script_result_id__in={row[2] for row in rows}, name="stdout"
+        )
+    }
+    for node_id, script_name, script_result_id in rows:
+        system_id = node_ids[node_id].system_id
+        namespace = script_output_nsmap[script_name]
+        ret[system_id][namespace] = stdouts.get(script_result_id, Bin(b""))
     return ret
+
+
+def get_probed_details_digests(nodes):
+    """Return digests of the details of the nodes in the given list.
+
+    A node's digest changes whenever its details do, but it's worked out
+    from the SHA256 of the commissioning output that the details come from
+    rather than from the output itself, so this is cheap to call for many
+    nodes at once.
+
+    :return: A ``{node_id: digest}`` map, where the digests are hex strings.
+    """
+    sources = {node.id: [] for node in nodes}
+    if len(sources) == 0:
+        return {}
+    with connection.cursor() as cursor:
+        # ScriptName only works here because LLDP and LSHW are builtin scripts
+        # which are not stored in the Script table.
+        sql_query = """
+            SELECT
+              script_set.node_id, script_result.script_name,
+              script_output.sha256
+            FROM
+              metadataserver_scriptresult AS script_result
+              JOIN metadataserver_scriptset AS script_set
+                ON script_set.id = script_result.script_set_id
+              JOIN maasserver_node AS node
+                ON script_set.id = node.current_commissioning_script_set_id
+              LEFT JOIN metadataserver_scriptoutput AS script_output
+                ON script_output.script_result_id = script_result.id AND
+                   script_output.name = 'stdout'
+            WHERE
+              script_set.node_id IN %s AND
+              script_result.status = %s AND
+              script_result.script_name IN %s;
+        """
+        cursor.execute(
+            sql_query,
+            [
+                tuple(sources),
+                SCRIPT_STATUS.PASSED,
+                tuple(script_output_nsmap),
+            ],
+        )
+        for node_id, script_name, output_sha256 in cursor.fetchall():
+            # Results without any output have no output row.
+            sources[node_id].append(
+                "%s:%s\n"
+                % (script_output_nsmap[script_name], output_sha256 or "")
+            )
+    return {
+        node_id: sha256("".join(sorted(lines)).encode("ascii")).hexdigest()
+        for node_id, lines in sources.items()
+    }
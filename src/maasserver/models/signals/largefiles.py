@@ -6,6 +6,7 @@
 
 from django.db.models.signals import post_delete
 
+from maasserver.largefilecache import largefile_cache
 from maasserver.models.largefile import (
     delete_large_object_content_later,
     LargeFile,
@@ -24,6 +25,9 @@ def delete_large_object(sender, instance, **kwargs):
     """
     if instance.content is not None:
         post_commit_do(delete_large_object_content_later, instance.content)
+    # Content cached on this region is no longer needed either. Other regions
+    # prune theirs when they next import resources.
+    post_commit_do(largefile_cache.discard, instance.sha256)
 
 
 signals.watch(post_delete, delete_large_object, LargeFile)
@@ -6,6 +6,7 @@
 
 from django.db.models.signals import post_init, post_save, pre_delete, pre_save
 
+from maasserver.clusterrpc.boot_config import invalidate_boot_configs_soon
 from maasserver.enum import NODE_STATUS, POWER_STATE
 from maasserver.models import (
     Controller,
@@ -18,6 +19,7 @@ from maasserver.models import (
 )
 from maasserver.models.nodeconfig import create_default_nodeconfig
 from maasserver.models.numa import create_default_numanode
+from maasserver.utils.orm import post_commit_do
 from maasserver.utils.signals import SignalsManager
 from metadataserver.models.nodekey import NodeKey
 
@@ -179,5 +181,24 @@ for klass in [Node, Machine]:
     signals.watch_fields(release_auto_ips, klass, ["power_state"])
 
 
+def invalidate_boot_configs_on_status_change(node, old_values, deleted=False):
+    """Have rack controllers forget the node's cached boot configs.
+
+    The boot config for a node depends on its status, so a rack controller
+    mustn't keep using one it got for the node's previous status. This
+    doesn't wait for the rack controllers, so as not to hold up the commit.
+    """
+    post_commit_do(invalidate_boot_configs_soon, [node.system_id])
+
+
+for klass in NODE_CLASSES:
+    signals.watch_fields(
+        invalidate_boot_configs_on_status_change,
+        klass,
+        ["status"],
+        delete=False,
+    )
+
+
 # Enable all signals by default.
 signals.enable()
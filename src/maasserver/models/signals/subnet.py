@@ -4,10 +4,11 @@
 """Respond to Subnet CIDR changes."""
 
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 
 from maasserver.enum import IPADDRESS_TYPE
-from maasserver.models import StaticIPAddress, Subnet
+from maasserver.models import StaticIPAddress, Subnet, VLAN
+from maasserver.models.subnet import subnet_index
 from maasserver.utils.signals import SignalsManager
 
 signals = SignalsManager()
@@ -41,7 +42,15 @@ def updated_cidr(instance, old_values, **kwargs):
     update_referenced_ip_addresses(instance)
 
 
+def invalidate_subnet_index(sender, instance, **kwargs):
+    """Stop using the in-memory index of subnets until this change ends."""
+    subnet_index.local_change()
+
+
 signals.watch(post_save, post_created, sender=Subnet)
+for klass in [Subnet, VLAN]:
+    signals.watch(post_save, invalidate_subnet_index, sender=klass)
+    signals.watch(post_delete, invalidate_subnet_index, sender=klass)
 signals.watch_fields(updated_cidr, Subnet, ["cidr"], delete=False)
 
 # Enable all signals by default.
@@ -19,6 +19,7 @@ from maasserver.enum import (
 )
 from maasserver.models import Node, RackController, StaticIPAddress
 from maasserver.models.service import RACK_SERVICES, REGION_SERVICES, Service
+from maasserver.models.signals import nodes as nodes_module
 from maasserver.models.signals import power
 from maasserver.node_status import NODE_TRANSITIONS
 from maasserver.testing.factory import factory
@@ -242,6 +243,24 @@ class TestNodeDefaultNUMANode(MAASServerTestCase):
         self.assertEqual(device.numanode_set.count(), 0)
 
 
+class TestNodeInvalidatesBootConfigs(MAASServerTestCase):
+    def test_invalidates_boot_configs_when_status_changes(self):
+        machine = factory.make_Machine(status=NODE_STATUS.NEW)
+        post_commit_do = self.patch(nodes_module, "post_commit_do")
+        machine.status = NODE_STATUS.COMMISSIONING
+        machine.save()
+        post_commit_do.assert_called_once_with(
+            nodes_module.invalidate_boot_configs_soon, [machine.system_id]
+        )
+
+    def test_does_nothing_when_status_unchanged(self):
+        machine = factory.make_Machine(status=NODE_STATUS.NEW)
+        post_commit_do = self.patch(nodes_module, "post_commit_do")
+        machine.hostname = factory.make_name("hostname")
+        machine.save()
+        post_commit_do.assert_not_called()
+
+
 class TestNodeReleasesAutoIPs(MAASServerTestCase):
     """Test that auto ips are released when node power is off."""
 
@@ -57,15 +57,26 @@ _mapping_base_fields = (
     "ip",
 )
 
-_special_mapping_result = _mapping_base_fields + ("dnsresource_id",)
+_special_mapping_result = _mapping_base_fields + (
+    "dnsresource_id",
+    "has_dnsresource",
+    "domain_ids",
+)
 
 _mapping_query_result = _mapping_base_fields + (
     "is_boot",
     "preference",
     "family",
+    "domain_id",
+    "domain2_id",
 )
 
-_interface_mapping_result = _mapping_base_fields + ("iface_name", "assigned")
+_interface_mapping_result = _mapping_base_fields + (
+    "iface_name",
+    "assigned",
+    "domain_id",
+    "domain2_id",
+)
 
 SpecialMappingQueryResult = namedtuple(
     "SpecialMappingQueryResult", _special_mapping_result
@@ -341,6 +352,22 @@ class StaticIPAddressManager(Manager):
             zone generation.
         :return: a (default) dict of hostname: HostnameIPMapping entries.
         """
+        if isinstance(domain, Domain):
+            return self._get_special_mappings_for_domains([domain], raw_ttl)[
+                domain.id
+            ]
+        return self._get_special_mappings_for_domains(None, raw_ttl)[None]
+
+    def _get_special_mappings_for_domains(self, domains, raw_ttl=False):
+        """Get the special mappings for many domains in one query.
+
+        See `_get_special_mappings` for what is returned for each domain.
+
+        :param domains: The domains to return mappings for, or None to return
+            all of the reverse mappings.
+        :return: a dict of domain id (None for the reverse mappings) to
+            (default) dict of hostname: HostnameIPMapping entries.
+        """
         default_ttl = "%d" % Config.objects.get_config("default_dns_ttl")
         # raw_ttl says that we don't coalesce, but we need to pick one, so we
         # go with DNSResource if it is involved.
@@ -360,7 +387,8 @@ class StaticIPAddressManager(Manager):
         # And here is the SQL query of doom.  Build up inner selects to get the
         # view of a DNSResource (and Node) that we need, and finally use
         # domain2 to handle the case where an FQDN is also the name of a domain
-        # that we know.
+        # that we know.  The domain IDs that each row is relevant to are
+        # returned too, so that the rows can be split between domains.
         sql_query = (
             """
             SELECT
@@ -372,7 +400,11 @@ class StaticIPAddressManager(Manager):
             + ttl_clause
             + """ AS ttl,
                 staticip.ip,
-                dnsrr.id AS dnsresource_id
+                dnsrr.id AS dnsresource_id,
+                dnsrr.fqdn IS NOT NULL AS has_dnsresource,
+                ARRAY[
+                    dnsrr.dom2_id, node.dom2_id,
+                    dnsrr.domain_id, node.domain_id] AS domain_ids
             FROM
                 maasserver_staticipaddress AS staticip
             LEFT JOIN (
@@ -433,49 +465,43 @@ class StaticIPAddressManager(Manager):
                 """
         )
 
+        default_domain = Domain.objects.get_default_domain()
         query_parms = []
-        if isinstance(domain, Domain):
-            if domain.is_default():
-                # The default domain is extra special, since it needs to have
-                # A/AAAA RRs for any USER_RESERVED addresses that have no name
-                # otherwise attached to them.
-                # We need to get all of the entries that are:
-                # - in this domain and have a dnsrr associated, OR
-                # - are USER_RESERVED and have NO fqdn associated at all.
-                sql_query += """ ((
-                        staticip.alloc_type = %s AND
-                        dnsrr.fqdn IS NULL AND
-                        node.fqdn IS NULL
-                    ) OR (
-                        dnsrr.fqdn IS NOT NULL AND
-                        (
-                            dnsrr.dom2_id = %s OR
-                            node.dom2_id = %s OR
-                            dnsrr.domain_id = %s OR
-                            node.domain_id = %s)))"""
-                query_parms += [IPADDRESS_TYPE.USER_RESERVED]
-            else:
-                # For domains, we only need answers for the domain we were
-                # given.  These can can possibly come from either the child or
-                # the parent for glue.  Anything with a node associated will be
-                # found inside of get_hostname_ip_mapping() - we need any
-                # entries that are:
-                # - in this domain and have a dnsrr associated.
-                sql_query += """ (
+        if domains is not None:
+            domain_ids = [domain.id for domain in domains]
+            # For domains, we only need answers for the domains we were
+            # given.  These can can possibly come from either the child or
+            # the parent for glue.  Anything with a node associated will be
+            # found inside of get_hostname_ip_mapping() - we need any
+            # entries that are:
+            # - in one of these domains and have a dnsrr associated.
+            # The default domain is extra special, since it needs to have
+            # A/AAAA RRs for any USER_RESERVED addresses that have no name
+            # otherwise attached to them, so we also get all of the entries
+            # that are USER_RESERVED and have NO fqdn associated at all.
+            sql_query += """ ((
+                    staticip.alloc_type = %s AND
+                    dnsrr.fqdn IS NULL AND
+                    node.fqdn IS NULL
+                ) OR (
                     dnsrr.fqdn IS NOT NULL AND
                     (
-                        dnsrr.dom2_id = %s OR
-                        node.dom2_id = %s OR
-                        dnsrr.domain_id = %s OR
-                        node.domain_id = %s))"""
-            query_parms += [domain.id, domain.id, domain.id, domain.id]
+                        dnsrr.dom2_id = ANY(%s) OR
+                        node.dom2_id = ANY(%s) OR
+                        dnsrr.domain_id = ANY(%s) OR
+                        node.domain_id = ANY(%s))))"""
+            query_parms += [IPADDRESS_TYPE.USER_RESERVED]
+            query_parms += [domain_ids, domain_ids, domain_ids, domain_ids]
+            mappings = {
+                domain_id: defaultdict(HostnameIPMapping)
+                for domain_id in domain_ids
+            }
         else:
             # In the subnet map, addresses attached to nodes only map back to
             # the node, since some things don't like multiple PTR RRs in
             # answers from the DNS.
             # Since that is handled in get_hostname_ip_mapping, we exclude
             # anything where the node also has a link to the address.
-            domain = None
             sql_query += """ ((
                     node.fqdn IS NULL AND dnsrr.fqdn IS NOT NULL
                 ) OR (
@@ -483,13 +509,21 @@ class StaticIPAddressManager(Manager):
                     dnsrr.fqdn IS NULL AND
                     node.fqdn IS NULL))"""
             query_parms += [IPADDRESS_TYPE.USER_RESERVED]
+            mappings = {None: defaultdict(HostnameIPMapping)}
 
-        default_domain = Domain.objects.get_default_domain()
-        mapping = defaultdict(HostnameIPMapping)
         cursor = connection.cursor()
         cursor.execute(sql_query, query_parms)
         for result in cursor.fetchall():
             result = SpecialMappingQueryResult(*result)
+            if domains is None:
+                targets = [None]
+            elif result.has_dnsresource:
+                targets = set(result.domain_ids).intersection(mappings)
+            elif default_domain.id in mappings:
+                # A USER_RESERVED address without a name.
+                targets = [default_domain.id]
+            else:
+                continue
             if result.fqdn is None or result.fqdn == "":
                 fqdn = "%s.%s" % (
                     get_ip_based_hostname(result.ip),
@@ -497,22 +531,23 @@ class StaticIPAddressManager(Manager):
                 )
             else:
                 fqdn = result.fqdn
-            # It is possible that there are both Node and DNSResource entries
-            # for this fqdn.  If we have any system_id, preserve it.  Ditto for
-            # TTL.  It is left as an exercise for the admin to make sure that
-            # the any non-default TTL applied to the Node and DNSResource are
-            # equal.
-            entry = mapping[fqdn]
-            if result.system_id is not None:
-                entry.node_type = result.node_type
-                entry.system_id = result.system_id
-            if result.ttl is not None:
-                entry.ttl = result.ttl
-            if result.user_id is not None:
-                entry.user_id = result.user_id
-            entry.ips.add(result.ip)
-            entry.dnsresource_id = result.dnsresource_id
-        return mapping
+            for target in targets:
+                # It is possible that there are both Node and DNSResource
+                # entries for this fqdn.  If we have any system_id, preserve
+                # it.  Ditto for TTL.  It is left as an exercise for the admin
+                # to make sure that the any non-default TTL applied to the
+                # Node and DNSResource are equal.
+                entry = mappings[target][fqdn]
+                if result.system_id is not None:
+                    entry.node_type = result.node_type
+                    entry.system_id = result.system_id
+                if result.ttl is not None:
+                    entry.ttl = result.ttl
+                if result.user_id is not None:
+                    entry.user_id = result.user_id
+                entry.ips.add(result.ip)
+                entry.dnsresource_id = result.dnsresource_id
+        return mappings
 
     def get_hostname_ip_mapping(self, domain_or_subnet, raw_ttl=False):
         """Return hostname mappings for `StaticIPAddress` entries.
@@ -526,6 +561,34 @@ class StaticIPAddressManager(Manager):
 
         The returned name is an FQDN (no trailing dot.)
         """
+        if isinstance(domain_or_subnet, Domain):
+            return self.get_hostname_ip_mapping_for_domains(
+                [domain_or_subnet], raw_ttl
+            )[domain_or_subnet]
+        return self._get_hostname_ip_mappings(None, raw_ttl)[None]
+
+    def get_hostname_ip_mapping_for_domains(self, domains, raw_ttl=False):
+        """Return hostname mappings for many domains at once.
+
+        This is the same as calling `get_hostname_ip_mapping` for each of the
+        `domains`, but issues a fixed number of queries and splits the results
+        between the domains in memory.
+
+        :return: a dict of domain: (default) dict of hostname:
+            HostnameIPMapping entries.
+        """
+        domains = list(domains)
+        if len(domains) == 0:
+            return {}
+        mappings = self._get_hostname_ip_mappings(domains, raw_ttl)
+        return {domain: mappings[domain.id] for domain in domains}
+
+    def _get_hostname_ip_mappings(self, domains, raw_ttl=False):
+        """Return hostname mappings keyed by domain id.
+
+        :param domains: The domains to return mappings for, or None to return
+            the mappings used for reverse zones (keyed by None).
+        """
         cursor = connection.cursor()
 
         # DISTINCT ON returns the first matching row for any given
@@ -543,6 +606,24 @@ class StaticIPAddressManager(Manager):
                     %s)"""
                 % default_ttl
             )
+        if domains is not None:
+            # The model has nodes in the parent domain, but they actually live
+            # in the child domain.  And the parent needs the glue.  So we
+            # return such nodes addresses in _BOTH_ the parent and the child
+            # domains. domain2.id will be non-null if this host's fqdn is the
+            # name of a domain in MAAS.
+            domain_ids = [domain.id for domain in domains]
+            domain_clause = """
+                (domain2.id = ANY(%s) OR node.domain_id = ANY(%s)) AND
+            """
+            query_parms = [domain_ids, domain_ids]
+        else:
+            # For subnets, we need ALL the names, so that we can correctly
+            # identify which ones should have the FQDN.  dns/zonegenerator.py
+            # optimizes based on this, and only calls once with a subnet,
+            # expecting to get all the subnets back in one table.
+            domain_clause = ""
+            query_parms = []
         sql_query = (
             """
             SELECT DISTINCT ON (fqdn, is_boot, family)
@@ -579,7 +660,9 @@ class StaticIPAddressManager(Manager):
                     WHEN interface.type = 'unknown' THEN 9
                     ELSE 10
                 END AS preference,
-                family(staticip.ip) AS family
+                family(staticip.ip) AS family,
+                node.domain_id,
+                domain2.id
             FROM
                 maasserver_interface AS interface
             LEFT OUTER JOIN maasserver_interfacerelationship AS rel ON
@@ -598,33 +681,14 @@ class StaticIPAddressManager(Manager):
                 link.interface_id = interface.id
             JOIN maasserver_staticipaddress AS staticip ON
                 staticip.id = link.staticipaddress_id
-            """
-        )
-        if isinstance(domain_or_subnet, Domain):
-            # The model has nodes in the parent domain, but they actually live
-            # in the child domain.  And the parent needs the glue.  So we
-            # return such nodes addresses in _BOTH_ the parent and the child
-            # domains. domain2.name will be non-null if this host's fqdn is the
-            # name of a domain in MAAS.
-            sql_query += """
             LEFT JOIN maasserver_domain AS domain2 ON
                 /* Pick up another copy of domain looking for instances of
                  * nodes a the top of a domain.
                  */ domain2.name = CONCAT(node.hostname, '.', domain.name)
             WHERE
-                (domain2.id = %s OR node.domain_id = %s) AND
             """
-            query_parms = [domain_or_subnet.id, domain_or_subnet.id]
-        else:
-            # For subnets, we need ALL the names, so that we can correctly
-            # identify which ones should have the FQDN.  dns/zonegenerator.py
-            # optimizes based on this, and only calls once with a subnet,
-            # expecting to get all the subnets back in one table.
-            sql_query += """
-            WHERE
-            """
-            query_parms = []
-        sql_query += """
+            + domain_clause
+            + """
                 staticip.ip IS NOT NULL AND
                 host(staticip.ip) != '' AND
                 staticip.temp_expires_on IS NULL
@@ -653,6 +717,7 @@ class StaticIPAddressManager(Manager):
                 interface.id,
                 inet 'fc00::/7' >> ip /* ULA after non-ULA */
             """
+        )
         iface_sql_query = (
             """
             SELECT
@@ -665,7 +730,9 @@ class StaticIPAddressManager(Manager):
             + """ AS ttl,
                 staticip.ip,
                 interface.name,
-                alloc_type != 6 /* DISCOVERED */ AS assigned
+                alloc_type != 6 /* DISCOVERED */ AS assigned,
+                node.domain_id,
+                domain2.id
             FROM
                 maasserver_interface AS interface
             JOIN maasserver_node AS node ON
@@ -676,29 +743,16 @@ class StaticIPAddressManager(Manager):
                 link.interface_id = interface.id
             JOIN maasserver_staticipaddress AS staticip ON
                 staticip.id = link.staticipaddress_id
-            """
-        )
-        if isinstance(domain_or_subnet, Domain):
-            # This logic is similar to the logic in sql_query above.
-            iface_sql_query += """
             LEFT JOIN maasserver_domain AS domain2 ON
                 /* Pick up another copy of domain looking for instances of
                  * the name as the top of a domain.
                  */
                 domain2.name = CONCAT(
                     interface.name, '.', node.hostname, '.', domain.name)
-            WHERE
-                (domain2.id = %s OR node.domain_id = %s) AND
-            """
-        else:
-            # For subnets, we need ALL the names, so that we can correctly
-            # identify which ones should have the FQDN.  dns/zonegenerator.py
-            # optimizes based on this, and only calls once with a subnet,
-            # expecting to get all the subnets back in one table.
-            iface_sql_query += """
             WHERE
             """
-        iface_sql_query += """
+            + domain_clause
+            + """
                 staticip.ip IS NOT NULL AND
                 host(staticip.ip) != '' AND
                 staticip.temp_expires_on IS NULL
@@ -707,15 +761,27 @@ class StaticIPAddressManager(Manager):
                 assigned DESC, /* Return all assigned IPs for a node first. */
                 interface.id
             """
+        )
+
+        def get_targets(result):
+            # Work out which of the mappings a row belongs to.  This is the
+            # same as the domain_clause above, applied to each domain.
+            if domains is None:
+                return [None]
+            return {result.domain_id, result.domain2_id}.intersection(mappings)
+
         # We get user reserved et al mappings first, so that we can overwrite
         # TTL as we process the return from the SQL horror above.
-        mapping = self._get_special_mappings(domain_or_subnet, raw_ttl)
+        mappings = self._get_special_mappings_for_domains(domains, raw_ttl)
         # All of the mappings that we got mean that we will only want to add
         # addresses for the boot interface (is_boot == True).
-        iface_is_boot = defaultdict(
-            bool, {hostname: True for hostname in mapping.keys()}
-        )
-        assigned_ips = defaultdict(bool)
+        iface_is_boot = {
+            target: defaultdict(
+                bool, {hostname: True for hostname in mapping.keys()}
+            )
+            for target, mapping in mappings.items()
+        }
+        assigned_ips = {target: defaultdict(bool) for target in mappings}
         cursor.execute(sql_query, query_parms)
         # The records from the query provide, for each hostname (after
         # stripping domain), the boot and non-boot interface ip address in ipv4
@@ -725,37 +791,42 @@ class StaticIPAddressManager(Manager):
         # interface IPs.  See Bug#1584850
         for result in cursor.fetchall():
             result = MappingQueryResult(*result)
-            entry = mapping[result.fqdn]
-            entry.node_type = result.node_type
-            entry.system_id = result.system_id
-            if result.user_id is not None:
-                entry.user_id = result.user_id
-            entry.ttl = result.ttl
-            if result.is_boot:
-                iface_is_boot[result.fqdn] = True
-            # If we have an IP on the right interface type, save it.
-            if result.is_boot == iface_is_boot[result.fqdn]:
-                entry.ips.add(result.ip)
+            for target in get_targets(result):
+                entry = mappings[target][result.fqdn]
+                entry.node_type = result.node_type
+                entry.system_id = result.system_id
+                if result.user_id is not None:
+                    entry.user_id = result.user_id
+                entry.ttl = result.ttl
+                if result.is_boot:
+                    iface_is_boot[target][result.fqdn] = True
+                # If we have an IP on the right interface type, save it.
+                if result.is_boot == iface_is_boot[target][result.fqdn]:
+                    entry.ips.add(result.ip)
         # Next, get all the addresses, on all the interfaces, and add the ones
         # that are not already present on the FQDN as $IFACE.$FQDN.  Exclude
         # any discovered addresses once there are any non-discovered addresses.
         cursor.execute(iface_sql_query, query_parms)
         for result in cursor.fetchall():
             result = InterfaceMappingResult(*result)
-            if result.assigned:
-                assigned_ips[result.fqdn] = True
-            # If this is an assigned IP, or there are NO assigned IPs on the
-            # node, then consider adding the IP.
-            if result.assigned or not assigned_ips[result.fqdn]:
-                if result.ip not in mapping[result.fqdn].ips:
-                    entry = mapping["%s.%s" % (result.iface_name, result.fqdn)]
-                    entry.node_type = result.node_type
-                    entry.system_id = result.system_id
-                    if result.user_id is not None:
-                        entry.user_id = result.user_id
-                    entry.ttl = result.ttl
-                    entry.ips.add(result.ip)
-        return mapping
+            for target in get_targets(result):
+                mapping = mappings[target]
+                if result.assigned:
+                    assigned_ips[target][result.fqdn] = True
+                # If this is an assigned IP, or there are NO assigned IPs on
+                # the node, then consider adding the IP.
+                if result.assigned or not assigned_ips[target][result.fqdn]:
+                    if result.ip not in mapping[result.fqdn].ips:
+                        entry = mapping[
+                            "%s.%s" % (result.iface_name, result.fqdn)
+                        ]
+                        entry.node_type = result.node_type
+                        entry.system_id = result.system_id
+                        if result.user_id is not None:
+                            entry.user_id = result.user_id
+                        entry.ttl = result.ttl
+                        entry.ips.add(result.ip)
+        return mappings
 
     def filter_by_ip_family(self, family):
         possible_families = map_enum_reverse(IPADDRESS_FAMILY)
@@ -5,6 +5,7 @@
 
 
 from operator import attrgetter
+import threading
 from typing import Iterable, Optional
 
 from django.contrib.postgres.fields import ArrayField
@@ -40,7 +41,7 @@ from maasserver.fields import CIDRField
 from maasserver.models.cleansave import CleanSave
 from maasserver.models.staticroute import StaticRoute
 from maasserver.models.timestampedmodel import TimestampedModel
-from maasserver.utils.orm import MAASQueriesMixin
+from maasserver.utils.orm import MAASQueriesMixin, post_commit
 from provisioningserver.logger import get_maas_logger
 from provisioningserver.utils.network import (
     IPRangeStatistics,
@@ -93,6 +94,130 @@ def create_cidr(network, subnet_mask=None):
     return str(cidr)
 
 
+class SubnetIndex:
+    """A process-local index of all subnets, for longest-prefix matching.
+
+    This answers `get_best_subnet_for_ip` from memory. It is only used once
+    it has been enabled, by a service that also arranges for `invalidate` to
+    be called when subnets or VLANs change in the database.
+
+    Changes made by this process are noticed too, through `local_change`.
+    Until the transaction that made them ends, the thread that made them
+    does not use the index, so that it neither sees a stale index nor builds
+    one from changes that may yet be rolled back.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._generation = 0
+        self._fields = None
+        self._index = None
+
+    def enable(self):
+        self.enabled = True
+        self.invalidate()
+
+    def disable(self):
+        self.enabled = False
+        self.invalidate()
+
+    def invalidate(self, *args):
+        """Forget the index; it will be built again when next needed.
+
+        Arguments are ignored, so that this can be used directly as a handler
+        for notifications.
+        """
+        with self._lock:
+            self._generation += 1
+            self._index = None
+
+    def local_change(self):
+        """Note that this thread has changed subnets or VLANs."""
+        if not self.enabled:
+            return
+        self.invalidate()
+        if not getattr(self._local, "changed", False):
+            self._local.changed = True
+            post_commit(self._local_change_ended)
+
+    def _local_change_ended(self, result):
+        self._local.changed = False
+        self.invalidate()
+        # Don't propagate failures (e.g. cancellation on rollback).
+        return None
+
+    def _build(self):
+        """Return a new index of all subnets.
+
+        The index maps an IP address family to a list of `(prefixlen,
+        {network: (dhcp_on, values)})` in descending order of prefixlen, where
+        `network` is the integer value of the network address shifted right
+        past its host bits.
+        """
+        fields = [field.attname for field in Subnet._meta.concrete_fields]
+        cidr_index = fields.index("cidr")
+        by_prefixlen = {}
+        for row in Subnet.objects.values_list(*fields, "vlan__dhcp_on"):
+            values, dhcp_on = row[:-1], row[-1]
+            network = IPNetwork(values[cidr_index])
+            if network.prefixlen == network._module.width:
+                # The query uses `<<`, so addresses never match host routes.
+                continue
+            key = network.value >> (network._module.width - network.prefixlen)
+            by_prefixlen.setdefault((network.version, network.prefixlen), {})[
+                key
+            ] = (dhcp_on, values)
+        index = {}
+        for (version, prefixlen), networks in sorted(
+            by_prefixlen.items(), reverse=True
+        ):
+            index.setdefault(version, []).append((prefixlen, networks))
+        return fields, index
+
+    def get_best_subnet_for_ip(self, ip):
+        """Find the best subnet for `ip`, as `get_best_subnet_for_ip` does.
+
+        :param ip: An `IPAddress`; not IPv4-mapped.
+        :return: A `Subnet`, None if there is none, or `NotImplemented` if the
+            index is not to be used by this thread.
+        """
+        if not self.enabled or getattr(self._local, "changed", False):
+            return NotImplemented
+        with self._lock:
+            fields, index, generation = (
+                self._fields,
+                self._index,
+                self._generation,
+            )
+        if index is None:
+            fields, index = self._build()
+            with self._lock:
+                # Only keep the index if nothing changed while building it.
+                if generation == self._generation:
+                    self._fields, self._index = fields, index
+        best = None
+        width = ip._module.width
+        for prefixlen, networks in index.get(ip.version, ()):
+            found = networks.get(ip.value >> (width - prefixlen))
+            if found is not None:
+                dhcp_on, values = found
+                if dhcp_on:
+                    # Subnets on a managed VLAN are preferred; this is the
+                    # most specific of those.
+                    best = values
+                    break
+                elif best is None:
+                    best = values
+        if best is None:
+            return None
+        return Subnet.from_db("default", fields, best)
+
+
+subnet_index = SubnetIndex()
+
+
 class SubnetQueriesMixin(MAASQueriesMixin):
 
     find_subnets_with_ip_query = """
@@ -140,6 +265,9 @@ class SubnetQueriesMixin(MAASQueriesMixin):
         ip = IPAddress(ip)
         if ip.is_ipv4_mapped():
             ip = ip.ipv4()
+        subnet = subnet_index.get_best_subnet_for_ip(ip)
+        if subnet is not NotImplemented:
+            return subnet
         subnets = self.raw(
             self.find_best_subnet_for_ip_query, params=[str(ip)]
         )
@@ -149,6 +277,53 @@ class SubnetQueriesMixin(MAASQueriesMixin):
         else:
             return None
 
+    # The same as find_best_subnet_for_ip_query, but for many IP addresses at
+    # once.  DISTINCT ON picks the first subnet for each address.
+    find_best_subnets_for_ips_query = """
+        SELECT DISTINCT ON (address.ip)
+            subnet.*,
+            host(address.ip) "for_ip",
+            masklen(subnet.cidr) "prefixlen",
+            vlan.dhcp_on "dhcp_on"
+        FROM unnest(%s::inet[]) AS address(ip)
+        INNER JOIN maasserver_subnet AS subnet
+            ON address.ip << subnet.cidr
+        INNER JOIN maasserver_vlan AS vlan
+            ON subnet.vlan_id = vlan.id
+        ORDER BY
+            address.ip,
+            dhcp_on DESC,
+            prefixlen DESC
+        """
+
+    def get_best_subnets_for_ips(self, ips):
+        """Find the most-specific managed Subnet for each of `ips`.
+
+        This is the same as calling `get_best_subnet_for_ip` for each of
+        `ips`, but with a single query.
+
+        :return: a dict of IP address (as given) to Subnet; addresses that do
+            not belong to any subnet are left out.
+        """
+        addresses = {}
+        for ip in ips:
+            address = IPAddress(ip)
+            if address.is_ipv4_mapped():
+                address = address.ipv4()
+            addresses[ip] = address
+        if len(addresses) == 0:
+            return {}
+        subnets = self.raw(
+            self.find_best_subnets_for_ips_query,
+            params=[sorted({str(address) for address in addresses.values()})],
+        )
+        best_subnets = {IPAddress(subnet.for_ip): subnet for subnet in subnets}
+        return {
+            ip: best_subnets[address]
+            for ip, address in addresses.items()
+            if address in best_subnets
+        }
+
     def validate_filter_specifiers(self, specifiers):
         """Validate the given filter string."""
         try:
@@ -341,6 +341,32 @@ class TestDNSDataMapping(MAASServerTestCase):
         actual_parent = DNSData.objects.get_hostname_dnsdata_mapping(parent)
         self.assertEqual(expected_parent, actual_parent)
 
+    def test_get_hostname_dnsdata_mapping_for_domains_matches_single(self):
+        parent = Domain.objects.get_default_domain()
+        name = factory.make_name("node")
+        domain = factory.make_Domain(name="%s.%s" % (name, parent.name))
+        other = factory.make_Domain()
+        dnsrr = factory.make_DNSResource(
+            name="@", domain=domain, no_ip_addresses=True
+        )
+        factory.make_DNSData(dnsresource=dnsrr, ip_addresses=True)
+        factory.make_Node_with_Interface_on_Subnet(
+            hostname=name, domain=parent
+        )
+        factory.make_DNSData(domain=parent)
+        factory.make_DNSData(domain=other, rrtype="CNAME")
+        domains = [parent, domain, other]
+        mappings = DNSData.objects.get_hostname_dnsdata_mapping_for_domains(
+            domains
+        )
+        self.assertEqual(
+            {
+                dom: DNSData.objects.get_hostname_dnsdata_mapping(dom)
+                for dom in domains
+            },
+            mappings,
+        )
+
     def test_get_hostname_dnsdata_mapping_handles_ttl(self):
         # We create 2 domains, one with a ttl, one withoout.
         # Within each domain, create an RRset with and without ttl.
@@ -143,6 +143,15 @@ class TestLargeFile(MAASServerTestCase):
             MockCalledOnceWith(largefile.content),
         )
 
+    def test_discards_cached_content(self):
+        largefile_cache = self.patch(signals.largefiles, "largefile_cache")
+        largefile = factory.make_LargeFile()
+        self.addCleanup(largefile.content.unlink)
+        with post_commit_hooks:
+            largefile.delete()
+            largefile_cache.discard.assert_not_called()
+        largefile_cache.discard.assert_called_once_with(largefile.sha256)
+
     def test_deletes_content_asynchronously_for_queries_too(self):
         self.patch(signals.largefiles, "delete_large_object_content_later")
         for _ in 1, 2:
@@ -0,0 +1,98 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for `maasserver.models.nodedetailscache`."""
+
+
+from lxml import etree
+
+from maasserver.models import NodeDetailsCache
+from maasserver.models import nodedetailscache as nodedetailscache_module
+from maasserver.testing.factory import factory
+from maasserver.testing.testcase import MAASServerTestCase
+from maasserver.utils.orm import reload_object
+from metadataserver.enum import RESULT_TYPE, SCRIPT_STATUS
+from provisioningserver.refresh.node_info_scripts import LSHW_OUTPUT_NAME
+from provisioningserver.tags import merge_details
+
+
+class TestNodeDetailsCacheManager(MAASServerTestCase):
+    def make_node_with_lshw(self, stdout):
+        node = factory.make_Node()
+        script_set = factory.make_ScriptSet(
+            node=node, result_type=RESULT_TYPE.COMMISSIONING
+        )
+        node.current_commissioning_script_set = script_set
+        node.save()
+        script_result = factory.make_ScriptResult(
+            script_set=script_set,
+            script_name=LSHW_OUTPUT_NAME,
+            exit_status=0,
+            status=SCRIPT_STATUS.PASSED,
+            stdout=stdout,
+        )
+        return node, script_result
+
+    def test_refresh_caches_merged_details(self):
+        node, _ = self.make_node_with_lshw(b"<foo/>")
+        caches = NodeDetailsCache.objects.refresh([node])
+        self.assertEqual([node.id], list(caches))
+        cache = reload_object(caches[node.id])
+        self.assertEqual(1, cache.version)
+        self.assertEqual(0, cache.tags_version)
+        self.assertEqual(
+            etree.tostring(merge_details({"lshw": b"<foo/>", "lldp": None})),
+            etree.tostring(cache.get_document()),
+        )
+
+    def test_refresh_caches_nodes_without_details(self):
+        node = factory.make_Node()
+        caches = NodeDetailsCache.objects.refresh([node])
+        self.assertEqual(1, caches[node.id].version)
+        self.assertEqual([], caches[node.id].get_document().xpath("/list/*"))
+
+    def test_refresh_reuses_unchanged_details(self):
+        node, _ = self.make_node_with_lshw(b"<foo/>")
+        NodeDetailsCache.objects.refresh([node])
+        merge_details = self.patch(nodedetailscache_module, "merge_details")
+        cache = NodeDetailsCache.objects.refresh([node])[node.id]
+        self.assertEqual(1, cache.version)
+        self.assertEqual(0, merge_details.call_count)
+
+    def test_refresh_merges_changed_details(self):
+        node, script_result = self.make_node_with_lshw(b"<foo/>")
+        NodeDetailsCache.objects.refresh([node])
+        script_result.stdout = b"<bar/>"
+        script_result.save()
+        cache = NodeDetailsCache.objects.refresh([node])[node.id]
+        self.assertEqual(2, cache.version)
+        self.assertEqual("bar", cache.get_document().getroot().tag)
+        self.assertEqual(2, reload_object(cache).version)
+
+    def test_refresh_without_documents_only_updates_versions(self):
+        node, script_result = self.make_node_with_lshw(b"<foo/>")
+        NodeDetailsCache.objects.refresh([node])
+        script_result.stdout = b"<bar/>"
+        script_result.save()
+        merge_details = self.patch(nodedetailscache_module, "merge_details")
+        caches = NodeDetailsCache.objects.refresh([node], documents=False)
+        self.assertEqual(2, caches[node.id].version)
+        self.assertIsNone(reload_object(caches[node.id]).document)
+        self.assertEqual(0, merge_details.call_count)
+
+    def test_refresh_merges_documents_left_unmerged(self):
+        node, _ = self.make_node_with_lshw(b"<foo/>")
+        NodeDetailsCache.objects.refresh([node], documents=False)
+        cache = NodeDetailsCache.objects.refresh([node])[node.id]
+        self.assertEqual(1, cache.version)
+        self.assertEqual("foo", cache.get_document().getroot().tag)
+        self.assertIsNotNone(reload_object(cache).document)
+
+    def test_refresh_without_nodes(self):
+        self.assertEqual({}, NodeDetailsCache.objects.refresh([]))
+
+    def test_cache_is_deleted_with_node(self):
+        node, _ = self.make_node_with_lshw(b"<foo/>")
+        NodeDetailsCache.objects.refresh([node])
+        node.delete()
+        self.assertFalse(NodeDetailsCache.objects.exists())
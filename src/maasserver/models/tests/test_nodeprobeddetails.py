@@ -6,6 +6,7 @@
 
 from maasserver.models.nodeprobeddetails import (
     get_probed_details,
+    get_probed_details_digests,
     get_single_probed_details,
     script_output_nsmap,
 )
@@ -101,3 +102,43 @@ class TestNodeDetail(MAASServerTestCase):
             # returned by get_probed_details.
             self.make_script_set_and_results(node, "new")
         self.assertDictEqual(expected, get_probed_details(nodes))
+
+    def test_get_probed_details_digests(self):
+        nodes = [factory.make_Node() for _ in range(2)]
+        for node, suffix in zip(nodes, ("one", "two")):
+            script_set, _ = self.make_script_set_and_results(node, suffix)
+            node.current_commissioning_script_set = script_set
+            node.save()
+        without_details = factory.make_Node()
+        digests = get_probed_details_digests(nodes + [without_details])
+        self.assertCountEqual(
+            [node.id for node in nodes + [without_details]], digests
+        )
+        self.assertEqual(3, len(set(digests.values())))
+        self.assertEqual(digests, get_probed_details_digests(nodes))
+
+    def test_get_probed_details_digests_changes_with_details(self):
+        node = factory.make_Node(with_empty_script_sets=True)
+        script_result = (
+            node.current_commissioning_script_set.find_script_result(
+                script_name=LSHW_OUTPUT_NAME
+            )
+        )
+        script_result.store_result(exit_status=0, stdout=b"<lshw-data/>")
+        [before] = get_probed_details_digests([node]).values()
+        script_result.stdout = b"<lshw-changed/>"
+        script_result.save()
+        [after] = get_probed_details_digests([node]).values()
+        self.assertNotEqual(before, after)
+
+    def test_get_probed_details_digests_ignores_old_results(self):
+        node = factory.make_Node()
+        script_set, _ = self.make_script_set_and_results(node)
+        node.current_commissioning_script_set = script_set
+        node.save()
+        [before] = get_probed_details_digests([node]).values()
+        self.make_script_set_and_results(node, "new")
+        self.assertEqual({node.id: before}, get_probed_details_digests([node]))
+
+    def test_get_probed_details_digests_without_nodes(self):
+        self.assertEqual({}, get_probed_details_digests([]))
@@ -1184,6 +1184,42 @@ class TestStaticIPAddressManagerMapping(MAASServerTestCase):
             mapping,
         )
 
+    def test_get_hostname_ip_mapping_for_domains_matches_single_domain(self):
+        default_domain = Domain.objects.get_default_domain()
+        parent = factory.make_Domain()
+        name = factory.make_name()
+        child = factory.make_Domain(name="%s.%s" % (name, parent.name))
+        other = factory.make_Domain()
+        subnet = factory.make_Subnet()
+        node = factory.make_Node_with_Interface_on_Subnet(
+            subnet=subnet, domain=parent, hostname=name
+        )
+        sip = factory.make_StaticIPAddress(subnet=subnet)
+        node.interface_set.first().ip_addresses.add(sip)
+        factory.make_Node_with_Interface_on_Subnet(
+            subnet=subnet, domain=default_domain
+        )
+        factory.make_DNSResource(domain=other)
+        factory.make_StaticIPAddress(
+            alloc_type=IPADDRESS_TYPE.USER_RESERVED, subnet=subnet
+        )
+        domains = [default_domain, parent, child, other]
+        mappings = StaticIPAddress.objects.get_hostname_ip_mapping_for_domains(
+            domains
+        )
+        self.assertEqual(
+            {
+                domain: StaticIPAddress.objects.get_hostname_ip_mapping(domain)
+                for domain in domains
+            },
+            mappings,
+        )
+
+    def test_get_hostname_ip_mapping_for_domains_returns_empty_for_none(self):
+        self.assertEqual(
+            {}, StaticIPAddress.objects.get_hostname_ip_mapping_for_domains([])
+        )
+
     def test_get_hostname_ip_mapping_does_not_return_discovered_and_auto(self):
         # Create a situation where we have an AUTO ip on the pxeboot interface,
         # and a discovered IP of the other address family (v4/v6) on another
@@ -31,7 +31,13 @@ from maasserver.enum import (
 )
 from maasserver.exceptions import StaticIPAddressExhaustion
 from maasserver.models import Config, Notification, Space
-from maasserver.models.subnet import create_cidr, get_allocated_ips, Subnet
+from maasserver.models import subnet as subnet_module
+from maasserver.models.subnet import (
+    create_cidr,
+    get_allocated_ips,
+    Subnet,
+    SubnetIndex,
+)
 from maasserver.models.timestampedmodel import now
 from maasserver.permissions import NodePermission
 from maasserver.testing.factory import factory, RANDOM, RANDOM_OR_NONE
@@ -825,6 +831,151 @@ class TestGetBestSubnetForIP(MAASServerTestCase):
         self.expectThat(subnet, Is(None))
 
 
+class TestSubnetIndex(MAASServerTestCase):
+    def make_index(self):
+        index = SubnetIndex()
+        index.enable()
+        return index
+
+    def test_not_used_until_enabled(self):
+        factory.make_Subnet(cidr="10.0.0.0/8")
+        index = SubnetIndex()
+        self.assertIs(
+            NotImplemented, index.get_best_subnet_for_ip(IPAddress("10.1.1.1"))
+        )
+
+    def test_returns_most_specific_subnet(self):
+        factory.make_Subnet(cidr="10.0.0.0/8")
+        expected_subnet = factory.make_Subnet(cidr="10.1.1.0/24")
+        factory.make_Subnet(cidr="10.1.0.0/16")
+        factory.make_Subnet(cidr="2001:db8:1:2::/64")
+        index = self.make_index()
+        subnet = index.get_best_subnet_for_ip(IPAddress("10.1.1.1"))
+        self.assertEqual(expected_subnet, subnet)
+        self.assertEqual(expected_subnet.cidr, subnet.cidr)
+        self.assertEqual(expected_subnet.vlan_id, subnet.vlan_id)
+
+    def test_returns_most_specific_ipv6_subnet(self):
+        factory.make_Subnet(cidr="2001::/16")
+        expected_subnet = factory.make_Subnet(cidr="2001:db8:1:2::/64")
+        factory.make_Subnet(cidr="2001:db8::/32")
+        index = self.make_index()
+        self.assertEqual(
+            expected_subnet,
+            index.get_best_subnet_for_ip(IPAddress("2001:db8:1:2::1")),
+        )
+
+    def test_prefers_subnets_with_dhcp_on(self):
+        vlan = factory.make_VLAN(dhcp_on=True)
+        expected_subnet = factory.make_Subnet(cidr="10.0.0.0/8", vlan=vlan)
+        factory.make_Subnet(cidr="10.1.1.0/24")
+        index = self.make_index()
+        self.assertEqual(
+            expected_subnet,
+            index.get_best_subnet_for_ip(IPAddress("10.1.1.1")),
+        )
+
+    def test_ignores_host_routes(self):
+        factory.make_Subnet(cidr="10.1.1.1/32")
+        index = self.make_index()
+        self.assertIsNone(index.get_best_subnet_for_ip(IPAddress("10.1.1.1")))
+
+    def test_returns_none_if_no_subnet_found(self):
+        factory.make_Subnet(cidr="10.0.0.0/8")
+        index = self.make_index()
+        self.assertIsNone(index.get_best_subnet_for_ip(IPAddress("::")))
+        self.assertIsNone(index.get_best_subnet_for_ip(IPAddress("11.0.0.1")))
+
+    def test_matches_query_for_random_subnets(self):
+        for _ in range(10):
+            factory.make_Subnet(
+                vlan=factory.make_VLAN(dhcp_on=factory.pick_bool())
+            )
+        ips = [
+            factory.pick_ip_in_Subnet(subnet)
+            for subnet in Subnet.objects.all()
+        ]
+        expected = {
+            ip: Subnet.objects.get_best_subnet_for_ip(ip) for ip in ips
+        }
+        index = self.make_index()
+        self.assertEqual(
+            expected,
+            {ip: index.get_best_subnet_for_ip(IPAddress(ip)) for ip in ips},
+        )
+
+    def test_does_not_query_once_built(self):
+        factory.make_Subnet(cidr="10.0.0.0/8")
+        index = self.make_index()
+        index.get_best_subnet_for_ip(IPAddress("10.1.1.1"))
+        count, _ = count_queries(
+            index.get_best_subnet_for_ip, IPAddress("10.1.1.1")
+        )
+        self.assertEqual(0, count)
+
+    def test_invalidate_rebuilds_index(self):
+        index = self.make_index()
+        self.assertIsNone(index.get_best_subnet_for_ip(IPAddress("10.1.1.1")))
+        subnet = factory.make_Subnet(cidr="10.0.0.0/8")
+        index.invalidate("create", subnet.id)
+        self.assertEqual(
+            subnet, index.get_best_subnet_for_ip(IPAddress("10.1.1.1"))
+        )
+
+    def test_local_change_bypasses_index_until_transaction_ends(self):
+        post_commit = self.patch(subnet_module, "post_commit")
+        index = self.make_index()
+        index.get_best_subnet_for_ip(IPAddress("10.1.1.1"))
+        index.local_change()
+        index.local_change()
+        self.assertIs(
+            NotImplemented, index.get_best_subnet_for_ip(IPAddress("10.1.1.1"))
+        )
+        # Only one hook is registered per transaction.
+        post_commit.assert_called_once_with(index._local_change_ended)
+        index._local_change_ended(None)
+        self.assertIsNone(index.get_best_subnet_for_ip(IPAddress("10.1.1.1")))
+
+    def test_local_change_ignored_when_disabled(self):
+        post_commit = self.patch(subnet_module, "post_commit")
+        index = SubnetIndex()
+        index.local_change()
+        post_commit.assert_not_called()
+
+    def test_get_best_subnet_for_ip_uses_index(self):
+        subnet = factory.make_Subnet(cidr="10.0.0.0/8")
+        index = self.make_index()
+        self.patch(subnet_module, "subnet_index", index)
+        index.get_best_subnet_for_ip(IPAddress("10.1.1.1"))
+        count, found = count_queries(
+            Subnet.objects.get_best_subnet_for_ip, "::ffff:10.1.1.1"
+        )
+        self.assertEqual(0, count)
+        self.assertEqual(subnet, found)
+
+
+class TestGetBestSubnetsForIPs(MAASServerTestCase):
+    def test_returns_most_specific_subnets(self):
+        factory.make_Subnet(cidr="10.0.0.0/8")
+        subnet_v4 = factory.make_Subnet(cidr="10.1.1.0/24")
+        factory.make_Subnet(cidr="10.1.0.0/16")
+        factory.make_Subnet(cidr="2001::/16")
+        subnet_v6 = factory.make_Subnet(cidr="2001:db8:1:2::/64")
+        self.assertEqual(
+            {
+                "10.1.1.1": subnet_v4,
+                "::ffff:10.1.1.2": subnet_v4,
+                "2001:db8:1:2::1": subnet_v6,
+            },
+            Subnet.objects.get_best_subnets_for_ips(
+                ["10.1.1.1", "::ffff:10.1.1.2", "2001:db8:1:2::1", "::"]
+            ),
+        )
+
+    def test_returns_empty_for_no_ips(self):
+        self.assertEqual({}, Subnet.objects.get_best_subnets_for_ips([]))
+
+
 class SubnetLabelTest(MAASServerTestCase):
     def test_returns_cidr_for_null_name(self):
         network = factory.make_ip4_or_6_network()
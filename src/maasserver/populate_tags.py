@@ -19,11 +19,8 @@ from twisted.internet.defer import DeferredList
 from apiclient.creds import convert_tuple_to_string
 from maasserver import logger
 from maasserver.models.node import Node, RackController
-from maasserver.models.nodeprobeddetails import (
-    get_probed_details,
-    get_single_probed_details,
-    script_output_nsmap,
-)
+from maasserver.models.nodedetailscache import NodeDetailsCache
+from maasserver.models.nodeprobeddetails import script_output_nsmap
 from maasserver.models.user import (
     create_auth_token,
     get_auth_tokens,
@@ -33,11 +30,7 @@ from maasserver.rpc import getAllClients
 from maasserver.utils.orm import in_transaction, transactional
 from provisioningserver.logger import get_maas_logger, LegacyLogger
 from provisioningserver.rpc.cluster import EvaluateTag
-from provisioningserver.tags import (
-    DEFAULT_BATCH_SIZE,
-    gen_batches,
-    merge_details,
-)
+from provisioningserver.tags import DEFAULT_BATCH_SIZE, gen_batches
 from provisioningserver.utils import classify
 from provisioningserver.utils.twisted import asynchronous, FOREVER, synchronous
 from provisioningserver.utils.xpath import try_match_xpath
@@ -100,14 +93,26 @@ def populate_tags(tag):
 
         return _populate_tag()
     else:
-        # Split the work between the connected rack controllers.
+        # Split the work between the connected rack controllers. Each rack
+        # controller is sent the version of each node's details, so that
+        # it only fetches details that have changed since it last had
+        # them. Nodes and clients are ordered so that each rack controller
+        # gets the same nodes each time, as long as they don't change.
         @transactional
         def _generate_work():
-            node_ids = Node.objects.all().values_list("system_id", flat=True)
-            node_ids = [{"system_id": node_id} for node_id in node_ids]
+            nodes = list(Node.objects.order_by("id").only("id", "system_id"))
+            caches = NodeDetailsCache.objects.refresh(nodes, documents=False)
+            node_ids = [
+                {
+                    "system_id": node.system_id,
+                    "details_version": caches[node.id].version,
+                }
+                for node in nodes
+            ]
             chunked_node_ids = list(chunk_list(node_ids, len(clients)))
             connected_racks = []
-            for idx, client in enumerate(clients):
+            ordered_clients = sorted(clients, key=lambda client: client.ident)
+            for idx, client in enumerate(ordered_clients):
                 rack = RackController.objects.get(system_id=client.ident)
                 token = _get_or_create_auth_token(rack.owner)
                 creds = convert_tuple_to_string(get_creds_tuple(token))
@@ -195,7 +200,7 @@ def _do_populate_tags(clients):
 
 
 @synchronous
-def populate_tags_for_single_node(tags, node):
+def populate_tags_for_single_node(tags, node, only_if_changed=False):
     """Reevaluate all tags for a single node.
 
     Presumably this node's details have recently changed. Use `populate_tags`
@@ -203,16 +208,26 @@ def populate_tags_for_single_node(tags, node):
     to which to farm-out work. Use `populate_tag_for_multiple_nodes` when many
     nodes need reevaluating locally, i.e. when there are no rack controllers
     connected.
+
+    :param only_if_changed: Skip the evaluation if the node's details haven't
+        changed since the tags were last evaluated this way. `tags` must be
+        all of the defined tags when this is set.
     """
-    probed_details = get_single_probed_details(node)
-    probed_details_doc = merge_details(probed_details)
+    [cache] = NodeDetailsCache.objects.refresh([node]).values()
+    if only_if_changed and cache.tags_version == cache.version:
+        return
     # Same document, many queries: use XPathEvaluator.
-    evaluator = etree.XPathEvaluator(probed_details_doc, namespaces=tag_nsmap)
+    evaluator = etree.XPathEvaluator(
+        cache.get_document(), namespaces=tag_nsmap
+    )
     evaluator = partial(try_match_xpath, doc=evaluator, logger=logger)
     tags_defined = ((tag, tag.definition) for tag in tags if tag.is_defined)
     tags_matching, tags_nonmatching = classify(evaluator, tags_defined)
     node.tags.remove(*tags_nonmatching)
     node.tags.add(*tags_matching)
+    if only_if_changed:
+        cache.tags_version = cache.version
+        cache.save()
 
 
 @synchronous
@@ -226,12 +241,13 @@ def populate_tag_for_multiple_nodes(tag, nodes, batch_size=DEFAULT_BATCH_SIZE):
     """
     # Same expression, multuple documents: compile expression with XPath.
     xpath = etree.XPath(tag.definition, namespaces=tag_nsmap)
-    # The XML details documents can be large so work in batches.
+    # The XML details documents can be large so work in batches. The
+    # details are cached, so they're only merged for nodes whose details
+    # have changed since they were last merged.
     for batch in gen_batches(nodes, batch_size):
-        probed_details = get_probed_details(batch)
+        caches = NodeDetailsCache.objects.refresh(batch)
         probed_details_docs_by_node = {
-            node: merge_details(probed_details[node.system_id])
-            for node in batch
+            node: caches[node.id].get_document() for node in batch
         }
         nodes_matching, nodes_nonmatching = classify(
             partial(try_match_xpath, xpath, logger=maaslog),
@@ -10,7 +10,8 @@ DNS:
     The regiond process listens for messages from Postgres on channel
     'sys_dns'. Any time a message is recieved on that channel the DNS is marked
     as requiring an update. Once marked for update the DNS configuration is
-    updated and bind9 is told to reload.
+    updated and bind9 is told to reload. After the first full publication only
+    the zones affected by newer publications are rewritten and reloaded.
 
 Proxy:
     The regiond process listens for messages from Postgres on channel
@@ -35,7 +36,7 @@ from twisted.internet.task import LoopingCall
 from twisted.names.client import Resolver
 
 from maasserver import locks
-from maasserver.dns.config import dns_update_all_zones
+from maasserver.dns.config import dns_update_all_zones, dns_update_dirty_zones
 from maasserver.macaroon_auth import get_auth_info
 from maasserver.models.config import Config
 from maasserver.models.dnspublication import DNSPublication
@@ -177,7 +178,12 @@ class RegionControllerService(Service):
         defers = []
         if self.needsDNSUpdate:
             self.needsDNSUpdate = False
-            d = deferToDatabase(transactional(dns_update_all_zones))
+            if self.previousSerial is None:
+                d = deferToDatabase(transactional(dns_update_all_zones))
+            else:
+                d = deferToDatabase(
+                    transactional(dns_update_dirty_zones), self.previousSerial
+                )
             d.addCallback(self._checkSerial)
             d.addCallback(self._logDNSReload)
             # Order here matters, first needsDNSUpdate is set then pass the
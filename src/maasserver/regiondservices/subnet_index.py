@@ -0,0 +1,40 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Subnet index service."""
+
+
+from twisted.application.service import Service
+
+from maasserver.listener import PostgresListenerService
+from maasserver.models.subnet import subnet_index
+
+
+class SubnetIndexService(Service):
+    """Service to keep the in-memory index of subnets up to date.
+
+    The index is used by `get_best_subnet_for_ip` only while this service is
+    running, since it relies on notifications from the database to know when
+    subnets or VLANs change.
+    """
+
+    channels = ("subnet", "vlan")
+
+    def __init__(self, postgresListener: PostgresListenerService = None):
+        super().__init__()
+        self.listener = postgresListener
+        self.index = subnet_index
+
+    def startService(self):
+        super().startService()
+        if self.listener is not None:
+            for channel in self.channels:
+                self.listener.register(channel, self.index.invalidate)
+            self.index.enable()
+
+    def stopService(self):
+        if self.listener is not None:
+            self.index.disable()
+            for channel in self.channels:
+                self.listener.unregister(channel, self.index.invalidate)
+        return super().stopService()
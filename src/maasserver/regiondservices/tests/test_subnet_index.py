@@ -0,0 +1,51 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for the subnet index service."""
+
+
+from unittest.mock import Mock
+
+from maasserver.models.subnet import SubnetIndex
+from maasserver.regiondservices.subnet_index import SubnetIndexService
+from maastesting.testcase import MAASTestCase
+
+
+class TestSubnetIndexService(MAASTestCase):
+    def make_service(self, listener):
+        service = SubnetIndexService(listener)
+        service.index = SubnetIndex()
+        return service
+
+    def test_start_enables_index_and_registers_channels(self):
+        listener = Mock()
+        service = self.make_service(listener)
+        service.startService()
+        self.assertTrue(service.index.enabled)
+        self.assertCountEqual(
+            [
+                (("subnet", service.index.invalidate),),
+                (("vlan", service.index.invalidate),),
+            ],
+            [call[:1] for call in listener.register.call_args_list],
+        )
+
+    def test_stop_disables_index_and_unregisters_channels(self):
+        listener = Mock()
+        service = self.make_service(listener)
+        service.startService()
+        service.stopService()
+        self.assertFalse(service.index.enabled)
+        self.assertCountEqual(
+            [
+                (("subnet", service.index.invalidate),),
+                (("vlan", service.index.invalidate),),
+            ],
+            [call[:1] for call in listener.unregister.call_args_list],
+        )
+
+    def test_index_not_enabled_without_listener(self):
+        service = self.make_service(None)
+        service.startService()
+        self.assertFalse(service.index.enabled)
+        service.stopService()
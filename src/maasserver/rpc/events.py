@@ -3,12 +3,16 @@
 
 """RPC helpers relating to events."""
 
+from datetime import timedelta
+
+from netaddr import AddrFormatError, EUI, IPAddress
 
 from maasserver.enum import INTERFACE_TYPE
 from maasserver.models import Event, EventType, Interface, Node
 from maasserver.utils.orm import transactional
 from provisioningserver.logger import LegacyLogger
 from provisioningserver.rpc.exceptions import NoSuchEventType
+from provisioningserver.utils.network import format_eui
 from provisioningserver.utils.twisted import synchronous
 
 log = LegacyLogger()
@@ -128,3 +132,112 @@ def send_event_ip_address(ip_address, type_name, description, timestamp):
             description=description,
             created=timestamp,
         )
+
+
+def _normalise(value, parse):
+    try:
+        return parse(value)
+    except (AddrFormatError, TypeError, ValueError):
+        return None
+
+
+def _normalise_mac(mac_address):
+    return _normalise(mac_address, lambda mac: format_eui(EUI(mac)))
+
+
+def _normalise_ip(ip_address):
+    return _normalise(ip_address, lambda ip: str(IPAddress(ip)))
+
+
+@synchronous
+@transactional
+def send_events(events, timestamp):
+    """Send a batch of events.
+
+    for :py:class:`~provisioningserver.rpc.region.SendEvents`.
+
+    The nodes of the events are found with one query for each of the ways
+    of identifying a node, and the events are all inserted together.
+    """
+    type_names = {event["type_name"] for event in events}
+    event_types = {
+        event_type.name: event_type
+        for event_type in EventType.objects.filter(name__in=type_names)
+    }
+    missing_types = type_names.difference(event_types)
+    if missing_types:
+        log.debug(
+            "Events sent with unknown types: {types}.",
+            types=", ".join(sorted(missing_types)),
+        )
+
+    system_ids = {
+        event["system_id"] for event in events if event.get("system_id")
+    }
+    nodes_by_system_id = dict(
+        Node.objects.filter(system_id__in=system_ids).values_list(
+            "system_id", "id"
+        )
+    )
+    mac_addresses = {
+        event["mac_address"] for event in events if event.get("mac_address")
+    }
+    nodes_by_mac_address = {
+        _normalise_mac(mac_address.raw): node_id
+        for mac_address, node_id in Interface.objects.filter(
+            type=INTERFACE_TYPE.PHYSICAL,
+            mac_address__in={
+                mac_address
+                for mac_address in map(_normalise_mac, mac_addresses)
+                if mac_address is not None
+            },
+        ).values_list("mac_address", "node_id")
+    }
+    ip_addresses = {
+        _normalise_ip(event["ip_address"])
+        for event in events
+        if event.get("ip_address")
+    }
+    ip_addresses.discard(None)
+    # As for a single event, the node with the lowest ID wins when more than
+    # one node has the same IP address.
+    nodes_by_ip_address = {
+        _normalise_ip(ip_address): node_id
+        for ip_address, node_id in Node.objects.filter(
+            interface__ip_addresses__ip__in=ip_addresses
+        )
+        .order_by("-id")
+        .values_list("interface__ip_addresses__ip", "id")
+    }
+
+    new_events = []
+    for event in events:
+        event_type = event_types.get(event["type_name"])
+        if event_type is None:
+            continue
+        if event.get("system_id"):
+            node_id = nodes_by_system_id.get(event["system_id"])
+        elif event.get("mac_address"):
+            node_id = nodes_by_mac_address.get(
+                _normalise_mac(event["mac_address"])
+            )
+        elif event.get("ip_address"):
+            node_id = nodes_by_ip_address.get(
+                _normalise_ip(event["ip_address"])
+            )
+        else:
+            node_id = None
+        if node_id is None:
+            # See `send_event`; the node may not have enlisted yet.
+            continue
+        created = timestamp - timedelta(seconds=event.get("age", 0))
+        new_events.append(
+            Event(
+                node_id=node_id,
+                type=event_type,
+                description=event["description"],
+                created=created,
+                updated=created,
+            )
+        )
+    Event.objects.bulk_create(new_events)
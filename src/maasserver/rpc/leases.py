@@ -6,7 +6,7 @@
 
 from datetime import datetime
 
-from netaddr import IPAddress
+from netaddr import AddrFormatError, EUI, IPAddress
 
 from maasserver.enum import IPADDRESS_FAMILY, IPADDRESS_TYPE
 from maasserver.models import (
@@ -17,7 +17,7 @@ from maasserver.models import (
     Subnet,
     UnknownInterface,
 )
-from maasserver.utils.orm import transactional
+from maasserver.utils.orm import savepoint, transactional
 from provisioningserver.logger import LegacyLogger
 from provisioningserver.utils.network import coerce_to_valid_hostname
 from provisioningserver.utils.twisted import synchronous
@@ -80,6 +80,95 @@ def update_lease(
     # Get the subnet for this IP address. If no subnet exists then something
     # is wrong as we should not be recieving message about unknown subnets.
     subnet = Subnet.objects.get_best_subnet_for_ip(ip)
+    _update_lease(
+        action, mac, ip_family, ip, timestamp, lease_time, hostname, subnet
+    )
+    return {}
+
+
+def _get_mac_key(mac):
+    """Return a key to match `mac` to the MAC address of an interface."""
+    try:
+        return EUI(str(mac))
+    except (AddrFormatError, TypeError, ValueError):
+        return None
+
+
+@synchronous
+@transactional
+def update_leases(updates):
+    """Update many DHCP leases from a cluster, in order.
+
+    This is the same as calling `update_lease` for each of `updates`, as
+    found in :py:class`~provisioningserver.rpc.region.UpdateLeases`, but all
+    within one transaction. The subnets for all the addresses and the
+    interfaces for all the MAC addresses are found up front, with one query
+    each.
+
+    A lease that cannot be updated is logged and skipped; the rest of the
+    leases are still updated.
+    """
+    updates = list(updates)
+    subnets = Subnet.objects.get_best_subnets_for_ips(
+        {update["ip"] for update in updates}
+    )
+    mac_keys = {
+        update["mac"]: _get_mac_key(update["mac"]) for update in updates
+    }
+    interfaces = {key: [] for key in mac_keys.values() if key is not None}
+    for interface in Interface.objects.filter(
+        mac_address__in=[
+            mac for mac, key in mac_keys.items() if key is not None
+        ]
+    ):
+        interfaces[_get_mac_key(interface.mac_address)].append(interface)
+    for update in updates:
+        action, mac, ip = update["action"], update["mac"], update["ip"]
+        mac_key = mac_keys[mac]
+        try:
+            # Each lease is updated in a savepoint so that a failure only
+            # loses that one lease.
+            with savepoint():
+                if action not in ["commit", "expiry", "release"]:
+                    raise LeaseUpdateError("Unknown lease action: %s" % action)
+                found_interfaces = _update_lease(
+                    action,
+                    mac,
+                    update["ip_family"],
+                    ip,
+                    update["timestamp"],
+                    update.get("lease_time"),
+                    update.get("hostname"),
+                    subnets.get(ip),
+                    None if mac_key is None else interfaces[mac_key],
+                )
+        except Exception:
+            log.err(None, "Unable to update lease for %s on %s." % (ip, mac))
+        else:
+            if mac_key is not None and found_interfaces is not None:
+                # A commit for an unknown MAC creates an interface for it.
+                interfaces[mac_key] = found_interfaces
+    return {}
+
+
+def _update_lease(
+    action,
+    mac,
+    ip_family,
+    ip,
+    timestamp,
+    lease_time,
+    hostname,
+    subnet,
+    interfaces=None,
+):
+    """Update one DHCP lease, given the best subnet for `ip`.
+
+    :param interfaces: The interfaces with the MAC address `mac`, or None to
+        look them up.
+    :return: The interfaces with the MAC address `mac` once the lease has been
+        updated, or None if they were not needed.
+    """
     if subnet is None:
         raise LeaseUpdateError("No subnet exists for: %s" % ip)
 
@@ -116,9 +205,10 @@ def update_lease(
     dynamic_range = subnet.get_dynamic_range_for_ip(IPAddress(ip))
     if dynamic_range is None:
         # Do nothing.
-        return {}
+        return None
 
-    interfaces = list(Interface.objects.filter(mac_address=mac))
+    if interfaces is None:
+        interfaces = list(Interface.objects.filter(mac_address=mac))
     if len(interfaces) == 0 and action == "commit":
         # A MAC address that is unknown to MAAS was given an IP address. Create
         # an unknown interface for this lease.
@@ -129,7 +219,7 @@ def update_lease(
         interfaces = [unknown_interface]
     elif len(interfaces) == 0:
         # No interfaces and not commit action so nothing needs to be done.
-        return {}
+        return interfaces
 
     sip = None
     # Delete all discovered IP addresses attached to all interfaces of the same
@@ -211,4 +301,4 @@ def update_lease(
             sip.save()
         for interface in interfaces:
             interface.ip_addresses.add(sip)
-    return {}
+    return interfaces
@@ -15,7 +15,7 @@ import json
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db.models import F, Q
+from django.db.models import Case, F, IntegerField, Q, Value, When
 
 from maasserver import exceptions, ntp
 from maasserver.api.utils import get_overridden_query_dict
@@ -25,6 +25,7 @@ from maasserver.models import Node, PhysicalInterface, RackController
 from maasserver.models.timestampedmodel import now
 from maasserver.utils.orm import transactional
 from provisioningserver.drivers.power.registry import PowerDriverRegistry
+from provisioningserver.enum import POWER_QUERY_PRIORITY
 from provisioningserver.rpc.exceptions import (
     CommissionNodeFailed,
     NodeAlreadyExists,
@@ -52,15 +53,50 @@ def mark_node_failed(system_id, error_description):
         raise NodeStateViolation(e)
 
 
+# Nodes in these states are changing state, so their power states are
+# wanted more often than every five minutes.
+POWER_QUERY_HIGH_PRIORITY_STATUSES = frozenset(
+    {
+        NODE_STATUS.COMMISSIONING,
+        NODE_STATUS.DEPLOYING,
+        NODE_STATUS.RELEASING,
+        NODE_STATUS.DISK_ERASING,
+        NODE_STATUS.ENTERING_RESCUE_MODE,
+        NODE_STATUS.EXITING_RESCUE_MODE,
+        NODE_STATUS.TESTING,
+    }
+)
+
+# Nodes in these states aren't expected to change power state.
+POWER_QUERY_LOW_PRIORITY_STATUSES = frozenset(
+    {NODE_STATUS.DEPLOYED, NODE_STATUS.READY}
+)
+
+
+def get_power_query_priority(node):
+    """Return the `POWER_QUERY_PRIORITY` hint for querying `node`."""
+    if node.status in POWER_QUERY_HIGH_PRIORITY_STATUSES:
+        return POWER_QUERY_PRIORITY.HIGH
+    elif node.status in POWER_QUERY_LOW_PRIORITY_STATUSES:
+        return POWER_QUERY_PRIORITY.LOW
+    else:
+        return POWER_QUERY_PRIORITY.NORMAL
+
+
 def _gen_cluster_nodes_power_parameters(nodes, limit):
     """Generate power parameters for `nodes`.
 
     These fulfil a subset of the return schema for the RPC call for
     :py:class:`~provisioningserver.rpc.region.ListNodePowerParameters`.
 
+    Nodes that are changing state come first, and are handed out again
+    after 30 seconds rather than five minutes, so that the rack hears about
+    them soon after they start to change.
+
     :return: A generator yielding `dict`s.
     """
     five_minutes_ago = now() - timedelta(minutes=5)
+    thirty_seconds_ago = now() - timedelta(seconds=30)
     queryable_power_types = [
         driver.name for _, driver in PowerDriverRegistry if driver.queryable
     ]
@@ -71,8 +107,26 @@ def _gen_cluster_nodes_power_parameters(nodes, limit):
         .filter(
             Q(power_state_queried=None)
             | Q(power_state_queried__lte=five_minutes_ago)
+            | Q(
+                status__in=POWER_QUERY_HIGH_PRIORITY_STATUSES,
+                power_state_queried__lte=thirty_seconds_ago,
+            )
+        )
+        .annotate(
+            changing=Case(
+                When(
+                    status__in=POWER_QUERY_HIGH_PRIORITY_STATUSES,
+                    then=Value(0),
+                ),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+        )
+        .order_by(
+            "changing",
+            F("power_state_queried").asc(nulls_first=True),
+            "system_id",
         )
-        .order_by(F("power_state_queried").asc(nulls_first=True), "system_id")
         .distinct()
     )
     for node in qs[:limit]:
@@ -84,6 +138,7 @@ def _gen_cluster_nodes_power_parameters(nodes, limit):
                 "power_state": node.power_state,
                 "power_type": power_info.power_type,
                 "context": power_info.power_parameters,
+                "priority": get_power_query_priority(node),
             }
 
 
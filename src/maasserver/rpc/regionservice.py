@@ -45,6 +45,7 @@ from maasserver.rpc import (
     packagerepository,
     rackcontrollers,
 )
+from maasserver.rpc.events import send_events
 from maasserver.rpc.nodes import (
     commission_node,
     create_node,
@@ -160,6 +161,31 @@ class Region(RPCProtocol):
         # region recieves the message.
         return d
 
+    @region.UpdateLeases.responder
+    def update_leases(self, cluster_uuid, updates):
+        """update_leases(cluster_uuid, updates)
+
+        Implementation of
+        :py:class`~provisioningserver.rpc.region.UpdateLeases`.
+        """
+        dbtasks = eventloop.services.getServiceNamed("database-tasks")
+        d = dbtasks.deferTask(leases.update_leases, updates)
+
+        # Catch all errors except the NoSuchCluster failure. We want that to
+        # be sent back to the cluster.
+        def err_NoSuchCluster_passThrough(failure):
+            if failure.check(NoSuchCluster):
+                return failure
+            else:
+                log.err(failure, "Unhandled failure in updating leases.")
+                return {}
+
+        d.addErrback(err_NoSuchCluster_passThrough)
+
+        # Wait for the records to be handled, so that batches are processed
+        # in order no matter which region recieves them.
+        return d
+
     @amp.StartTLS.responder
     def get_tls_parameters(self):
         """get_tls_parameters()
@@ -268,9 +294,17 @@ class Region(RPCProtocol):
         :py:class:`~provisioningserver.rpc.region.UpdateLastImageSync`.
         """
         d = deferToDatabase(rackcontrollers.update_last_image_sync, system_id)
+        d.addCallback(lambda _: self.imagesSynced(system_id))
         d.addCallback(lambda args: {})
         return d
 
+    def imagesSynced(self, system_id):
+        """Called when the rack controller `system_id` has new boot images.
+
+        `RegionServer` overrides this to forget cached `ListBootImages`
+        results.
+        """
+
     @region.UpdateNodePowerState.responder
     def update_node_power_state(self, system_id, power_state):
         """update_node_power_state()
@@ -350,6 +384,19 @@ class Region(RPCProtocol):
         # Don't wait for the record to be written.
         return succeed({})
 
+    @region.SendEvents.responder
+    def send_events(self, events):
+        """send_events()
+
+        Implementation of
+        :py:class:`~provisioningserver.rpc.region.SendEvents`.
+        """
+        timestamp = datetime.now()
+        dbtasks = eventloop.services.getServiceNamed("database-tasks")
+        dbtasks.addTask(send_events, events, timestamp)
+        # Don't wait for the records to be written.
+        return succeed({})
+
     @region.ReportForeignDHCPServer.responder
     def report_foreign_dhcp_server(
         self, system_id, interface_name, dhcp_ip=None
@@ -798,6 +845,11 @@ class RegionServer(Region):
         else:
             self.transport.loseConnection()
 
+    def imagesSynced(self, system_id):
+        self.factory.service.invalidateCallCache(
+            system_id, cluster.ListBootImages
+        )
+
     def connectionLost(self, reason):
         if self.hostIsRemote:
             d = self.factory.service.ipcWorker.rpcUnregisterConnection(
@@ -816,17 +868,37 @@ def _get_call_latency_metric_labels(client, cmd, *args, **kwargs):
     return {"call": cmd.__name__}
 
 
+def _freeze(value):
+    """Return a hashable equivalent of `value`, for keying the call cache."""
+    if isinstance(value, dict):
+        return tuple(
+            sorted((key, _freeze(item)) for key, item in value.items())
+        )
+    elif isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    elif isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    else:
+        return value
+
+
 class RackClient(common.Client):
     """A `common.Client` for communication from region to rack."""
 
-    # Currently the only calls that can be cached are the ones that take
-    # no arguments. More work needs to be done to this class to handle
-    # argument matching.
-    cache_calls = [cluster.DescribePowerTypes]
-
-    def __init__(self, connection, cache):
+    # Calls whose results are cached for each connection, keyed on their
+    # arguments, mapped to the number of seconds a result is kept for. None
+    # keeps it until the rack controller disconnects.
+    cache_calls = {
+        cluster.DescribePowerTypes: None,
+        cluster.ListBootImages: 60,
+        cluster.ListOperatingSystems: 60,
+        cluster.ValidateLicenseKey: 300,
+    }
+
+    def __init__(self, connection, cache, clock=reactor):
         super().__init__(connection)
         self.cache = cache
+        self.clock = clock
 
     def _getCallCache(self):
         """Return the call cache."""
@@ -837,6 +909,17 @@ class RackClient(common.Client):
         else:
             return self.cache["call_cache"]
 
+    def invalidate(self, *cmds):
+        """Forget the cached results of `cmds`, or of all calls.
+
+        Results of calls that are in progress aren't cached either.
+        """
+        call_cache = self._getCallCache()
+        for key in list(call_cache):
+            if len(cmds) == 0 or key[0] in cmds:
+                del call_cache[key]
+        self.cache["invalidations"] = self.cache.get("invalidations", 0) + 1
+
     @PROMETHEUS_METRICS.record_call_latency(
         "maas_region_rack_rpc_call_latency",
         get_labels=_get_call_latency_metric_labels,
@@ -845,28 +928,48 @@ class RackClient(common.Client):
     def __call__(self, cmd, *args, **kwargs):
         """Call a remote RPC method.
 
-        This caches calls to the rack controller that do not change value,
-        unless the rack controller disconnects and reconnects to the region.
+        This caches the results of `cache_calls`, for the same arguments,
+        until they expire or the rack controller disconnects and reconnects
+        to the region.
         """
-        call_cache = self._getCallCache()
         if cmd not in self.cache_calls:
             return super().__call__(cmd, *args, **kwargs)
-        if cmd in call_cache:
-            # Call has already been made over this connection, just return
-            # the original result.
-            return succeed(copy.deepcopy(call_cache[cmd]))
-        else:
-            # First time this call has been made so cache the result so
-            # so the next call over this connection will just be returned
-            # from the cache.
-
-            def cb_cache(result):
-                call_cache[cmd] = result
-                return result
+        call_cache = self._getCallCache()
+        key = (cmd, _freeze(args), _freeze(kwargs))
+        if key in call_cache:
+            expires, result = call_cache[key]
+            if expires is None or expires > self.clock.seconds():
+                # Call has already been made over this connection, just
+                # return the original result.
+                self._recordCacheResult(cmd, "hit")
+                return succeed(copy.deepcopy(result))
+            else:
+                del call_cache[key]
+        # Cache the result so the next call over this connection will just
+        # be returned from the cache.
+        self._recordCacheResult(cmd, "miss")
+        ttl = self.cache_calls[cmd]
+        invalidations = self.cache.get("invalidations", 0)
+
+        def cb_cache(result):
+            if self.cache.get("invalidations", 0) == invalidations:
+                if ttl is None:
+                    call_cache[key] = None, result
+                else:
+                    call_cache[key] = self.clock.seconds() + ttl, result
+            # Callers may change what they get back; keep the cache as is.
+            return copy.deepcopy(result)
+
+        d = super().__call__(cmd, *args, **kwargs)
+        d.addCallback(cb_cache)
+        return d
 
-            d = super().__call__(cmd, *args, **kwargs)
-            d.addCallback(cb_cache)
-            return d
+    def _recordCacheResult(self, cmd, result):
+        PROMETHEUS_METRICS.update(
+            "maas_region_rack_rpc_call_cache",
+            "inc",
+            labels={"call": cmd.__name__, "result": result},
+        )
 
 
 class RegionService(service.Service):
@@ -976,6 +1079,16 @@ class RegionService(service.Service):
         self.connectionsCache.pop(connection, None)
         self.events.disconnected.fire(ident)
 
+    def invalidateCallCache(self, ident, *cmds):
+        """Forget cached results of `cmds` over connections to `ident`.
+
+        See `RackClient.invalidate`.
+        """
+        for connection in self.connections.get(ident, ()):
+            RackClient(
+                connection, self.connectionsCache[connection]
+            ).invalidate(*cmds)
+
     def _savePorts(self, results):
         """Save the opened ports to ``self.ports``.
 
@@ -13,6 +13,7 @@ from maasserver.models.eventtype import EventType
 from maasserver.rpc import events
 from maasserver.testing.factory import factory
 from maasserver.testing.testcase import MAASServerTestCase
+from maastesting.djangotestcase import count_queries
 from provisioningserver.rpc.exceptions import NoSuchEventType
 
 
@@ -178,3 +179,116 @@ class TestSendEventIPAddress(MAASServerTestCase):
             description=description,
             created=timestamp,
         )
+
+
+class TestSendEvents(MAASServerTestCase):
+    def make_event(self, event_type, description=None, age=0, **node):
+        if description is None:
+            description = factory.make_name("description")
+        return dict(
+            node, type_name=event_type.name, description=description, age=age
+        )
+
+    def test_creates_events_for_nodes(self):
+        event_type = factory.make_EventType()
+        node1 = factory.make_Node(interface=True)
+        node2 = factory.make_Node(interface=True)
+        node3 = factory.make_Node(interface=True)
+        ip = factory.make_StaticIPAddress(
+            interface=node1.interface_set.first()
+        )
+        mac_address = node2.interface_set.first().mac_address
+        sent_events = [
+            self.make_event(event_type, ip_address=ip.ip),
+            self.make_event(event_type, mac_address=str(mac_address)),
+            self.make_event(event_type, system_id=node3.system_id),
+        ]
+        timestamp = datetime.datetime.utcnow()
+        events.send_events(sent_events, timestamp)
+        self.assertCountEqual(
+            [
+                (node1.id, sent_events[0]["description"], timestamp),
+                (node2.id, sent_events[1]["description"], timestamp),
+                (node3.id, sent_events[2]["description"], timestamp),
+            ],
+            Event.objects.filter(type=event_type).values_list(
+                "node_id", "description", "created"
+            ),
+        )
+
+    def test_matches_mac_address_in_any_form(self):
+        event_type = factory.make_EventType()
+        node = factory.make_Node(interface=True)
+        mac_address = str(node.interface_set.first().mac_address)
+        events.send_events(
+            [
+                self.make_event(
+                    event_type,
+                    mac_address=mac_address.upper().replace(":", "-"),
+                )
+            ],
+            datetime.datetime.utcnow(),
+        )
+        self.assertEqual(
+            [node.id],
+            list(
+                Event.objects.filter(type=event_type).values_list(
+                    "node_id", flat=True
+                )
+            ),
+        )
+
+    def test_sets_created_from_age(self):
+        event_type = factory.make_EventType()
+        node = factory.make_Node()
+        timestamp = datetime.datetime.utcnow()
+        events.send_events(
+            [self.make_event(event_type, age=2.5, system_id=node.system_id)],
+            timestamp,
+        )
+        event = Event.objects.get(type=event_type)
+        self.assertEqual(
+            timestamp - datetime.timedelta(seconds=2.5), event.created
+        )
+        self.assertEqual(event.created, event.updated)
+
+    def test_skips_unknown_nodes_and_event_types(self):
+        event_type = factory.make_EventType()
+        node = factory.make_Node()
+        sent_events = [
+            self.make_event(event_type, ip_address=factory.make_ip_address()),
+            self.make_event(
+                event_type, mac_address=factory.make_mac_address()
+            ),
+            self.make_event(event_type, system_id=factory.make_name("id")),
+            dict(
+                self.make_event(event_type, system_id=node.system_id),
+                type_name=factory.make_name("type"),
+            ),
+            self.make_event(event_type, system_id=node.system_id),
+        ]
+        events.send_events(sent_events, datetime.datetime.utcnow())
+        self.assertEqual(
+            [sent_events[-1]["description"]],
+            list(Event.objects.values_list("description", flat=True)),
+        )
+
+    def test_uses_constant_number_of_queries(self):
+        event_type = factory.make_EventType()
+        nodes = [factory.make_Node(interface=True) for _ in range(3)]
+        ips = [
+            factory.make_StaticIPAddress(interface=node.interface_set.first())
+            for node in nodes
+        ]
+
+        def send_events(count):
+            sent_events = [
+                self.make_event(event_type, ip_address=ip.ip)
+                for ip in ips[:count]
+            ]
+            queries, _ = count_queries(
+                events.send_events, sent_events, datetime.datetime.utcnow()
+            )
+            return queries
+
+        self.assertEqual(send_events(1), send_events(3))
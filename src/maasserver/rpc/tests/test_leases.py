@@ -16,7 +16,7 @@ from maasserver.enum import INTERFACE_TYPE, IPADDRESS_FAMILY, IPADDRESS_TYPE
 from maasserver.models import DNSResource
 from maasserver.models.interface import UnknownInterface
 from maasserver.models.staticipaddress import StaticIPAddress
-from maasserver.rpc.leases import LeaseUpdateError, update_lease
+from maasserver.rpc.leases import LeaseUpdateError, update_lease, update_leases
 from maasserver.testing.factory import factory
 from maasserver.testing.testcase import MAASServerTestCase
 from maasserver.utils.orm import get_one, reload_object
@@ -505,3 +505,84 @@ class TestUpdateLease(MAASServerTestCase):
         self.assertEqual(1, ip_address2.interface_set.count())
         self.assertEqual(1, boot_interface1.ip_addresses.count())
         self.assertEqual(1, boot_interface2.ip_addresses.count())
+
+
+class TestUpdateLeases(MAASServerTestCase):
+    def make_update(self, subnet, action="commit", mac=None, ip=None):
+        if mac is None:
+            mac = factory.make_mac_address()
+        if ip is None:
+            ip = factory.pick_ip_in_IPRange(subnet.get_dynamic_ranges()[0])
+        return {
+            "action": action,
+            "mac": mac,
+            "ip_family": "ipv4",
+            "ip": ip,
+            "timestamp": int(time.time()),
+            "lease_time": random.randint(30, 1000),
+            "hostname": factory.make_name("host"),
+        }
+
+    def make_managed_subnet(self):
+        return factory.make_ipv4_Subnet_with_IPRanges(
+            with_static_range=False, dhcp_on=True
+        )
+
+    def test_creates_leases(self):
+        subnet = self.make_managed_subnet()
+        node = factory.make_Node_with_Interface_on_Subnet(subnet=subnet)
+        boot_interface = node.get_boot_interface()
+        updates = [
+            self.make_update(subnet, mac=boot_interface.mac_address),
+            self.make_update(subnet),
+        ]
+        update_leases(updates)
+        self.assertEqual(
+            [updates[0]["ip"]],
+            [
+                sip.ip
+                for sip in boot_interface.ip_addresses.filter(
+                    alloc_type=IPADDRESS_TYPE.DISCOVERED
+                )
+            ],
+        )
+        unknown_interface = UnknownInterface.objects.get(
+            mac_address=updates[1]["mac"]
+        )
+        self.assertEqual(
+            [updates[1]["ip"]],
+            [sip.ip for sip in unknown_interface.ip_addresses.all()],
+        )
+
+    def test_applies_updates_in_order(self):
+        subnet = self.make_managed_subnet()
+        mac = factory.make_mac_address()
+        commit = self.make_update(subnet, mac=mac)
+        release = self.make_update(
+            subnet, action="release", mac=mac, ip=commit["ip"]
+        )
+        update_leases([commit, release])
+        # The commit created a single interface for the MAC, which the
+        # release then used.
+        [unknown_interface] = UnknownInterface.objects.filter(mac_address=mac)
+        [sip] = unknown_interface.ip_addresses.all()
+        self.assertIsNone(sip.ip)
+
+    def test_skips_leases_that_cannot_be_updated(self):
+        subnet = self.make_managed_subnet()
+        bad_action = self.make_update(subnet, action=factory.make_name("bad"))
+        no_subnet = self.make_update(subnet, ip=factory.make_ipv6_address())
+        good = self.make_update(subnet)
+        update_leases([bad_action, no_subnet, good])
+        self.assertFalse(
+            UnknownInterface.objects.filter(
+                mac_address__in=[bad_action["mac"], no_subnet["mac"]]
+            ).exists()
+        )
+        unknown_interface = UnknownInterface.objects.get(
+            mac_address=good["mac"]
+        )
+        self.assertEqual(
+            [good["ip"]],
+            [sip.ip for sip in unknown_interface.ip_addresses.all()],
+        )
@@ -44,6 +44,7 @@ from maasserver.utils.orm import post_commit_hooks, reload_object
 from maastesting.twisted import always_succeed_with
 from metadataserver.builtin_scripts import load_builtin_scripts
 from provisioningserver.drivers.power.registry import PowerDriverRegistry
+from provisioningserver.enum import POWER_QUERY_PRIORITY
 from provisioningserver.rpc.cluster import DescribePowerTypes
 from provisioningserver.rpc.exceptions import (
     CommissionNodeFailed,
@@ -468,6 +469,73 @@ class TestListClusterNodesPowerParameters(MAASServerTestCase):
             [node.system_id for node in nodes_in_order], system_ids
         )
 
+    def test_returns_changing_nodes_first(self):
+        rack = factory.make_RackController()
+        nodes = [self.make_Node(bmc_connected_to=rack) for _ in range(3)]
+        node_deploying = self.make_Node(
+            bmc_connected_to=rack,
+            status=NODE_STATUS.DEPLOYING,
+            power_state_queried=now() - timedelta(minutes=1),
+        )
+
+        power_parameters = list_cluster_nodes_power_parameters(rack.system_id)
+        system_ids = [params["system_id"] for params in power_parameters]
+
+        self.assertEqual(node_deploying.system_id, system_ids[0])
+        self.assertCountEqual(
+            [node.system_id for node in nodes], system_ids[1:]
+        )
+
+    def test_returns_changing_nodes_checked_30_seconds_ago(self):
+        rack = factory.make_RackController()
+        node_deploying = self.make_Node(
+            bmc_connected_to=rack,
+            status=NODE_STATUS.DEPLOYING,
+            power_state_queried=now() - timedelta(seconds=40),
+        )
+        self.make_Node(
+            bmc_connected_to=rack,
+            status=NODE_STATUS.DEPLOYING,
+            power_state_queried=now() - timedelta(seconds=10),
+        )
+        self.make_Node(
+            bmc_connected_to=rack,
+            status=NODE_STATUS.DEPLOYED,
+            power_state_queried=now() - timedelta(seconds=40),
+        )
+
+        power_parameters = list_cluster_nodes_power_parameters(rack.system_id)
+        system_ids = [params["system_id"] for params in power_parameters]
+
+        self.assertEqual([node_deploying.system_id], system_ids)
+
+    def test_returns_priority_hints(self):
+        rack = factory.make_RackController()
+        expected = {
+            self.make_Node(
+                bmc_connected_to=rack, status=NODE_STATUS.COMMISSIONING
+            ).system_id: POWER_QUERY_PRIORITY.HIGH,
+            self.make_Node(
+                bmc_connected_to=rack, status=NODE_STATUS.DEPLOYED
+            ).system_id: POWER_QUERY_PRIORITY.LOW,
+            self.make_Node(
+                bmc_connected_to=rack, status=NODE_STATUS.READY
+            ).system_id: POWER_QUERY_PRIORITY.LOW,
+            self.make_Node(
+                bmc_connected_to=rack, status=NODE_STATUS.ALLOCATED
+            ).system_id: POWER_QUERY_PRIORITY.NORMAL,
+        }
+
+        power_parameters = list_cluster_nodes_power_parameters(rack.system_id)
+
+        self.assertEqual(
+            expected,
+            {
+                params["system_id"]: params["priority"]
+                for params in power_parameters
+            },
+        )
+
     def test_returns_at_most_60kiB_of_JSON(self):
         # Configure the rack controller subnet to be very large so it
         # can hold that many BMC connected to the interface for the rack
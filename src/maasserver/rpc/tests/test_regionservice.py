@@ -42,6 +42,7 @@ from twisted.internet.endpoints import TCP4ServerEndpoint
 from twisted.internet.error import ConnectionClosed
 from twisted.internet.interfaces import IStreamServerEndpoint
 from twisted.internet.protocol import Factory
+from twisted.internet.task import Clock
 from twisted.protocols import amp
 from twisted.python.failure import Failure
 from twisted.python.reflect import fullyQualifiedName
@@ -515,7 +516,12 @@ class TestRegionServer(MAASTransactionServerTestCase):
 class TestRackClient(MAASTestCase):
     def test_defined_cache_calls(self):
         self.assertEqual(
-            [cluster.DescribePowerTypes],
+            {
+                cluster.DescribePowerTypes: None,
+                cluster.ListBootImages: 60,
+                cluster.ListOperatingSystems: 60,
+                cluster.ValidateLicenseKey: 300,
+            },
             RackClient.cache_calls,
         )
 
@@ -536,6 +542,15 @@ class TestRackClient(MAASTestCase):
         self.assertIs(call_cache2, cache["call_cache"])
         self.assertIs(call_cache2, call_cache)
 
+    def make_client(self, clock=reactor):
+        conn = DummyConnection()
+        conn.ident = factory.make_name("ident")
+        callRemote = self.patch(conn, "callRemote")
+        callRemote.side_effect = lambda cmd, **kwargs: succeed(
+            {"is_valid": True}
+        )
+        return RackClient(conn, {}, clock=clock), callRemote
+
     @wait_for_reactor
     @inlineCallbacks
     def test_call__returns_cache_value(self):
@@ -544,7 +559,7 @@ class TestRackClient(MAASTestCase):
         client = RackClient(conn, {})
         call_cache = client._getCallCache()
         power_types = {"power_types": [{"name": "ipmi"}, {"name": "wedge"}]}
-        call_cache[cluster.DescribePowerTypes] = power_types
+        call_cache[(cluster.DescribePowerTypes, (), ())] = None, power_types
         result = yield client(cluster.DescribePowerTypes)
         # The result is a copy. It should equal the result but not be
         # the same object.
@@ -563,8 +578,9 @@ class TestRackClient(MAASTestCase):
         call_cache = client._getCallCache()
         result = yield client(cluster.DescribePowerTypes)
         self.assertIs(sentinel.power_types, result)
-        self.assertIs(
-            sentinel.power_types, call_cache[cluster.DescribePowerTypes]
+        self.assertEqual(
+            (None, sentinel.power_types),
+            call_cache[(cluster.DescribePowerTypes, (), ())],
         )
 
     @wait_for_reactor
@@ -573,13 +589,121 @@ class TestRackClient(MAASTestCase):
         conn = DummyConnection()
         conn.ident = factory.make_name("ident")
         self.patch(conn, "callRemote").return_value = succeed(
-            sentinel.boot_images
+            sentinel.architectures
         )
         client = RackClient(conn, {})
         call_cache = client._getCallCache()
-        result = yield client(cluster.ListBootImages)
-        self.assertIs(sentinel.boot_images, result)
-        self.assertNotIn(cluster.ListBootImages, call_cache)
+        result = yield client(cluster.ListSupportedArchitectures)
+        self.assertIs(sentinel.architectures, result)
+        self.assertEqual({}, call_cache)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_call__caches_results_by_arguments(self):
+        client, callRemote = self.make_client()
+        yield client(
+            cluster.ValidateLicenseKey, osystem="windows", release="a", key="k"
+        )
+        yield client(
+            cluster.ValidateLicenseKey, key="k", release="a", osystem="windows"
+        )
+        yield client(
+            cluster.ValidateLicenseKey, osystem="windows", release="b", key="k"
+        )
+        self.assertThat(
+            callRemote,
+            MockCallsMatch(
+                call(
+                    cluster.ValidateLicenseKey,
+                    osystem="windows",
+                    release="a",
+                    key="k",
+                ),
+                call(
+                    cluster.ValidateLicenseKey,
+                    osystem="windows",
+                    release="b",
+                    key="k",
+                ),
+            ),
+        )
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_call__expires_results(self):
+        clock = Clock()
+        client, callRemote = self.make_client(clock)
+        yield client(cluster.ListBootImages)
+        clock.advance(59)
+        yield client(cluster.ListBootImages)
+        self.assertEqual(1, callRemote.call_count)
+        clock.advance(1)
+        yield client(cluster.ListBootImages)
+        self.assertEqual(2, callRemote.call_count)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_invalidate_forgets_results_of_given_calls(self):
+        client, callRemote = self.make_client()
+        yield client(cluster.ListBootImages)
+        yield client(cluster.ListOperatingSystems)
+        client.invalidate(cluster.ListBootImages)
+        yield client(cluster.ListBootImages)
+        yield client(cluster.ListOperatingSystems)
+        self.assertThat(
+            callRemote,
+            MockCallsMatch(
+                call(cluster.ListBootImages),
+                call(cluster.ListOperatingSystems),
+                call(cluster.ListBootImages),
+            ),
+        )
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_invalidate_forgets_results_of_all_calls(self):
+        client, callRemote = self.make_client()
+        yield client(cluster.ListBootImages)
+        yield client(cluster.ListOperatingSystems)
+        client.invalidate()
+        self.assertEqual({}, client._getCallCache())
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_invalidate_stops_calls_in_progress_being_cached(self):
+        client, callRemote = self.make_client()
+        response = Deferred()
+        callRemote.side_effect = None
+        callRemote.return_value = response
+        d = client(cluster.ListBootImages)
+        client.invalidate(cluster.ListBootImages)
+        response.callback(sentinel.images)
+        result = yield d
+        self.assertIs(sentinel.images, result)
+        self.assertEqual({}, client._getCallCache())
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_call__records_cache_metric(self):
+        mock_metrics = self.patch(PROMETHEUS_METRICS, "update")
+        client, callRemote = self.make_client()
+        yield client(cluster.ListOperatingSystems)
+        yield client(cluster.ListOperatingSystems)
+        mock_metrics.assert_has_calls(
+            [
+                call(
+                    "maas_region_rack_rpc_call_cache",
+                    "inc",
+                    labels={"call": "ListOperatingSystems", "result": "miss"},
+                ),
+                call(
+                    "maas_region_rack_rpc_call_cache",
+                    "inc",
+                    labels={"call": "ListOperatingSystems", "result": "hit"},
+                ),
+            ],
+            any_order=True,
+        )
 
     @wait_for_reactor
     @inlineCallbacks
@@ -1045,6 +1169,40 @@ class TestRegionService(MAASTestCase):
 
         self.assertThat(mock_fire, MockCalledOnceWith(uuid))
 
+    def test_invalidateCallCache_invalidates_connections_for_ident(self):
+        service = RegionService(sentinel.ipcWorker)
+        uuid = factory.make_UUID()
+        c1 = DummyConnection()
+        c2 = DummyConnection()
+        service._addConnectionFor(uuid, c1)
+        service._addConnectionFor(factory.make_UUID(), c2)
+        for connection in (c1, c2):
+            client = RackClient(
+                connection, service.connectionsCache[connection]
+            )
+            client._getCallCache()[(cluster.ListBootImages, (), ())] = (
+                None,
+                sentinel.images,
+            )
+
+        service.invalidateCallCache(uuid, cluster.ListBootImages)
+
+        self.assertEqual({}, service.connectionsCache[c1]["call_cache"])
+        self.assertNotEqual({}, service.connectionsCache[c2]["call_cache"])
+
+    def test_imagesSynced_invalidates_ListBootImages(self):
+        service = RegionService(sentinel.ipcWorker)
+        invalidateCallCache = self.patch(service, "invalidateCallCache")
+        protocol = service.factory.buildProtocol(addr=None)
+        system_id = factory.make_name("system_id")
+
+        protocol.imagesSynced(system_id)
+
+        self.assertThat(
+            invalidateCallCache,
+            MockCalledOnceWith(system_id, cluster.ListBootImages),
+        )
+
     @wait_for_reactor
     def test_getConnectionFor_returns_existing_connection(self):
         service = RegionService(sentinel.ipcWorker)
@@ -48,6 +48,7 @@ from maasserver.utils.threads import deferToDatabase
 from maastesting.matchers import MockCalledOnceWith, MockCalledWith
 from maastesting.testcase import MAASTestCase
 from maastesting.twisted import TwistedLoggerFixture
+from provisioningserver.enum import POWER_QUERY_PRIORITY
 from provisioningserver.rpc.exceptions import NoSuchCluster, NoSuchNode
 from provisioningserver.rpc.region import (
     Authenticate,
@@ -73,7 +74,9 @@ from provisioningserver.rpc.region import (
     RequestRackRefresh,
     SendEvent,
     SendEventMACAddress,
+    SendEvents,
     UpdateLease,
+    UpdateLeases,
     UpdateNodePowerState,
     UpdateServices,
 )
@@ -272,6 +275,50 @@ class TestRegionProtocol_UpdateLease(MAASTransactionServerTestCase):
         # works as expected.
 
 
+class TestRegionProtocol_UpdateLeases(MAASTransactionServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.useFixture(RegionEventLoopFixture("database-tasks"))
+
+    def test_update_leases_is_registered(self):
+        protocol = Region()
+        responder = protocol.locateResponder(UpdateLeases.commandName)
+        self.assertIsNotNone(responder)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_passes_updates_to_update_leases(self):
+        update_leases = self.patch(leases_module, "update_leases")
+        update_leases.return_value = {}
+        updates = [
+            {
+                "action": "expiry",
+                "mac": factory.make_mac_address(),
+                "ip_family": "ipv4",
+                "ip": factory.make_ipv4_address(),
+                "timestamp": int(time.time()),
+                "lease_time": None,
+                "hostname": None,
+            }
+        ]
+
+        yield eventloop.start()
+        try:
+            response = yield call_responder(
+                Region(),
+                UpdateLeases,
+                {
+                    "cluster_uuid": factory.make_name("uuid"),
+                    "updates": updates,
+                },
+            )
+        finally:
+            yield eventloop.reset()
+
+        self.assertEqual({}, response)
+        self.assertThat(update_leases, MockCalledOnceWith(updates))
+
+
 class TestRegionProtocol_GetBootConfig(MAASTransactionServerTestCase):
     def test_get_boot_config_is_registered(self):
         protocol = Region()
@@ -549,6 +596,7 @@ class TestRegionProtocol_ListNodePowerParameters(
                     "power_state": node.power_state,
                     "power_type": node.get_effective_power_type(),
                     "context": power_params,
+                    "priority": POWER_QUERY_PRIORITY.NORMAL,
                 }
             )
 
@@ -1020,6 +1068,68 @@ class TestRegionProtocol_SendEventMACAddress(MAASTransactionServerTestCase):
         )
 
 
+class TestRegionProtocol_SendEvents(MAASTransactionServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.useFixture(RegionEventLoopFixture("database-tasks"))
+
+    def test_send_events_is_registered(self):
+        protocol = Region()
+        responder = protocol.locateResponder(SendEvents.commandName)
+        self.assertIsNotNone(responder)
+
+    @transactional
+    def get_events(self, type_name):
+        return list(
+            Event.objects.filter(type__name=type_name)
+            .order_by("id")
+            .values_list("node__system_id", "description")
+        )
+
+    @transactional
+    def create_event_type(self, name):
+        EventType.objects.create(name=name, description=name, level=0)
+
+    @transactional
+    def create_node(self):
+        return factory.make_Node().system_id
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_send_events_stores_events(self):
+        name = factory.make_name("type_name")
+        yield deferToDatabase(self.create_event_type, name)
+        system_id = yield deferToDatabase(self.create_node)
+        descriptions = [factory.make_name("description") for _ in range(3)]
+
+        yield eventloop.start()
+        try:
+            response = yield call_responder(
+                Region(),
+                SendEvents,
+                {
+                    "events": [
+                        {
+                            "system_id": system_id,
+                            "type_name": name,
+                            "description": description,
+                            "age": 0.0,
+                        }
+                        for description in descriptions
+                    ]
+                },
+            )
+        finally:
+            yield eventloop.reset()
+
+        self.assertEqual({}, response)
+        stored_events = yield deferToDatabase(self.get_events, name)
+        self.assertEqual(
+            [(system_id, description) for description in descriptions],
+            stored_events,
+        )
+
+
 class TestRegionProtocol_UpdateServices(MAASTransactionServerTestCase):
     def setUp(self):
         super().setUp()
@@ -50,13 +50,14 @@ class MAASRegionTestCaseBase(PostCommitHooksTestMixin):
 
     client_class = MAASSensibleClient
 
-    # cache_boot_sources and delete_large_object_content_later are
-    # called from signals and fire off threads to do work after the
-    # commit. This can interfere with other tests, so we mock out,
-    # post_commit_do for them, so they never will be called, unless the
-    # tests explicitly sets these attributes to False.
+    # cache_boot_sources, delete_large_object_content_later and
+    # invalidate_boot_configs are called from signals and fire off threads to
+    # do work after the commit. This can interfere with other tests, so we
+    # mock out, post_commit_do for them, so they never will be called, unless
+    # the tests explicitly sets these attributes to False.
     mock_cache_boot_source = True
     mock_delete_large_object_content_later = True
+    mock_invalidate_boot_configs = True
 
     @property
     def client(self):
@@ -89,6 +90,8 @@ class MAASRegionTestCaseBase(PostCommitHooksTestMixin):
             self.patch(signals.bootsources, "post_commit_do")
         if self.mock_delete_large_object_content_later:
             self.patch(signals.largefiles, "post_commit_do")
+        if self.mock_invalidate_boot_configs:
+            self.patch(signals.nodes, "post_commit_do")
 
     def setUpFixtures(self):
         """This should be called by a subclass once other set-up is done."""
@@ -4,12 +4,14 @@
 
 from datetime import datetime
 from email.utils import format_datetime
+import hashlib
 import http.client
 from io import BytesIO
 import json
 import logging
 import os
 from os import environ
+from os import path as os_path
 import random
 from random import randint
 from subprocess import CalledProcessError
@@ -48,6 +50,7 @@ from maasserver.enum import (
     BOOT_RESOURCE_TYPE,
     COMPONENT,
 )
+from maasserver.largefilecache import LargeFileCache
 from maasserver.listener import PostgresListenerService
 from maasserver.models import (
     BootResource,
@@ -162,11 +165,14 @@ class TestSimpleStreamsHandler(MAASServerTestCase):
     def get_stream_client(self, filename):
         return self.client.get(self.reverse_stream_handler(filename))
 
-    def get_file_client(self, os, arch, subarch, series, version, filename):
+    def get_file_client(
+        self, os, arch, subarch, series, version, filename, **extra
+    ):
         return self.client.get(
             self.reverse_file_handler(
                 os, arch, subarch, series, version, filename
-            )
+            ),
+            **extra,
         )
 
     def get_product_name_for_resource(self, resource):
@@ -483,6 +489,93 @@ class TestSimpleStreamsHandler(MAASServerTestCase):
         )
         self.assertIsInstance(response, StreamingHttpResponse)
 
+    def make_cached_file_client_args(self):
+        cache = LargeFileCache(self.make_dir())
+        self.patch(bootresources, "largefile_cache", cache)
+        product, resource = self.make_usable_product_boot_resource()
+        _, _, os, arch, subarch, series = product.split(":")
+        resource_set = resource.get_latest_complete_set()
+        resource_file = resource_set.files.order_by("?")[0]
+        content = factory.make_bytes(size=1024)
+        with open(
+            os_path.join(cache.path, resource_file.largefile.sha256), "wb"
+        ) as stream:
+            stream.write(content)
+        self.patch(
+            bootresources, "ConnectionWrapper"
+        ).side_effect = AssertionError("Should not read from the database.")
+        args = (
+            os,
+            arch,
+            subarch,
+            series,
+            resource_set.version,
+            resource_file.filename,
+        )
+        return content, args
+
+    def test_download_serves_cached_content(self):
+        content, args = self.make_cached_file_client_args()
+        response = self.get_file_client(*args)
+        self.assertEqual(http.client.OK, response.status_code)
+        self.assertEqual(content, b"".join(response.streaming_content))
+        self.assertEqual("bytes", response["Accept-Ranges"])
+        self.assertEqual(bootresources.FILE_BLOCK_SIZE, response.block_size)
+
+    def test_download_serves_range_of_cached_content(self):
+        content, args = self.make_cached_file_client_args()
+        response = self.get_file_client(*args, HTTP_RANGE="bytes=100-199")
+        self.assertEqual(http.client.PARTIAL_CONTENT, response.status_code)
+        self.assertEqual(
+            content[100:200], b"".join(response.streaming_content)
+        )
+        self.assertEqual("bytes 100-199/1024", response["Content-Range"])
+        self.assertEqual("100", response["Content-Length"])
+
+    def test_download_rejects_unsatisfiable_range_of_cached_content(self):
+        content, args = self.make_cached_file_client_args()
+        response = self.get_file_client(*args, HTTP_RANGE="bytes=2000-")
+        self.assertEqual(
+            http.client.REQUESTED_RANGE_NOT_SATISFIABLE, response.status_code
+        )
+        self.assertEqual("bytes */1024", response["Content-Range"])
+
+
+class TestParseRangeHeader(MAASTestCase):
+    """Tests for `parse_range_header`."""
+
+    scenarios = (
+        ("none", {"header": None, "expected": None}),
+        ("start-end", {"header": "bytes=10-19", "expected": (10, 19)}),
+        ("start-", {"header": "bytes=10-", "expected": (10, 99)}),
+        ("-suffix", {"header": "bytes=-10", "expected": (90, 99)}),
+        ("long suffix", {"header": "bytes=-1000", "expected": (0, 99)}),
+        ("end past size", {"header": "bytes=90-1000", "expected": (90, 99)}),
+        ("other unit", {"header": "items=1-2", "expected": None}),
+        ("many ranges", {"header": "bytes=1-2,5-6", "expected": None}),
+        ("invalid", {"header": "bytes=a-b", "expected": None}),
+    )
+
+    def test_parses_range(self):
+        self.assertEqual(
+            self.expected, bootresources.parse_range_header(self.header, 100)
+        )
+
+
+class TestParseRangeHeaderUnsatisfiable(MAASTestCase):
+    """Tests for `parse_range_header` with ranges that can't be satisfied."""
+
+    scenarios = (
+        ("start past size", {"header": "bytes=100-"}),
+        ("end before start", {"header": "bytes=20-10"}),
+        ("empty suffix", {"header": "bytes=-0"}),
+    )
+
+    def test_raises_ValueError(self):
+        self.assertRaises(
+            ValueError, bootresources.parse_range_header, self.header, 100
+        )
+
 
 class TestConnectionWrapper(MAASTransactionServerTestCase):
     """Tests the use of StreamingHttpResponse(ConnectionWrapper(stream)).
@@ -545,6 +638,18 @@ class TestConnectionWrapper(MAASTransactionServerTestCase):
         """
         return b"".join(response.streaming_content)
 
+    def test_download_caches_content(self):
+        cache = LargeFileCache(self.make_dir())
+        self.patch(bootresources, "largefile_cache", cache)
+        content, url = self.make_file_for_client()
+        client = MAASSensibleClient()
+        response = client.get(url)
+        self.assertEqual(content, self.read_response(response))
+        response.close()
+        sha256 = hashlib.sha256(content).hexdigest()
+        with open(cache.get_file_path(sha256), "rb") as stream:
+            self.assertEqual(content, stream.read())
+
     def test_download_calls__get_new_connection(self):
         content, url = self.make_file_for_client()
         mock_get_new_connection = self.patch(
@@ -2083,7 +2188,9 @@ class TestImportResourcesService(MAASTestCase):
         service = bootresources.ImportResourcesService()
         deferToDatabase = self.patch(bootresources, "deferToDatabase")
         exception_type = factory.make_exception_type()
-        deferToDatabase.return_value = fail(exception_type())
+        deferToDatabase.side_effect = lambda *args, **kwargs: fail(
+            exception_type()
+        )
         d = service.maybe_import_resources()
         self.assertIsNone(extract_result(d))
 
@@ -129,6 +129,42 @@ class TestRegionConfigurationWorkerOptions(MAASTestCase):
         self.assertEqual({"num_workers": workers}, config.store)
 
 
+class TestRegionConfigurationStatusOptions(MAASTestCase):
+    """Tests for the status message options in `RegionConfiguration`."""
+
+    def test_default(self):
+        config = RegionConfiguration({})
+        self.assertEqual(10, config.status_flush_interval)
+
+    def test_set_and_get(self):
+        config = RegionConfiguration({})
+        interval = random.randint(1, 60)
+        config.status_flush_interval = interval
+        self.assertEqual(interval, config.status_flush_interval)
+        # It's also stored in the configuration database.
+        self.assertEqual({"status_flush_interval": interval}, config.store)
+
+
+class TestRegionConfigurationScriptOutputOptions(MAASTestCase):
+    """Tests for the script output options in `RegionConfiguration`."""
+
+    def test_default(self):
+        config = RegionConfiguration({})
+        self.assertEqual("database", config.script_output_store)
+
+    def test_set_and_get(self):
+        config = RegionConfiguration({})
+        config.script_output_store = "directory"
+        self.assertEqual("directory", config.script_output_store)
+        # It's also stored in the configuration database.
+        self.assertEqual({"script_output_store": "directory"}, config.store)
+
+    def test_rejects_unknown_store(self):
+        config = RegionConfiguration({})
+        with ExpectedException(formencode.api.Invalid):
+            config.script_output_store = factory.make_name("store")
+
+
 class TestRegionConfigurationDebugOptions(MAASTestCase):
     """Tests for the debug options in `RegionConfiguration`."""
 
@@ -0,0 +1,151 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for `maasserver.event_partitions`."""
+
+
+from datetime import date, datetime
+
+from django.db import connection
+from twisted.internet.defer import maybeDeferred
+from twisted.internet.task import Clock
+
+from maasserver import event_partitions
+from maasserver.event_partitions import (
+    _add_months,
+    drop_expired_event_partitions,
+    ensure_event_partitions,
+    EventPartitionService,
+    get_event_partitions,
+    maintain_event_partitions,
+)
+from maasserver.models import Config, Event
+from maasserver.testing.factory import factory
+from maasserver.testing.testcase import MAASServerTestCase
+from maastesting.matchers import MockCalledOnceWith, MockNotCalled
+
+
+def get_partition_event_ids(name):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT id FROM %s" % name)
+        return [id for id, in cursor.fetchall()]
+
+
+class TestEventPartitions(MAASServerTestCase):
+    def make_Event(self, created):
+        event = factory.make_Event()
+        Event.objects.filter(id=event.id).update(created=created)
+        return event
+
+    def get_next_month(self):
+        """Return the first month after all existing partitions."""
+        return _add_months(max(get_event_partitions().values()), 1)
+
+    def test_get_event_partitions_includes_migrated_table(self):
+        partitions = get_event_partitions()
+        self.assertNotEqual({}, partitions)
+        for name, month in partitions.items():
+            self.assertEqual(
+                "maasserver_event_p%04d%02d" % (month.year, month.month), name
+            )
+            self.assertEqual(1, month.day)
+
+    def test_ensure_creates_upcoming_partitions(self):
+        month = self.get_next_month()
+        created = ensure_event_partitions(month.replace(day=15))
+        expected = [
+            "maasserver_event_p%04d%02d" % (m.year, m.month)
+            for m in (month, _add_months(month, 1), _add_months(month, 2))
+        ]
+        self.assertEqual(expected, created)
+        self.assertLessEqual(set(expected), set(get_event_partitions()))
+
+    def test_ensure_skips_existing_partitions(self):
+        month = self.get_next_month()
+        ensure_event_partitions(month)
+        self.assertEqual([], ensure_event_partitions(month))
+        later = _add_months(month, 10)
+        self.assertEqual(
+            "maasserver_event_p%04d%02d" % (later.year, later.month),
+            ensure_event_partitions(later)[0],
+        )
+
+    def test_ensure_moves_events_from_default_partition(self):
+        month = self.get_next_month()
+        event = self.make_Event(datetime(month.year, month.month, 3))
+        self.assertEqual(
+            [event.id], get_partition_event_ids("maasserver_event_default")
+        )
+        [name, *_] = ensure_event_partitions(month)
+        self.assertEqual(
+            [], get_partition_event_ids("maasserver_event_default")
+        )
+        self.assertEqual([event.id], get_partition_event_ids(name))
+        self.assertTrue(Event.objects.filter(id=event.id).exists())
+
+    def test_drop_does_nothing_without_retention(self):
+        month = self.get_next_month()
+        ensure_event_partitions(month)
+        self.assertEqual(
+            [], drop_expired_event_partitions(0, _add_months(month, 24))
+        )
+
+    def test_drop_drops_partitions_past_retention(self):
+        month = self.get_next_month()
+        first, second, third = ensure_event_partitions(month)
+        old_event = self.make_Event(datetime(month.year, month.month, 3))
+        new_event = self.make_Event(
+            datetime(
+                _add_months(month, 2).year, _add_months(month, 2).month, 3
+            )
+        )
+        # All of the second month has to be past retention before its
+        # partition is dropped.
+        today = _add_months(month, 2).replace(day=10)
+        dropped = drop_expired_event_partitions(35, today)
+        self.assertIn(first, dropped)
+        self.assertNotIn(second, dropped)
+        self.assertNotIn(third, dropped)
+        self.assertNotIn(first, get_event_partitions())
+        self.assertFalse(Event.objects.filter(id=old_event.id).exists())
+        self.assertTrue(Event.objects.filter(id=new_event.id).exists())
+
+    def test_drop_deletes_expired_events_from_default_partition(self):
+        month = self.get_next_month()
+        old_event = self.make_Event(datetime(month.year, month.month, 3))
+        new_event = self.make_Event(datetime(month.year, month.month, 20))
+        drop_expired_event_partitions(5, date(month.year, month.month, 15))
+        self.assertFalse(Event.objects.filter(id=old_event.id).exists())
+        self.assertTrue(Event.objects.filter(id=new_event.id).exists())
+
+    def test_maintain_uses_retention_config(self):
+        Config.objects.set_config("event_retention_days", 30)
+        ensure = self.patch(event_partitions, "ensure_event_partitions")
+        ensure.return_value = []
+        drop = self.patch(event_partitions, "drop_expired_event_partitions")
+        drop.return_value = []
+        maintain_event_partitions()
+        self.assertThat(ensure, MockCalledOnceWith())
+        self.assertThat(drop, MockCalledOnceWith(30))
+
+
+class TestEventPartitionService(MAASServerTestCase):
+    def test_init_with_default_interval(self):
+        maintain = self.patch(event_partitions, "maintain_event_partitions")
+        self.patch(event_partitions, "deferToDatabase", maybeDeferred)
+
+        service = EventPartitionService()
+        service.clock = Clock()
+
+        interval = 24 * 60 * 60  # seconds.
+        self.assertEqual(service.step, interval)
+        self.assertThat(maintain, MockNotCalled())
+        service.startService()
+        self.assertThat(maintain, MockCalledOnceWith())
+        service.clock.advance(interval)
+        self.assertEqual(2, maintain.call_count)
+
+    def test_interval_can_be_set(self):
+        interval = self.getUniqueInteger()
+        service = EventPartitionService(interval)
+        self.assertEqual(interval, service.step)
@@ -16,6 +16,7 @@ from twisted.python.threadable import isInIOThread
 
 from maasserver import (
     bootresources,
+    event_partitions,
     eventloop,
     ipc,
     nonces_cleanup,
@@ -29,11 +30,17 @@ from maasserver import (
 from maasserver.eventloop import DEFAULT_PORT, MAASServices
 from maasserver.prometheus.service import REGION_PROMETHEUS_PORT
 from maasserver.prometheus.stats import PrometheusService
-from maasserver.regiondservices import ntp, service_monitor_service, syslog
+from maasserver.regiondservices import (
+    ntp,
+    service_monitor_service,
+    subnet_index,
+    syslog,
+)
 from maasserver.regiondservices.version_update_check import (
     RegionVersionUpdateCheckService,
 )
 from maasserver.rpc import regionservice
+from maasserver.testing.config import RegionConfigurationFixture
 from maasserver.testing.eventloop import RegionEventLoopFixture
 from maasserver.testing.listener import FakePostgresListenerService
 from maasserver.testing.testcase import MAASServerTestCase
@@ -42,7 +49,7 @@ from maasserver.utils.orm import DisabledDatabaseConnection, transactional
 from maastesting.factory import factory
 from maastesting.matchers import MockCallsMatch
 from maastesting.testcase import MAASTestCase
-from metadataserver import api_twisted
+from metadataserver import api_twisted, outputstore
 from provisioningserver.utils.twisted import asynchronous
 
 wait_for_reactor = wait_for(30)  # 30 seconds.
@@ -378,6 +385,34 @@ class TestFactories(MAASServerTestCase):
             eventloop.loop.factories["nonce-cleanup"]["only_on_master"]
         )
 
+    def test_make_EventPartitionService(self):
+        service = eventloop.make_EventPartitionService()
+        self.assertThat(
+            service, IsInstance(event_partitions.EventPartitionService)
+        )
+        # It is registered as a factory in RegionEventLoop.
+        self.assertIs(
+            eventloop.make_EventPartitionService,
+            eventloop.loop.factories["event-partitions"]["factory"],
+        )
+        self.assertTrue(
+            eventloop.loop.factories["event-partitions"]["only_on_master"]
+        )
+
+    def test_make_ScriptOutputPruneService(self):
+        service = eventloop.make_ScriptOutputPruneService()
+        self.assertThat(
+            service, IsInstance(outputstore.ScriptOutputPruneService)
+        )
+        # It is registered as a factory in RegionEventLoop.
+        self.assertIs(
+            eventloop.make_ScriptOutputPruneService,
+            eventloop.loop.factories["script-output-prune"]["factory"],
+        )
+        self.assertTrue(
+            eventloop.loop.factories["script-output-prune"]["only_on_master"]
+        )
+
     def test_make_StatusMonitorService(self):
         service = eventloop.make_StatusMonitorService()
         self.assertThat(
@@ -497,6 +532,25 @@ class TestFactories(MAASServerTestCase):
             eventloop.loop.factories["rack-controller"]["only_on_master"]
         )
 
+    def test_make_SubnetIndexService(self):
+        service = eventloop.make_SubnetIndexService(
+            FakePostgresListenerService()
+        )
+        self.assertIsInstance(service, subnet_index.SubnetIndexService)
+        # It is registered as a factory in RegionEventLoop.
+        self.assertIs(
+            eventloop.make_SubnetIndexService,
+            eventloop.loop.factories["subnet-index"]["factory"],
+        )
+        # Has a dependency of postgres-listener.
+        self.assertEqual(
+            ["postgres-listener-worker"],
+            eventloop.loop.factories["subnet-index"]["requires"],
+        )
+        self.assertFalse(
+            eventloop.loop.factories["subnet-index"]["only_on_master"]
+        )
+
     def test_make_ServiceMonitorService(self):
         service = eventloop.make_ServiceMonitorService()
         self.assertThat(
@@ -515,17 +569,18 @@ class TestFactories(MAASServerTestCase):
         )
 
     def test_make_StatusWorkerService(self):
-        service = eventloop.make_StatusWorkerService(sentinel.dbtasks)
+        self.useFixture(RegionConfigurationFixture(status_flush_interval=3))
+        service = eventloop.make_StatusWorkerService()
         self.assertThat(service, IsInstance(api_twisted.StatusWorkerService))
+        # The flush interval comes from the region configuration.
+        self.assertEqual(3, service.step)
         # It is registered as a factory in RegionEventLoop.
         self.assertIs(
             eventloop.make_StatusWorkerService,
             eventloop.loop.factories["status-worker"]["factory"],
         )
-        # Has a dependency of database-tasks.
         self.assertEqual(
-            ["database-tasks"],
-            eventloop.loop.factories["status-worker"]["requires"],
+            [], eventloop.loop.factories["status-worker"]["requires"]
         )
         self.assertFalse(
             eventloop.loop.factories["status-worker"]["only_on_master"]
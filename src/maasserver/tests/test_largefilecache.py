@@ -0,0 +1,126 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for `maasserver.largefilecache`."""
+
+
+import hashlib
+import os
+import time
+from unittest.mock import Mock
+
+from fixtures import EnvironmentVariableFixture
+
+from maasserver.largefilecache import LargeFileCache
+from maastesting.factory import factory
+from maastesting.testcase import MAASTestCase
+
+
+class TestLargeFileCache(MAASTestCase):
+    def make_cache(self):
+        return LargeFileCache(os.path.join(self.make_dir(), "cache"))
+
+    def make_content(self):
+        chunks = [factory.make_bytes(size=100) for _ in range(3)]
+        content = b"".join(chunks)
+        return chunks, hashlib.sha256(content).hexdigest(), len(content)
+
+    def test_defaults_to_maas_data_path(self):
+        self.useFixture(
+            EnvironmentVariableFixture("MAAS_DATA", "/var/lib/maas-test")
+        )
+        self.assertEqual(
+            "/var/lib/maas-test/largefile-cache", LargeFileCache().path
+        )
+
+    def test_get_file_path_returns_None_when_not_cached(self):
+        cache = self.make_cache()
+        self.assertIsNone(cache.get_file_path(factory.make_name("sha256")))
+
+    def test_cache_stream_passes_stream_through(self):
+        cache = self.make_cache()
+        chunks, sha256, size = self.make_content()
+        self.assertEqual(
+            chunks, list(cache.cache_stream(sha256, size, iter(chunks)))
+        )
+
+    def test_cache_stream_caches_content_read_to_the_end(self):
+        cache = self.make_cache()
+        chunks, sha256, size = self.make_content()
+        list(cache.cache_stream(sha256, size, iter(chunks)))
+        with open(cache.get_file_path(sha256), "rb") as stream:
+            self.assertEqual(b"".join(chunks), stream.read())
+        self.assertEqual([sha256], os.listdir(cache.path))
+
+    def test_cache_stream_drops_content_not_read_to_the_end(self):
+        cache = self.make_cache()
+        chunks, sha256, size = self.make_content()
+        stream = cache.cache_stream(sha256, size, iter(chunks))
+        next(stream)
+        stream.close()
+        self.assertIsNone(cache.get_file_path(sha256))
+        self.assertEqual([], os.listdir(cache.path))
+
+    def test_cache_stream_drops_content_with_wrong_sha256(self):
+        cache = self.make_cache()
+        chunks, _, size = self.make_content()
+        sha256 = hashlib.sha256(b"other").hexdigest()
+        list(cache.cache_stream(sha256, size, iter(chunks)))
+        self.assertIsNone(cache.get_file_path(sha256))
+        self.assertEqual([], os.listdir(cache.path))
+
+    def test_cache_stream_drops_content_with_wrong_size(self):
+        cache = self.make_cache()
+        chunks, sha256, size = self.make_content()
+        list(cache.cache_stream(sha256, size + 1, iter(chunks)))
+        self.assertIsNone(cache.get_file_path(sha256))
+
+    def test_cache_stream_still_streams_if_content_cannot_be_cached(self):
+        path = self.make_file()
+        # The cache directory can't be created under a file.
+        cache = LargeFileCache(os.path.join(path, "cache"))
+        chunks, sha256, size = self.make_content()
+        self.assertEqual(
+            chunks, list(cache.cache_stream(sha256, size, iter(chunks)))
+        )
+        self.assertIsNone(cache.get_file_path(sha256))
+
+    def test_close_closes_stream(self):
+        cache = self.make_cache()
+        stream = Mock()
+        cache.cache_stream(factory.make_name("sha256"), 0, stream).close()
+        stream.close.assert_called_once_with()
+
+    def test_discard_removes_cached_content(self):
+        cache = self.make_cache()
+        chunks, sha256, size = self.make_content()
+        list(cache.cache_stream(sha256, size, iter(chunks)))
+        cache.discard(sha256)
+        self.assertIsNone(cache.get_file_path(sha256))
+        # Discarding again is fine.
+        cache.discard(sha256)
+
+    def test_prune_keeps_only_given_content(self):
+        cache = self.make_cache()
+        sha256s = []
+        for _ in range(3):
+            chunks, sha256, size = self.make_content()
+            list(cache.cache_stream(sha256, size, iter(chunks)))
+            sha256s.append(sha256)
+        cache.prune(sha256s[:2])
+        self.assertCountEqual(sha256s[:2], os.listdir(cache.path))
+
+    def test_prune_removes_stale_temporary_files(self):
+        cache = self.make_cache()
+        os.makedirs(cache.path)
+        fresh = factory.make_file(cache.path, name=".fresh")
+        stale = factory.make_file(cache.path, name=".stale")
+        stale_time = time.time() - cache.stale_temporary_age - 1
+        os.utime(stale, (stale_time, stale_time))
+        cache.prune([])
+        self.assertEqual([os.path.basename(fresh)], os.listdir(cache.path))
+
+    def test_prune_does_nothing_without_cache(self):
+        cache = self.make_cache()
+        cache.prune([])
+        self.assertFalse(os.path.exists(cache.path))
@@ -44,6 +44,7 @@ from maasserver.utils.orm import transactional
 from maasserver.utils.threads import deferToDatabase
 from maastesting.matchers import (
     DocTestMatches,
+    IsFiredDeferred,
     MockCalledOnceWith,
     MockCalledWith,
     MockCallsMatch,
@@ -522,7 +523,124 @@ class TestPostgresListenerService(MAASServerTestCase):
         self.patch(listener, "handleNotify")
 
         listener.doRead()
-        self.assertCountEqual(listener.notifications, set(notifications))
+        self.assertEqual(
+            [
+                (
+                    (notify.channel.split("_", 1)[0], notify.payload),
+                    notify.channel,
+                )
+                for notify in notifications
+            ],
+            [
+                (key, channel)
+                for key, (channel, _) in listener.notifications.items()
+            ],
+        )
+
+    def test_doRead_coalesces_actions_for_the_same_payload(self):
+        listener = PostgresListenerService()
+        payload = factory.make_name("payload")
+        other_payload = factory.make_name("payload")
+        connection = self.patch(listener, "connection")
+        connection.connection.poll.return_value = None
+        connection.connection.notifies = [
+            FakeNotify(channel="node_create", payload=payload),
+            FakeNotify(channel="node_update", payload=other_payload),
+            FakeNotify(channel="node_update", payload=payload),
+            FakeNotify(channel="node_delete", payload=payload),
+        ]
+        self.patch(listener, "handleNotify")
+        listener.doRead()
+        self.assertEqual(
+            [
+                (("node", payload), "node_delete"),
+                (("node", other_payload), "node_update"),
+            ],
+            [
+                (key, channel)
+                for key, (channel, _) in listener.notifications.items()
+            ],
+        )
+
+    def test_handleNotifies_handles_queued_notifications_in_order(self):
+        listener = PostgresListenerService()
+        handleNotify = self.patch(listener, "handleNotify")
+        handleNotify.return_value = None
+        listener.notifications[("node", "a")] = ("node_update", 0)
+        listener.notifications[("machine", "b")] = ("machine_create", 0)
+        listener.handleNotifies()
+        self.assertEqual(
+            [
+                call(("node_update", "a"), clock=reactor, received=0),
+                call(("machine_create", "b"), clock=reactor, received=0),
+            ],
+            handleNotify.call_args_list,
+        )
+        self.assertEqual(0, len(listener.notifications))
+
+    def test_handleNotify_limits_concurrency_per_handler(self):
+        listener = PostgresListenerService()
+        listener.HANDLER_CONCURRENCY = 2
+        handled = []
+
+        def handler(action, payload):
+            d = Deferred()
+            handled.append((payload, d))
+            return d
+
+        listener.listeners["node"] = [handler]
+        ds = [listener.handleNotify(("node_update", str(i))) for i in range(3)]
+        # Only two notifications are handed to the handler at once, and
+        # handling the third has to wait for one of them to finish.
+        self.assertEqual(["0", "1"], [payload for payload, _ in handled])
+        self.assertThat(ds[0], IsFiredDeferred())
+        self.assertThat(ds[1], IsFiredDeferred())
+        self.assertThat(ds[2], Not(IsFiredDeferred()))
+        handled[0][1].callback(None)
+        self.assertEqual(["0", "1", "2"], [payload for payload, _ in handled])
+        self.assertThat(ds[2], IsFiredDeferred())
+
+    def test_handleNotify_measures_lag_when_handler_starts(self):
+        listener = PostgresListenerService()
+        listener.HANDLER_CONCURRENCY = 1
+        handling = []
+
+        def handler(action, payload):
+            d = Deferred()
+            handling.append(d)
+            return d
+
+        listener.listeners["node"] = [handler]
+        update = self.patch(listener_module.PROMETHEUS_METRICS, "update")
+        listener.handleNotify(("node_update", "1"), received=0)
+        listener.handleNotify(("node_update", "2"), received=0)
+        lag_calls = [
+            call_args
+            for call_args in update.call_args_list
+            if call_args[0][0] == "maas_db_notify_processing_lag"
+        ]
+        # The second notification is still waiting for the handler.
+        self.assertEqual(1, len(lag_calls))
+        handling[0].callback(None)
+        lag_calls = [
+            call_args
+            for call_args in update.call_args_list
+            if call_args[0][0] == "maas_db_notify_processing_lag"
+        ]
+        self.assertEqual(2, len(lag_calls))
+        self.assertEqual({"channel": "node"}, lag_calls[-1][1]["labels"])
+
+    def test_handleNotify_releases_handler_after_failure(self):
+        listener = PostgresListenerService()
+        listener.HANDLER_CONCURRENCY = 1
+        handler = Mock(side_effect=ZeroDivisionError())
+        listener.listeners["node"] = [handler]
+        with TwistedLoggerFixture() as logger:
+            listener.handleNotify(("node_update", "1"))
+            d = listener.handleNotify(("node_update", "2"))
+        self.assertThat(d, IsFiredDeferred())
+        self.assertEqual(2, handler.call_count)
+        self.assertIn("Failure while handling notification", logger.output)
 
     @wait_for_reactor
     @inlineCallbacks
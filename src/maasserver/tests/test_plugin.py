@@ -121,6 +121,7 @@ class TestRegionWorkerServiceMaker(TestServiceMaker):
             "database-tasks",
             "postgres-listener-worker",
             "rack-controller",
+            "subnet-index",
             "rpc",
             "status-worker",
             "web",
@@ -158,6 +159,7 @@ class TestRegionWorkerServiceMaker(TestServiceMaker):
             "database-tasks",
             "postgres-listener-worker",
             "rack-controller",
+            "subnet-index",
             "rpc",
             "status-worker",
             "web",
@@ -244,6 +246,8 @@ class TestRegionMasterServiceMaker(TestServiceMaker):
         expected_services = {
             "region-controller",
             "nonce-cleanup",
+            "event-partitions",
+            "script-output-prune",
             "dns-publication-cleanup",
             "service-monitor",
             "status-monitor",
@@ -360,6 +364,7 @@ class TestRegionAllInOneServiceMaker(TestServiceMaker):
             "database-tasks",
             "postgres-listener-worker",
             "rack-controller",
+            "subnet-index",
             "rpc",
             "service-monitor",
             "status-worker",
@@ -369,6 +374,8 @@ class TestRegionAllInOneServiceMaker(TestServiceMaker):
             # Master services.
             "region-controller",
             "nonce-cleanup",
+            "event-partitions",
+            "script-output-prune",
             "dns-publication-cleanup",
             "status-monitor",
             "stats",
@@ -20,7 +20,7 @@ from twisted.internet.threads import blockingCallFromThread
 from apiclient.creds import convert_tuple_to_string
 from maasserver import populate_tags as populate_tags_module
 from maasserver import rpc as rpc_module
-from maasserver.models import Node, Tag
+from maasserver.models import Node, NodeDetailsCache, Tag
 from maasserver.models import tag as tag_module
 from maasserver.models.user import (
     create_auth_token,
@@ -299,6 +299,42 @@ class TestPopulateTagsEndToNearlyEnd(MAASTransactionServerTestCase):
                 ),
             )
 
+    def test_sends_details_versions_to_clusters(self):
+        rpc_fixture = self.prepare_live_rpc()
+        rack_controllers = [factory.make_RackController() for _ in range(2)]
+        protocols = []
+        for rack in rack_controllers:
+            protocol = rpc_fixture.makeCluster(rack, EvaluateTag)
+            protocol.EvaluateTag.side_effect = always_succeed_with({})
+            protocols.append(protocol)
+        node = factory.make_Node()
+        make_lshw_result(node, b"<foo/>")
+        tag = factory.make_Tag(populate=False)
+
+        [d] = populate_tags(tag)
+
+        wait_for_populate = asynchronous(lambda: d)
+        wait_for_populate().wait(10)
+
+        nodes_sent = [
+            node_sent
+            for protocol in protocols
+            for node_sent in protocol.EvaluateTag.call_args[1]["nodes"]
+        ]
+        self.assertCountEqual(
+            [
+                {
+                    "system_id": cache.node.system_id,
+                    "details_version": cache.version,
+                }
+                for cache in NodeDetailsCache.objects.all()
+            ],
+            nodes_sent,
+        )
+        self.assertEqual(Node.objects.count(), len(nodes_sent))
+        # The documents are merged by the rack controllers, not here.
+        self.assertIsNone(NodeDetailsCache.objects.get(node=node).document)
+
 
 class TestPopulateTagsInRegion(MAASTransactionServerTestCase):
     """Tests for populating tags in the region.
@@ -395,6 +431,29 @@ class TestPopulateTagsForSingleNode(MAASServerTestCase):
             ["foo"], [tag.name for tag in node.tags.all()]
         )
 
+    def test_only_if_changed_skips_nodes_whose_details_are_unchanged(self):
+        node = factory.make_Node()
+        script_result = make_lshw_result(node, b"<foo/>")
+        tags = [factory.make_Tag("foo", "/foo", populate=False)]
+        populate_tags_for_single_node(tags, node, only_if_changed=True)
+        self.assertEqual(["foo"], [tag.name for tag in node.tags.all()])
+        node.tags.clear()
+        populate_tags_for_single_node(tags, node, only_if_changed=True)
+        self.assertEqual([], list(node.tags.all()))
+        script_result.stdout = b"<foo><bar/></foo>"
+        script_result.save()
+        populate_tags_for_single_node(tags, node, only_if_changed=True)
+        self.assertEqual(["foo"], [tag.name for tag in node.tags.all()])
+
+    def test_evaluates_unchanged_nodes_by_default(self):
+        node = factory.make_Node()
+        make_lshw_result(node, b"<foo/>")
+        tags = [factory.make_Tag("foo", "/foo", populate=False)]
+        populate_tags_for_single_node(tags, node, only_if_changed=True)
+        node.tags.clear()
+        populate_tags_for_single_node(tags, node)
+        self.assertEqual(["foo"], [tag.name for tag in node.tags.all()])
+
 
 class TestPopulateTagForMultipleNodes(MAASServerTestCase):
     def test_updates_nodes_with_tag(self):
@@ -407,3 +466,16 @@ class TestPopulateTagForMultipleNodes(MAASServerTestCase):
             [node.hostname for node in nodes[0:2]],
             [node.hostname for node in Node.objects.filter(tags__name="bar")],
         )
+
+    def test_updates_nodes_whose_details_changed(self):
+        nodes = [factory.make_Node() for _ in range(2)]
+        script_results = [make_lldp_result(node, b"<bar/>") for node in nodes]
+        tag = factory.make_Tag("bar", "//lldp:bar", populate=False)
+        populate_tag_for_multiple_nodes(tag, nodes)
+        script_results[0].stdout = b"<baz/>"
+        script_results[0].save()
+        populate_tag_for_multiple_nodes(tag, nodes)
+        self.assertCountEqual(
+            [nodes[1].hostname],
+            [node.hostname for node in Node.objects.filter(tags__name="bar")],
+        )
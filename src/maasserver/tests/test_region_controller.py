@@ -215,6 +215,37 @@ class TestRegionControllerService(MAASServerTestCase):
             MockCalledOnceWith("Reloaded DNS configuration; regiond started."),
         )
 
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_process_updates_dirty_zones_after_first_update(self):
+        service = self.make_service(sentinel.listener)
+        service.needsDNSUpdate = True
+        service.previousSerial = "%0.10d" % random.randint(1, 1000)
+        dns_result = (
+            "%0.10d" % random.randint(1001, 2000),
+            True,
+            [factory.make_name("domain")],
+        )
+        mock_dns_update_all_zones = self.patch(
+            region_controller, "dns_update_all_zones"
+        )
+        mock_dns_update_dirty_zones = self.patch(
+            region_controller, "dns_update_dirty_zones"
+        )
+        mock_dns_update_dirty_zones.return_value = dns_result
+        mock_check_serial = self.patch(service, "_checkSerial")
+        mock_check_serial.return_value = succeed(dns_result)
+        self.patch(service, "_getReloadReasons").return_value = []
+        previous_serial = service.previousSerial
+        service.startProcessing()
+        yield service.processingDefer
+        self.assertThat(mock_dns_update_all_zones, MockNotCalled())
+        self.assertThat(
+            mock_dns_update_dirty_zones, MockCalledOnceWith(previous_serial)
+        )
+        self.assertThat(mock_check_serial, MockCalledOnceWith(dns_result))
+        self.assertEqual(dns_result[0], service.previousSerial)
+
     @wait_for_reactor
     @inlineCallbacks
     def test_process_zones_kills_bind_on_failed_reload(self):
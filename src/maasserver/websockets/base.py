@@ -179,6 +179,12 @@ class Handler(metaclass=HandlerMetaclass):
         self.user = user
         self.cache = cache
         self.request = request
+        # Set while a notification is processed to a dict that is shared
+        # between the handlers for all connections, so that what the
+        # notification is about is only fetched once for each user, and
+        # only dehydrated once for all of them; see `_get_listen_object` and
+        # `_get_listen_data`.
+        self.notify_cache = None
         # Holds a set of all pks that the client has loaded and has on their
         # end of the connection. This is used to inform the client of the
         # correct notifications based on what items the client has.
@@ -188,6 +194,16 @@ class Handler(metaclass=HandlerMetaclass):
     def full_dehydrate(self, obj, for_list=False):
         """Convert the given object into a dictionary.
 
+        :param for_list: True when the object is being converted to belong
+            in a list.
+        """
+        data = self.shared_dehydrate(obj, for_list=for_list)
+        return self.dehydrate_for_user(obj, data, for_list=for_list)
+
+    def shared_dehydrate(self, obj, for_list=False):
+        """Convert the given object into a dictionary, leaving out what
+        depends on the user; see `dehydrate_for_user`.
+
         :param for_list: True when the object is being converted to belong
             in a list.
         """
@@ -224,9 +240,6 @@ class Handler(metaclass=HandlerMetaclass):
                 else:
                     data[field_name] = field.value_to_string(obj)
 
-        # Add permissions that can be performed on this object.
-        data = self._add_permissions(obj, data)
-
         # Return the data after the final dehydrate.
         return self.dehydrate(obj, data, for_list=for_list)
 
@@ -240,6 +253,20 @@ class Handler(metaclass=HandlerMetaclass):
         """
         return data
 
+    def dehydrate_for_user(self, obj, data, for_list=False):
+        """Add what depends on the user to `data`.
+
+        `data` may have been dehydrated for another user, and its values
+        may be shared with what other users are sent, so only set keys.
+
+        :param obj: object being dehydrated.
+        :param data: dictionary to place extra info.
+        :param for_list: True when the object is being converted to belong
+            in a list.
+        """
+        # Add permissions that can be performed on this object.
+        return self._add_permissions(obj, data)
+
     def _is_foreign_key_for(self, field_name, obj, value):
         """Given the specified field name for the specified object, returns
         True if the specified value is a foreign key; otherwise returns False.
@@ -615,11 +642,7 @@ class Handler(metaclass=HandlerMetaclass):
             else:
                 return None
 
-        self.user.refresh_from_db()
-        try:
-            obj = self.listen(channel, action, pk)
-        except HandlerDoesNotExistError:
-            obj = None
+        obj = self._get_listen_object(channel, action, pk)
         if action == "create" and obj is not None:
             if pk in self.cache["loaded_pks"]:
                 # The user already knows about this node, so its not a create
@@ -660,7 +683,7 @@ class Handler(metaclass=HandlerMetaclass):
             return (
                 self._meta.handler_name,
                 action,
-                self.full_dehydrate(obj, for_list=False),
+                self._get_listen_data(obj, for_list=False),
             )
         else:
             # Not active so only send the data like it was comming from
@@ -668,8 +691,51 @@ class Handler(metaclass=HandlerMetaclass):
             return (
                 self._meta.handler_name,
                 action,
-                self.full_dehydrate(obj, for_list=True),
+                self._get_listen_data(obj, for_list=True),
+            )
+
+    def _get_listen_object(self, channel, action, pk):
+        """Return the object for a notification, or None if there isn't one
+        that the user can see.
+
+        When `notify_cache` is set the object is only fetched once for each
+        user of the handlers that share it, as what the user can see decides
+        whether there's an object.
+        """
+        key = ("listen", self.user.id, channel, action, pk)
+        if self.notify_cache is not None and key in self.notify_cache:
+            return self.notify_cache[key]
+        self.user.refresh_from_db()
+        try:
+            obj = self.listen(channel, action, pk)
+        except HandlerDoesNotExistError:
+            obj = None
+        if self.notify_cache is not None:
+            self.notify_cache[key] = obj
+        return obj
+
+    def _get_listen_data(self, obj, for_list):
+        """Return `obj` dehydrated for a notification.
+
+        When `notify_cache` is set what doesn't depend on the user is only
+        dehydrated once for all the handlers that share it, whatever their
+        user; what does is added to a copy of that for each handler.
+        """
+        if self.notify_cache is None:
+            return self._dehydrate_for_listen(obj, for_list)
+        key = ("dehydrate", type(self), getattr(obj, self._meta.pk), for_list)
+        if key not in self.notify_cache:
+            self.notify_cache[key] = self._dehydrate_for_listen(
+                obj, for_list, shared=True
             )
+        # `dehydrate_for_user` only sets keys, so a shallow copy will do.
+        data = dict(self.notify_cache[key])
+        return self.dehydrate_for_user(obj, data, for_list=for_list)
+
+    def _dehydrate_for_listen(self, obj, for_list, shared=False):
+        if shared:
+            return self.shared_dehydrate(obj, for_list=for_list)
+        return self.full_dehydrate(obj, for_list=for_list)
 
     def listen(self, channel, action, pk):
         """Called when the handler listens for events on channels with
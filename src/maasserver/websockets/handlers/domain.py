@@ -49,6 +49,17 @@ class DomainHandler(TimestampedModelHandler, AdminOnlyMixin):
         listen_channels = ["domain"]
 
     def dehydrate(self, domain, data, for_list=False):
+        if domain.is_default():
+            data["displayname"] = "%s (default)" % data["name"]
+            data["is_default"] = True
+        else:
+            data["displayname"] = data["name"]
+            data["is_default"] = False
+        return data
+
+    def dehydrate_for_user(self, domain, data, for_list=False):
+        """Add the resource records that the user can see to `data`."""
+        data = super().dehydrate_for_user(domain, data, for_list=for_list)
         rrsets = domain.render_json_for_related_rrdata(
             for_list=for_list, user=self.user
         )
@@ -58,12 +69,6 @@ class DomainHandler(TimestampedModelHandler, AdminOnlyMixin):
             {rr["system_id"] for rr in rrsets if rr["system_id"] is not None}
         )
         data["resource_count"] = len(rrsets)
-        if domain.is_default():
-            data["displayname"] = "%s (default)" % data["name"]
-            data["is_default"] = True
-        else:
-            data["displayname"] = data["name"]
-            data["is_default"] = False
         return data
 
     def _get_domain_or_permission_error(self, params):
@@ -4,12 +4,16 @@
 """The machine handler for the WebSocket connection."""
 
 
+import base64
+import binascii
 from functools import partial
+import json
 import logging
 from operator import itemgetter
 
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
-from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 
 from maasserver.enum import (
     BMC_TYPE,
@@ -17,6 +21,7 @@ from maasserver.enum import (
     IPADDRESS_TYPE,
     NODE_STATUS,
     NODE_STATUS_CHOICES,
+    NODE_STATUS_CHOICES_DICT,
     POWER_STATE,
 )
 from maasserver.exceptions import NodeActionError, NodeStateViolation
@@ -65,6 +70,7 @@ from maasserver.models import (
     VolumeGroup,
 )
 from maasserver.node_action import compile_node_actions
+from maasserver.node_constraint_filter_forms import ReadNodesForm
 from maasserver.permissions import NodePermission
 from maasserver.storage_layouts import (
     StorageLayoutError,
@@ -90,6 +96,24 @@ from provisioningserver.utils.twisted import asynchronous
 log = LegacyLogger()
 
 
+# The keys that `MachineHandler.search` can sort and group machines by,
+# mapped to the expressions that they sort and group on. Missing values sort
+# as empty strings, so that they can be compared when paginating.
+SEARCH_KEYS = {
+    "architecture": Coalesce("architecture", Value("")),
+    "cpu_count": F("cpu_count"),
+    "domain": Coalesce("domain__name", Value("")),
+    "hostname": F("hostname"),
+    "memory": F("memory"),
+    "owner": Coalesce("owner__username", Value("")),
+    "pool": Coalesce("pool__name", Value("")),
+    "power_state": F("power_state"),
+    "status": F("status"),
+    "system_id": F("system_id"),
+    "zone": F("zone__name"),
+}
+
+
 class MachineHandler(NodeHandler):
     class Meta(NodeHandler.Meta):
         abstract = False
@@ -198,6 +222,7 @@ class MachineHandler(NodeHandler):
             "get_latest_failed_testing_script_results",
             "get_workload_annotations",
             "set_workload_annotations",
+            "search",
         ]
         form = AdminMachineWithMACAddressesForm
         exclude = [
@@ -263,6 +288,144 @@ class MachineHandler(NodeHandler):
             from_nodes=super().get_queryset(for_list=for_list),
         )
 
+    def search(self, params):
+        """List a page of the machines that match a filter.
+
+        Unlike `list`, only the machines on the requested page are loaded
+        and dehydrated. Pages are found with a cursor rather than an offset,
+        so that the cost of a page doesn't depend on how far into the list
+        it is.
+
+        :param filter: Optional constraints that machines must match, as
+            accepted by `ReadNodesForm`.
+        :param sort_key: One of `SEARCH_KEYS` to sort by; `hostname` by
+            default.
+        :param sort_direction: `ascending` (the default) or `descending`.
+        :param group_key: Optional key from `SEARCH_KEYS` to group machines
+            by. Machines are sorted by group first.
+        :param limit: Maximum number of machines to return; 50 by default.
+        :param cursor: The `next_cursor` returned with the previous page.
+        :return: A dict with the dehydrated machines as `items`, the number
+            of matching machines as `count`, the `value`, display `name` and
+            `count` of each group as `groups` (if grouping), and the cursor
+            for the next page as `next_cursor`, or None if this is the last
+            page.
+        """
+        form = ReadNodesForm(data=params.get("filter", {}))
+        if not form.is_valid():
+            raise HandlerValidationError(form.errors)
+        sort_key = params.get("sort_key", "hostname")
+        group_key = params.get("group_key")
+        sort_direction = params.get("sort_direction", "ascending")
+        limit = params.get("limit", 50)
+        errors = {}
+        if sort_key not in SEARCH_KEYS:
+            errors["sort_key"] = ["Unknown sort key: %s" % sort_key]
+        if group_key is not None and group_key not in SEARCH_KEYS:
+            errors["group_key"] = ["Unknown group key: %s" % group_key]
+        if sort_direction not in ("ascending", "descending"):
+            errors["sort_direction"] = ["Must be 'ascending' or 'descending'."]
+        if not isinstance(limit, int) or limit < 1:
+            errors["limit"] = ["Must be a positive integer."]
+        if errors:
+            raise HandlerValidationError(errors)
+
+        nodes = Machine.objects.get_nodes(self.user, NodePermission.view)
+        nodes, _, _ = form.filter_nodes(nodes)
+        # Filtering, sorting and counting are done over the bare machines,
+        # leaving the joins and prefetching needed for dehydration to the
+        # machines on the page.
+        machines = Machine.objects.filter(id__in=nodes.values("id"))
+        result = {"count": machines.count()}
+        if group_key is not None:
+            machines = machines.annotate(group_value=SEARCH_KEYS[group_key])
+            groups = (
+                machines.values("group_value")
+                .annotate(count=Count("id"))
+                .order_by("group_value")
+            )
+            result["groups"] = [
+                {
+                    "value": group["group_value"],
+                    "name": self._get_group_name(
+                        group_key, group["group_value"]
+                    ),
+                    "count": group["count"],
+                }
+                for group in groups
+            ]
+        descending = sort_direction == "descending"
+        machines = machines.annotate(sort_value=SEARCH_KEYS[sort_key])
+        ordering = ["-sort_value" if descending else "sort_value", "id"]
+        fields = ["id", "sort_value"]
+        if group_key is not None:
+            ordering.insert(0, "group_value")
+            fields.append("group_value")
+        if params.get("cursor") is not None:
+            machines = machines.filter(
+                self._get_cursor_filter(
+                    params["cursor"], descending, group_key is not None
+                )
+            )
+        page = list(
+            machines.order_by(*ordering).values_list(*fields)[: limit + 1]
+        )
+        if len(page) > limit:
+            page = page[:limit]
+            result["next_cursor"] = self._make_cursor(page[-1])
+        else:
+            result["next_cursor"] = None
+
+        ids = [row[0] for row in page]
+        objs = {
+            obj.id: obj
+            for obj in self.get_queryset(for_list=True).filter(id__in=ids)
+        }
+        objs = [objs[pk] for pk in ids if pk in objs]
+        self._cache_pks(objs)
+        result["items"] = [
+            self.full_dehydrate(obj, for_list=True) for obj in objs
+        ]
+        return result
+
+    def _get_group_name(self, group_key, value):
+        if group_key == "status":
+            return NODE_STATUS_CHOICES_DICT.get(value, value)
+        else:
+            return value
+
+    def _make_cursor(self, row):
+        """Return a cursor for the page after `row`.
+
+        :param row: The id and sort value of the last machine on the page,
+            and its group value when grouping.
+        """
+        return base64.urlsafe_b64encode(json.dumps(row).encode()).decode()
+
+    def _get_cursor_filter(self, cursor, descending, grouped):
+        """Return a filter for the machines after `cursor`."""
+        try:
+            row = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if grouped:
+                pk, sort_value, group_value = row
+            else:
+                pk, sort_value = row
+        except (AttributeError, binascii.Error, TypeError, ValueError):
+            raise HandlerValidationError({"cursor": ["Invalid cursor."]})
+        sort_after = Q(
+            **{
+                "sort_value__lt"
+                if descending
+                else "sort_value__gt": sort_value
+            }
+        ) | Q(sort_value=sort_value, id__gt=pk)
+        if grouped:
+            return Q(group_value__gt=group_value) | (
+                Q(group_value=group_value) & sort_after
+            )
+        else:
+            return sort_after
+
     def dehydrate(self, obj, data, for_list=False):
         """Add extra fields to `data`."""
         data = super().dehydrate(obj, data, for_list=for_list)
@@ -53,6 +53,7 @@ from metadataserver.enum import (
     SCRIPT_STATUS,
     SCRIPT_STATUS_FAILED,
 )
+from metadataserver.models.scriptoutput import ScriptOutput
 from metadataserver.models.scriptresult import ScriptResult
 from metadataserver.models.scriptset import get_status_from_qs
 from provisioningserver.refresh.node_info_scripts import (
@@ -196,7 +197,6 @@ class NodeHandler(TimestampedModelHandler):
     def dehydrate(self, obj, data, for_list=False):
         """Add extra fields to `data`."""
         data["fqdn"] = obj.fqdn
-        data["actions"] = list(compile_node_actions(obj, self.user).keys())
         data["node_type_display"] = obj.get_node_type_display()
         data["link_type"] = NODE_TYPE_TO_LINK_TYPE[obj.node_type]
         data["tags"] = [tag.id for tag in obj.tags.all()]
@@ -433,14 +433,8 @@ class NodeHandler(TimestampedModelHandler):
                     for script_result in commissioning_script_results:
                         if script_result.name == LIST_MODALIASES_OUTPUT_NAME:
                             if script_result.status == SCRIPT_STATUS.PASSED:
-                                # STDOUT is deferred in the cache so load it.
-                                script_result = (
-                                    ScriptResult.objects.filter(
-                                        id=script_result.id
-                                    )
-                                    .only("id", "status", "stdout")
-                                    .first()
-                                )
+                                # STDOUT isn't in the cache, it's loaded
+                                # when it's read.
                                 modaliases = script_result.stdout.decode(
                                     "utf-8"
                                 ).splitlines()
@@ -457,14 +451,18 @@ class NodeHandler(TimestampedModelHandler):
 
         return data
 
+    def dehydrate_for_user(self, obj, data, for_list=False):
+        """Add the actions the user can perform on the node to `data`."""
+        data = super().dehydrate_for_user(obj, data, for_list=for_list)
+        data["actions"] = list(compile_node_actions(obj, self.user).keys())
+        return data
+
     def _cache_script_results(self, nodes):
         """Refresh the ScriptResult cache from the given node."""
         script_results = ScriptResult.objects.filter(
             script_set__node__in=nodes
         )
-        script_results = script_results.defer(
-            "parameters", "output", "stdout", "stderr", "result"
-        )
+        script_results = script_results.defer("parameters")
         script_results = script_results.select_related("script_set", "script")
         script_results = script_results.defer(
             "script_set__requested_scripts",
@@ -526,9 +524,9 @@ class NodeHandler(TimestampedModelHandler):
         super()._cache_pks(nodes)
         self._cache_script_results(nodes)
 
-    def on_listen_for_active_pk(self, action, pk, obj):
+    def _dehydrate_for_listen(self, obj, for_list, shared=False):
         self._cache_script_results([obj])
-        return super().on_listen_for_active_pk(action, pk, obj)
+        return super()._dehydrate_for_listen(obj, for_list, shared=shared)
 
     def dehydrate_blockdevice(self, blockdevice, obj):
         """Return `BlockDevice` formatted for JSON encoding."""
@@ -978,7 +976,7 @@ class NodeHandler(TimestampedModelHandler):
         node = self.get_object(params)
         # Produce a "clean" composite details document.
         details_template = dict.fromkeys(script_output_nsmap.values())
-        for script_result in (
+        script_results = list(
             node.get_latest_script_results.filter(
                 script_name__in=script_output_nsmap.keys(),
                 status=SCRIPT_STATUS.PASSED,
@@ -988,14 +986,15 @@ class NodeHandler(TimestampedModelHandler):
                 "status",
                 "script_name",
                 "updated",
-                "stdout",
                 "script__id",
                 "script_set__node",
                 "script__name",
             )
             .order_by("script_name", "-updated")
             .distinct("script_name")
-        ):
+        )
+        ScriptOutput.objects.load_outputs(script_results, ["stdout"])
+        for script_result in script_results:
             namespace = script_output_nsmap[script_result.name]
             details_template[namespace] = script_result.stdout
         probed_details = merge_details_cleanly(details_template)
@@ -1015,7 +1014,7 @@ class NodeHandler(TimestampedModelHandler):
         node = self.get_object(params)
         # Produce a "clean" composite details document.
         details_template = dict.fromkeys(script_output_nsmap.values())
-        for script_result in (
+        script_results = list(
             ScriptResult.objects.filter(
                 script_name__in=script_output_nsmap.keys(),
                 status=SCRIPT_STATUS.PASSED,
@@ -1025,13 +1024,14 @@ class NodeHandler(TimestampedModelHandler):
                 "status",
                 "script_name",
                 "updated",
-                "stdout",
                 "script__id",
                 "script_set__node",
             )
             .order_by("script_name", "-updated")
             .distinct("script_name")
-        ):
+        )
+        ScriptOutput.objects.load_outputs(script_results, ["stdout"])
+        for script_result in script_results:
             namespace = script_output_nsmap[script_result.name]
             details_template[namespace] = script_result.stdout
         probed_details = merge_details_cleanly(details_template)
@@ -1078,12 +1078,15 @@ class NodeHandler(TimestampedModelHandler):
                 script_set__node__system_id__in=system_ids,
                 suppressed=False,
             )
-            .defer("output", "stdout", "stderr")
             .prefetch_related("script", "script_set", "script_set__node")
             .defer("script__parameters", "script__packages")
             .defer("script_set__requested_scripts")
         )
 
+        # The results YAML of each is read when it's dehydrated.
+        script_results = list(script_results)
+        ScriptOutput.objects.load_outputs(script_results, ["result"])
+
         # Create the node to script result mappings.
         script_result_mappings = {}
         for script_result in script_results:
@@ -1113,7 +1116,6 @@ class NodeHandler(TimestampedModelHandler):
                 script_set__node__system_id__in=system_ids,
                 script_set__result_type=RESULT_TYPE.TESTING,
             )
-            .defer("output", "stdout", "stderr")
             .prefetch_related("script", "script_set", "script_set__node")
             .defer("script__parameters", "script__packages")
             .defer("script_set__requested_scripts")
@@ -1128,6 +1130,11 @@ class NodeHandler(TimestampedModelHandler):
             )
         )
 
+        script_results = list(script_results)
+        ScriptOutput.objects.load_outputs(
+            [s for s in script_results if s.status in SCRIPT_STATUS_FAILED],
+            ["result"],
+        )
         for system_id in system_ids:
             # Need to evaluate QuerySet first to get latest script results,
             # then filter by results that have failed
@@ -18,14 +18,13 @@ from maasserver.websockets.handlers.timestampedmodel import (
     TimestampedModelHandler,
 )
 from metadataserver.enum import HARDWARE_TYPE
-from metadataserver.models import ScriptResult
+from metadataserver.models import ScriptOutput, ScriptResult
 
 
 class NodeResultHandler(TimestampedModelHandler):
     class Meta:
         queryset = (
             ScriptResult.objects.all()
-            .defer("output", "stdout", "stderr")
             .prefetch_related("script", "script_set")
             .defer("script__parameters", "script__packages")
             .defer("script_set__requested_scripts")
@@ -39,7 +38,7 @@ class NodeResultHandler(TimestampedModelHandler):
             "list",
         ]
         listen_channels = ["scriptresult"]
-        exclude = ["script_set", "script_name", "output", "stdout", "stderr"]
+        exclude = ["script_set", "script_name"]
         list_fields = [
             "id",
             "updated",
@@ -168,7 +167,6 @@ class NodeResultHandler(TimestampedModelHandler):
         """
         node = self.get_node(params)
         queryset = node.get_latest_script_results
-        queryset = queryset.defer("output", "stdout", "stderr")
         queryset = queryset.defer("script__parameters", "script__packages")
         queryset = queryset.defer("script_set__requested_scripts")
 
@@ -188,13 +186,15 @@ class NodeResultHandler(TimestampedModelHandler):
             queryset = queryset.filter(interface_id=params["interface_id"])
         if "has_surfaced" in params:
             if params["has_surfaced"]:
-                queryset = queryset.exclude(result="")
+                queryset = queryset.filter(outputs__name="result")
         if "start" in params:
             queryset = queryset[params["start"] :]
         if "limit" in params:
             queryset = queryset[: params["limit"]]
 
         objs = list(queryset)
+        # The results YAML of each is read when it's dehydrated.
+        ScriptOutput.objects.load_outputs(objs, ["result"])
         getpk = attrgetter(self._meta.pk)
         self.cache["loaded_pks"].update(getpk(obj) for obj in objs)
         return [self.full_dehydrate(obj, for_list=True) for obj in objs]
@@ -208,9 +208,7 @@ class NodeResultHandler(TimestampedModelHandler):
         if data_type == "combined":
             data_type = "output"
         script_result = (
-            ScriptResult.objects.filter(id=id)
-            .only("status", data_type)
-            .first()
+            ScriptResult.objects.filter(id=id).only("status").first()
         )
         if script_result is None:
             return "Unknown ScriptResult id %s" % id
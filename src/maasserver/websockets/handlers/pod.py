@@ -118,8 +118,6 @@ class PodHandler(TimestampedModelHandler):
                 "resources": self.dehydrate_resources(obj, for_list=for_list),
             }
         )
-        if self.user.is_superuser:
-            data["power_parameters"] = obj.power_parameters
         if not for_list:
             if obj.host:
                 data["attached_vlans"] = list(
@@ -146,14 +144,21 @@ class PodHandler(TimestampedModelHandler):
                 cert = Certificate.from_pem(certificate, key)
                 data["certificate"] = dehydrate_certificate(cert)
 
-        if self.user.has_perm(PodPermission.compose, obj):
-            data["permissions"].append("compose")
-
         if obj.hints.cluster:
             data["cluster"] = obj.hints.cluster_id
 
         return data
 
+    def dehydrate_for_user(self, obj, data, for_list=False):
+        """Add the power parameters, for admins, and the compose permission
+        to `data`."""
+        data = super().dehydrate_for_user(obj, data, for_list=for_list)
+        if self.user.is_superuser:
+            data["power_parameters"] = obj.power_parameters
+        if self.user.has_perm(PodPermission.compose, obj):
+            data["permissions"].append("compose")
+        return data
+
     def dehydrate_storage_pool(self, pool):
         """Dehydrate PodStoragePool."""
         used = pool.get_used_storage()
@@ -4642,6 +4642,153 @@ class TestMachineHandler(MAASServerTestCase):
         )
 
 
+class TestMachineHandlerSearch(MAASServerTestCase):
+    def search(self, handler, **params):
+        return handler.search(params)
+
+    def get_hostnames(self, result):
+        return [item["hostname"] for item in result["items"]]
+
+    def test_returns_dehydrated_machines(self):
+        user = factory.make_User()
+        machine = factory.make_Machine(owner=user)
+        handler = MachineHandler(user, {}, None)
+        result = self.search(handler)
+        self.assertEqual(1, result["count"])
+        self.assertIsNone(result["next_cursor"])
+        self.assertEqual(
+            [handler.full_dehydrate(machine, for_list=True)], result["items"]
+        )
+        self.assertIn(machine.id, handler.cache["loaded_pks"])
+
+    def test_returns_machines_only_viewable_by_user(self):
+        user = factory.make_User()
+        machine = factory.make_Machine(owner=user)
+        factory.make_Machine(owner=factory.make_User())
+        handler = MachineHandler(user, {}, None)
+        result = self.search(handler)
+        self.assertEqual(1, result["count"])
+        self.assertEqual([machine.hostname], self.get_hostnames(result))
+
+    def test_filters_machines(self):
+        user = factory.make_User()
+        zone = factory.make_Zone()
+        machine = factory.make_Machine(owner=user, zone=zone)
+        factory.make_Machine(owner=user)
+        handler = MachineHandler(user, {}, None)
+        result = self.search(handler, filter={"zone": zone.name})
+        self.assertEqual(1, result["count"])
+        self.assertEqual([machine.hostname], self.get_hostnames(result))
+
+    def test_rejects_invalid_filter(self):
+        handler = MachineHandler(factory.make_User(), {}, None)
+        self.assertRaises(
+            HandlerValidationError,
+            self.search,
+            handler,
+            filter={"zone": factory.make_name("zone")},
+        )
+
+    def test_rejects_invalid_params(self):
+        handler = MachineHandler(factory.make_User(), {}, None)
+        for params in (
+            {"sort_key": "power_parameters"},
+            {"group_key": "power_parameters"},
+            {"sort_direction": "up"},
+            {"limit": 0},
+            {"cursor": "not a cursor"},
+        ):
+            self.assertRaises(HandlerValidationError, handler.search, params)
+
+    def test_pages_through_sorted_machines(self):
+        user = factory.make_User()
+        hostnames = sorted(
+            factory.make_Machine(owner=user).hostname for _ in range(5)
+        )
+        handler = MachineHandler(user, {}, None)
+        pages = []
+        result = self.search(handler, limit=2)
+        pages.append(self.get_hostnames(result))
+        while result["next_cursor"] is not None:
+            result = self.search(
+                handler, limit=2, cursor=result["next_cursor"]
+            )
+            pages.append(self.get_hostnames(result))
+        self.assertEqual(
+            [hostnames[0:2], hostnames[2:4], hostnames[4:]], pages
+        )
+
+    def test_pages_through_descending_ties(self):
+        user = factory.make_User()
+        machines = [
+            factory.make_Machine(owner=user, cpu_count=count)
+            for count in (1, 2, 2, 2, 3)
+        ]
+        handler = MachineHandler(user, {}, None)
+        params = {
+            "sort_key": "cpu_count",
+            "sort_direction": "descending",
+            "limit": 2,
+        }
+        hostnames = []
+        result = self.search(handler, **params)
+        hostnames.extend(self.get_hostnames(result))
+        while result["next_cursor"] is not None:
+            result = self.search(
+                handler, cursor=result["next_cursor"], **params
+            )
+            hostnames.extend(self.get_hostnames(result))
+        self.assertEqual(
+            [machines[i].hostname for i in (4, 1, 2, 3, 0)], hostnames
+        )
+
+    def test_groups_machines(self):
+        user = factory.make_User()
+        ready = [
+            factory.make_Machine(status=NODE_STATUS.READY) for _ in range(2)
+        ]
+        new = factory.make_Machine(status=NODE_STATUS.NEW)
+        handler = MachineHandler(user, {}, None)
+        result = self.search(handler, group_key="status", limit=2)
+        self.assertEqual(
+            [
+                {
+                    "value": NODE_STATUS.NEW,
+                    "name": "New",
+                    "count": 1,
+                },
+                {
+                    "value": NODE_STATUS.READY,
+                    "name": "Ready",
+                    "count": 2,
+                },
+            ],
+            result["groups"],
+        )
+        self.assertEqual(
+            [new.hostname, min(machine.hostname for machine in ready)],
+            self.get_hostnames(result),
+        )
+        result = self.search(
+            handler, group_key="status", cursor=result["next_cursor"]
+        )
+        self.assertEqual(
+            [max(machine.hostname for machine in ready)],
+            self.get_hostnames(result),
+        )
+
+    def test_dehydrates_only_machines_on_page(self):
+        user = factory.make_User()
+        for _ in range(3):
+            factory.make_Machine(owner=user)
+        handler = MachineHandler(user, {}, None)
+        dehydrate = self.patch(handler, "full_dehydrate")
+        dehydrate.return_value = {}
+        result = self.search(handler, limit=1)
+        self.assertEqual(3, result["count"])
+        self.assertEqual(1, dehydrate.call_count)
+
+
 class TestMachineHandlerCheckPower(MAASTransactionServerTestCase):
     @wait_for_reactor
     @inlineCallbacks
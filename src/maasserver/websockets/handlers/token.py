@@ -32,7 +32,7 @@ class TokenHandler(Handler):
         else:
             return obj
 
-    def full_dehydrate(self, obj, for_list=False):
+    def shared_dehydrate(self, obj, for_list=False):
         """Return the representation for the object."""
         return {
             "id": obj.id,
@@ -164,6 +164,11 @@ class UserHandler(Handler):
                 "last_login": dehydrate_datetime(obj.last_login),
             }
         )
+        return data
+
+    def dehydrate_for_user(self, obj, data, for_list=False):
+        """Add the global permissions to `data`, for the user itself."""
+        data = super().dehydrate_for_user(obj, data, for_list=for_list)
         if obj.id == self.user.id:
             # User is reading information about itself, so provide the global
             # permissions.
@@ -96,7 +96,7 @@ class VMClusterHandler(TimestampedModelHandler):
             },
         }
 
-    def full_dehydrate(self, obj, for_list=False):
+    def shared_dehydrate(self, obj, for_list=False):
         return self.dehydrate(
             obj,
             obj.hosts(),
@@ -104,6 +104,10 @@ class VMClusterHandler(TimestampedModelHandler):
             obj.tracked_virtual_machines(),
         )
 
+    def dehydrate_for_user(self, obj, data, for_list=False):
+        # Nothing about a cluster depends on the user.
+        return data
+
     def dehydrate(self, cluster, vmhosts, resources, vms):
         return {
             "id": cluster.id,
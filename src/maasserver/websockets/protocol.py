@@ -15,8 +15,8 @@ from django.conf import settings
 from django.contrib.auth import BACKEND_SESSION_KEY, load_backend, SESSION_KEY
 from django.core.exceptions import ValidationError
 from django.http import HttpRequest
-from twisted.internet import defer
-from twisted.internet.defer import fail, inlineCallbacks
+from twisted.internet import defer, reactor
+from twisted.internet.defer import Deferred, fail, inlineCallbacks
 from twisted.internet.protocol import Factory, Protocol
 from twisted.python.modules import getModule
 from twisted.web.server import NOT_DONE_YET
@@ -391,10 +391,19 @@ class WebSocketFactory(Factory):
 
     protocol = WebSocketProtocol
 
-    def __init__(self, listener):
+    # Seconds to wait before sending a notification to the clients. Further
+    # notifications for the same object in that time are sent with it, as
+    # one notification with the latest action.
+    notify_delay = 0.1
+
+    def __init__(self, listener, clock=reactor):
         self.handlers = {}
         self.clients = []
         self.listener = listener
+        self.clock = clock
+        # Maps (handler_class, channel, obj_id) to the latest action for
+        # that object, and the Deferreds waiting for it to be sent.
+        self.pending_notifies = {}
         self.cacheHandlers()
         self.registerNotifiers()
 
@@ -444,23 +453,83 @@ class WebSocketFactory(Factory):
         for handler in self.handlers.values():
             for channel in handler._meta.listen_channels:
                 self.listener.register(
-                    channel, partial(self.onNotify, handler, channel)
+                    channel, partial(self.acceptNotify, handler, channel)
                 )
 
-    @inlineCallbacks
+    def acceptNotify(self, handler_class, channel, action, obj_id):
+        """Accept a notification from the listener.
+
+        The notification is sent in the background, by `onNotify`, so the
+        listener can go on to the next one straight away rather than wait
+        for `notify_delay` and for the notification to be processed.
+        """
+        self.onNotify(handler_class, channel, action, obj_id)
+
     def onNotify(self, handler_class, channel, action, obj_id):
-        for client in self.clients:
-            handler = client.buildHandler(handler_class)
-            data = yield deferToDatabase(
-                self.processNotify, handler, channel, action, obj_id
+        """Send a notification to the clients once `notify_delay` passes.
+
+        :return: A `Deferred` that fires once the notification, coalesced
+            with any others for the same object, has been sent.
+        """
+        key = (handler_class, channel, obj_id)
+        if key in self.pending_notifies:
+            self.pending_notifies[key][0] = action
+        else:
+            self.pending_notifies[key] = [action, []]
+            self.clock.callLater(
+                self.notify_delay, self.sendPendingNotify, key
             )
+        d = Deferred()
+        self.pending_notifies[key][1].append(d)
+        return d
+
+    def sendPendingNotify(self, key):
+        """Send the pending notification for `key` to the clients."""
+        action, waiting = self.pending_notifies.pop(key)
+        handler_class, channel, obj_id = key
+        d = self.notifyClients(handler_class, channel, action, obj_id)
+        d.addErrback(
+            log.err,
+            "Failed to send '%s' notification for %s %s."
+            % (action, channel, obj_id),
+        )
+
+        def done(_):
+            for waiter in waiting:
+                waiter.callback(None)
+
+        return d.addCallback(done)
+
+    @inlineCallbacks
+    def notifyClients(self, handler_class, channel, action, obj_id):
+        """Send a notification to the clients."""
+        clients = list(self.clients)
+        if len(clients) == 0:
+            return
+        notifies = yield deferToDatabase(
+            self.processNotify, handler_class, clients, channel, action, obj_id
+        )
+        for client, data in zip(clients, notifies):
             if data is not None:
                 (name, client_action, data) = data
                 client.sendNotify(name, client_action, data)
 
     @transactional
-    def processNotify(self, handler, channel, action, obj_id):
-        return handler.on_listen(channel, action, obj_id)
+    def processNotify(self, handler_class, clients, channel, action, obj_id):
+        """Return what to send each of `clients` about a notification.
+
+        The handlers of all clients share a `notify_cache`, so the object is
+        only fetched once for each user, and what doesn't depend on the user
+        is only dehydrated once. What each client is sent still depends on
+        its user and what it has loaded.
+        """
+        notify_cache = {}
+        notifies = []
+        for client in clients:
+            handler = client.buildHandler(handler_class)
+            handler.notify_cache = notify_cache
+            notifies.append(handler.on_listen(channel, action, obj_id))
+        return notifies
 
     def registerRPCEvents(self):
         """Register for connected and disconnected events from the RPC
@@ -5,7 +5,7 @@
 
 
 import random
-from unittest.mock import ANY, MagicMock, sentinel
+from unittest.mock import ANY, call, MagicMock, sentinel
 
 from django.db.models.query import QuerySet
 from django.http import HttpRequest
@@ -854,6 +854,96 @@ class TestHandler(MAASServerTestCase, FakeNodesHandlerMixin):
             mock_dehydrate, MockCalledOnceWith(node, for_list=False)
         )
 
+    def test_on_listen_shares_object_and_data_through_notify_cache(self):
+        node = factory.make_Node()
+        handler = self.make_nodes_handler(fields=["hostname"])
+        other_handler = make_handler(
+            "TestNodesHandler",
+            queryset=Node.objects.all(),
+            object_class=Node,
+            pk="system_id",
+            pk_type=str,
+            fields=["hostname"],
+        )
+        other_handler.__init__(handler.user, {}, handler.request)
+        notify_cache = {}
+        handler.notify_cache = other_handler.notify_cache = notify_cache
+        handler.cache["loaded_pks"].add(node.system_id)
+        handler.on_listen(sentinel.channel, "update", node.system_id)
+        mock_listen = self.patch(other_handler, "listen")
+        mock_dehydrate = self.patch(other_handler, "shared_dehydrate")
+        self.assertEqual(
+            (
+                other_handler._meta.handler_name,
+                "create",
+                {"hostname": node.hostname},
+            ),
+            other_handler.on_listen(
+                sentinel.channel, "update", node.system_id
+            ),
+        )
+        self.assertThat(mock_listen, MockNotCalled())
+        self.assertThat(mock_dehydrate, MockNotCalled())
+        self.assertIn(node.system_id, other_handler.cache["loaded_pks"])
+
+    def test_on_listen_shares_data_but_not_object_between_users(self):
+        node = factory.make_Node()
+        handler = self.make_nodes_handler(
+            fields=["hostname"], edit_permission=NodePermission.admin
+        )
+        handler.user = factory.make_admin()
+        other_handler = self.make_nodes_handler(
+            fields=["hostname"], edit_permission=NodePermission.admin
+        )
+        notify_cache = {}
+        handler.notify_cache = other_handler.notify_cache = notify_cache
+        handler.cache["loaded_pks"].add(node.system_id)
+        other_handler.cache["loaded_pks"].add(node.system_id)
+        self.assertEqual(
+            (
+                handler._meta.handler_name,
+                "update",
+                {"hostname": node.hostname, "permissions": ["edit"]},
+            ),
+            handler.on_listen(sentinel.channel, "update", node.system_id),
+        )
+        mock_listen = self.patch(other_handler, "listen")
+        mock_listen.return_value = node
+        mock_dehydrate = self.patch(other_handler, "shared_dehydrate")
+        self.assertEqual(
+            (
+                other_handler._meta.handler_name,
+                "update",
+                {"hostname": node.hostname, "permissions": []},
+            ),
+            other_handler.on_listen(
+                sentinel.channel, "update", node.system_id
+            ),
+        )
+        self.assertThat(
+            mock_listen,
+            MockCalledOnceWith(sentinel.channel, "update", node.system_id),
+        )
+        self.assertThat(mock_dehydrate, MockNotCalled())
+
+    def test_on_listen_dehydrates_once_for_list_and_once_for_active(self):
+        node = factory.make_Node()
+        handler = self.make_nodes_handler()
+        handler.notify_cache = {}
+        mock_dehydrate = self.patch(handler, "shared_dehydrate")
+        mock_dehydrate.return_value = {}
+        handler.on_listen(sentinel.channel, "update", node.system_id)
+        handler.on_listen(sentinel.channel, "update", node.system_id)
+        handler.cache["active_pk"] = node.system_id
+        handler.on_listen(sentinel.channel, "update", node.system_id)
+        self.assertEqual(
+            [
+                call(node, for_list=True),
+                call(node, for_list=False),
+            ],
+            mock_dehydrate.call_args_list,
+        )
+
     def test_listen_calls_get_object_with_pk_on_other_actions(self):
         handler = self.make_nodes_handler()
         mock_get_object = self.patch(handler, "get_object")
@@ -7,7 +7,7 @@
 from collections import deque
 import json
 import random
-from unittest.mock import MagicMock, sentinel
+from unittest.mock import call, MagicMock, sentinel
 
 from crochet import wait_for
 from django.core.exceptions import ValidationError
@@ -15,6 +15,7 @@ from django.http import HttpRequest
 from testtools.matchers import Equals, Is
 from twisted.internet import defer
 from twisted.internet.defer import fail, inlineCallbacks, succeed
+from twisted.internet.task import Clock
 from twisted.web.server import NOT_DONE_YET
 
 from apiclient.utils import ascii_url
@@ -39,9 +40,10 @@ from maastesting.matchers import (
     IsFiredDeferred,
     MockCalledOnceWith,
     MockCalledWith,
+    MockNotCalled,
 )
 from maastesting.testcase import MAASTestCase
-from maastesting.twisted import TwistedLoggerFixture
+from maastesting.twisted import extract_result, TwistedLoggerFixture
 from provisioningserver.refresh.node_info_scripts import LSHW_OUTPUT_NAME
 from provisioningserver.utils.twisted import synchronous
 from provisioningserver.utils.url import splithost
@@ -897,6 +899,91 @@ class TestWebSocketFactory(MAASTestCase, MakeProtocolFactoryMixin):
             MockCalledOnceWith(factory.updateRackController),
         )
 
+    def test_onNotify_sends_after_notify_delay(self):
+        factory = self.make_factory()
+        factory.clock = Clock()
+        notifyClients = self.patch(factory, "notifyClients")
+        notifyClients.return_value = succeed(None)
+        d = factory.onNotify(
+            sentinel.handler, sentinel.channel, "update", sentinel.obj_id
+        )
+        self.assertThat(notifyClients, MockNotCalled())
+        factory.clock.advance(factory.notify_delay)
+        self.assertThat(
+            notifyClients,
+            MockCalledOnceWith(
+                sentinel.handler, sentinel.channel, "update", sentinel.obj_id
+            ),
+        )
+        self.assertIsNone(extract_result(d))
+
+    def test_onNotify_coalesces_notifications_for_same_object(self):
+        factory = self.make_factory()
+        factory.clock = Clock()
+        notifyClients = self.patch(factory, "notifyClients")
+        notifyClients.return_value = succeed(None)
+        ds = [
+            factory.onNotify(
+                sentinel.handler, sentinel.channel, action, sentinel.obj_id
+            )
+            for action in ("create", "update", "delete")
+        ]
+        factory.onNotify(
+            sentinel.handler, sentinel.channel, "update", sentinel.other_id
+        )
+        factory.clock.advance(factory.notify_delay)
+        self.assertCountEqual(
+            [
+                call(
+                    sentinel.handler,
+                    sentinel.channel,
+                    "delete",
+                    sentinel.obj_id,
+                ),
+                call(
+                    sentinel.handler,
+                    sentinel.channel,
+                    "update",
+                    sentinel.other_id,
+                ),
+            ],
+            notifyClients.call_args_list,
+        )
+        for d in ds:
+            self.assertIsNone(extract_result(d))
+        self.assertEqual({}, factory.pending_notifies)
+
+    def test_onNotify_logs_failures(self):
+        factory = self.make_factory()
+        factory.clock = Clock()
+        notifyClients = self.patch(factory, "notifyClients")
+        notifyClients.return_value = fail(ZeroDivisionError())
+        with TwistedLoggerFixture() as logger:
+            d = factory.onNotify(
+                sentinel.handler, sentinel.channel, "update", sentinel.obj_id
+            )
+            factory.clock.advance(factory.notify_delay)
+        self.assertIsNone(extract_result(d))
+        self.assertIn("Failed to send 'update' notification", logger.output)
+
+    def test_acceptNotify_returns_before_notification_is_sent(self):
+        factory = self.make_factory()
+        factory.clock = Clock()
+        notifyClients = self.patch(factory, "notifyClients")
+        notifyClients.return_value = succeed(None)
+        result = factory.acceptNotify(
+            sentinel.handler, sentinel.channel, "update", sentinel.obj_id
+        )
+        self.assertIsNone(result)
+        self.assertThat(notifyClients, MockNotCalled())
+        factory.clock.advance(factory.notify_delay)
+        self.assertThat(
+            notifyClients,
+            MockCalledOnceWith(
+                sentinel.handler, sentinel.channel, "update", sentinel.obj_id
+            ),
+        )
+
     def test_registerNotifiers_registers_all_notifiers(self):
         factory = self.make_factory()
         self.assertEqual(ALL_NOTIFIERS, factory.listener.listeners.keys())
@@ -979,6 +1066,30 @@ class TestWebSocketFactoryTransactional(
         )
         self.assertThat(mock_sendNotify, MockCalledWith(name, action, data))
 
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_processNotify_shares_notify_cache_between_clients(self):
+        user = yield deferToDatabase(self.make_user)
+        other_user = yield deferToDatabase(self.make_user)
+        protocol, factory = self.make_protocol_with_factory(user=user)
+        clients = [MagicMock(user=user), MagicMock(user=user)]
+        clients.append(MagicMock(user=other_user))
+        for client in clients:
+            client.buildHandler.return_value.on_listen.return_value = None
+        yield deferToDatabase(
+            factory.processNotify,
+            sentinel.handler,
+            clients,
+            sentinel.channel,
+            sentinel.action,
+            sentinel.obj_id,
+        )
+        [cache1, cache2, cache3] = [
+            client.buildHandler.return_value.notify_cache for client in clients
+        ]
+        self.assertIs(cache1, cache2)
+        self.assertIs(cache1, cache3)
+
     @wait_for_reactor
     @inlineCallbacks
     def test_updateRackController_calls_onNotify_for_controller_update(self):
@@ -91,6 +91,7 @@ from metadataserver.models import (
     NodeKey,
     NodeUserData,
     Script,
+    ScriptOutput,
     ScriptResult,
     ScriptSet,
 )
@@ -278,7 +279,7 @@ def process_file(
 
     script_result = (
         script_set.scriptresult_set.filter(id=script_result_id)
-        .defer("parameters", "output", "stdout", "stderr", "result")
+        .defer("parameters")
         .first()
     )
     if script_result is None:
@@ -688,7 +689,8 @@ class VersionIndexHandler(MetadataViewHandler):
             if qs.count() > 0:
                 target_status = NODE_STATUS.FAILED_COMMISSIONING
             else:
-                # Recalculate tags when commissioning ends.
+                # Recalculate tags when commissioning ends, unless the
+                # node's details are the same as they were before.
                 try_or_log_event(
                     node,
                     status,
@@ -696,6 +698,7 @@ class VersionIndexHandler(MetadataViewHandler):
                     populate_tags_for_single_node,
                     Tag.objects.exclude(definition=None),
                     node,
+                    only_if_changed=True,
                 )
 
         if (
@@ -1278,7 +1281,14 @@ class MAASScriptsHandler(OperationsHandler):
         if script_set is None:
             return []
         meta_data = []
-        for script_result in script_set:
+        script_results = list(script_set)
+        # The outputs of the scripts that have started are sent with them.
+        ScriptOutput.objects.load_outputs(
+            script_result
+            for script_result in script_results
+            if script_result.status != SCRIPT_STATUS.PENDING
+        )
+        for script_result in script_results:
             # Don't rerun Scripts which have already run.
             if (
                 not include_finshed
@@ -4,14 +4,24 @@
 """Metadata API that runs in the Twisted reactor."""
 
 import base64
+import binascii
 import bz2
 from collections import defaultdict
 from datetime import datetime
+from functools import partial
+from io import BytesIO
 import json
 
 from django.db.utils import DatabaseError
 from twisted.application.internet import TimerService
 from twisted.internet import reactor
+from twisted.internet.defer import (
+    DeferredList,
+    DeferredLock,
+    DeferredSemaphore,
+    succeed,
+)
+from twisted.internet.threads import deferToThread
 from twisted.web.resource import Resource
 from twisted.web.server import NOT_DONE_YET
 
@@ -31,6 +41,7 @@ from metadataserver import logger
 from metadataserver.api import add_event_to_node_event_log, process_file
 from metadataserver.enum import SCRIPT_STATUS
 from metadataserver.models import NodeKey
+from metadataserver.status_spool import StatusMessageSpool
 from metadataserver.vendor_data import (
     LXD_CERTIFICATE_METADATA_KEY,
     VIRSH_PASSWORD_METADATA_KEY,
@@ -268,44 +279,110 @@ def _create_vmhost_for_deployment(node):
 
 
 class StatusWorkerService(TimerService):
-    """Service to update nodes from recieved status messages."""
+    """Service to update nodes from recieved status messages.
+
+    Messages that don't need to be processed straight away are queued, and
+    written to a spool on disk so that they survive a restart, then
+    processed every `interval` seconds. Messages for different nodes are
+    processed in parallel, but those for each node are always processed in
+    the order they were received.
+    """
+
+    check_interval = 10  # Every 10 seconds.
 
-    check_interval = 60  # Every second.
+    # The most nodes whose messages are processed at once, each in its own
+    # database thread.
+    max_parallel_nodes = 4
 
-    def __init__(self, dbtasks, clock=reactor):
-        # Call self._tryUpdateNodes() every self.check_interval.
-        super().__init__(self.check_interval, self._tryUpdateNodes)
-        self.dbtasks = dbtasks
+    # Size of the pieces that file contents are decoded in.
+    decode_chunk_size = 1024 * 1024
+
+    def __init__(self, clock=reactor, interval=None, spool=None):
+        if interval is None:
+            interval = self.check_interval
+        # Call self._tryUpdateNodes() every interval.
+        super().__init__(interval, self._tryUpdateNodes)
         self.clock = clock
         self.queue = defaultdict(list)
+        self.spool = StatusMessageSpool() if spool is None else spool
+        # Spool segments holding messages that are in the queue, other than
+        # the one messages are being appended to.
+        self._segments = []
+        # Maps each node key to a lock that keeps its messages in order.
+        self._locks = {}
+        self._semaphore = DeferredSemaphore(self.max_parallel_nodes)
+
+    def startService(self):
+        # Queue the messages that were spooled by processes that stopped
+        # before they could process them.
+        for segment in self.spool.claim_orphans():
+            for authorization, message in self.spool.read(segment):
+                self.queue[authorization].append(message)
+            self._segments.append(segment)
+        super().startService()
 
     def _tryUpdateNodes(self):
         if len(self.queue) != 0:
             queue, self.queue = self.queue, defaultdict(list)
-            d = deferToDatabase(self._preProcessQueue, queue)
-            d.addCallback(self._processMessagesLater)
+            segments, self._segments = self._segments, []
+            segments.append(self.spool.rotate())
+            d = DeferredList(
+                [
+                    self._processInOrder(
+                        authorization,
+                        deferToDatabase,
+                        self._processQueuedMessages,
+                        authorization,
+                        messages,
+                    )
+                    for authorization, messages in queue.items()
+                ]
+            )
+            d.addCallback(self._removeSegments, segments)
             d.addErrback(log.err, "Failed to process node status messages.")
             return d
 
-    @transactional
-    def _preProcessQueue(self, queue):
-        """Check authorizations.
+    def _removeSegments(self, _, segments):
+        for segment in segments:
+            if segment is not None:
+                self.spool.remove(segment)
 
-        Return a list of (node, messages) tuples, where each node is found
-        from its authorisation.
+    def _processInOrder(self, authorization, func, *args):
+        """Call `func` once earlier messages for the node have been processed.
+
+        `func` returns a `Deferred`. No more than `max_parallel_nodes` are
+        waited for at once.
         """
-        keys = NodeKey.objects.filter(
-            key__in=list(queue.keys())
-        ).select_related("node")
-        return [(key.node, queue[key.key]) for key in keys]
-
-    def _processMessagesLater(self, tasks):
-        # Move all messages on the queue off onto the database tasks queue.
-        # We're not going to wait for them to be processed because we can't /
-        # don't apply back-pressure to those systems that are producing these
-        # messages anyway.
-        for node, messages in tasks:
-            self.dbtasks.addTask(self._processMessages, node, messages)
+        lock = self._locks.get(authorization)
+        if lock is None:
+            lock = self._locks[authorization] = DeferredLock()
+
+        def release(result):
+            if not lock.locked and self._locks.get(authorization) is lock:
+                del self._locks[authorization]
+            return result
+
+        d = lock.run(self._semaphore.run, func, *args)
+        d.addBoth(release)
+        d.addErrback(
+            log.err,
+            "Failed to process status messages for node key: %s"
+            % authorization,
+        )
+        return d
+
+    def _processQueuedMessages(self, authorization, messages):
+        # This should be called in a non-reactor thread with a pre-existing
+        # connection (e.g. via deferToDatabase).
+        try:
+            node = transactional(NodeKey.objects.get_node_for_key)(
+                authorization
+            )
+        except NodeKey.DoesNotExist:
+            # The node that should get these messages has already had its
+            # owner cleared or changed and they cannot be saved.
+            return
+        self._processMessages(node, messages)
 
     def _processMessages(self, node, messages):
         # Push the messages into the database, recording them for this node.
@@ -400,10 +477,11 @@ class StatusWorkerService(TimerService):
             # Curtin is instructed to post the error_tarfile and no error
             # has occured(LP:1772118). Empty files are still captured as
             # they are sent as the empty string
-            if content is not None:
+            if isinstance(content, str):
                 content = self._retrieve_content(
                     compression, encoding, content
                 )
+            if content is not None:
                 process_file(
                     results,
                     script_set,
@@ -513,25 +591,56 @@ class StatusWorkerService(TimerService):
         return True
 
     def _retrieve_content(self, compression, encoding, content):
-        """Extract the content of the sent file."""
+        """Extract the content of the sent file.
+
+        The content is decoded and decompressed a piece at a time, so that
+        no more than one full copy of it is held besides `content`.
+        """
         # Select the appropriate decompressor.
         if compression is None:
-
-            def decompress(s):
-                return s
-
+            decompressor = None
         elif compression == "bzip2":
-            decompress = bz2.decompress
+            decompressor = bz2.BZ2Decompressor()
         else:
             raise ValueError("Invalid compression: %s" % compression)
 
         # Select the appropriate decoder.
-        if encoding == "base64":
-            decode = base64.decodebytes
-        else:
+        if encoding != "base64":
             raise ValueError("Invalid encoding: %s" % encoding)
 
-        return decompress(decode(content.encode("ascii")))
+        output = BytesIO()
+        remainder = ""
+        for start in range(0, len(content), self.decode_chunk_size):
+            # Base64 is decoded in whole groups of 4 characters; anything
+            # left over is carried on to the next piece.
+            chunk = remainder + "".join(
+                content[start : start + self.decode_chunk_size].split()
+            )
+            end = len(chunk) - len(chunk) % 4
+            chunk, remainder = chunk[:end], chunk[end:]
+            data = base64.decodebytes(chunk.encode("ascii"))
+            if decompressor is not None and data:
+                data = decompressor.decompress(data)
+            output.write(data)
+        if remainder:
+            raise binascii.Error("Incorrect padding")
+        return output.getvalue()
+
+    def _decodeFiles(self, message):
+        """Decode the content of the files sent with `message`.
+
+        This is slow for large files so is done in a thread that isn't
+        holding a database connection, before `message` is processed.
+        """
+        for sent_file in message.get("files", []):
+            content = sent_file.get("content")
+            if content is not None:
+                sent_file["content"] = self._retrieve_content(
+                    sent_file.get("compression"),
+                    sent_file.get("encoding"),
+                    content,
+                )
+        return message
 
     def _is_top_level(self, activity_name):
         """Top-level events do not have slashes in their names."""
@@ -601,12 +710,24 @@ class StatusWorkerService(TimerService):
             or is_curtin_early_late
             or is_status_message_event
         ):
-            d = deferToDatabase(
-                self._processMessageNow, authorization, message
-            )
-            d.addErrback(
-                log.err, "Failed to process status message instantly."
-            )
-            return d
+            if authorization in self.queue:
+                # Messages for this node that were queued earlier have to be
+                # processed first.
+                self._tryUpdateNodes()
+
+            def process():
+                if has_files:
+                    d = deferToThread(self._decodeFiles, message)
+                else:
+                    d = succeed(message)
+                d.addCallback(
+                    partial(
+                        deferToDatabase, self._processMessageNow, authorization
+                    )
+                )
+                return d
+
+            return self._processInOrder(authorization, process)
         else:
+            self.spool.append(authorization, message)
             self.queue[authorization].append(message)
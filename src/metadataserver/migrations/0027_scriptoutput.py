@@ -0,0 +1,75 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The outputs that are moved from columns of the script result table.
+SCRIPT_OUTPUT_NAMES = ("output", "stdout", "stderr", "result")
+
+# Existing output is moved as it is, uncompressed, so that the migration
+# doesn't have to read it all into Python. Output that's written after
+# this is compressed.
+MOVE_OUTPUT_SQL = """
+INSERT INTO metadataserver_scriptoutput
+  (script_result_id, name, size, sha256, store, compression, data)
+SELECT id, '{name}', length(data), encode(sha256(data), 'hex'),
+  'database', '', data
+FROM (
+  SELECT id, decode({name}, 'base64') AS data
+  FROM metadataserver_scriptresult
+  WHERE {name} != ''
+) AS script_result
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("metadataserver", "0026_drop_ipaddr_script"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScriptOutput",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(editable=False, max_length=32)),
+                ("size", models.BigIntegerField(editable=False)),
+                ("sha256", models.CharField(editable=False, max_length=64)),
+                ("store", models.CharField(editable=False, max_length=32)),
+                (
+                    "compression",
+                    models.CharField(
+                        blank=True, editable=False, max_length=32
+                    ),
+                ),
+                ("data", models.BinaryField(editable=False, null=True)),
+                (
+                    "script_result",
+                    models.ForeignKey(
+                        editable=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="outputs",
+                        to="metadataserver.ScriptResult",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("script_result", "name")},
+            },
+        ),
+        *(
+            migrations.RunSQL(MOVE_OUTPUT_SQL.format(name=name))
+            for name in SCRIPT_OUTPUT_NAMES
+        ),
+        *(
+            migrations.RemoveField(model_name="scriptresult", name=name)
+            for name in SCRIPT_OUTPUT_NAMES
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Output of a script result, stored outside of the result itself."""
+
+
+from hashlib import sha256
+
+from django.db.models import (
+    BigIntegerField,
+    BinaryField,
+    CASCADE,
+    CharField,
+    ForeignKey,
+    Manager,
+    Model,
+)
+
+from metadataserver import DefaultMeta
+from metadataserver.fields import Bin
+from metadataserver.outputstore import get_output_store
+
+# The names of the outputs that a script result has.
+SCRIPT_OUTPUT_NAMES = ("output", "stdout", "stderr", "result")
+
+
+class ScriptOutputManager(Manager):
+    """Manager for `ScriptOutput` objects."""
+
+    def load_outputs(self, script_results, names=SCRIPT_OUTPUT_NAMES):
+        """Load the outputs called `names` of all of `script_results`.
+
+        The outputs are fetched with a single query, and cached on each of
+        the results, so that reading them afterwards doesn't query the
+        database for each result in turn.
+        """
+        script_results = [
+            script_result
+            for script_result in script_results
+            if script_result.id is not None
+        ]
+        if not script_results:
+            return
+        loaded = {
+            script_result.id: {name: Bin(b"") for name in names}
+            for script_result in script_results
+        }
+        script_outputs = self.filter(
+            script_result_id__in=loaded.keys(), name__in=names
+        )
+        for script_output in script_outputs:
+            loaded[script_output.script_result_id][
+                script_output.name
+            ] = script_output.read()
+        for script_result in script_results:
+            script_result._get_cached_outputs().update(
+                (name, content)
+                for name, content in loaded[script_result.id].items()
+                if name not in script_result._get_dirty_outputs()
+            )
+
+    def save_output(self, script_result, name, content, store=None):
+        """Replace the output of `script_result` called `name`.
+
+        The content is written to `store`, or the store configured for the
+        region if that's None. Empty content is stored by not having an
+        output at all.
+        """
+        self.filter(script_result=script_result, name=name).delete()
+        if content:
+            script_output = self.model(
+                script_result=script_result,
+                name=name,
+                size=len(content),
+                sha256=sha256(content).hexdigest(),
+            )
+            if store is None:
+                store = get_output_store()
+            script_output.store = store.name
+            store.write(script_output, content)
+            script_output.save(force_insert=True)
+
+
+class ScriptOutput(Model):
+    """The content of one of the outputs of a `ScriptResult`.
+
+    :ivar script_result: The result that this is the output of.
+    :ivar name: Which of the outputs this is, one of `SCRIPT_OUTPUT_NAMES`.
+    :ivar size: The size of the content, uncompressed.
+    :ivar sha256: The SHA256 of the content, uncompressed.
+    :ivar store: The name of the store that holds the content.
+    :ivar compression: How the stored content is compressed, if at all.
+    :ivar data: The stored content, for stores that keep it in the row.
+    """
+
+    class Meta(DefaultMeta):
+        unique_together = ("script_result", "name")
+
+    objects = ScriptOutputManager()
+
+    script_result = ForeignKey(
+        "metadataserver.ScriptResult",
+        editable=False,
+        related_name="outputs",
+        on_delete=CASCADE,
+    )
+
+    name = CharField(max_length=32, editable=False)
+
+    size = BigIntegerField(editable=False)
+
+    sha256 = CharField(max_length=64, editable=False)
+
+    store = CharField(max_length=32, editable=False)
+
+    compression = CharField(max_length=32, editable=False, blank=True)
+
+    data = BinaryField(editable=False, null=True)
+
+    def __str__(self):
+        return "%s/%s" % (self.script_result_id, self.name)
+
+    def stream(self):
+        """Return an iterator over the uncompressed content, in pieces."""
+        return get_output_store(self.store).stream(self)
+
+    def read(self):
+        """Return all of the uncompressed content."""
+        return Bin(b"".join(self.stream()))
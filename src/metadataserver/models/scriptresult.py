@@ -33,12 +33,39 @@ from metadataserver.enum import (
     SCRIPT_STATUS_RUNNING_OR_PENDING,
     SCRIPT_TYPE,
 )
-from metadataserver.fields import Bin, BinaryField
+from metadataserver.fields import Bin
 from metadataserver.models.script import Script
+from metadataserver.models.scriptoutput import (
+    SCRIPT_OUTPUT_NAMES,
+    ScriptOutput,
+)
 from metadataserver.models.scriptset import ScriptSet
+from metadataserver.outputstore import get_output_store
 from provisioningserver.events import EVENT_TYPES
 
 
+def _script_output_property(name):
+    """Return a property for the output of a `ScriptResult` called `name`.
+
+    Outputs are loaded from their `ScriptOutput` when they are first read,
+    unless they were already loaded with `ScriptOutput.objects.load_outputs`,
+    and are only written back when the result is saved after they change.
+    """
+
+    def get(self):
+        outputs = self._get_cached_outputs()
+        if name not in outputs:
+            ScriptOutput.objects.load_outputs([self], [name])
+            outputs.setdefault(name, Bin(b""))
+        return outputs[name]
+
+    def set(self, value):
+        self._get_cached_outputs()[name] = Bin(value)
+        self._get_dirty_outputs().add(name)
+
+    return property(get, set)
+
+
 class ScriptResult(CleanSave, TimestampedModel):
 
     # Force model into the metadataserver namespace.
@@ -91,13 +118,15 @@ class ScriptResult(CleanSave, TimestampedModel):
         max_length=255, unique=False, editable=False, null=True
     )
 
-    output = BinaryField(max_length=1024 * 1024, blank=True, default=b"")
+    # The combined output, stdout, stderr, and result YAML of the script
+    # are kept as ScriptOutputs, see `_script_output_property`.
+    output = _script_output_property("output")
 
-    stdout = BinaryField(max_length=1024 * 1024, blank=True, default=b"")
+    stdout = _script_output_property("stdout")
 
-    stderr = BinaryField(max_length=1024 * 1024, blank=True, default=b"")
+    stderr = _script_output_property("stderr")
 
-    result = BinaryField(max_length=1024 * 1024, blank=True, default=b"")
+    result = _script_output_property("result")
 
     # When the script started to run
     started = DateTimeField(editable=False, null=True, blank=True)
@@ -192,6 +221,17 @@ class ScriptResult(CleanSave, TimestampedModel):
     def __str__(self):
         return "%s/%s" % (self.script_set.node.system_id, self.name)
 
+    def _get_cached_outputs(self):
+        return self.__dict__.setdefault("_script_outputs", {})
+
+    def _get_dirty_outputs(self):
+        return self.__dict__.setdefault("_dirty_script_outputs", set())
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.__dict__.pop("_script_outputs", None)
+        self.__dict__.pop("_dirty_script_outputs", None)
+
     def read_results(self):
         """Read the results YAML file and validate it."""
         try:
@@ -478,4 +518,22 @@ class ScriptResult(CleanSave, TimestampedModel):
                     qs = qs.filter(interface=None)
                 qs.delete()
 
-        return super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            # Outputs aren't fields, they are saved below if they changed.
+            kwargs["update_fields"] = [
+                field
+                for field in update_fields
+                if field not in SCRIPT_OUTPUT_NAMES
+            ]
+        saved = super().save(*args, **kwargs)
+        dirty_outputs = self._get_dirty_outputs()
+        if dirty_outputs:
+            store = get_output_store()
+            outputs = self._get_cached_outputs()
+            for name in sorted(dirty_outputs):
+                ScriptOutput.objects.save_output(
+                    self, name, outputs[name], store
+                )
+            dirty_outputs.clear()
+        return saved
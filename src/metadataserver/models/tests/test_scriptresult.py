@@ -3,6 +3,7 @@
 
 
 from datetime import datetime, timedelta
+from hashlib import sha256
 import random
 from unittest.mock import MagicMock
 
@@ -11,11 +12,13 @@ import yaml
 
 from maasserver.enum import NODE_STATUS
 from maasserver.models import Event, EventType
+from maasserver.testing.config import RegionConfigurationFixture
 from maasserver.testing.factory import factory
 from maasserver.testing.testcase import MAASServerTestCase
 from maasserver.utils.orm import reload_object
 from maastesting.djangotestcase import CountQueries
 from maastesting.matchers import DocTestMatches, MockCalledOnceWith
+from metadataserver import outputstore
 from metadataserver.builtin_scripts.hooks import NODE_INFO_SCRIPTS
 from metadataserver.enum import (
     RESULT_TYPE,
@@ -24,7 +27,7 @@ from metadataserver.enum import (
     SCRIPT_STATUS_RUNNING_OR_PENDING,
     SCRIPT_TYPE,
 )
-from metadataserver.models import ScriptResult
+from metadataserver.models import ScriptOutput, ScriptResult
 from metadataserver.models import scriptresult as scriptresult_module
 from provisioningserver.events import EVENT_TYPES
 
@@ -917,3 +920,123 @@ class TestScriptResult(MAASServerTestCase):
     def test_suppressed(self):
         script_result = factory.make_ScriptResult(suppressed=True)
         self.assertTrue(script_result.suppressed)
+
+
+class TestScriptResultOutputs(MAASServerTestCase):
+    """Test the outputs of the ScriptResult model."""
+
+    def test_outputs_are_stored_out_of_row(self):
+        output = factory.make_bytes()
+        script_result = factory.make_ScriptResult(
+            status=SCRIPT_STATUS.PASSED, output=output
+        )
+        script_output = ScriptOutput.objects.get(
+            script_result=script_result, name="output"
+        )
+        self.assertEqual(len(output), script_output.size)
+        self.assertEqual(sha256(output).hexdigest(), script_output.sha256)
+        self.assertEqual("database", script_output.store)
+        self.assertEqual(output, script_output.read())
+
+    def test_outputs_are_compressed(self):
+        output = b"a" * 10000
+        script_result = factory.make_ScriptResult(
+            status=SCRIPT_STATUS.PASSED, output=output
+        )
+        script_output = ScriptOutput.objects.get(
+            script_result=script_result, name="output"
+        )
+        self.assertEqual("zlib", script_output.compression)
+        self.assertLess(len(script_output.data), len(output))
+        self.assertEqual(output, reload_object(script_result).output)
+
+    def test_empty_outputs_are_not_stored(self):
+        script_result = factory.make_ScriptResult(status=SCRIPT_STATUS.PENDING)
+        self.assertFalse(script_result.outputs.exists())
+        self.assertEqual(b"", reload_object(script_result).stdout)
+
+    def test_outputs_are_loaded_lazily(self):
+        stdout = factory.make_bytes()
+        script_result = factory.make_ScriptResult(
+            status=SCRIPT_STATUS.PASSED, stdout=stdout
+        )
+        queries = CountQueries()
+        with queries:
+            script_result = ScriptResult.objects.get(id=script_result.id)
+        self.assertEqual(1, queries.count)
+        queries = CountQueries()
+        with queries:
+            self.assertEqual(stdout, script_result.stdout)
+            self.assertEqual(stdout, script_result.stdout)
+        self.assertEqual(1, queries.count)
+
+    def test_save_replaces_changed_outputs(self):
+        script_result = factory.make_ScriptResult(status=SCRIPT_STATUS.PASSED)
+        stdout = factory.make_bytes()
+        script_result.stdout = stdout
+        script_result.stderr = b""
+        script_result.save()
+        script_result = reload_object(script_result)
+        self.assertEqual(stdout, script_result.stdout)
+        self.assertFalse(script_result.outputs.filter(name="stderr").exists())
+
+    def test_save_with_update_fields_saves_outputs(self):
+        script_result = factory.make_ScriptResult(status=SCRIPT_STATUS.PASSED)
+        result = factory.make_bytes()
+        script_result.result = result
+        script_result.save(update_fields=["result"])
+        self.assertEqual(result, reload_object(script_result).result)
+
+    def test_load_outputs_loads_outputs_with_one_query(self):
+        script_results = [
+            factory.make_ScriptResult(status=SCRIPT_STATUS.PASSED)
+            for _ in range(3)
+        ]
+        expected = [script_result.stdout for script_result in script_results]
+        script_results = list(
+            ScriptResult.objects.filter(
+                id__in=[script_result.id for script_result in script_results]
+            ).order_by("id")
+        )
+        queries = CountQueries()
+        with queries:
+            ScriptOutput.objects.load_outputs(script_results, ["stdout"])
+            stdouts = [
+                script_result.stdout for script_result in script_results
+            ]
+        self.assertEqual(1, queries.count)
+        self.assertEqual(expected, stdouts)
+
+    def test_load_outputs_keeps_changed_outputs(self):
+        script_result = factory.make_ScriptResult(status=SCRIPT_STATUS.PASSED)
+        stdout = factory.make_bytes()
+        script_result.stdout = stdout
+        ScriptOutput.objects.load_outputs([script_result])
+        self.assertEqual(stdout, script_result.stdout)
+
+    def test_outputs_are_deleted_with_result(self):
+        script_result = factory.make_ScriptResult(status=SCRIPT_STATUS.PASSED)
+        script_result_id = script_result.id
+        script_result.delete()
+        self.assertFalse(
+            ScriptOutput.objects.filter(
+                script_result_id=script_result_id
+            ).exists()
+        )
+
+    def test_outputs_can_be_written_to_directory(self):
+        self.useFixture(
+            RegionConfigurationFixture(script_output_store="directory")
+        )
+        outputstore.get_configured_store_name.cache_clear()
+        self.addCleanup(outputstore.get_configured_store_name.cache_clear)
+        stdout = factory.make_bytes()
+        script_result = factory.make_ScriptResult(
+            status=SCRIPT_STATUS.PASSED, stdout=stdout
+        )
+        script_output = ScriptOutput.objects.get(
+            script_result=script_result, name="stdout"
+        )
+        self.assertEqual("directory", script_output.store)
+        self.assertIsNone(script_output.data)
+        self.assertEqual(stdout, reload_object(script_result).stdout)
@@ -0,0 +1,248 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Stores for the content of script output.
+
+The output of a script result is kept in a `ScriptOutput` row of its own
+rather than in the `ScriptResult`, and its content is kept by one of the
+stores here. Which store new output is written to is set with the
+`script_output_store` option in regiond.conf, which is read once, so the
+region must be restarted for a change to it to apply; output is always read
+back from the store it was written to.
+"""
+
+__all__ = [
+    "DatabaseOutputStore",
+    "DirectoryOutputStore",
+    "get_configured_store_name",
+    "get_output_store",
+    "prune_script_output_directory",
+    "SCRIPT_OUTPUT_STORES",
+    "ScriptOutputPruneService",
+]
+
+from functools import lru_cache
+import os
+import tempfile
+import time
+import zlib
+
+from twisted.application.internet import TimerService
+
+from maasserver.config import RegionConfiguration
+from maasserver.utils.orm import transactional
+from maasserver.utils.threads import deferToDatabase
+from provisioningserver.logger import get_maas_logger, LegacyLogger
+from provisioningserver.path import get_maas_data_path
+from provisioningserver.utils.twisted import synchronous
+
+log = LegacyLogger()
+maaslog = get_maas_logger("outputstore")
+
+# Size of the pieces that content is decompressed and streamed in.
+CHUNK_SIZE = 64 * 1024
+
+
+def _compress(content):
+    """Compress `content`, unless that doesn't make it any smaller.
+
+    :return: A `(compression, data)` tuple.
+    """
+    compressed = zlib.compress(content)
+    if len(compressed) < len(content):
+        return "zlib", compressed
+    else:
+        return "", content
+
+
+def _decompress_chunks(compression, chunks):
+    """Decompress an iterable of compressed `chunks`, a piece at a time."""
+    if compression == "zlib":
+        decompressor = zlib.decompressobj()
+        for chunk in chunks:
+            data = decompressor.decompress(chunk, CHUNK_SIZE)
+            while data:
+                yield data
+                data = decompressor.decompress(
+                    decompressor.unconsumed_tail, CHUNK_SIZE
+                )
+        data = decompressor.flush()
+        if data:
+            yield data
+    elif compression == "":
+        yield from chunks
+    else:
+        raise ValueError("Unknown compression: %s" % compression)
+
+
+class DatabaseOutputStore:
+    """Keeps output compressed in the `ScriptOutput` row itself."""
+
+    name = "database"
+
+    def write(self, script_output, content):
+        """Store `content` for `script_output`, before it's saved."""
+        script_output.compression, script_output.data = _compress(content)
+
+    def stream(self, script_output):
+        """Return an iterator over the content of `script_output`."""
+        data = bytes(script_output.data)
+        return _decompress_chunks(
+            script_output.compression,
+            (
+                data[i : i + CHUNK_SIZE]
+                for i in range(0, len(data), CHUNK_SIZE)
+            ),
+        )
+
+
+class DirectoryOutputStore:
+    """Keeps output compressed in a content-addressed directory.
+
+    Files are named for the SHA256 of their uncompressed content, so output
+    that is the same for many results is only stored once. The directory is
+    local to the region, so this is only suitable for deployments with a
+    single region, or where the directory is on storage that all regions
+    share.
+    """
+
+    name = "directory"
+
+    # Files that were written more recently than this, in seconds, are never
+    # pruned, as the output that uses them may not have been committed yet.
+    prune_min_age = 24 * 60 * 60
+
+    def __init__(self, path=None):
+        """
+        :param path: The directory of the store. Defaults to a directory in
+            the MAAS data directory, as it is when the store is used.
+        """
+        self._path = path
+
+    @property
+    def path(self):
+        if self._path is None:
+            return get_maas_data_path("script-output")
+        else:
+            return self._path
+
+    def write(self, script_output, content):
+        """Store `content` for `script_output`, before it's saved."""
+        path = os.path.join(self.path, script_output.sha256)
+        compression, data = _compress(content)
+        try:
+            # Content that's stored already is reused. It's touched so that
+            # it isn't pruned before the output that now uses it is saved.
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(self.path, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(
+                dir=self.path, prefix=".%s-" % script_output.sha256
+            )
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(compression.encode("ascii") + b"\n")
+                fp.write(data)
+            os.rename(temp_path, path)
+        script_output.compression = compression
+        script_output.data = None
+
+    def stream(self, script_output):
+        """Return an iterator over the content of `script_output`."""
+        path = os.path.join(self.path, script_output.sha256)
+        try:
+            fp = open(path, "rb")
+        except FileNotFoundError:
+            maaslog.warning(
+                "Script output %s is missing from %s."
+                % (script_output.sha256, self.path)
+            )
+            return iter([])
+        return self._stream_file(fp)
+
+    def _stream_file(self, fp):
+        with fp:
+            compression = fp.readline().strip().decode("ascii")
+            yield from _decompress_chunks(
+                compression, iter(lambda: fp.read(CHUNK_SIZE), b"")
+            )
+
+    def prune(self, sha256s):
+        """Remove all content except for `sha256s`.
+
+        Temporary files left behind by processes that died are removed too.
+        Nothing that was written recently is removed.
+
+        :return: The number of files that were removed.
+        """
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return 0
+        sha256s = set(sha256s)
+        prune_before = time.time() - self.prune_min_age
+        removed = 0
+        for name in names:
+            if name in sha256s:
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                if os.path.getmtime(path) < prune_before:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                # Removed by another process.
+                pass
+        return removed
+
+
+SCRIPT_OUTPUT_STORES = {
+    store.name: store for store in (DatabaseOutputStore, DirectoryOutputStore)
+}
+
+
+@lru_cache(maxsize=1)
+def get_configured_store_name():
+    """Return the name of the store that new output is written to.
+
+    This is read from the region's configuration the first time only, as
+    it's needed each time a script result with new output is saved.
+    """
+    with RegionConfiguration.open() as config:
+        return config.script_output_store
+
+
+def get_output_store(name=None):
+    """Return the output store called `name`.
+
+    :param name: The name of the store, or None for the store that new
+        output is written to, as configured for the region.
+    """
+    if name is None:
+        name = get_configured_store_name()
+    return SCRIPT_OUTPUT_STORES[name]()
+
+
+def prune_script_output_directory():
+    """Remove content from the directory store that no output uses."""
+    # Avoid circular dependencies.
+    from metadataserver.models import ScriptOutput
+
+    sha256s = ScriptOutput.objects.filter(
+        store=DirectoryOutputStore.name
+    ).values_list("sha256", flat=True)
+    removed = DirectoryOutputStore().prune(sha256s.iterator())
+    if removed > 0:
+        log.msg("Pruned %d unused script output files." % removed)
+
+
+class ScriptOutputPruneService(TimerService):
+    """Service to periodically prune the directory store of script output.
+
+    This will run immediately when it's started, then once again each
+    day, though the interval can be overridden by passing it to the
+    constructor.
+    """
+
+    def __init__(self, interval=(24 * 60 * 60)):
+        prune = synchronous(transactional(prune_script_output_directory))
+        super().__init__(interval, deferToDatabase, prune)
@@ -0,0 +1,157 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""On-disk spool of node status messages waiting to be processed."""
+
+__all__ = ["StatusMessageSpool"]
+
+from datetime import datetime
+import fcntl
+import json
+import os
+import time
+import uuid
+
+from provisioningserver.logger import get_maas_logger
+from provisioningserver.path import get_maas_data_path
+
+maaslog = get_maas_logger("status-spool")
+
+
+def _encode_message(key, message):
+    timestamp = message.get("timestamp")
+    if isinstance(timestamp, datetime):
+        message = dict(message, timestamp=timestamp.isoformat())
+    return json.dumps([key, message]) + "\n"
+
+
+def _decode_message(line):
+    key, message = json.loads(line)
+    timestamp = message.get("timestamp")
+    if isinstance(timestamp, str):
+        message["timestamp"] = datetime.fromisoformat(timestamp)
+    return key, message
+
+
+class StatusMessageSpool:
+    """A journal of queued status messages, so they survive a restart.
+
+    Messages are appended, one per line, to the current segment file in the
+    spool directory. Once the messages in a segment have been handed off for
+    processing the spool is rotated onto a new segment, and the old one is
+    removed when they have been processed.
+
+    Several processes can share the same spool directory. Each process holds
+    an exclusive lock on the segments it's using, so that segments that were
+    left behind by a process that died, and only those, can be claimed and
+    replayed by another.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: The directory of the spool. Defaults to a directory in
+            the MAAS data directory, as it is when the spool is used.
+        """
+        self._path = path
+        # The segment that messages are appended to, and its file.
+        self._segment = None
+        self._file = None
+        # Maps the path of each segment this process has locked to its open
+        # file, which holds the lock.
+        self._locked = {}
+
+    @property
+    def path(self):
+        if self._path is None:
+            return get_maas_data_path("status-spool")
+        else:
+            return self._path
+
+    def _open_segment(self):
+        os.makedirs(self.path, exist_ok=True)
+        # Segment names sort in the order they were created.
+        name = "%020d-%s" % (time.time_ns(), uuid.uuid4().hex)
+        # The segment is locked before it's given its name, so that no other
+        # process can mistake it for an orphan.
+        temp_path = os.path.join(self.path, ".%s" % name)
+        segment = os.path.join(self.path, name)
+        fp = open(temp_path, "a")
+        fcntl.flock(fp, fcntl.LOCK_EX)
+        os.rename(temp_path, segment)
+        self._locked[segment] = fp
+        self._segment, self._file = segment, fp
+
+    def append(self, key, message):
+        """Write `message` for the node with `key` to the spool."""
+        if self._file is None:
+            self._open_segment()
+        self._file.write(_encode_message(key, message))
+        self._file.flush()
+
+    def rotate(self):
+        """Start a new segment for messages that are appended after this.
+
+        :return: The path of the previous segment, or None if nothing has
+            been appended since the last rotation.
+        """
+        segment = self._segment
+        self._segment, self._file = None, None
+        return segment
+
+    def remove(self, segment):
+        """Remove `segment`, once its messages have been processed."""
+        try:
+            os.remove(segment)
+        except FileNotFoundError:
+            pass
+        fp = self._locked.pop(segment, None)
+        if fp is not None:
+            fp.close()
+
+    def claim_orphans(self):
+        """Lock the segments of processes that are no longer running.
+
+        :return: The paths of the claimed segments, oldest first.
+        """
+        try:
+            names = sorted(os.listdir(self.path))
+        except FileNotFoundError:
+            return []
+        claimed = []
+        for name in names:
+            segment = os.path.join(self.path, name)
+            if name.startswith(".") or segment in self._locked:
+                continue
+            try:
+                fp = open(segment, "r")
+            except FileNotFoundError:
+                # Processed and removed by its owner.
+                continue
+            try:
+                fcntl.flock(fp, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Still in use by another process.
+                fp.close()
+                continue
+            if not os.path.exists(segment):
+                # Removed between listing and locking it.
+                fp.close()
+                continue
+            self._locked[segment] = fp
+            claimed.append(segment)
+        return claimed
+
+    def read(self, segment):
+        """Return a list of the `(key, message)` pairs in `segment`."""
+        messages = []
+        with open(segment, "r") as fp:
+            for line in fp:
+                try:
+                    messages.append(_decode_message(line))
+                except ValueError:
+                    # The last line is incomplete if the process that was
+                    # writing it died part-way through.
+                    maaslog.warning(
+                        "Ignoring unreadable status message in %s." % segment
+                    )
+        return messages
@@ -2579,7 +2579,8 @@ class TestCommissioningAPI(MAASServerTestCase):
         self.assertEqual(http.client.OK, response.status_code)
         self.assertEqual(NODE_STATUS.READY, reload_object(node).status)
         self.assertThat(
-            populate_tags_for_single_node, MockCalledOnceWith(ANY, node)
+            populate_tags_for_single_node,
+            MockCalledOnceWith(ANY, node, only_if_changed=True),
         )
 
     def test_signaling_commissioning_OK_moves_node_to_new_when_enlisting(self):
@@ -2614,7 +2615,8 @@ class TestCommissioningAPI(MAASServerTestCase):
         self.assertEqual(NODE_STATUS.NEW, reload_object(node).status)
         self.assertIsNone(reload_object(nmd))
         self.assertThat(
-            populate_tags_for_single_node, MockCalledOnceWith(ANY, node)
+            populate_tags_for_single_node,
+            MockCalledOnceWith(ANY, node, only_if_changed=True),
         )
 
     def test_signaling_commissioning_other_keeps_enlisting_tag(self):
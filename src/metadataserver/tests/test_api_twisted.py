@@ -3,10 +3,12 @@
 
 
 import base64
+import binascii
 import bz2
 from datetime import datetime, timedelta
 from io import BytesIO
 import json
+import os
 import random
 from unittest.mock import call, Mock, sentinel
 
@@ -14,7 +16,6 @@ from crochet import wait_for
 from django.db.utils import DatabaseError
 from netaddr import IPAddress
 from testtools import ExpectedException
-from testtools.matchers import Equals, MatchesListwise, MatchesSetwise
 from twisted.internet.defer import inlineCallbacks, succeed
 from twisted.web.server import NOT_DONE_YET
 from twisted.web.test.requesthelper import DummyRequest
@@ -53,6 +54,7 @@ from metadataserver.api_twisted import (
 )
 from metadataserver.enum import RESULT_TYPE, SCRIPT_STATUS
 from metadataserver.models import NodeKey
+from metadataserver.status_spool import StatusMessageSpool
 from provisioningserver.events import EVENT_STATUS_MESSAGES
 
 wait_for_reactor = wait_for(30)
@@ -179,49 +181,120 @@ class TestStatusWorkerServiceTransactional(MAASTransactionServerTestCase):
         }
 
     def test_init__(self):
-        worker = StatusWorkerService(sentinel.dbtasks, clock=sentinel.reactor)
-        self.assertEqual(sentinel.dbtasks, worker.dbtasks)
+        worker = StatusWorkerService(clock=sentinel.reactor)
         self.assertEqual(sentinel.reactor, worker.clock)
-        self.assertEqual(60, worker.step)
+        self.assertEqual(10, worker.step)
         self.assertEqual((worker._tryUpdateNodes, tuple(), {}), worker.call)
 
+    def test_init_with_interval(self):
+        worker = StatusWorkerService(interval=3)
+        self.assertEqual(3, worker.step)
+
     def test_tryUpdateNodes_returns_None_when_empty_queue(self):
-        worker = StatusWorkerService(sentinel.dbtasks)
+        worker = StatusWorkerService()
         self.assertIsNone(worker._tryUpdateNodes())
 
     @wait_for_reactor
     @inlineCallbacks
-    def test_tryUpdateNodes_sends_work_to_dbtasks(self):
+    def test_tryUpdateNodes_processes_messages_for_each_node(self):
         nodes_with_tokens = yield deferToDatabase(self.make_nodes_with_tokens)
         node_messages = {
             node: [self.make_message() for _ in range(3)]
             for node, _ in nodes_with_tokens
         }
-        dbtasks = Mock()
-        dbtasks.addTask = Mock()
-        worker = StatusWorkerService(dbtasks)
+        worker = StatusWorkerService()
+        mock_processMessages = self.patch(worker, "_processMessages")
         for node, token in nodes_with_tokens:
             for message in node_messages[node]:
                 worker.queueMessage(token.key, message)
         yield worker._tryUpdateNodes()
-        call_args = [
-            (call_arg[0][1], call_arg[0][2])
-            for call_arg in dbtasks.addTask.call_args_list
-        ]
+        # Nodes are processed in parallel, so in no particular order.
+        self.assertCountEqual(
+            [call(node, messages) for node, messages in node_messages.items()],
+            mock_processMessages.call_args_list,
+        )
+        self.assertEqual({}, worker.queue)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_tryUpdateNodes_skips_invalid_nodekey(self):
+        nodes_with_tokens = yield deferToDatabase(self.make_nodes_with_tokens)
+        node, token = nodes_with_tokens[0]
+        yield deferToDatabase(token.delete)
+        worker = StatusWorkerService()
+        mock_processMessages = self.patch(worker, "_processMessages")
+        worker.queueMessage(token.key, self.make_message())
+        yield worker._tryUpdateNodes()
+        self.assertThat(mock_processMessages, MockNotCalled())
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_queueMessage_spools_queued_messages(self):
+        nodes_with_tokens = yield deferToDatabase(self.make_nodes_with_tokens)
+        node, token = nodes_with_tokens[0]
+        spool = StatusMessageSpool(self.make_dir())
+        worker = StatusWorkerService(spool=spool)
+        self.patch(worker, "_processMessages")
+        message = self.make_message()
+        yield worker.queueMessage(token.key, message)
+        [segment] = os.listdir(spool.path)
+        self.assertEqual(
+            [(token.key, message)],
+            spool.read(os.path.join(spool.path, segment)),
+        )
+        # The spooled messages are removed once they have been processed.
+        yield worker._tryUpdateNodes()
+        self.assertEqual([], os.listdir(spool.path))
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_startService_processes_orphaned_messages(self):
+        nodes_with_tokens = yield deferToDatabase(self.make_nodes_with_tokens)
+        node, token = nodes_with_tokens[0]
+        path = self.make_dir()
+        message = self.make_message()
+        message["timestamp"] = datetime.utcnow()
+        # Spooled by a process that's no longer running.
+        orphaned = StatusMessageSpool(path)
+        orphaned.append(token.key, message)
+        orphaned._file.close()
+        worker = StatusWorkerService(spool=StatusMessageSpool(path))
+        mock_processMessages = self.patch(worker, "_processMessages")
+        # Process the queue below rather than when the service starts.
+        worker.call = (lambda: None, (), {})
+        worker.startService()
+        self.addCleanup(worker.stopService)
+        self.assertEqual({token.key: [message]}, worker.queue)
+        yield worker._tryUpdateNodes()
         self.assertThat(
-            call_args,
-            MatchesSetwise(
-                *[
-                    MatchesListwise([Equals(node), Equals(messages)])
-                    for node, messages in node_messages.items()
-                ]
-            ),
+            mock_processMessages, MockCalledOnceWith(node, [message])
         )
+        self.assertEqual([], os.listdir(path))
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_queueMessage_processes_queued_messages_first(self):
+        nodes_with_tokens = yield deferToDatabase(self.make_nodes_with_tokens)
+        node, token = nodes_with_tokens[0]
+        worker = StatusWorkerService()
+        processed = []
+        self.patch(
+            worker,
+            "_processMessage",
+            lambda node, message: processed.append(message["name"]),
+        )
+        queued = self.make_message()
+        worker.queueMessage(token.key, queued)
+        instant = self.make_message()
+        instant["event_type"] = "finish"
+        yield worker.queueMessage(token.key, instant)
+        self.assertEqual([queued["name"], instant["name"]], processed)
+        self.assertEqual({}, worker.queue)
 
     @wait_for_reactor
     @inlineCallbacks
     def test_processMessages_fails_when_in_transaction(self):
-        worker = StatusWorkerService(sentinel.dbtasks)
+        worker = StatusWorkerService()
         with ExpectedException(TransactionManagementError):
             yield deferToDatabase(
                 transactional(worker._processMessages),
@@ -232,7 +305,7 @@ class TestStatusWorkerServiceTransactional(MAASTransactionServerTestCase):
     @wait_for_reactor
     @inlineCallbacks
     def test_processMessageNow_fails_when_in_transaction(self):
-        worker = StatusWorkerService(sentinel.dbtasks)
+        worker = StatusWorkerService()
         with ExpectedException(TransactionManagementError):
             yield deferToDatabase(
                 transactional(worker._processMessageNow),
@@ -243,7 +316,7 @@ class TestStatusWorkerServiceTransactional(MAASTransactionServerTestCase):
     @wait_for_reactor
     @inlineCallbacks
     def test_processMessages_doesnt_call_when_node_deleted(self):
-        worker = StatusWorkerService(sentinel.dbtasks)
+        worker = StatusWorkerService()
         mock_processMessage = self.patch(worker, "_processMessage")
         mock_processMessage.return_value = False
         yield deferToDatabase(
@@ -259,7 +332,7 @@ class TestStatusWorkerServiceTransactional(MAASTransactionServerTestCase):
     @wait_for_reactor
     @inlineCallbacks
     def test_processMessages_calls_processMessage(self):
-        worker = StatusWorkerService(sentinel.dbtasks)
+        worker = StatusWorkerService()
         mock_processMessage = self.patch(worker, "_processMessage")
         yield deferToDatabase(
             worker._processMessages,
@@ -277,7 +350,7 @@ class TestStatusWorkerServiceTransactional(MAASTransactionServerTestCase):
     @wait_for_reactor
     @inlineCallbacks
     def test_queueMessages_processes_top_level_message_instantly(self):
-        worker = StatusWorkerService(sentinel.dbtasks)
+        worker = StatusWorkerService()
         mock_processMessage = self.patch(worker, "_processMessage")
         message = self.make_message()
         message["event_type"] = "finish"
@@ -290,7 +363,7 @@ class TestStatusWorkerServiceTransactional(MAASTransactionServerTestCase):
     @inlineCallbacks
     def test_queueMessages_processes_top_level_status_messages_instantly(self):
         for name in EVENT_STATUS_MESSAGES.keys():
-            worker = StatusWorkerService(sentinel.dbtasks)
+            worker = StatusWorkerService()
             mock_processMessage = self.patch(worker, "_processMessage")
             message = self.make_message()
             message["event_type"] = "start"
@@ -307,7 +380,7 @@ class TestStatusWorkerServiceTransactional(MAASTransactionServerTestCase):
     @wait_for_reactor
     @inlineCallbacks
     def test_queueMessages_processes_files_message_instantly(self):
-        worker = StatusWorkerService(sentinel.dbtasks)
+        worker = StatusWorkerService()
         mock_processMessage = self.patch(worker, "_processMessage")
         contents = b"These are the contents of the file."
         encoded_content = encode_as_base64(bz2.compress(contents))
@@ -315,7 +388,7 @@ class TestStatusWorkerServiceTransactional(MAASTransactionServerTestCase):
         message["files"] = [
             {
                 "path": "sample.txt",
-                "encoding": "uuencode",
+                "encoding": "base64",
                 "compression": "bzip2",
                 "content": encoded_content,
             }
@@ -324,11 +397,35 @@ class TestStatusWorkerServiceTransactional(MAASTransactionServerTestCase):
         node, token = nodes_with_tokens[0]
         yield worker.queueMessage(token.key, message)
         self.assertThat(mock_processMessage, MockCalledOnceWith(node, message))
+        # The content was decoded before the message was processed.
+        self.assertEqual(contents, message["files"][0]["content"])
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_queueMessages_decodes_files_outside_database_thread(self):
+        worker = StatusWorkerService()
+        self.patch(worker, "_processMessage")
+        deferToThread = self.patch(api_twisted_module, "deferToThread")
+        deferToThread.side_effect = lambda func, *args: succeed(func(*args))
+        message = self.make_message()
+        message["files"] = [
+            {
+                "path": "sample.txt",
+                "encoding": "base64",
+                "content": encode_as_base64(b"contents"),
+            }
+        ]
+        nodes_with_tokens = yield deferToDatabase(self.make_nodes_with_tokens)
+        node, token = nodes_with_tokens[0]
+        yield worker.queueMessage(token.key, message)
+        self.assertThat(
+            deferToThread, MockCalledOnceWith(worker._decodeFiles, message)
+        )
 
     @wait_for_reactor
     @inlineCallbacks
     def test_queueMessages_handled_invalid_nodekey_with_instant_msg(self):
-        worker = StatusWorkerService(sentinel.dbtasks)
+        worker = StatusWorkerService()
         mock_processMessage = self.patch(worker, "_processMessage")
         contents = b"These are the contents of the file."
         encoded_content = encode_as_base64(bz2.compress(contents))
@@ -336,7 +433,7 @@ class TestStatusWorkerServiceTransactional(MAASTransactionServerTestCase):
         message["files"] = [
             {
                 "path": "sample.txt",
-                "encoding": "uuencode",
+                "encoding": "base64",
                 "compression": "bzip2",
                 "content": encoded_content,
             }
@@ -358,7 +455,7 @@ class TestStatusWorkerService(MAASServerTestCase):
         self.useFixture(SignalsDisabled("power"))
 
     def processMessage(self, node, payload):
-        worker = StatusWorkerService(sentinel.dbtasks)
+        worker = StatusWorkerService()
         return worker._processMessage(node, payload)
 
     def test_process_message_logs_event_for_start_event_type(self):
@@ -849,6 +946,27 @@ class TestStatusWorkerService(MAASServerTestCase):
         with ExpectedException(ValueError):
             self.processMessage(node, payload)
 
+    def test_retrieve_content_decodes_in_pieces(self):
+        worker = StatusWorkerService()
+        worker.decode_chunk_size = 7
+        contents = factory.make_bytes(500)
+        # encodebytes() splits its output into lines.
+        encoded_content = encode_as_base64(bz2.compress(contents))
+        self.assertEqual(
+            contents,
+            worker._retrieve_content("bzip2", "base64", encoded_content),
+        )
+
+    def test_retrieve_content_rejects_truncated_content(self):
+        worker = StatusWorkerService()
+        self.assertRaises(
+            binascii.Error,
+            worker._retrieve_content,
+            None,
+            "base64",
+            encode_as_base64(b"contents").strip()[:-1],
+        )
+
     def test_status_with_file_no_compression_succeeds(self):
         node = factory.make_Node(
             interface=True,
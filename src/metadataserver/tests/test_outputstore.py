@@ -0,0 +1,193 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for `metadataserver.outputstore`."""
+
+
+from hashlib import sha256
+import os
+
+from twisted.internet.defer import maybeDeferred
+from twisted.internet.task import Clock
+
+from maasserver.testing.config import RegionConfigurationFixture
+from maasserver.testing.factory import factory
+from maasserver.testing.testcase import MAASServerTestCase
+from maasserver.utils.orm import reload_object
+from maastesting.matchers import MockCalledOnceWith, MockNotCalled
+from maastesting.testcase import MAASTestCase
+from metadataserver import outputstore
+from metadataserver.enum import SCRIPT_STATUS
+from metadataserver.models import ScriptOutput
+from metadataserver.outputstore import (
+    DatabaseOutputStore,
+    DirectoryOutputStore,
+    get_output_store,
+    prune_script_output_directory,
+    ScriptOutputPruneService,
+)
+from provisioningserver.path import get_maas_data_path
+
+
+def make_script_output(content):
+    return ScriptOutput(
+        name="stdout", size=len(content), sha256=sha256(content).hexdigest()
+    )
+
+
+class TestDatabaseOutputStore(MAASTestCase):
+    def test_write_compresses_content(self):
+        content = b"a" * 10000
+        script_output = make_script_output(content)
+        DatabaseOutputStore().write(script_output, content)
+        self.assertEqual("zlib", script_output.compression)
+        self.assertLess(len(script_output.data), len(content))
+
+    def test_write_keeps_content_that_doesnt_compress(self):
+        content = os.urandom(100)
+        script_output = make_script_output(content)
+        DatabaseOutputStore().write(script_output, content)
+        self.assertEqual("", script_output.compression)
+        self.assertEqual(content, script_output.data)
+
+    def test_stream_returns_content(self):
+        content = os.urandom(1000) + b"a" * (outputstore.CHUNK_SIZE * 3)
+        script_output = make_script_output(content)
+        store = DatabaseOutputStore()
+        store.write(script_output, content)
+        # The database returns the content as a memoryview.
+        script_output.data = memoryview(script_output.data)
+        chunks = list(store.stream(script_output))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(content, b"".join(chunks))
+
+
+class TestDirectoryOutputStore(MAASTestCase):
+    def test_path_defaults_to_maas_data(self):
+        self.assertEqual(
+            get_maas_data_path("script-output"), DirectoryOutputStore().path
+        )
+
+    def test_write_stores_content_by_sha256(self):
+        content = factory.make_bytes()
+        script_output = make_script_output(content)
+        store = DirectoryOutputStore(self.make_dir())
+        store.write(script_output, content)
+        self.assertIsNone(script_output.data)
+        self.assertEqual([script_output.sha256], os.listdir(store.path))
+        self.assertEqual(content, b"".join(store.stream(script_output)))
+
+    def test_write_reuses_stored_content(self):
+        content = b"a" * 10000
+        store = DirectoryOutputStore(self.make_dir())
+        store.write(make_script_output(content), content)
+        script_output = make_script_output(content)
+        path = os.path.join(store.path, script_output.sha256)
+        os.utime(path, (0, 0))
+        store.write(script_output, content)
+        self.assertEqual("zlib", script_output.compression)
+        self.assertEqual([script_output.sha256], os.listdir(store.path))
+        self.assertGreater(os.path.getmtime(path), 0)
+
+    def test_stream_returns_nothing_when_content_is_missing(self):
+        script_output = make_script_output(factory.make_bytes())
+        store = DirectoryOutputStore(self.make_dir())
+        self.assertEqual([], list(store.stream(script_output)))
+
+    def test_prune_removes_unused_content(self):
+        store = DirectoryOutputStore(self.make_dir())
+        used, unused, recent = (factory.make_bytes() for _ in range(3))
+        script_outputs = {}
+        for content in (used, unused, recent):
+            script_output = make_script_output(content)
+            store.write(script_output, content)
+            script_outputs[content] = script_output
+        for content in (used, unused):
+            os.utime(
+                os.path.join(store.path, script_outputs[content].sha256),
+                (0, 0),
+            )
+        self.assertEqual(1, store.prune([script_outputs[used].sha256]))
+        self.assertCountEqual(
+            [script_outputs[used].sha256, script_outputs[recent].sha256],
+            os.listdir(store.path),
+        )
+
+    def test_prune_removes_stale_temporary_files(self):
+        store = DirectoryOutputStore(self.make_dir())
+        stale = self.make_file(dirpath=store.path, name=".stale")
+        os.utime(stale, (0, 0))
+        self.make_file(dirpath=store.path, name=".fresh")
+        self.assertEqual(1, store.prune([]))
+        self.assertEqual([".fresh"], os.listdir(store.path))
+
+    def test_prune_without_directory(self):
+        store = DirectoryOutputStore(os.path.join(self.make_dir(), "missing"))
+        self.assertEqual(0, store.prune([]))
+
+
+def use_output_store(testcase, name):
+    """Configure the region to write new output to the store called `name`."""
+    testcase.useFixture(RegionConfigurationFixture(script_output_store=name))
+    outputstore.get_configured_store_name.cache_clear()
+    testcase.addCleanup(outputstore.get_configured_store_name.cache_clear)
+
+
+class TestGetOutputStore(MAASTestCase):
+    def test_returns_named_store(self):
+        self.assertIsInstance(
+            get_output_store("directory"), DirectoryOutputStore
+        )
+
+    def test_returns_configured_store(self):
+        use_output_store(self, "database")
+        self.assertIsInstance(get_output_store(), DatabaseOutputStore)
+        use_output_store(self, "directory")
+        self.assertIsInstance(get_output_store(), DirectoryOutputStore)
+
+    def test_reads_configured_store_once(self):
+        use_output_store(self, "directory")
+        get_output_store()
+        self.useFixture(
+            RegionConfigurationFixture(script_output_store="database")
+        )
+        self.assertIsInstance(get_output_store(), DirectoryOutputStore)
+
+
+class TestPruneScriptOutputDirectory(MAASServerTestCase):
+    def test_prunes_content_that_is_not_used(self):
+        use_output_store(self, "directory")
+        script_result = factory.make_ScriptResult(status=SCRIPT_STATUS.PASSED)
+        store = DirectoryOutputStore()
+        unused = self.make_file(dirpath=store.path, name="0" * 64)
+        os.utime(unused, (0, 0))
+        used = set(os.listdir(store.path)) - {"0" * 64}
+        for name in used:
+            os.utime(os.path.join(store.path, name), (0, 0))
+        prune_script_output_directory()
+        self.assertEqual(used, set(os.listdir(store.path)))
+        script_result = reload_object(script_result)
+        for name in ("output", "stdout", "stderr", "result"):
+            self.assertNotEqual(b"", getattr(script_result, name))
+
+
+class TestScriptOutputPruneService(MAASServerTestCase):
+    def test_init_with_default_interval(self):
+        prune = self.patch(outputstore, "prune_script_output_directory")
+        self.patch(outputstore, "deferToDatabase", maybeDeferred)
+
+        service = ScriptOutputPruneService()
+        service.clock = Clock()
+
+        interval = 24 * 60 * 60  # seconds.
+        self.assertEqual(service.step, interval)
+        self.assertThat(prune, MockNotCalled())
+        service.startService()
+        self.assertThat(prune, MockCalledOnceWith())
+        service.clock.advance(interval)
+        self.assertEqual(2, prune.call_count)
+
+    def test_interval_can_be_set(self):
+        interval = self.getUniqueInteger()
+        service = ScriptOutputPruneService(interval)
+        self.assertEqual(interval, service.step)
@@ -0,0 +1,87 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for `metadataserver.status_spool`."""
+
+
+from datetime import datetime
+import os
+
+from maastesting.factory import factory
+from maastesting.testcase import MAASTestCase
+from metadataserver.status_spool import StatusMessageSpool
+from provisioningserver.path import get_maas_data_path
+
+
+class TestStatusMessageSpool(MAASTestCase):
+    def make_message(self):
+        return {
+            "event_type": factory.make_name("type"),
+            "name": factory.make_name("name"),
+            "timestamp": datetime.utcnow(),
+        }
+
+    def test_path_defaults_to_maas_data(self):
+        self.assertEqual(
+            get_maas_data_path("status-spool"), StatusMessageSpool().path
+        )
+
+    def test_append_writes_messages_to_segment(self):
+        spool = StatusMessageSpool(self.make_dir())
+        messages = [
+            (factory.make_name("key"), self.make_message()) for _ in range(3)
+        ]
+        for key, message in messages:
+            spool.append(key, message)
+        segment = spool.rotate()
+        self.assertEqual([os.path.basename(segment)], os.listdir(spool.path))
+        self.assertEqual(messages, spool.read(segment))
+
+    def test_rotate_starts_new_segment(self):
+        spool = StatusMessageSpool(self.make_dir())
+        self.assertIsNone(spool.rotate())
+        spool.append("key", self.make_message())
+        first = spool.rotate()
+        self.assertIsNone(spool.rotate())
+        spool.append("key", self.make_message())
+        second = spool.rotate()
+        self.assertNotEqual(first, second)
+        self.assertEqual(sorted([first, second]), [first, second])
+
+    def test_remove_removes_segment(self):
+        spool = StatusMessageSpool(self.make_dir())
+        spool.append("key", self.make_message())
+        spool.remove(spool.rotate())
+        self.assertEqual([], os.listdir(spool.path))
+
+    def test_claim_orphans_ignores_segments_in_use(self):
+        path = self.make_dir()
+        other = StatusMessageSpool(path)
+        other.append("key", self.make_message())
+        other.append("key", self.make_message())
+        other.rotate()
+        other.append("key", self.make_message())
+        self.assertEqual([], StatusMessageSpool(path).claim_orphans())
+
+    def test_claim_orphans_claims_unlocked_segments(self):
+        path = self.make_dir()
+        message = self.make_message()
+        orphaned = StatusMessageSpool(path)
+        orphaned.append("key", message)
+        segment = orphaned.rotate()
+        # The process that wrote the segment has gone away.
+        orphaned._locked.pop(segment).close()
+        spool = StatusMessageSpool(path)
+        self.assertEqual([segment], spool.claim_orphans())
+        self.assertEqual([("key", message)], spool.read(segment))
+        # Once claimed, no other process can claim it.
+        self.assertEqual([], StatusMessageSpool(path).claim_orphans())
+        self.assertEqual([], spool.claim_orphans())
+
+    def test_read_skips_incomplete_lines(self):
+        spool = StatusMessageSpool(self.make_dir())
+        message = self.make_message()
+        spool.append("key", message)
+        spool._file.write('["key", {"event_')
+        spool._file.flush()
+        self.assertEqual([("key", message)], spool.read(spool.rotate()))
@@ -120,12 +120,13 @@ import traceback
 from formencode import ForEach, Schema
 from formencode.api import is_validator, NoDefault
 from formencode.declarative import DeclarativeMeta
-from formencode.validators import Number, Set
+from formencode.validators import Int, Number, Set
 import yaml
 
 from provisioningserver.path import get_maas_data_path, get_tentative_data_path
 from provisioningserver.utils import typed
 from provisioningserver.utils.config import (
+    DictOf,
     DirectoryString,
     ExtendedURL,
     OneWayStringBool,
@@ -783,6 +784,33 @@ class ClusterConfiguration(Configuration, metaclass=ClusterConfigurationMeta):
         ),
     )
 
+    # Power options.
+    power_thread_pool_size = ConfigurationOption(
+        "power_thread_pool_size",
+        (
+            "The most threads that run blocking power driver calls for each "
+            "power type at once."
+        ),
+        Number(min=1, if_missing=10),
+    )
+    power_thread_pool_size_by_type = ConfigurationOption(
+        "power_thread_pool_size_by_type",
+        (
+            "The most threads that run blocking power driver calls at once "
+            "for each of the given power types, e.g. {ipmi: 20}, instead of "
+            "power_thread_pool_size."
+        ),
+        DictOf(Int(min=1), if_missing={}),
+    )
+    power_max_nodes_at_once_by_type = ConfigurationOption(
+        "power_max_nodes_at_once_by_type",
+        (
+            "The most power queries in progress at once for each of the "
+            "given power types, e.g. {ipmi: 20}, instead of the default."
+        ),
+        DictOf(Int(min=1), if_missing={}),
+    )
+
     # GRUB options.
 
     @property
@@ -1,5 +1,7 @@
 import base64
 import secrets
+import struct
+from typing import Iterable, List, Optional, Tuple
 
 from pypureomapi import (
     Omapi,
@@ -8,6 +10,7 @@ from pypureomapi import (
     OmapiError,
     OmapiMessage,
     pack_ip,
+    pack_mac,
 )
 
 
@@ -17,7 +20,16 @@ def generate_omapi_key() -> str:
 
 
 class OmapiClient:
-    """Client for the DHCP OMAPI."""
+    """Client for the DHCP OMAPI.
+
+    Besides the single host operations, hosts can be added, removed and
+    updated in batches. A batch sends its messages without waiting for the
+    responses in between, up to `pipeline_depth` messages at a time, so it
+    takes a couple of round-trips to the server however many hosts it has.
+    """
+
+    # The most messages that are sent before waiting for their responses.
+    pipeline_depth = 64
 
     def __init__(self, omapi_key: str, ipv6: bool = False):
         self._omapi = Omapi(
@@ -52,5 +64,87 @@ class OmapiClient:
                 f"Updating IP for host {name.decode('ascii')} to {ip} failed"
             )
 
+    def add_hosts(self, hosts: Iterable[Tuple[str, str, Optional[str]]]):
+        """Add host mappings for `(mac, ip, statements)` tuples.
+
+        `statements` are dhcpd statements for the host, or None.
+        """
+        messages = []
+        for mac, ip, statements in hosts:
+            msg = OmapiMessage.open(b"host")
+            msg.message.append((b"create", struct.pack("!I", 1)))
+            msg.obj.append((b"name", self._name_from_mac(mac)))
+            msg.obj.append((b"hardware-address", pack_mac(mac)))
+            msg.obj.append((b"hardware-type", struct.pack("!I", 1)))
+            msg.obj.append((b"ip-address", pack_ip(ip)))
+            if statements:
+                msg.obj.append((b"statements", statements.encode("utf-8")))
+            messages.append(msg)
+        for msg, resp in zip(messages, self._query_server_pipelined(messages)):
+            if resp.opcode != OMAPI_OP_UPDATE:
+                name = dict(msg.obj)[b"name"].decode("ascii")
+                raise OmapiError(f"Adding host {name} failed")
+
+    def del_hosts(self, macs: Iterable[str]):
+        """Remove the host mappings for `macs`."""
+        handles = self._open_hosts(macs)
+        messages = [OmapiMessage.delete(handle) for _, handle in handles]
+        for (name, _), resp in zip(
+            handles, self._query_server_pipelined(messages)
+        ):
+            if resp.opcode != OMAPI_OP_STATUS:
+                raise OmapiError(f"Deleting host {name} failed")
+
+    def update_hosts(self, hosts: Iterable[Tuple[str, str]]):
+        """Update the host mappings for `(mac, ip)` tuples."""
+        hosts = list(hosts)
+        handles = self._open_hosts(mac for mac, _ in hosts)
+        messages = []
+        for (_, handle), (_, ip) in zip(handles, hosts):
+            msg = OmapiMessage.update(handle)
+            msg.update_object({b"ip-address": pack_ip(ip)})
+            messages.append(msg)
+        for (name, _), (_, ip), resp in zip(
+            handles, hosts, self._query_server_pipelined(messages)
+        ):
+            if resp.opcode != OMAPI_OP_STATUS:
+                raise OmapiError(f"Updating IP for host {name} to {ip} failed")
+
+    def _open_hosts(self, macs: Iterable[str]) -> List[Tuple[str, int]]:
+        """Return `(name, handle)` of the existing host for each of `macs`."""
+        names = [self._name_from_mac(mac) for mac in macs]
+        messages = []
+        for name in names:
+            msg = OmapiMessage.open(b"host")
+            msg.update_object({b"name": name})
+            messages.append(msg)
+        handles = []
+        for name, resp in zip(names, self._query_server_pipelined(messages)):
+            name = name.decode("ascii")
+            if resp.opcode != OMAPI_OP_UPDATE or resp.handle == 0:
+                raise OmapiError(f"Host not found: {name}")
+            handles.append((name, resp.handle))
+        return handles
+
+    def _query_server_pipelined(
+        self, messages: List[OmapiMessage]
+    ) -> List[OmapiMessage]:
+        """Send `messages`, and return their responses in the same order."""
+        responses = {}
+        for start in range(0, len(messages), self.pipeline_depth):
+            pending = {}
+            for msg in messages[start : start + self.pipeline_depth]:
+                self._omapi.send_message(msg)
+                pending[msg.tid] = msg
+            while pending:
+                resp = self._omapi.receive_message()
+                msg = pending.pop(resp.rid, None)
+                if msg is None:
+                    raise OmapiError(
+                        "received message is not the desired response"
+                    )
+                responses[msg.tid] = resp
+        return [responses[msg.tid] for msg in messages]
+
     def _name_from_mac(self, mac: str) -> bytes:
         return mac.replace(":", "-").encode("ascii")
@@ -1,6 +1,8 @@
 import base64
 from unittest.mock import Mock
 
+from pypureomapi import OMAPI_OP_DELETE, OMAPI_OP_OPEN
+
 from maastesting.testcase import MAASTestCase
 from provisioningserver.dhcp import omapi
 from provisioningserver.dhcp.omapi import (
@@ -101,3 +103,159 @@ class TestOmapiClient(MAASTestCase):
             str(err),
             "Updating IP for host aa-bb-cc-dd-ee-ff to 1.2.3.4 failed",
         )
+
+
+class FakeOmapi:
+    """Answers OMAPI messages once several have been sent."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.sent = []
+        self.unanswered = []
+        self.max_unanswered = 0
+
+    def send_message(self, msg):
+        self.sent.append(msg)
+        self.unanswered.append(msg)
+        self.max_unanswered = max(self.max_unanswered, len(self.unanswered))
+
+    def receive_message(self):
+        msg = self.unanswered.pop(0)
+        resp = self.respond(msg)
+        resp.rid = msg.tid
+        return resp
+
+
+class TestOmapiClientBatches(MAASTestCase):
+    def make_client(self, respond):
+        fake_omapi = FakeOmapi(respond)
+        self.patch(omapi, "Omapi").return_value = fake_omapi
+        return OmapiClient("shared-key"), fake_omapi
+
+    def respond_ok(self, msg):
+        if msg.opcode == OMAPI_OP_OPEN:
+            return OmapiMessage(opcode=OMAPI_OP_UPDATE, handle=len(msg.obj))
+        else:
+            return OmapiMessage(opcode=OMAPI_OP_STATUS)
+
+    def test_add_hosts(self):
+        cli, fake_omapi = self.make_client(
+            lambda msg: OmapiMessage(opcode=OMAPI_OP_UPDATE)
+        )
+        cli.add_hosts(
+            [
+                ("aa:bb:cc:dd:ee:ff", "1.2.3.4", None),
+                ("aa:bb:cc:dd:ee:00", "1.2.3.5", "option a;"),
+            ]
+        )
+        self.assertEqual(
+            [
+                [
+                    (b"name", b"aa-bb-cc-dd-ee-ff"),
+                    (b"hardware-address", b"\xaa\xbb\xcc\xdd\xee\xff"),
+                    (b"hardware-type", b"\x00\x00\x00\x01"),
+                    (b"ip-address", b"\x01\x02\x03\x04"),
+                ],
+                [
+                    (b"name", b"aa-bb-cc-dd-ee-00"),
+                    (b"hardware-address", b"\xaa\xbb\xcc\xdd\xee\x00"),
+                    (b"hardware-type", b"\x00\x00\x00\x01"),
+                    (b"ip-address", b"\x01\x02\x03\x05"),
+                    (b"statements", b"option a;"),
+                ],
+            ],
+            [msg.obj for msg in fake_omapi.sent],
+        )
+        self.assertEqual(2, fake_omapi.max_unanswered)
+
+    def test_add_hosts_error(self):
+        cli, _ = self.make_client(
+            lambda msg: OmapiMessage(opcode=OMAPI_OP_STATUS)
+        )
+        err = self.assertRaises(
+            OmapiError,
+            cli.add_hosts,
+            [("aa:bb:cc:dd:ee:ff", "1.2.3.4", None)],
+        )
+        self.assertEqual(str(err), "Adding host aa-bb-cc-dd-ee-ff failed")
+
+    def test_del_hosts(self):
+        cli, fake_omapi = self.make_client(self.respond_ok)
+        cli.del_hosts(["aa:bb:cc:dd:ee:ff", "aa:bb:cc:dd:ee:00"])
+        self.assertEqual(
+            [OMAPI_OP_OPEN, OMAPI_OP_OPEN, OMAPI_OP_DELETE, OMAPI_OP_DELETE],
+            [msg.opcode for msg in fake_omapi.sent],
+        )
+        self.assertEqual(
+            [(b"name", b"aa-bb-cc-dd-ee-ff")], fake_omapi.sent[0].obj
+        )
+        self.assertEqual(2, fake_omapi.max_unanswered)
+
+    def test_del_hosts_not_found(self):
+        cli, fake_omapi = self.make_client(
+            lambda msg: OmapiMessage(opcode=OMAPI_OP_STATUS)
+        )
+        err = self.assertRaises(
+            OmapiError, cli.del_hosts, ["aa:bb:cc:dd:ee:ff"]
+        )
+        self.assertEqual(str(err), "Host not found: aa-bb-cc-dd-ee-ff")
+        self.assertEqual(1, len(fake_omapi.sent))
+
+    def test_update_hosts(self):
+        cli, fake_omapi = self.make_client(self.respond_ok)
+        cli.update_hosts(
+            [
+                ("aa:bb:cc:dd:ee:ff", "1.2.3.4"),
+                ("aa:bb:cc:dd:ee:00", "1.2.3.5"),
+            ]
+        )
+        self.assertEqual(
+            [OMAPI_OP_OPEN, OMAPI_OP_OPEN, OMAPI_OP_UPDATE, OMAPI_OP_UPDATE],
+            [msg.opcode for msg in fake_omapi.sent],
+        )
+        self.assertEqual(
+            [
+                [(b"ip-address", b"\x01\x02\x03\x04")],
+                [(b"ip-address", b"\x01\x02\x03\x05")],
+            ],
+            [msg.obj for msg in fake_omapi.sent[2:]],
+        )
+
+    def test_update_hosts_error(self):
+        cli, _ = self.make_client(
+            lambda msg: OmapiMessage(opcode=OMAPI_OP_UPDATE, handle=1)
+        )
+        err = self.assertRaises(
+            OmapiError,
+            cli.update_hosts,
+            [("aa:bb:cc:dd:ee:ff", "1.2.3.4")],
+        )
+        self.assertEqual(
+            str(err),
+            "Updating IP for host aa-bb-cc-dd-ee-ff to 1.2.3.4 failed",
+        )
+
+    def test_limits_messages_in_flight(self):
+        self.patch(OmapiClient, "pipeline_depth", 3)
+        cli, fake_omapi = self.make_client(
+            lambda msg: OmapiMessage(opcode=OMAPI_OP_UPDATE)
+        )
+        cli.add_hosts(
+            [
+                ("aa:bb:cc:dd:ee:%02x" % i, "1.2.3.%d" % i, None)
+                for i in range(10)
+            ]
+        )
+        self.assertEqual(10, len(fake_omapi.sent))
+        self.assertEqual(3, fake_omapi.max_unanswered)
+
+    def test_rejects_unexpected_response(self):
+        cli, fake_omapi = self.make_client(None)
+        fake_omapi.receive_message = lambda: OmapiMessage(
+            opcode=OMAPI_OP_UPDATE, rid=0
+        )
+        self.assertRaises(
+            OmapiError,
+            cli.add_hosts,
+            [("aa:bb:cc:dd:ee:ff", "1.2.3.4", None)],
+        )
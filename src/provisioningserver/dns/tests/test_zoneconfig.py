@@ -28,6 +28,8 @@ from provisioningserver.dns.zoneconfig import (
     DNSForwardZoneConfig,
     DNSReverseZoneConfig,
     DomainInfo,
+    enumerate_ip_mapping,
+    IPIndexedMapping,
 )
 
 
@@ -621,6 +623,28 @@ class TestDNSReverseZoneConfig(MAASTestCase):
             expected, DNSReverseZoneConfig.get_PTR_mapping(mapping, network)
         )
 
+    def test_get_ptr_mapping_uses_indexed_mapping(self):
+        name = factory.make_string()
+        network = IPNetwork("192.12.0.0/30")
+        mapping = IPIndexedMapping(
+            {
+                "%s.%s"
+                % (factory.make_string(), name): HostnameIPMapping(
+                    None, 30, {ip}
+                )
+                for ip in ["192.12.0.2", "192.50.0.2", "2001:db8::2"]
+            }
+        )
+        unindexed_mapping = dict(mapping)
+        self.assertEqual(
+            list(
+                DNSReverseZoneConfig.get_PTR_mapping(
+                    unindexed_mapping, network
+                )
+            ),
+            list(DNSReverseZoneConfig.get_PTR_mapping(mapping, network)),
+        )
+
     def test_writes_dns_zone_config_with_NS_record(self):
         target_dir = patch_dns_config_path(self)
         network = factory.make_ipv4_network()
@@ -743,6 +767,60 @@ class TestDNSReverseZoneConfig(MAASTestCase):
             self.assertTrue(filepath.getPermissions().other.read)
 
 
+class TestIPIndexedMapping(MAASTestCase):
+    """Tests for `IPIndexedMapping`."""
+
+    def test_is_a_dict(self):
+        mapping = {factory.make_name("host"): HostnameIPMapping(None, 30)}
+        self.assertEqual(mapping, IPIndexedMapping(mapping))
+
+    def test_enumerate_ip_mapping_returns_ips_in_network(self):
+        network = IPNetwork("10.0.1.0/24")
+        mapping = IPIndexedMapping(
+            {
+                factory.make_name("host"): HostnameIPMapping(
+                    None, random.randint(1, 100), {ip}
+                )
+                for ip in [
+                    "10.0.0.255",
+                    "10.0.1.0",
+                    "10.0.1.17",
+                    "10.0.1.255",
+                    "10.0.2.0",
+                    "::a00:110",
+                ]
+            }
+        )
+        self.assertEqual(
+            [
+                item
+                for item in enumerate_ip_mapping(mapping)
+                if IPAddress(item[2]) in network
+            ],
+            list(mapping.enumerate_ip_mapping(network)),
+        )
+
+    def test_enumerate_ip_mapping_keeps_mapping_order(self):
+        network = factory.make_ipv6_network(slash=120)
+        mapping = IPIndexedMapping(
+            {
+                factory.make_name("host"): HostnameIPMapping(
+                    None,
+                    30,
+                    {
+                        str(factory.pick_ip_in_network(network))
+                        for _ in range(3)
+                    },
+                )
+                for _ in range(10)
+            }
+        )
+        self.assertEqual(
+            list(enumerate_ip_mapping(mapping)),
+            list(mapping.enumerate_ip_mapping(network)),
+        )
+
+
 class TestDNSReverseZoneConfig_GetGenerateDirectives(MAASTestCase):
     """Tests for `DNSReverseZoneConfig.get_GENERATE_directives()`."""
 
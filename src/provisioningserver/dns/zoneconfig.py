@@ -4,6 +4,7 @@
 """Classes for generating BIND zone config files."""
 
 
+from bisect import bisect_left, bisect_right
 from datetime import datetime
 from itertools import chain
 
@@ -42,6 +43,49 @@ def enumerate_ip_mapping(mapping):
             yield hostname, info.ttl, value
 
 
+class IPIndexedMapping(dict):
+    """A `hostname: info` mapping that can be searched by network.
+
+    Reverse zones for every subnet share the same mapping of all known hosts.
+    Rather than scanning all of it for each zone, the addresses are sorted
+    once (on first use) so that the ones within a network can be found by
+    bisection.  The mapping must not be changed once it has been searched.
+    """
+
+    __slots__ = ("_keys", "_entries")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._keys = None
+        self._entries = None
+
+    def _build_index(self):
+        entries = sorted(
+            ((ip.version, ip.value), position, hostname, ttl, value)
+            for position, (hostname, ttl, value) in enumerate(
+                enumerate_ip_mapping(self)
+            )
+            for ip in [IPAddress(value)]
+        )
+        self._keys = [entry[0] for entry in entries]
+        self._entries = [entry[1:] for entry in entries]
+
+    def enumerate_ip_mapping(self, network):
+        """Generate `(hostname, ttl, value)` tuples within `network`.
+
+        The tuples come in the same order as `enumerate_ip_mapping` would
+        generate them.
+
+        :type network: :class:`netaddr.IPNetwork`
+        """
+        if self._keys is None:
+            self._build_index()
+        start = bisect_left(self._keys, (network.version, network.first))
+        end = bisect_right(self._keys, (network.version, network.last))
+        for _, hostname, ttl, value in sorted(self._entries[start:end]):
+            yield hostname, ttl, value
+
+
 def enumerate_rrset_mapping(mapping):
     """Generate `(hostname, ttl, value)` tuples from `mapping`.
 
@@ -482,6 +526,11 @@ class DNSReverseZoneConfig(DomainConfigBase):
 
         if mapping is None:
             return ()
+        if isinstance(mapping, IPIndexedMapping):
+            return (
+                (short_name(ip, network), ttl, "%s." % hostname)
+                for hostname, ttl, ip in mapping.enumerate_ip_mapping(network)
+            )
         return (
             (short_name(ip, network), ttl, "%s." % hostname)
             for hostname, ttl, ip in enumerate_ip_mapping(mapping)
@@ -10,13 +10,13 @@ import sys
 from jsonschema import validate
 from twisted.internet import reactor
 from twisted.internet.defer import inlineCallbacks, returnValue
-from twisted.internet.threads import deferToThread
 
 from provisioningserver.drivers import (
     IP_EXTRACTOR_SCHEMA,
     MULTIPLE_CHOICE_SETTING_PARAMETER_FIELD_SCHEMA,
     SETTING_PARAMETER_FIELD_SCHEMA,
 )
+from provisioningserver.drivers.power.utils import power_thread_pools
 from provisioningserver.utils.twisted import IAsynchronous, pause
 
 # We specifically declare this here so that a node not knowing its own
@@ -125,6 +125,9 @@ class PowerActionError(PowerError):
 class PowerDriverBase(metaclass=ABCMeta):
     """Base driver for a power driver."""
 
+    # The most nodes that are queried at once with `query_many`.
+    query_batch_size = 64
+
     def __init__(self):
         super().__init__()
         validate(
@@ -224,6 +227,28 @@ class PowerDriverBase(metaclass=ABCMeta):
         """
         raise NotImplementedError()
 
+    def get_query_group(self, context):
+        """Return a key for querying `context` together with others.
+
+        Nodes whose power settings have the same key can be queried at once
+        with `query_many`. Returns None when the node can only be queried on
+        its own, which is the case for most drivers.
+
+        :param context: Power settings for the node.
+        """
+        return None
+
+    def query_many(self, contexts):
+        """Perform the query action for several nodes at once.
+
+        :param contexts: A dict mapping each `Node.system_id` to the power
+            settings for the node, all with the same `get_query_group` key.
+        :return: A dict mapping system IDs to power states, `on` or `off`.
+            Nodes whose state couldn't be found are left out, and should be
+            queried on their own with `query`.
+        """
+        raise NotImplementedError()
+
     def get_schema(self, detect_missing_packages=True):
         """Returns the JSON schema for the driver.
 
@@ -280,6 +305,16 @@ class PowerDriver(PowerDriverBase):
     def __init__(self, clock=reactor):
         self.clock = reactor
 
+    def deferToThread(self, func, *args, **kwargs):
+        """Call the blocking `func` in a thread.
+
+        The thread comes from the pool for this driver's power type, see
+        `PowerThreadPools`.
+        """
+        return power_thread_pools.deferToThread(
+            self.name, func, *args, **kwargs
+        )
+
     @abstractmethod
     def power_on(self, system_id, context):
         """Implement this method for the actual implementation
@@ -341,7 +376,7 @@ class PowerDriver(PowerDriverBase):
                     # The @asynchronous decorator will DTRT.
                     state = yield self.power_query(system_id, context)
                 else:
-                    state = yield deferToThread(
+                    state = yield self.deferToThread(
                         self.power_query, system_id, context
                     )
             except PowerFatalError:
@@ -355,6 +390,20 @@ class PowerDriver(PowerDriverBase):
         else:
             raise exc_info[0](exc_info[1]).with_traceback(exc_info[2])
 
+    def query_many(self, contexts):
+        """Performs the power query action for several nodes at once.
+
+        Override `power_query_many` for drivers that return a key from
+        `get_query_group`. Nothing is retried here; nodes missing from the
+        result are retried when they are queried on their own.
+        """
+        return self.deferToThread(self.power_query_many, contexts)
+
+    def power_query_many(self, contexts):
+        """Implement this method for drivers that can query several nodes
+        at once. See `PowerDriverBase.query_many`."""
+        raise NotImplementedError()
+
     @inlineCallbacks
     def perform_power(self, power_func, state_desired, system_id, context):
         """Provides the logic to perform the power actions.
@@ -379,7 +428,7 @@ class PowerDriver(PowerDriverBase):
                     # The @asynchronous decorator will DTRT.
                     yield power_func(system_id, context)
                 else:
-                    yield deferToThread(power_func, system_id, context)
+                    yield self.deferToThread(power_func, system_id, context)
             except PowerFatalError:
                 raise  # Don't retry.
             except PowerError:
@@ -402,7 +451,7 @@ class PowerDriver(PowerDriverBase):
                         # The @asynchronous decorator will DTRT.
                         state = yield self.power_query(system_id, context)
                     else:
-                        state = yield deferToThread(
+                        state = yield self.deferToThread(
                             self.power_query, system_id, context
                         )
                 except PowerFatalError:
@@ -374,6 +374,41 @@ class IPMIPowerDriver(PowerDriver):
         match = re.search(r":\s*(on|off)", result.stdout)
         return result.stdout if match is None else match.group(1)
 
+    @staticmethod
+    def _get_common_args(
+        power_address,
+        power_user,
+        power_pass,
+        power_driver,
+        k_g,
+        cipher_suite_id,
+        privilege_level,
+    ):
+        """Return the connection arguments for the FreeIPMI commands.
+
+        See https://launchpad.net/bugs/1053391 for details of modifying the
+        command for power_driver and power_user.
+        """
+        common_args = []
+        if is_power_parameter_set(power_driver):
+            common_args.extend(("--driver-type", power_driver))
+        common_args.extend(("-h", power_address))
+        if is_power_parameter_set(power_user):
+            common_args.extend(("-u", power_user))
+        common_args.extend(("-p", power_pass))
+        if is_power_parameter_set(k_g):
+            common_args.extend(("-k", k_g))
+        if is_power_parameter_set(cipher_suite_id):
+            if cipher_suite_id != "17":
+                maaslog.warning("using a non-secure cipher suite id")
+            common_args.extend(("-I", cipher_suite_id))
+        if is_power_parameter_set(privilege_level):
+            common_args.extend(("-l", privilege_level))
+        else:
+            # LP:1889788 - Default to communicate at operator level.
+            common_args.extend(("-l", IPMI_PRIVILEGE_LEVEL.OPERATOR.name))
+        return common_args
+
     def _issue_ipmi_command(
         self,
         power_change,
@@ -408,27 +443,16 @@ class IPMIPowerDriver(PowerDriver):
         ] + self._workarounds(workaround_flags)
         ipmipower_command = ["ipmipower"] + self._workarounds(workaround_flags)
 
-        # Arguments in common between chassis config and power control. See
-        # https://launchpad.net/bugs/1053391 for details of modifying the
-        # command for power_driver and power_user.
-        common_args = []
-        if is_power_parameter_set(power_driver):
-            common_args.extend(("--driver-type", power_driver))
-        common_args.extend(("-h", power_address))
-        if is_power_parameter_set(power_user):
-            common_args.extend(("-u", power_user))
-        common_args.extend(("-p", power_pass))
-        if is_power_parameter_set(k_g):
-            common_args.extend(("-k", k_g))
-        if is_power_parameter_set(cipher_suite_id):
-            if cipher_suite_id != "17":
-                maaslog.warning("using a non-secure cipher suite id")
-            common_args.extend(("-I", cipher_suite_id))
-        if is_power_parameter_set(privilege_level):
-            common_args.extend(("-l", privilege_level))
-        else:
-            # LP:1889788 - Default to communicate at operator level.
-            common_args.extend(("-l", IPMI_PRIVILEGE_LEVEL.OPERATOR.name))
+        # Arguments in common between chassis config and power control.
+        common_args = self._get_common_args(
+            power_address,
+            power_user,
+            power_pass,
+            power_driver,
+            k_g,
+            cipher_suite_id,
+            privilege_level,
+        )
 
         # Update the power commands with common args.
         ipmipower_command.extend(common_args)
@@ -516,3 +540,68 @@ class IPMIPowerDriver(PowerDriver):
                 return self._issue_ipmi_command("query", **context)
             else:
                 raise e
+
+    def get_query_group(self, context):
+        """Group nodes that share their IPMI settings.
+
+        Nodes without a usable `power_address`, such as those that are found
+        from their MAC address, are queried on their own.
+        """
+        power_address = context.get("power_address")
+        if not is_power_parameter_set(power_address) or any(
+            char in power_address for char in ",[]"
+        ):
+            # Commas and brackets mean something else in a FreeIPMI host
+            # list.
+            return None
+        return (
+            context.get("power_driver"),
+            context.get("power_user"),
+            context.get("power_pass"),
+            context.get("k_g"),
+            context.get("cipher_suite_id"),
+            context.get("privilege_level"),
+            tuple(context.get("workaround_flags", ["opensesspriv"]) or ()),
+        )
+
+    def power_query_many(self, contexts):
+        """Query several nodes with one `ipmipower`.
+
+        `ipmipower` queries each of the hosts it is given in parallel, and
+        prints a `host: state` line for each of them.
+        """
+        system_ids_by_address = {}
+        for system_id, context in contexts.items():
+            system_ids_by_address.setdefault(
+                context["power_address"].strip(), []
+            ).append(system_id)
+        context = next(iter(contexts.values()))
+        command = ["ipmipower"] + self._workarounds(
+            context.get("workaround_flags", ["opensesspriv"])
+        )
+        command.extend(
+            self._get_common_args(
+                ",".join(system_ids_by_address),
+                context.get("power_user"),
+                context.get("power_pass"),
+                context.get("power_driver"),
+                context.get("k_g"),
+                context.get("cipher_suite_id"),
+                context.get("privilege_level"),
+            )
+        )
+        command.append("--stat")
+        # A failure of some of the hosts makes ipmipower exit non-zero, so
+        # the return code isn't checked. Errors are printed in place of the
+        # state; those nodes are left out and queried again on their own.
+        result = shell.run_command(*command)
+        states = {}
+        for line in result.stdout.splitlines():
+            address, _, state = line.rpartition(":")
+            state = state.strip()
+            if state in ("on", "off"):
+                for system_id in system_ids_by_address.get(
+                    address.strip(), ()
+                ):
+                    states[system_id] = state
+        return states
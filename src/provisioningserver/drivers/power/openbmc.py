@@ -21,7 +21,10 @@ from provisioningserver.drivers.power import (
     PowerDriver,
     PowerFatalError,
 )
-from provisioningserver.drivers.power.utils import WebClientContextFactory
+from provisioningserver.drivers.power.utils import (
+    get_http_pool,
+    WebClientContextFactory,
+)
 from provisioningserver.utils.twisted import asynchronous
 
 # OpenBMC RESTful uri path
@@ -35,6 +38,17 @@ SRC_NET = {"data": "xyz.openbmc_project.Control.Boot.Source.Sources.Network"}
 REG_MODE = {"data": "xyz.openbmc_project.Control.Boot.Mode.Modes.Regular"}
 
 
+class OpenBMCAuthError(PowerActionError):
+    """The BMC refused the session or credentials of a request."""
+
+
+def make_body(data):
+    """Return a body producer for the JSON payload `data`, if any."""
+    if data is None:
+        return None
+    return FileBodyProducer(BytesIO(json.dumps(data).encode("utf-8")))
+
+
 class OpenBMCPowerDriver(PowerDriver):
 
     chassis = False
@@ -57,8 +71,16 @@ class OpenBMCPowerDriver(PowerDriver):
 
     cookie_jar = compat.cookielib.CookieJar()
     agent = CookieAgent(
-        Agent(reactor, contextFactory=WebClientContextFactory()), cookie_jar
+        Agent(
+            reactor,
+            contextFactory=WebClientContextFactory(),
+            pool=get_http_pool(),
+        ),
+        cookie_jar,
     )
+    # The credentials that each BMC is logged in with; the session itself
+    # is in `cookie_jar`.
+    sessions = {}
 
     def detect_missing_packages(self):
         # no required packages
@@ -81,6 +103,15 @@ class OpenBMCPowerDriver(PowerDriver):
                 data = data.decode("utf-8")
                 return json.loads(data)
 
+            # The session has expired, or the credentials are wrong.
+            if response.code in (
+                HTTPStatus.UNAUTHORIZED,
+                HTTPStatus.FORBIDDEN,
+            ):
+                raise OpenBMCAuthError(
+                    "OpenBMC request failed with response status code:"
+                    " %s." % response.code
+                )
             # Error out if the response has a status code of 400 or above.
             if response.code >= int(HTTPStatus.BAD_REQUEST):
                 raise PowerActionError(
@@ -105,41 +136,54 @@ class OpenBMCPowerDriver(PowerDriver):
         return uri.encode("utf-8")
 
     @inlineCallbacks
-    def command(self, context, method, uri, data=None):
-        """Current deployments of OpenBMC in the field do not
-        support header based authentication. To issue RESTful commands,
-        we need to login, issue RESTful command and logout.
-        """
-        # login to BMC
+    def login(self, context):
+        """Log in to the BMC, starting a session."""
         login_uri = self.get_uri(context, "/login")
         login_creds = {
             "data": [context.get("power_user"), context.get("power_pass")]
         }
-        login_data = FileBodyProducer(
-            BytesIO(json.dumps(login_creds).encode("utf-8"))
+        login = yield self.openbmc_request(
+            b"POST", login_uri, make_body(login_creds)
         )
-        login = yield self.openbmc_request(b"POST", login_uri, login_data)
         login_status = login.get("status")
         if login_status.lower() != "ok":
             raise PowerFatalError(
                 "OpenBMC power driver received unexpected response"
                 " to login command"
             )
-        # issue command
-        cmd_out = yield self.openbmc_request(method, uri, data)
-        # logout of BMC
-        logout_uri = self.get_uri(context, "/logout")
-        logout_creds = {"data": []}
-        logout_data = FileBodyProducer(
-            BytesIO(json.dumps(logout_creds).encode("utf-8"))
-        )
-        logout = yield self.openbmc_request(b"POST", logout_uri, logout_data)
-        logout_status = logout.get("status")
-        if logout_status.lower() != "ok":
-            raise PowerFatalError(
-                "OpenBMC power driver received unexpected response"
-                " to logout command"
-            )
+
+    @inlineCallbacks
+    def command(self, context, method, uri, data=None):
+        """Current deployments of OpenBMC in the field do not
+        support header based authentication. To issue RESTful commands,
+        we need to login first.
+
+        The session is kept for later commands, until the BMC refuses it;
+        logging in and out for each command is a lot of work for the BMC.
+        BMCs expire sessions that haven't been used for a while, so a command
+        refused with a kept session is tried once more after logging in.
+
+        :param data: The JSON payload of the command, if any.
+        """
+        bmc = self.get_uri(context)
+        creds = (context.get("power_user"), context.get("power_pass"))
+        if self.sessions.get(bmc) == creds:
+            try:
+                cmd_out = yield self.openbmc_request(
+                    method, uri, make_body(data)
+                )
+            except OpenBMCAuthError:
+                self.sessions.pop(bmc, None)
+            else:
+                return cmd_out
+        self.sessions.pop(bmc, None)
+        yield self.login(context)
+        self.sessions[bmc] = creds
+        try:
+            cmd_out = yield self.openbmc_request(method, uri, make_body(data))
+        except OpenBMCAuthError:
+            self.sessions.pop(bmc, None)
+            raise
         return cmd_out
 
     @inlineCallbacks
@@ -147,12 +191,10 @@ class OpenBMCPowerDriver(PowerDriver):
         """Set the host to PXE boot."""
         # set boot mode to one-time boot.
         uri = self.get_uri(context, HOST_CONTROL + "one_time/attr/BootMode")
-        data = FileBodyProducer(BytesIO(json.dumps(REG_MODE).encode("utf-8")))
-        yield self.command(context, b"PUT", uri, data)
+        yield self.command(context, b"PUT", uri, REG_MODE)
         # set one-time boot source to network.
         uri = self.get_uri(context, HOST_CONTROL + "one_time/attr/BootSource")
-        data = FileBodyProducer(BytesIO(json.dumps(SRC_NET).encode("utf-8")))
-        yield self.command(context, b"PUT", uri, data)
+        yield self.command(context, b"PUT", uri, SRC_NET)
 
     @asynchronous
     @inlineCallbacks
@@ -176,10 +218,7 @@ class OpenBMCPowerDriver(PowerDriver):
         uri = self.get_uri(context, HOST_STATE + "RequestedHostTransition")
         # power off host if it is currently on.
         if cur_state == "on":
-            data = FileBodyProducer(
-                BytesIO(json.dumps(HOST_OFF).encode("utf-8"))
-            )
-            off_state = yield self.command(context, b"PUT", uri, data)
+            off_state = yield self.command(context, b"PUT", uri, HOST_OFF)
             status = off_state.get("status")
             if status.lower() != "ok":
                 raise PowerFatalError(
@@ -189,8 +228,7 @@ class OpenBMCPowerDriver(PowerDriver):
         # set one-time boot to PXE boot.
         yield self.set_pxe_boot(context)
         # power on host.
-        data = FileBodyProducer(BytesIO(json.dumps(HOST_ON).encode("utf-8")))
-        on_state = yield self.command(context, b"PUT", uri, data)
+        on_state = yield self.command(context, b"PUT", uri, HOST_ON)
         status = on_state.get("status")
         if status.lower() != "ok":
             raise PowerFatalError(
@@ -203,11 +241,10 @@ class OpenBMCPowerDriver(PowerDriver):
     def power_off(self, system_id, context):
         """Power off host."""
         uri = self.get_uri(context, HOST_STATE + "RequestedHostTransition")
-        data = FileBodyProducer(BytesIO(json.dumps(HOST_OFF).encode("utf-8")))
         # set next one-time boot to PXE boot.
         yield self.set_pxe_boot(context)
         # power off host.
-        power_state = yield self.command(context, b"PUT", uri, data)
+        power_state = yield self.command(context, b"PUT", uri, HOST_OFF)
         status = power_state.get("status")
         if status.lower() != "ok":
             raise PowerFatalError(
@@ -27,7 +27,10 @@ from provisioningserver.drivers import (
     SETTING_SCOPE,
 )
 from provisioningserver.drivers.power import PowerActionError, PowerDriver
-from provisioningserver.drivers.power.utils import WebClientContextFactory
+from provisioningserver.drivers.power.utils import (
+    get_http_pool,
+    WebClientContextFactory,
+)
 from provisioningserver.utils.twisted import asynchronous
 
 # no trailing slashes
@@ -37,8 +40,25 @@ REDFISH_POWER_CONTROL_ENDPOINT = (
 
 REDFISH_SYSTEMS_ENDPOINT = b"redfish/v1/Systems"
 
+REDFISH_SESSIONS_ENDPOINT = b"redfish/v1/SessionService/Sessions"
+
+
+class RedfishAuthError(PowerActionError):
+    """The BMC refused the credentials or session of a request."""
+
 
 class RedfishPowerDriverBase(PowerDriver):
+    def __init__(self, clock=reactor):
+        super().__init__(clock)
+        # What has been learnt from each BMC, keyed by tuples that start
+        # with the URL of the BMC: the IDs of systems, the ETags of systems,
+        # and session tokens (False where the BMC has no sessions). It's
+        # forgotten when a request to the BMC fails, see `forget`; sessions
+        # only when the BMC refused them, as the BMC still holds them.
+        self._node_ids = {}
+        self._etags = {}
+        self._sessions = {}
+
     def get_url(self, context):
         """Return url for the pod."""
         url = context.get("power_address")
@@ -60,11 +80,77 @@ class RedfishPowerDriverBase(PowerDriver):
             }
         )
 
+    def forget(self, uri, sessions=True):
+        """Forget what was learnt from the BMC that `uri` is on.
+
+        :param sessions: Whether to forget the sessions on the BMC too.
+        """
+        caches = [self._node_ids, self._etags]
+        if sessions:
+            caches.append(self._sessions)
+        for cache in caches:
+            for key in list(cache):
+                if uri.startswith(key[0].rstrip(b"/") + b"/"):
+                    del cache[key]
+
+    @inlineCallbacks
+    def create_session(self, url, headers, power_user, power_pass):
+        """Create a session on the BMC, and return its token.
+
+        :return: The token, or False if the BMC doesn't support sessions.
+        """
+        payload = FileBodyProducer(
+            BytesIO(
+                json.dumps(
+                    {"UserName": power_user, "Password": power_pass}
+                ).encode("utf-8")
+            )
+        )
+        try:
+            _, session_headers = yield self.redfish_request(
+                b"POST", join(url, REDFISH_SESSIONS_ENDPOINT), headers, payload
+            )
+        except Exception:
+            # Requests without a session will fail too if this was anything
+            # other than a lack of sessions, and make this be tried again.
+            return False
+        if session_headers is None:
+            return False
+        tokens = session_headers.getRawHeaders(b"X-Auth-Token")
+        return tokens[0] if tokens else False
+
+    @inlineCallbacks
+    def get_auth_headers(self, url, context):
+        """Return authentication headers, using a session when possible.
+
+        A session is created the first time, and its token is used instead
+        of the user and password from then on, until the BMC refuses it.
+        """
+        headers = self.make_auth_headers(**context)
+        key = (url, context.get("power_user"), context.get("power_pass"))
+        token = self._sessions.get(key)
+        if token is None:
+            token = yield self.create_session(
+                url,
+                self.make_auth_headers(**context),
+                context.get("power_user"),
+                context.get("power_pass"),
+            )
+            self._sessions[key] = token
+        if token:
+            headers.removeHeader(b"Authorization")
+            headers.setRawHeaders(b"X-Auth-Token", [token])
+        return headers
+
     @asynchronous
     def redfish_request(self, method, uri, headers=None, bodyProducer=None):
         """Send the redfish request and return the response."""
         agent = RedirectAgent(
-            Agent(reactor, contextFactory=WebClientContextFactory())
+            Agent(
+                reactor,
+                contextFactory=WebClientContextFactory(),
+                pool=get_http_pool(),
+            )
         )
         d = agent.request(
             method, uri, headers=headers, bodyProducer=bodyProducer
@@ -114,6 +200,11 @@ class RedfishPowerDriverBase(PowerDriver):
                         headers=headers,
                         bodyProducer=bodyProducer,
                     )
+                elif response.code == HTTPStatus.UNAUTHORIZED:
+                    raise RedfishAuthError(
+                        "Redfish request failed with response status code:"
+                        " %s." % response.code
+                    )
                 else:
                     raise PowerActionError(
                         "Redfish request failed with response status code:"
@@ -126,9 +217,31 @@ class RedfishPowerDriverBase(PowerDriver):
             d.addCallback(cb_attach_headers, headers=response.headers)
             return d
 
+        def eb_forget(failure):
+            # Anything cached about the BMC may be why the request failed.
+            # Sessions are kept unless the BMC refused them, otherwise they
+            # would be left behind on the BMC, which limits how many it has.
+            self.forget(uri, sessions=bool(failure.check(RedfishAuthError)))
+            return failure
+
         d.addCallback(render_response)
+        d.addErrback(eb_forget)
         return d
 
+    @inlineCallbacks
+    def retry_on_auth_error(self, func, *args):
+        """Call `func`, and once more if the BMC refused its session.
+
+        BMCs expire sessions that haven't been used for a while. The
+        session has been forgotten by then, so the second call logs in
+        with a new one.
+        """
+        try:
+            result = yield func(*args)
+        except RedfishAuthError:
+            result = yield func(*args)
+        return result
+
 
 # XXX ltrager - 2021-01-12 - Change parent class to WebhookPowerDriver.
 class RedfishPowerDriver(RedfishPowerDriverBase):
@@ -169,14 +282,32 @@ class RedfishPowerDriver(RedfishPowerDriverBase):
           }
         """
         url = self.get_url(context)
-        headers = self.make_auth_headers(**context)
+        headers = yield self.get_auth_headers(url, context)
         node_id = context.get("node_id")
         if node_id:
             node_id = node_id.encode("utf-8")
         else:
-            node_id = yield self.get_node_id(url, headers)
+            key = (url, context.get("power_user"))
+            node_id = self._node_ids.get(key)
+            if node_id is None:
+                node_id = yield self.get_node_id(url, headers)
+                self._node_ids[key] = node_id
         return url, node_id, headers
 
+    def _get_etag(self, node_data, node_headers):
+        """Return the ETag of a system from the response to a GET of it."""
+        etag = node_data.get("@odata.etag")
+        if (
+            etag is None
+            and node_headers is not None
+            and node_headers.getRawHeaders("etag")
+        ):
+            etag = node_headers.getRawHeaders("etag")[0]
+
+        if etag:
+            etag = etag.encode("utf-8")
+        return etag
+
     @inlineCallbacks
     def get_etag(self, url, node_id, headers):
         """Get the system Etag suggested for PATCH calls"""
@@ -184,13 +315,7 @@ class RedfishPowerDriver(RedfishPowerDriverBase):
         node_data, node_headers = yield self.redfish_request(
             b"GET", uri, headers
         )
-        etag = node_data.get("@odata.etag")
-        if etag is None and node_headers.getRawHeaders("etag"):
-            etag = node_headers.getRawHeaders("etag")[0]
-
-        if etag:
-            etag = etag.encode("utf-8")
-        return etag
+        return self._get_etag(node_data, node_headers)
 
     @inlineCallbacks
     def get_node_id(self, url, headers):
@@ -205,23 +330,42 @@ class RedfishPowerDriver(RedfishPowerDriverBase):
     def set_pxe_boot(self, url, node_id, headers):
         """Set the machine with node_id to PXE boot."""
         endpoint = join(REDFISH_SYSTEMS_ENDPOINT, b"%s" % node_id)
-        payload = FileBodyProducer(
-            BytesIO(
-                json.dumps(
-                    {
-                        "Boot": {
-                            "BootSourceOverrideEnabled": "Once",
-                            "BootSourceOverrideTarget": "Pxe",
+
+        def make_payload():
+            return FileBodyProducer(
+                BytesIO(
+                    json.dumps(
+                        {
+                            "Boot": {
+                                "BootSourceOverrideEnabled": "Once",
+                                "BootSourceOverrideTarget": "Pxe",
+                            }
                         }
-                    }
-                ).encode("utf-8")
+                    ).encode("utf-8")
+                )
             )
-        )
-        etag = yield self.get_etag(url, node_id, headers)
+
+        # The PATCH changes the ETag, so the cached one can't be used again.
+        etag = self._etags.pop((url, node_id), None)
+        if etag is None:
+            etag = yield self.get_etag(url, node_id, headers)
+        else:
+            try:
+                headers.setRawHeaders(b"If-Match", [etag])
+                yield self.redfish_request(
+                    b"PATCH", join(url, endpoint), headers, make_payload()
+                )
+            except PowerActionError:
+                # The cached ETag may be out of date; try again with the
+                # current one.
+                headers.removeHeader(b"If-Match")
+                etag = yield self.get_etag(url, node_id, headers)
+            else:
+                return
         if etag:
             headers.addRawHeader(b"If-Match", etag)
         yield self.redfish_request(
-            b"PATCH", join(url, endpoint), headers, payload
+            b"PATCH", join(url, endpoint), headers, make_payload()
         )
 
     @inlineCallbacks
@@ -231,14 +375,19 @@ class RedfishPowerDriver(RedfishPowerDriverBase):
         payload = FileBodyProducer(
             BytesIO(json.dumps({"ResetType": power_change}).encode("utf-8"))
         )
+        # Changing the power state changes the ETag of the system.
+        self._etags.pop((url, node_id), None)
         yield self.redfish_request(
             b"POST", join(url, endpoint), headers, payload
         )
 
     @asynchronous
-    @inlineCallbacks
     def power_on(self, node_id, context):
         """Power on machine."""
+        return self.retry_on_auth_error(self._power_on, node_id, context)
+
+    @inlineCallbacks
+    def _power_on(self, node_id, context):
         url, node_id, headers = yield self.process_redfish_context(context)
         power_state = yield self.power_query(node_id, context)
         # Power off the machine if currently on.
@@ -250,9 +399,12 @@ class RedfishPowerDriver(RedfishPowerDriverBase):
         yield self.power("On", url, node_id, headers)
 
     @asynchronous
-    @inlineCallbacks
     def power_off(self, node_id, context):
         """Power off machine."""
+        return self.retry_on_auth_error(self._power_off, node_id, context)
+
+    @inlineCallbacks
+    def _power_off(self, node_id, context):
         url, node_id, headers = yield self.process_redfish_context(context)
         # Power off the machine if it is not already off
         power_state = yield self.power_query(node_id, context)
@@ -262,10 +414,20 @@ class RedfishPowerDriver(RedfishPowerDriverBase):
         yield self.set_pxe_boot(url, node_id, headers)
 
     @asynchronous
-    @inlineCallbacks
     def power_query(self, node_id, context):
         """Power query machine."""
+        return self.retry_on_auth_error(self._power_query, node_id, context)
+
+    @inlineCallbacks
+    def _power_query(self, node_id, context):
         url, node_id, headers = yield self.process_redfish_context(context)
         uri = join(url, REDFISH_SYSTEMS_ENDPOINT, b"%s" % node_id)
-        node_data, _ = yield self.redfish_request(b"GET", uri, headers)
+        node_data, node_headers = yield self.redfish_request(
+            b"GET", uri, headers
+        )
+        # Keep the ETag for setting the boot order of a power change, which
+        # starts with a query.
+        etag = self._get_etag(node_data, node_headers)
+        if etag:
+            self._etags[(url, node_id)] = etag
         return node_data.get("PowerState").lower()
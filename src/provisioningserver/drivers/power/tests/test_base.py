@@ -392,10 +392,10 @@ class TestPowerDriverPowerAction(MAASTestCase):
     def test_success_async(self):
         system_id = factory.make_name("system_id")
         context = {"context": factory.make_name("context")}
-        mock_deferToThread = self.patch(power, "deferToThread")
         driver = make_async_power_driver(
             wait_time=[0], query_result=self.action
         )
+        mock_deferToThread = self.patch(driver, "deferToThread")
         method = getattr(driver, self.action)
         result = yield method(system_id, context)
         self.assertEqual(result, None)
@@ -659,3 +659,95 @@ class TestIPMIPowerDriver(MAASTestCase):
         )
         self.assertThat(tmpfile.flush, MockCalledOnceWith())
         self.assertThat(tmpfile.__exit__, MockCalledOnceWith(None, None, None))
+
+    def test_get_query_group_groups_same_settings(self):
+        context = make_context()
+        other_context = dict(
+            context, power_address=factory.make_name("power_address")
+        )
+        driver = IPMIPowerDriver()
+        self.assertIsNotNone(driver.get_query_group(context))
+        self.assertEqual(
+            driver.get_query_group(context),
+            driver.get_query_group(other_context),
+        )
+
+    def test_get_query_group_separates_different_settings(self):
+        context = make_context()
+        driver = IPMIPowerDriver()
+        for key in (
+            "power_user",
+            "power_pass",
+            "power_driver",
+            "k_g",
+            "privilege_level",
+        ):
+            other_context = dict(context, **{key: factory.make_name(key)})
+            self.assertNotEqual(
+                driver.get_query_group(context),
+                driver.get_query_group(other_context),
+            )
+        other_context = dict(context, workaround_flags=[])
+        self.assertNotEqual(
+            driver.get_query_group(context),
+            driver.get_query_group(other_context),
+        )
+
+    def test_get_query_group_returns_none_without_power_address(self):
+        context = make_context()
+        context["mac_address"] = factory.make_mac_address()
+        context["power_address"] = random.choice((None, "", "   "))
+        self.assertIsNone(IPMIPowerDriver().get_query_group(context))
+
+    def test_get_query_group_returns_none_for_host_list_syntax(self):
+        context = make_context()
+        context["power_address"] = random.choice(("host[1-2]", "host1,host2"))
+        self.assertIsNone(IPMIPowerDriver().get_query_group(context))
+
+    def test_power_query_many_queries_all_hosts_at_once(self):
+        context = make_context()
+        addresses = [factory.make_ipv4_address() for _ in range(3)]
+        contexts = {
+            factory.make_name("system_id"): dict(
+                context, power_address=address
+            )
+            for address in addresses
+        }
+        run_command_mock = self.patch(ipmi_module.shell, "run_command")
+        run_command_mock.return_value = ProcessResult(
+            stdout="%s: on\n%s: off\n%s: connection timeout\n"
+            % tuple(addresses),
+            returncode=1,
+        )
+        states = IPMIPowerDriver().power_query_many(contexts)
+        system_ids = list(contexts)
+        self.assertEqual({system_ids[0]: "on", system_ids[1]: "off"}, states)
+        ipmipower_command = make_ipmipower_command(
+            **dict(context, power_address=",".join(addresses))
+        )
+        ipmipower_command += ("--stat",)
+        run_command_mock.assert_called_once_with(*ipmipower_command)
+
+    def test_power_query_many_reports_shared_address_for_each_node(self):
+        context = make_context()
+        contexts = {
+            factory.make_name("system_id"): context,
+            factory.make_name("system_id"): context,
+        }
+        run_command_mock = self.patch(ipmi_module.shell, "run_command")
+        run_command_mock.return_value = ProcessResult(
+            stdout="%s: on\n" % context["power_address"]
+        )
+        states = IPMIPowerDriver().power_query_many(contexts)
+        self.assertEqual(dict.fromkeys(contexts, "on"), states)
+
+    def test_power_query_many_parses_ipv6_addresses(self):
+        context = make_context()
+        context["power_address"] = factory.make_ipv6_address()
+        system_id = factory.make_name("system_id")
+        run_command_mock = self.patch(ipmi_module.shell, "run_command")
+        run_command_mock.return_value = ProcessResult(
+            stdout="%s: off\n" % context["power_address"]
+        )
+        states = IPMIPowerDriver().power_query_many({system_id: context})
+        self.assertEqual({system_id: "off"}, states)
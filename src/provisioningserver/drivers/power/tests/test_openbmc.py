@@ -2,20 +2,21 @@
 # GNU Affero General Public License version 3 (see the file LICENSE).
 
 
-from io import BytesIO
-import json
 from os.path import join
 import random
 
+from testtools import ExpectedException
 from twisted.internet._sslverify import ClientTLSOptions
-from twisted.internet.defer import inlineCallbacks
-from twisted.web.client import FileBodyProducer
+from twisted.internet.defer import fail, inlineCallbacks
 
 from maastesting.factory import factory
 from maastesting.matchers import MockCalledOnceWith, MockCalledWith
 from maastesting.testcase import MAASTestCase, MAASTwistedRunTest
-import provisioningserver.drivers.power.openbmc as openbmc_module
-from provisioningserver.drivers.power.openbmc import OpenBMCPowerDriver
+from provisioningserver.drivers.power import PowerActionError
+from provisioningserver.drivers.power.openbmc import (
+    OpenBMCAuthError,
+    OpenBMCPowerDriver,
+)
 from provisioningserver.drivers.power.utils import WebClientContextFactory
 
 SAMPLE_JSON_HOSTOFF = {
@@ -110,13 +111,6 @@ class TestOpenBMCPowerDriver(MAASTestCase):
         system_id = factory.make_name("system_id")
         context = make_context()
         url = driver.get_uri(context, HOST_STATE + "RequestedHostTransition")
-        mock_file_body_producer = self.patch(
-            openbmc_module, "FileBodyProducer"
-        )
-        dataon = FileBodyProducer(BytesIO(json.dumps(HOST_ON).encode("utf-8")))
-        mock_openbmc_request = self.patch(driver, "openbmc_request")
-        mock_openbmc_request.return_value = dataon
-        mock_file_body_producer.return_value = dataon
         mock_power_query = self.patch(driver, "power_query")
         mock_power_query.return_value = "on"
         mock_command = self.patch(driver, "command")
@@ -129,7 +123,7 @@ class TestOpenBMCPowerDriver(MAASTestCase):
         )
         self.assertThat(mock_set_pxe_boot, MockCalledWith(context))
         self.assertThat(
-            mock_command, MockCalledWith(context, b"PUT", url, dataon)
+            mock_command, MockCalledWith(context, b"PUT", url, HOST_ON)
         )
 
     @inlineCallbacks
@@ -138,15 +132,6 @@ class TestOpenBMCPowerDriver(MAASTestCase):
         system_id = factory.make_name("system_id")
         context = make_context()
         url = driver.get_uri(context, HOST_STATE + "RequestedHostTransition")
-        mock_file_body_producer = self.patch(
-            openbmc_module, "FileBodyProducer"
-        )
-        dataoff = FileBodyProducer(
-            BytesIO(json.dumps(HOST_OFF).encode("utf-8"))
-        )
-        mock_openbmc_request = self.patch(driver, "openbmc_request")
-        mock_openbmc_request.return_value = dataoff
-        mock_file_body_producer.return_value = dataoff
         mock_command = self.patch(driver, "command")
         mock_command.return_value = SAMPLE_JSON_HOSTOFF
         mock_set_pxe_boot = self.patch(driver, "set_pxe_boot")
@@ -154,5 +139,106 @@ class TestOpenBMCPowerDriver(MAASTestCase):
         yield driver.power_off(system_id, context)
         self.assertThat(mock_set_pxe_boot, MockCalledOnceWith(context))
         self.assertThat(
-            mock_command, MockCalledOnceWith(context, b"PUT", url, dataoff)
+            mock_command, MockCalledOnceWith(context, b"PUT", url, HOST_OFF)
+        )
+
+    @inlineCallbacks
+    def test_command_logs_in_once(self):
+        driver = OpenBMCPowerDriver()
+        self.patch(driver, "sessions", {})
+        context = make_context()
+        uri = driver.get_uri(context, HOST_STATE + "CurrentHostState")
+        mock_openbmc_request = self.patch(driver, "openbmc_request")
+        mock_openbmc_request.return_value = SAMPLE_JSON_HOSTOFF
+
+        yield driver.command(context, b"GET", uri)
+        yield driver.command(context, b"GET", uri)
+        self.assertEqual(
+            [
+                driver.get_uri(context, "/login"),
+                uri,
+                uri,
+            ],
+            [args[1] for args, _ in mock_openbmc_request.call_args_list],
+        )
+
+    @inlineCallbacks
+    def test_command_logs_in_again_with_other_credentials(self):
+        driver = OpenBMCPowerDriver()
+        self.patch(driver, "sessions", {})
+        context = make_context()
+        uri = driver.get_uri(context, HOST_STATE + "CurrentHostState")
+        mock_openbmc_request = self.patch(driver, "openbmc_request")
+        mock_openbmc_request.return_value = SAMPLE_JSON_HOSTOFF
+
+        yield driver.command(context, b"GET", uri)
+        context["power_pass"] = factory.make_name("power_pass")
+        yield driver.command(context, b"GET", uri)
+        self.assertEqual(4, mock_openbmc_request.call_count)
+
+    @inlineCallbacks
+    def test_command_logs_in_again_when_session_is_refused(self):
+        driver = OpenBMCPowerDriver()
+        self.patch(driver, "sessions", {})
+        context = make_context()
+        uri = driver.get_uri(context, HOST_STATE + "RequestedHostTransition")
+        mock_openbmc_request = self.patch(driver, "openbmc_request")
+        mock_openbmc_request.side_effect = [
+            SAMPLE_JSON_HOSTOFF,
+            SAMPLE_JSON_HOSTOFF,
+            fail(OpenBMCAuthError("401")),
+            SAMPLE_JSON_HOSTOFF,
+            SAMPLE_JSON_HOSTOFF,
+        ]
+
+        yield driver.command(context, b"GET", uri)
+        cmd_out = yield driver.command(context, b"PUT", uri, HOST_OFF)
+        self.assertEqual(SAMPLE_JSON_HOSTOFF, cmd_out)
+        login_uri = driver.get_uri(context, "/login")
+        self.assertEqual(
+            [login_uri, uri, uri, login_uri, uri],
+            [args[1] for args, _ in mock_openbmc_request.call_args_list],
+        )
+        # The payload is produced anew for the second attempt.
+        calls = mock_openbmc_request.call_args_list
+        self.assertIsNot(calls[2][0][2], calls[4][0][2])
+
+    @inlineCallbacks
+    def test_command_fails_when_new_session_is_refused(self):
+        driver = OpenBMCPowerDriver()
+        self.patch(driver, "sessions", {})
+        context = make_context()
+        uri = driver.get_uri(context, HOST_STATE + "CurrentHostState")
+        mock_openbmc_request = self.patch(driver, "openbmc_request")
+        mock_openbmc_request.side_effect = [
+            SAMPLE_JSON_HOSTOFF,
+            fail(OpenBMCAuthError("403")),
+        ]
+
+        with ExpectedException(OpenBMCAuthError):
+            yield driver.command(context, b"GET", uri)
+        self.assertEqual({}, driver.sessions)
+        self.assertEqual(2, mock_openbmc_request.call_count)
+
+    @inlineCallbacks
+    def test_command_keeps_session_after_other_failure(self):
+        driver = OpenBMCPowerDriver()
+        self.patch(driver, "sessions", {})
+        context = make_context()
+        uri = driver.get_uri(context, HOST_STATE + "CurrentHostState")
+        mock_openbmc_request = self.patch(driver, "openbmc_request")
+        mock_openbmc_request.side_effect = [
+            SAMPLE_JSON_HOSTOFF,
+            SAMPLE_JSON_HOSTOFF,
+            fail(PowerActionError("500")),
+            SAMPLE_JSON_HOSTOFF,
+        ]
+
+        yield driver.command(context, b"GET", uri)
+        with ExpectedException(PowerActionError):
+            yield driver.command(context, b"GET", uri)
+        yield driver.command(context, b"GET", uri)
+        self.assertEqual(
+            [driver.get_uri(context, "/login"), uri, uri, uri],
+            [args[1] for args, _ in mock_openbmc_request.call_args_list],
         )
@@ -11,7 +11,7 @@ from io import BytesIO
 import json
 from os.path import join
 import random
-from unittest.mock import call, Mock
+from unittest.mock import ANY, call, Mock
 
 from testtools import ExpectedException
 from twisted.internet._sslverify import ClientTLSOptions
@@ -30,6 +30,7 @@ from provisioningserver.drivers.power import PowerActionError
 import provisioningserver.drivers.power.redfish as redfish_module
 from provisioningserver.drivers.power.redfish import (
     REDFISH_POWER_CONTROL_ENDPOINT,
+    RedfishAuthError,
     RedfishPowerDriver,
     WebClientContextFactory,
 )
@@ -670,6 +671,7 @@ class TestRedfishPowerDriver(MAASTestCase):
         NODE_POWERED_ON = deepcopy(SAMPLE_JSON_SYSTEM)
         NODE_POWERED_ON["PowerState"] = "On"
         mock_redfish_request.side_effect = [
+            (None, Headers()),
             (SAMPLE_JSON_SYSTEMS, None),
             (NODE_POWERED_ON, None),
         ]
@@ -684,8 +686,212 @@ class TestRedfishPowerDriver(MAASTestCase):
         context = make_context()
         mock_redfish_request = self.patch(driver, "redfish_request")
         mock_redfish_request.side_effect = [
+            (None, Headers()),
             (SAMPLE_JSON_SYSTEMS, None),
             (SAMPLE_JSON_SYSTEM, None),
         ]
         power_state = yield driver.power_query(system_id, context)
         self.assertEqual(power_state, power_change.lower())
+
+    @inlineCallbacks
+    def test_get_auth_headers_uses_session_token(self):
+        driver = RedfishPowerDriver()
+        context = make_context()
+        url = driver.get_url(context)
+        token = factory.make_name("token").encode("utf-8")
+        mock_redfish_request = self.patch(driver, "redfish_request")
+        mock_redfish_request.return_value = succeed(
+            (None, Headers({b"X-Auth-Token": [token]}))
+        )
+
+        headers = yield driver.get_auth_headers(url, context)
+        self.assertEqual([token], headers.getRawHeaders(b"X-Auth-Token"))
+        self.assertFalse(headers.hasHeader(b"Authorization"))
+        self.assertThat(
+            mock_redfish_request,
+            MockCalledOnceWith(
+                b"POST",
+                join(url, b"redfish/v1/SessionService/Sessions"),
+                driver.make_auth_headers(**context),
+                ANY,
+            ),
+        )
+
+    @inlineCallbacks
+    def test_get_auth_headers_reuses_session(self):
+        driver = RedfishPowerDriver()
+        context = make_context()
+        url = driver.get_url(context)
+        token = factory.make_name("token").encode("utf-8")
+        mock_redfish_request = self.patch(driver, "redfish_request")
+        mock_redfish_request.return_value = succeed(
+            (None, Headers({b"X-Auth-Token": [token]}))
+        )
+
+        yield driver.get_auth_headers(url, context)
+        headers = yield driver.get_auth_headers(url, context)
+        self.assertEqual([token], headers.getRawHeaders(b"X-Auth-Token"))
+        self.assertThat(
+            mock_redfish_request, MockCalledOnceWith(ANY, ANY, ANY, ANY)
+        )
+
+    @inlineCallbacks
+    def test_get_auth_headers_without_sessions_uses_basic_auth(self):
+        driver = RedfishPowerDriver()
+        context = make_context()
+        url = driver.get_url(context)
+        mock_redfish_request = self.patch(driver, "redfish_request")
+        mock_redfish_request.return_value = fail(
+            PowerActionError("Unsupported")
+        )
+
+        headers = yield driver.get_auth_headers(url, context)
+        self.assertEqual(driver.make_auth_headers(**context), headers)
+        # Sessions aren't tried again.
+        yield driver.get_auth_headers(url, context)
+        self.assertEqual(1, mock_redfish_request.call_count)
+
+    @inlineCallbacks
+    def test_process_redfish_context_caches_node_id(self):
+        driver = RedfishPowerDriver()
+        context = make_context()
+        self.patch(driver, "get_auth_headers").return_value = succeed(
+            driver.make_auth_headers(**context)
+        )
+        mock_get_node_id = self.patch(driver, "get_node_id")
+        mock_get_node_id.return_value = succeed(b"1")
+
+        _, node_id, _ = yield driver.process_redfish_context(context)
+        _, node_id, _ = yield driver.process_redfish_context(context)
+        self.assertEqual(b"1", node_id)
+        self.assertThat(mock_get_node_id, MockCalledOnceWith(ANY, ANY))
+
+    @inlineCallbacks
+    def test_redfish_request_failure_forgets_bmc(self):
+        driver = RedfishPowerDriver()
+        context = make_context()
+        url = driver.get_url(context)
+        other_url = b"https://%s" % factory.make_ipv4_address().encode()
+        for bmc_url in (url, other_url):
+            driver._node_ids[(bmc_url, "user")] = b"1"
+            driver._etags[(bmc_url, b"1")] = b"etag"
+            driver._sessions[(bmc_url, "user", "pass")] = b"token"
+        mock_agent = self.patch(redfish_module, "Agent")
+        response = Mock()
+        response.code = HTTPStatus.UNAUTHORIZED
+        mock_agent.return_value.request.return_value = succeed(response)
+
+        with ExpectedException(RedfishAuthError):
+            yield driver.redfish_request(
+                b"GET", join(url, b"redfish/v1/Systems"), Headers()
+            )
+        self.assertEqual({(other_url, "user"): b"1"}, driver._node_ids)
+        self.assertEqual({(other_url, b"1"): b"etag"}, driver._etags)
+        self.assertEqual(
+            {(other_url, "user", "pass"): b"token"}, driver._sessions
+        )
+
+    @inlineCallbacks
+    def test_redfish_request_failure_keeps_sessions(self):
+        driver = RedfishPowerDriver()
+        context = make_context()
+        url = driver.get_url(context)
+        driver._node_ids[(url, "user")] = b"1"
+        driver._etags[(url, b"1")] = b"etag"
+        driver._sessions[(url, "user", "pass")] = b"token"
+        mock_agent = self.patch(redfish_module, "Agent")
+        response = Mock()
+        response.code = HTTPStatus.PRECONDITION_FAILED
+        mock_agent.return_value.request.return_value = succeed(response)
+
+        with ExpectedException(PowerActionError):
+            yield driver.redfish_request(
+                b"PATCH", join(url, b"redfish/v1/Systems/1"), Headers()
+            )
+        self.assertEqual({}, driver._node_ids)
+        self.assertEqual({}, driver._etags)
+        self.assertEqual({(url, "user", "pass"): b"token"}, driver._sessions)
+
+    @inlineCallbacks
+    def test_power_query_retries_with_new_session_after_auth_error(self):
+        driver = RedfishPowerDriver()
+        context = make_context()
+        context["node_id"] = "1"
+        mock_get_auth_headers = self.patch(driver, "get_auth_headers")
+        mock_get_auth_headers.return_value = succeed(Headers())
+        mock_redfish_request = self.patch(driver, "redfish_request")
+        mock_redfish_request.side_effect = [
+            fail(RedfishAuthError("401")),
+            succeed((SAMPLE_JSON_SYSTEM, None)),
+        ]
+
+        power_state = yield driver.power_query(b"1", context)
+        self.assertEqual("off", power_state)
+        self.assertEqual(2, mock_get_auth_headers.call_count)
+
+    @inlineCallbacks
+    def test_power_query_retries_auth_error_only_once(self):
+        driver = RedfishPowerDriver()
+        context = make_context()
+        context["node_id"] = "1"
+        self.patch(driver, "get_auth_headers").return_value = succeed(
+            Headers()
+        )
+        mock_redfish_request = self.patch(driver, "redfish_request")
+        mock_redfish_request.side_effect = lambda *args: fail(
+            RedfishAuthError("401")
+        )
+
+        with ExpectedException(RedfishAuthError):
+            yield driver.power_query(b"1", context)
+        self.assertEqual(2, mock_redfish_request.call_count)
+
+    @inlineCallbacks
+    def test_power_query_keeps_etag_for_set_pxe_boot(self):
+        driver = RedfishPowerDriver()
+        context = make_context()
+        context["node_id"] = "1"
+        url = driver.get_url(context)
+        headers = driver.make_auth_headers(**context)
+        self.patch(driver, "get_auth_headers").return_value = succeed(headers)
+        mock_redfish_request = self.patch(driver, "redfish_request")
+        mock_redfish_request.return_value = succeed(
+            (SAMPLE_JSON_SYSTEM, Headers(SAMPLE_HEADERS))
+        )
+        mock_get_etag = self.patch(driver, "get_etag")
+
+        yield driver.power_query(b"1", context)
+        yield driver.set_pxe_boot(url, b"1", headers)
+        self.assertThat(mock_get_etag, MockNotCalled())
+        self.assertEqual([b'"1631219999"'], headers.getRawHeaders(b"If-Match"))
+        # The PATCH changes the ETag.
+        self.assertEqual({}, driver._etags)
+
+    @inlineCallbacks
+    def test_power_forgets_etag(self):
+        driver = RedfishPowerDriver()
+        driver._etags[(b"https://bmc", b"1")] = b"etag"
+        self.patch(driver, "redfish_request")
+
+        yield driver.power("On", b"https://bmc", b"1", Headers())
+        self.assertEqual({}, driver._etags)
+
+    @inlineCallbacks
+    def test_set_pxe_boot_retries_stale_etag(self):
+        driver = RedfishPowerDriver()
+        context = make_context()
+        url = driver.get_url(context)
+        headers = driver.make_auth_headers(**context)
+        driver._etags[(url, b"1")] = b"stale"
+        mock_redfish_request = self.patch(driver, "redfish_request")
+        mock_redfish_request.side_effect = [
+            fail(PowerActionError("412")),
+            succeed((None, None)),
+        ]
+        mock_get_etag = self.patch(driver, "get_etag")
+        mock_get_etag.return_value = succeed(b"fresh")
+
+        yield driver.set_pxe_boot(url, b"1", headers)
+        self.assertThat(mock_get_etag, MockCalledOnceWith(url, b"1", headers))
+        self.assertEqual(2, mock_redfish_request.call_count)
+        self.assertEqual([b"fresh"], headers.getRawHeaders(b"If-Match"))
@@ -0,0 +1,127 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for `provisioningserver.drivers.power.utils`."""
+
+
+import threading
+
+from twisted.internet.defer import CancelledError, inlineCallbacks
+
+from maastesting.factory import factory
+from maastesting.runtest import MAASTwistedRunTest
+from maastesting.testcase import MAASTestCase
+from provisioningserver.drivers.power.utils import (
+    get_http_pool,
+    PowerThreadPools,
+)
+from provisioningserver.utils.twisted import deferToNewThread
+
+
+class TestGetHTTPPool(MAASTestCase):
+    def test_returns_persistent_pool(self):
+        pool = get_http_pool()
+        self.assertTrue(pool.persistent)
+        self.assertIs(pool, get_http_pool())
+
+    def test_keeps_verified_connections_apart(self):
+        self.assertIsNot(get_http_pool(verify=True), get_http_pool())
+
+
+class TestPowerThreadPools(MAASTestCase):
+
+    run_tests_with = MAASTwistedRunTest.make_factory(timeout=5)
+
+    def make_pools(self):
+        pools = PowerThreadPools()
+        self.addCleanup(lambda: [pool.stop() for pool in pools.pools.values()])
+        return pools
+
+    @inlineCallbacks
+    def test_calls_in_thread_from_pool_for_power_type(self):
+        pools = self.make_pools()
+        power_type = factory.make_name("power_type")
+        thread_name = yield pools.deferToThread(
+            power_type, lambda: threading.current_thread().name
+        )
+        self.assertIn("power-%s" % power_type, thread_name)
+        self.assertEqual([power_type], list(pools.pools))
+
+    @inlineCallbacks
+    def test_calls_in_daemon_thread(self):
+        pools = self.make_pools()
+        daemon = yield pools.deferToThread(
+            "ipmi", lambda: threading.current_thread().daemon
+        )
+        self.assertTrue(daemon)
+
+    def test_stop_does_not_wait_for_blocked_workers(self):
+        pools = self.make_pools()
+        started = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def hang():
+            started.set()
+            release.wait()
+
+        pools.deferToThread("ipmi", hang)
+        self.assertTrue(started.wait(2))
+        # This is what rackd calls as it shuts down.
+        stopper = threading.Thread(target=pools.get_pool("ipmi").stop)
+        stopper.daemon = True
+        stopper.start()
+        stopper.join(2)
+        self.assertFalse(stopper.is_alive())
+
+    @inlineCallbacks
+    def test_passes_on_failure(self):
+        pools = self.make_pools()
+        exception_type = factory.make_exception_type()
+
+        def fail():
+            raise exception_type()
+
+        with self.assertRaisesRegex(exception_type, ""):
+            yield pools.deferToThread("ipmi", fail)
+
+    def test_pools_have_configured_sizes(self):
+        pools = self.make_pools()
+        pools.configure(3, {"amt": 1})
+        self.assertEqual(1, pools.get_pool("amt").max)
+        self.assertEqual(3, pools.get_pool("ipmi").max)
+        pools.configure(4)
+        self.assertEqual(4, pools.get_pool("amt").max)
+
+    @inlineCallbacks
+    def test_cancelling_stops_waiting_call(self):
+        pools = self.make_pools()
+        pools.configure(1)
+        release = threading.Event()
+        calls = []
+        d_busy = pools.deferToThread("ipmi", release.wait)
+        d_waiting = pools.deferToThread("ipmi", calls.append, "call")
+        d_waiting.cancel()
+        release.set()
+        yield d_busy
+        with self.assertRaisesRegex(CancelledError, ""):
+            yield d_waiting
+        # Wait for the pool to get through the cancelled call.
+        yield pools.deferToThread("ipmi", lambda: None)
+        self.assertEqual([], calls)
+
+    @inlineCallbacks
+    def test_counts_queued_and_running_calls(self):
+        pools = self.make_pools()
+        pools.configure(1)
+        release = threading.Event()
+        d_busy = pools.deferToThread("ipmi", release.wait)
+        d_waiting = pools.deferToThread("ipmi", lambda: None)
+        self.assertEqual(2, pools.queued["ipmi"])
+        release.set()
+        yield d_busy
+        yield d_waiting
+        # Wait for the counts to be updated from the threads.
+        yield deferToNewThread(lambda: None)
+        self.assertEqual(0, pools.queued["ipmi"])
+        self.assertEqual(0, pools.running["ipmi"])
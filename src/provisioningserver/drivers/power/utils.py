@@ -3,12 +3,22 @@
 
 """Helpers for MAAS power drivers."""
 
+import time
 
+from twisted.internet import reactor
 from twisted.internet._sslverify import (
     ClientTLSOptions,
     OpenSSLCertificateOptions,
 )
-from twisted.web.client import BrowserLikePolicyForHTTPS
+from twisted.internet.defer import Deferred
+from twisted.web.client import BrowserLikePolicyForHTTPS, HTTPConnectionPool
+
+from provisioningserver.prometheus.metrics import PROMETHEUS_METRICS
+from provisioningserver.utils.twisted import ThreadPool
+
+# Connection pools shared by the HTTP based power drivers, see
+# `get_http_pool`.
+_http_pools = {}
 
 
 class WebClientContextFactory(BrowserLikePolicyForHTTPS):
@@ -24,3 +34,164 @@ class WebClientContextFactory(BrowserLikePolicyForHTTPS):
         # This forces Twisted to not validate the hostname of the certificate.
         opts._ctx.set_info_callback(lambda *args: None)
         return opts
+
+
+def get_http_pool(verify=False):
+    """Return the pool of persistent connections to BMCs.
+
+    Connections are kept open between requests and reused for the same
+    scheme, host and port, so the several requests of a power action, and
+    later queries of the same BMC, don't each need a new connection and TLS
+    handshake. There is a separate pool for connections whose certificates
+    are verified, so that those are never shared with unverified ones.
+
+    :param verify: Whether the connections in the pool verify certificates,
+        as with `WebClientContextFactory`.
+    """
+    pool = _http_pools.get(verify)
+    if pool is None:
+        pool = _http_pools[verify] = HTTPConnectionPool(
+            reactor, persistent=True
+        )
+        # BMCs handle few connections at once; don't hog them.
+        pool.maxPersistentPerHost = 2
+        # BMCs tend to drop idle connections quickly.
+        pool.cachedConnectionTimeout = 60
+    return pool
+
+
+class PowerThreadPool(ThreadPool):
+    """Thread-pool for power driver calls.
+
+    Its workers are daemon threads: a call to a BMC that hangs mustn't stop
+    rackd from exiting.
+    """
+
+    def threadFactory(self, target, name):
+        thread = super().threadFactory(target=target, name=name)
+        thread.daemon = True
+        return thread
+
+    def stop(self):
+        """Stop the pool without waiting for its workers to exit.
+
+        Idle workers exit straight away. A worker that's stuck in a call to
+        a BMC is left behind rather than joined, so that it can't stop rackd
+        from shutting down; being a daemon thread, it doesn't stop the
+        process from exiting either.
+        """
+        if self.joined:
+            return
+        self.joined = True
+        self.started = False
+        self._team.quit()
+
+
+class PowerThreadPools:
+    """Bounded thread pools for blocking power driver calls.
+
+    Each power type has a pool of its own, rather than sharing the reactor's
+    thread pool with the rest of the rack, so that a family of BMCs that are
+    slow or hang can only hold up the nodes of that power type.
+    """
+
+    # The most threads in each pool, unless set for the power type in
+    # `sizes`.
+    default_size = 10
+
+    def __init__(self):
+        self.sizes = {}
+        self.pools = {}
+        self.queued = {}
+        self.running = {}
+
+    def configure(self, default_size, sizes=None):
+        """Set the sizes of the pools, including ones already started."""
+        self.default_size = default_size
+        self.sizes = {} if sizes is None else dict(sizes)
+        for power_type, pool in self.pools.items():
+            pool.adjustPoolsize(maxthreads=self.get_size(power_type))
+
+    def get_size(self, power_type):
+        return self.sizes.get(power_type, self.default_size)
+
+    def get_pool(self, power_type):
+        """Return the pool for `power_type`, starting it if need be."""
+        pool = self.pools.get(power_type)
+        if pool is None:
+            pool = self.pools[power_type] = PowerThreadPool(
+                minthreads=0,
+                maxthreads=self.get_size(power_type),
+                name="power-%s" % power_type,
+            )
+            pool.start()
+            reactor.addSystemEventTrigger("during", "shutdown", pool.stop)
+        return pool
+
+    def _update_metrics(self, power_type):
+        labels = {"power_type": power_type}
+        PROMETHEUS_METRICS.update(
+            "maas_power_thread_pool_queued",
+            "set",
+            value=self.queued.get(power_type, 0),
+            labels=labels,
+        )
+        PROMETHEUS_METRICS.update(
+            "maas_power_thread_pool_running",
+            "set",
+            value=self.running.get(power_type, 0),
+            labels=labels,
+        )
+
+    def _count(self, counts, power_type, change):
+        counts[power_type] = counts.get(power_type, 0) + change
+        self._update_metrics(power_type)
+
+    def deferToThread(self, power_type, func, *args, **kwargs):
+        """Call `func` in a thread from the pool for `power_type`.
+
+        Cancelling the returned `Deferred`, as when a deadline passes, stops
+        `func` from being called if it's still waiting for a thread. A call
+        that is already running can't be interrupted, but its result is
+        discarded.
+
+        :return: A `Deferred` that fires with the result of `func`.
+        """
+        cancelled = []
+        d = Deferred(cancelled.append)
+        queued_at = time.monotonic()
+
+        def run():
+            reactor.callFromThread(started)
+            PROMETHEUS_METRICS.update(
+                "maas_power_thread_pool_wait_time",
+                "observe",
+                value=time.monotonic() - queued_at,
+                labels={"power_type": power_type},
+            )
+            if cancelled:
+                return None
+            return func(*args, **kwargs)
+
+        def started():
+            self._count(self.queued, power_type, -1)
+            self._count(self.running, power_type, +1)
+
+        def finished(success, result):
+            self._count(self.running, power_type, -1)
+            if cancelled:
+                return
+            elif success:
+                d.callback(result)
+            else:
+                d.errback(result)
+
+        def onResult(success, result):
+            reactor.callFromThread(finished, success, result)
+
+        self._count(self.queued, power_type, +1)
+        self.get_pool(power_type).callInThreadWithCallback(onResult, run)
+        return d
+
+
+power_thread_pools = PowerThreadPools()
@@ -23,7 +23,10 @@ from provisioningserver.drivers import (
     make_setting_field,
 )
 from provisioningserver.drivers.power import PowerActionError, PowerDriver
-from provisioningserver.drivers.power.utils import WebClientContextFactory
+from provisioningserver.drivers.power.utils import (
+    get_http_pool,
+    WebClientContextFactory,
+)
 from provisioningserver.utils.twisted import asynchronous
 from provisioningserver.utils.version import get_running_version
 
@@ -123,6 +126,7 @@ class WebhookPowerDriver(PowerDriver):
             Agent(
                 reactor,
                 contextFactory=WebClientContextFactory(verify=verify_ssl),
+                pool=get_http_pool(verify=verify_ssl),
             )
         )
         d = agent.request(
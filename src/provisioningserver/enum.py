@@ -61,3 +61,19 @@ class LIBVIRT_NETWORK:
 
 
 LIBVIRT_NETWORK_CHOICES = enum_choices(LIBVIRT_NETWORK)
+
+
+class POWER_QUERY_PRIORITY:
+    """How often a node's power state is worth querying.
+
+    The region gives one of these for each node in `ListNodePowerParameters`,
+    and the rack schedules its queries of the node from it.
+    """
+
+    # The node is changing state, e.g. deploying, commissioning or releasing,
+    # so its power state is expected to change soon.
+    HIGH = "high"
+    NORMAL = "normal"
+    # The node is deployed or ready, so its power state is expected to stay
+    # as it is.
+    LOW = "low"
@@ -6,7 +6,10 @@
 from collections import namedtuple
 from logging import DEBUG, ERROR, INFO, WARN
 
-from twisted.internet.defer import maybeDeferred, succeed
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred, maybeDeferred, succeed
+from twisted.protocols.amp import UnhandledCommand
+from twisted.python.failure import Failure
 
 from provisioningserver.logger import get_maas_logger, LegacyLogger
 from provisioningserver.rpc import getRegionClient
@@ -16,6 +19,7 @@ from provisioningserver.rpc.region import (
     SendEvent,
     SendEventIPAddress,
     SendEventMACAddress,
+    SendEvents,
 )
 from provisioningserver.utils.env import get_maas_id
 from provisioningserver.utils.twisted import (
@@ -428,12 +432,36 @@ class NodeEventHub:
 
     This automatically ensures that the event type is registered before
     sending logs to the region.
+
+    Events logged by MAC or IP address, most of which are sent as nodes
+    boot, are held for up to `batch_interval` seconds and sent to the region
+    together in one `SendEvents` call. While it waits, an event of one of
+    `coalesced_event_types` is dropped when the same event for the same node
+    is already waiting to be sent.
     """
 
-    def __init__(self):
+    # How long events are held for, in seconds, before they're sent.
+    batch_interval = 1.0
+
+    # The most events that are sent in one call.
+    batch_size = 500
+
+    # A booting node can request the same file many times over, so a
+    # repeated request is only sent once.
+    coalesced_event_types = frozenset(
+        {EVENT_TYPES.NODE_TFTP_REQUEST, EVENT_TYPES.NODE_HTTP_REQUEST}
+    )
+
+    def __init__(self, clock=reactor):
         super().__init__()
         self._types_registering = dict()
         self._types_registered = set()
+        self._clock = clock
+        # Events waiting to be sent, as `(time, event, waiters)` tuples.
+        self._batch = []
+        # The waiters of the events in the batch that can be coalesced.
+        self._batch_waiters = {}
+        self._batch_call = None
 
     @asynchronous
     def registerEventType(self, event_type):
@@ -510,6 +538,91 @@ class NodeEventHub:
             self._types_registered.discard(event_type)
         return failure
 
+    def _queueEvent(self, event_type, description, **node):
+        """Add an event to the batch, and return a `Deferred` that fires
+        once it has been sent.
+
+        :param node: The `system_id`, `mac_address` or `ip_address` of the
+            node of the event.
+        """
+        waiter = Deferred()
+        key = (event_type, description, *node.items())
+        if key in self._batch_waiters:
+            self._batch_waiters[key].append(waiter)
+            return waiter
+        event = dict(node, type_name=event_type, description=description)
+        waiters = [waiter]
+        self._batch.append((self._clock.seconds(), event, waiters))
+        if event_type in self.coalesced_event_types:
+            self._batch_waiters[key] = waiters
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+        elif self._batch_call is None:
+            self._batch_call = self._clock.callLater(
+                self.batch_interval, self.flush
+            )
+        return waiter
+
+    @asynchronous
+    def flush(self):
+        """Send the batch of waiting events to the region now.
+
+        :return: :class:`Deferred` that fires once they have been sent.
+        """
+        if self._batch_call is not None:
+            if self._batch_call.active():
+                self._batch_call.cancel()
+            self._batch_call = None
+        batch, self._batch = self._batch, []
+        self._batch_waiters = {}
+        if len(batch) == 0:
+            return succeed(None)
+
+        now = self._clock.seconds()
+        events = [
+            dict(event, age=max(0.0, now - queued))
+            for queued, event, _ in batch
+        ]
+
+        def notify(result, entries):
+            for _, _, waiters in entries:
+                for waiter in waiters:
+                    if isinstance(result, Failure):
+                        waiter.errback(result)
+                    else:
+                        waiter.callback(None)
+
+        def sendEach(failure, client):
+            # Regions from before `SendEvents` are sent one event at a time.
+            failure.trap(UnhandledCommand)
+            d = succeed(None)
+            for entry in batch:
+                d.addCallback(
+                    lambda _, entry=entry: maybeDeferred(
+                        self._sendEvent, client, entry[1]
+                    ).addBoth(notify, [entry])
+                )
+            return d
+
+        def send(client):
+            d = client(SendEvents, events=events)
+            d.addCallback(notify, batch)
+            d.addErrback(sendEach, client)
+            return d
+
+        d = maybeDeferred(getRegionClient).addCallback(send)
+        return d.addErrback(notify, batch)
+
+    def _sendEvent(self, client, event):
+        """Send a single batched `event` to the region on its own."""
+        if "mac_address" in event:
+            command = SendEventMACAddress
+        elif "ip_address" in event:
+            command = SendEventIPAddress
+        else:
+            command = SendEvent
+        return client(command, **event)
+
     @asynchronous
     def logByID(self, event_type, system_id, description=""):
         """Send the given node event to the region.
@@ -541,7 +654,8 @@ class NodeEventHub:
     def logByMAC(self, event_type, mac_address, description=""):
         """Send the given node event to the region.
 
-        The node is specified by its MAC address.
+        The node is specified by its MAC address. The event is sent along
+        with others in a batch; see `NodeEventHub`.
 
         :param event_type: The type of the event.
         :type event_type: unicode
@@ -552,12 +666,8 @@ class NodeEventHub:
         """
 
         def send(_):
-            client = getRegionClient()
-            return client(
-                SendEventMACAddress,
-                mac_address=mac_address,
-                type_name=event_type,
-                description=description,
+            return self._queueEvent(
+                event_type, description, mac_address=mac_address
             )
 
         d = self.ensureEventTypeRegistered(event_type).addCallback(send)
@@ -576,7 +686,8 @@ class NodeEventHub:
     def logByIP(self, event_type, ip_address, description=""):
         """Send the given node event to the region.
 
-        The node is specified by its MAC address.
+        The node is specified by its IP address. The event is sent along
+        with others in a batch; see `NodeEventHub`.
 
         :param event_type: The type of the event.
         :type event_type: unicode
@@ -587,12 +698,8 @@ class NodeEventHub:
         """
 
         def send(_):
-            client = getRegionClient()
-            return client(
-                SendEventIPAddress,
-                ip_address=ip_address,
-                type_name=event_type,
-                description=description,
+            return self._queueEvent(
+                event_type, description, ip_address=ip_address
             )
 
         d = self.ensureEventTypeRegistered(event_type).addCallback(send)
@@ -7,6 +7,7 @@
 from datetime import datetime
 import os.path
 import tarfile
+from urllib.parse import urlparse
 
 from simplestreams.mirrors import BasicMirrorWriter, UrlMirrorReader
 from simplestreams.objectstores import FileStore
@@ -21,6 +22,7 @@ from provisioningserver.import_images.helpers import (
     get_signing_policy,
     maaslog,
 )
+from provisioningserver.import_images.resumable_download import download_file
 from provisioningserver.logger import LegacyLogger
 
 log = LegacyLogger()
@@ -29,6 +31,45 @@ log = LegacyLogger()
 DEFAULT_KEYRING_PATH = "/usr/share/keyrings"
 
 
+def get_content_source_url(content_source):
+    """Return the HTTP URL that `content_source` reads from, or None."""
+    url = getattr(content_source, "url", None)
+    if url is None:
+        # A `ChecksummingContentSource` wraps another content source.
+        url = getattr(getattr(content_source, "cs", None), "url", None)
+    if isinstance(url, str) and urlparse(url).scheme in ("http", "https"):
+        return url
+    else:
+        return None
+
+
+class ResumableFileStore(FileStore):
+    """A `FileStore` that resumes interrupted downloads.
+
+    Content read over HTTP is downloaded with `download_file`, which keeps
+    partial downloads around to resume them, fetches large files in
+    parallel chunks, and checks the SHA256 of the whole file. Anything else
+    is inserted as `FileStore` would.
+    """
+
+    def insert(self, path, reader, checksums=None, mutable=True, size=None):
+        url = get_content_source_url(reader)
+        sha256 = None if checksums is None else checksums.get("sha256")
+        wpath = self._fullpath(path)
+        if (
+            url is None
+            or sha256 is None
+            or size is None
+            or (os.path.isfile(wpath) and mutable)
+        ):
+            super().insert(
+                path, reader, checksums=checksums, mutable=mutable, size=size
+            )
+        elif not os.path.isfile(wpath):
+            log.debug("Downloading {url} (size={size}).", url=url, size=size)
+            download_file(url, wpath, sha256, size)
+
+
 def insert_file(store, name, tag, checksums, size, content_source):
     """Insert a file into `store`.
 
@@ -347,11 +388,11 @@ def download_all_boot_resources(
     """
     storage_path = os.path.abspath(storage_path)
     snapshot_path = compose_snapshot_path(storage_path)
-    # Use a FileStore as our ObjectStore implementation.  It will write to the
-    # cache directory.
+    # Use a ResumableFileStore as our ObjectStore implementation.  It will
+    # write to the cache directory.
     if store is None:
         cache_path = os.path.join(storage_path, "cache")
-        store = FileStore(cache_path)
+        store = ResumableFileStore(cache_path)
     # XXX jtv 2014-04-11: FileStore now also takes an argument called
     # complete_callback, which can be used for progress reporting.
 
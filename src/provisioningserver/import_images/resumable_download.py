@@ -0,0 +1,274 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Resumable, chunked downloads of boot resources."""
+
+__all__ = ["DownloadError", "download_file"]
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+from urllib.request import Request, urlopen
+
+from provisioningserver.logger import get_maas_logger
+
+maaslog = get_maas_logger("import-images")
+
+
+class DownloadError(Exception):
+    """Raised when a file can't be downloaded."""
+
+
+class RangesNotSupported(Exception):
+    """Raised when the server ignores the Range header of a request."""
+
+
+class ResumableDownload:
+    """Download a file over HTTP, so that an interrupted download resumes.
+
+    The file is fetched in chunks with HTTP range requests, several chunks
+    at once when it is large. Content is written into a partial file next to
+    `path`, and the progress of each chunk is recorded in a state file next
+    to that, so a download that is interrupted, even by a restart, picks up
+    where it left off. The partial file is only moved to `path` once the
+    SHA256 and size of all of it, resumed parts included, have been checked.
+
+    Servers that don't support ranges are downloaded from in one go.
+    """
+
+    # Size of the chunks that the file is fetched in.
+    chunk_size = 64 * 1024 * 1024
+
+    # The most chunks that are fetched at once.
+    max_parallel_chunks = 4
+
+    # How many times a download is attempted before giving up, and how long
+    # to wait before the first retry, doubled for each retry after that.
+    max_attempts = 5
+    retry_delay = 1
+
+    read_size = 1024 * 1024
+    timeout = 60
+
+    def __init__(self, url, path, sha256, size):
+        self.url = url
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.partial_path = path + ".partial"
+        self.state_path = path + ".partial.json"
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        # Maps the start of each chunk to the number of bytes of it that
+        # have been written.
+        self.progress = {}
+
+    def get_chunks(self):
+        """Return the `(start, end)` of each chunk, `end` exclusive."""
+        return [
+            (start, min(start + self.chunk_size, self.size))
+            for start in range(0, self.size, self.chunk_size)
+        ] or [(0, 0)]
+
+    def load_state(self):
+        """Load the progress of an earlier download, if there was one.
+
+        An earlier download of different content, or with different chunks,
+        is thrown away.
+        """
+        try:
+            with open(self.state_path, "r") as fp:
+                state = json.load(fp)
+            expected = (self.sha256, self.size, self.chunk_size)
+            if (
+                state["sha256"],
+                state["size"],
+                state["chunk_size"],
+            ) == expected and os.path.isfile(self.partial_path):
+                self.progress = {
+                    int(start): written
+                    for start, written in state["progress"].items()
+                }
+                return
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError, AttributeError):
+            maaslog.warning(
+                "Ignoring unreadable download state in %s." % self.state_path
+            )
+        self.progress = {}
+        self.remove_partial()
+        with open(self.partial_path, "wb") as fp:
+            fp.truncate(self.size)
+
+    def save_state(self):
+        """Record the progress of the download."""
+        with self._lock:
+            state = {
+                "sha256": self.sha256,
+                "size": self.size,
+                "chunk_size": self.chunk_size,
+                "progress": {
+                    str(start): written
+                    for start, written in self.progress.items()
+                },
+            }
+            temp_path = self.state_path + ".new"
+            with open(temp_path, "w") as fp:
+                json.dump(state, fp)
+            os.rename(temp_path, self.state_path)
+
+    def remove_partial(self):
+        for path in (self.partial_path, self.state_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get_pending_chunks(self):
+        return [
+            (start, end)
+            for start, end in self.get_chunks()
+            if start + self.progress.get(start, 0) < end
+        ]
+
+    def open_range(self, start, end):
+        """Open a response for the bytes from `start` up to `end`.
+
+        :raise RangesNotSupported: If the server responds with the whole file
+            instead of the range.
+        """
+        request = Request(
+            self.url, headers={"Range": "bytes=%d-%d" % (start, end - 1)}
+        )
+        response = urlopen(request, timeout=self.timeout)
+        if response.status != 206:
+            response.close()
+            raise RangesNotSupported()
+        return response
+
+    def fetch_chunk(self, start, end):
+        """Fetch what is left of the chunk from `start` to `end`."""
+        offset = start + self.progress.get(start, 0)
+        response = self.open_range(offset, end)
+        try:
+            with open(self.partial_path, "r+b") as fp:
+                fp.seek(offset)
+                try:
+                    while offset < end and not self._stopping.is_set():
+                        data = response.read(min(self.read_size, end - offset))
+                        if not data:
+                            raise http.client.IncompleteRead(b"", end - offset)
+                        fp.write(data)
+                        offset += len(data)
+                        with self._lock:
+                            self.progress[start] = offset - start
+                finally:
+                    fp.flush()
+                    self.save_state()
+        finally:
+            response.close()
+
+    def fetch_chunks(self, chunks):
+        """Fetch `chunks`, several at once."""
+        self._stopping.clear()
+        if len(chunks) == 1:
+            self.fetch_chunk(*chunks[0])
+            return
+        with ThreadPoolExecutor(self.max_parallel_chunks) as executor:
+            futures = [
+                executor.submit(self.fetch_chunk, start, end)
+                for start, end in chunks
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            finally:
+                # Once one chunk fails the download is retried as a whole,
+                # so there's no point in carrying on with the others.
+                self._stopping.set()
+
+    def fetch_whole(self):
+        """Fetch the whole file in one go, from a server without ranges."""
+        self.progress = {}
+        self.remove_partial()
+        response = urlopen(self.url, timeout=self.timeout)
+        try:
+            with open(self.partial_path, "wb") as fp:
+                for data in iter(lambda: response.read(self.read_size), b""):
+                    fp.write(data)
+        finally:
+            response.close()
+
+    def verify(self):
+        """Check the SHA256 and size of the whole partial file."""
+        hasher = hashlib.sha256()
+        with open(self.partial_path, "rb") as fp:
+            for data in iter(lambda: fp.read(self.read_size), b""):
+                hasher.update(data)
+            size = fp.tell()
+        if size != self.size or hasher.hexdigest() != self.sha256:
+            self.remove_partial()
+            raise DownloadError(
+                "Checksum mismatch for %s, downloaded from %s."
+                % (self.path, self.url)
+            )
+
+    def run(self):
+        """Download the file to `path`."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.load_state()
+        if self.progress:
+            maaslog.info(
+                "Resuming download of %s; %d of %d bytes were downloaded."
+                % (self.url, sum(self.progress.values()), self.size)
+            )
+        ranges = True
+        attempt = 1
+        while True:
+            try:
+                if ranges:
+                    chunks = self.get_pending_chunks()
+                    if chunks:
+                        self.fetch_chunks(chunks)
+                else:
+                    self.fetch_whole()
+                self.verify()
+            except RangesNotSupported:
+                maaslog.info(
+                    "%s doesn't support resuming downloads." % self.url
+                )
+                ranges = False
+            except (OSError, http.client.HTTPException) as error:
+                if attempt == self.max_attempts:
+                    raise DownloadError(
+                        "Unable to download %s: %s" % (self.url, error)
+                    ) from error
+                maaslog.warning(
+                    "Download of %s was interrupted (%s); resuming."
+                    % (self.url, error)
+                )
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+                attempt += 1
+            else:
+                break
+        os.rename(self.partial_path, self.path)
+        try:
+            os.remove(self.state_path)
+        except FileNotFoundError:
+            pass
+
+
+def download_file(url, path, sha256, size):
+    """Download `url` to `path`, resuming an earlier partial download.
+
+    See `ResumableDownload`.
+
+    :raise DownloadError: If the file couldn't be downloaded, or its content
+        doesn't match `sha256` and `size`.
+    """
+    ResumableDownload(url, path, sha256, size).run()
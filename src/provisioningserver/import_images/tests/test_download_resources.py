@@ -6,12 +6,16 @@
 
 from datetime import datetime
 import hashlib
+import io
 import os
 import random
 import tarfile
 from unittest import mock
 
-from simplestreams.contentsource import ChecksummingContentSource
+from simplestreams.contentsource import (
+    ChecksummingContentSource,
+    UrlContentSource,
+)
 from simplestreams.objectstores import FileStore
 
 from maastesting.factory import factory
@@ -84,6 +88,53 @@ class TestDownloadAllBootResources(MAASTestCase):
         )
 
 
+class TestResumableFileStore(MAASTestCase):
+    """Tests for `ResumableFileStore`."""
+
+    def make_content_source(self, url):
+        content = factory.make_bytes()
+        checksums = {"sha256": hashlib.sha256(content).hexdigest()}
+        content_source = ChecksummingContentSource(
+            UrlContentSource(url), checksums, len(content)
+        )
+        return content_source, checksums, len(content)
+
+    def test_downloads_http_content(self):
+        download_file = self.patch(download_resources, "download_file")
+        store = download_resources.ResumableFileStore(self.make_dir())
+        url = factory.make_simple_http_url()
+        content_source, checksums, size = self.make_content_source(url)
+        store.insert(
+            "tag", content_source, checksums, mutable=False, size=size
+        )
+        self.assertThat(
+            download_file,
+            MockCalledOnceWith(
+                url, store._fullpath("tag"), checksums["sha256"], size
+            ),
+        )
+
+    def test_does_not_download_existing_content(self):
+        download_file = self.patch(download_resources, "download_file")
+        store = download_resources.ResumableFileStore(self.make_dir())
+        factory.make_file(store._fullpath(""), "tag")
+        url = factory.make_simple_http_url()
+        content_source, checksums, size = self.make_content_source(url)
+        store.insert(
+            "tag", content_source, checksums, mutable=False, size=size
+        )
+        self.assertThat(download_file, MockNotCalled())
+
+    def test_inserts_other_content(self):
+        download_file = self.patch(download_resources, "download_file")
+        store = download_resources.ResumableFileStore(self.make_dir())
+        content = factory.make_bytes()
+        store.insert("tag", io.BytesIO(content), mutable=False)
+        self.assertThat(download_file, MockNotCalled())
+        with open(store._fullpath("tag"), "rb") as fp:
+            self.assertEqual(content, fp.read())
+
+
 class TestDownloadBootResources(MAASTestCase):
     """Tests for `download_boot_resources()`."""
 
@@ -0,0 +1,202 @@
+# Copyright 2022 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for `provisioningserver.import_images.resumable_download`."""
+
+
+import hashlib
+import io
+import json
+import os
+import re
+
+from maastesting.factory import factory
+from maastesting.testcase import MAASTestCase
+from provisioningserver.import_images import resumable_download
+from provisioningserver.import_images.resumable_download import (
+    download_file,
+    DownloadError,
+    ResumableDownload,
+)
+
+
+class FakeResponse(io.BytesIO):
+    def __init__(self, content, status, fail_after=None):
+        super().__init__(content)
+        self.status = status
+        self.fail_after = fail_after
+
+    def read(self, size=-1):
+        if self.fail_after is not None and self.tell() >= self.fail_after:
+            raise ConnectionResetError("Connection reset by peer")
+        if self.fail_after is not None:
+            size = min(size, self.fail_after - self.tell())
+        return super().read(size)
+
+
+class FakeServer:
+    """Serves `content`, as `urlopen` would."""
+
+    def __init__(self, content, ranges=True):
+        self.content = content
+        self.ranges = ranges
+        self.requests = []
+        # Requests that should fail after this many bytes of the response.
+        self.failures = []
+
+    def urlopen(self, request, timeout=None):
+        headers = getattr(request, "headers", {})
+        range_header = headers.get("Range")
+        self.requests.append(range_header)
+        fail_after = self.failures.pop(0) if self.failures else None
+        if range_header is None or not self.ranges:
+            return FakeResponse(self.content, 200, fail_after)
+        start, end = re.match(r"bytes=(\d+)-(\d+)", range_header).groups()
+        return FakeResponse(
+            self.content[int(start) : int(end) + 1], 206, fail_after
+        )
+
+
+class TestResumableDownload(MAASTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patch(ResumableDownload, "chunk_size", 16)
+        self.patch(ResumableDownload, "read_size", 4)
+        self.patch(resumable_download.time, "sleep")
+        self.url = "http://%s/file" % factory.make_hostname()
+        self.path = os.path.join(self.make_dir(), "file")
+
+    def make_server(self, size=100, **kwargs):
+        content = os.urandom(size)
+        server = FakeServer(content, **kwargs)
+        self.patch(resumable_download, "urlopen", server.urlopen)
+        return server
+
+    def download(self, server):
+        download_file(
+            self.url,
+            self.path,
+            hashlib.sha256(server.content).hexdigest(),
+            len(server.content),
+        )
+
+    def assertDownloaded(self, server):
+        with open(self.path, "rb") as fp:
+            self.assertEqual(server.content, fp.read())
+        self.assertEqual(
+            [os.path.basename(self.path)],
+            os.listdir(os.path.dirname(self.path)),
+        )
+
+    def test_downloads_in_chunks(self):
+        server = self.make_server(40)
+        self.download(server)
+        self.assertDownloaded(server)
+        self.assertCountEqual(
+            ["bytes=0-15", "bytes=16-31", "bytes=32-39"], server.requests
+        )
+
+    def test_downloads_empty_file(self):
+        server = self.make_server(0)
+        self.download(server)
+        self.assertDownloaded(server)
+        self.assertEqual([], server.requests)
+
+    def test_downloads_whole_file_without_ranges(self):
+        server = self.make_server(40, ranges=False)
+        self.download(server)
+        self.assertDownloaded(server)
+        self.assertIn(None, server.requests)
+
+    def test_resumes_interrupted_chunk(self):
+        server = self.make_server(10)
+        server.failures = [6]
+        self.download(server)
+        self.assertDownloaded(server)
+        self.assertEqual(["bytes=0-9", "bytes=6-9"], server.requests)
+
+    def test_resumes_partial_download(self):
+        server = self.make_server(40)
+        sha256 = hashlib.sha256(server.content).hexdigest()
+        download = ResumableDownload(self.url, self.path, sha256, 40)
+        download.load_state()
+        download.fetch_chunk(16, 32)
+        download.fetch_chunk(0, 16)
+        server.requests.clear()
+        self.download(server)
+        self.assertDownloaded(server)
+        self.assertEqual(["bytes=32-39"], server.requests)
+
+    def test_discards_partial_download_of_other_content(self):
+        server = self.make_server(40)
+        download = ResumableDownload(
+            self.url, self.path, factory.make_string(), 40
+        )
+        download.load_state()
+        download.fetch_chunk(0, 16)
+        server.requests.clear()
+        self.download(server)
+        self.assertDownloaded(server)
+        self.assertEqual(3, len(server.requests))
+
+    def test_ignores_unreadable_state(self):
+        server = self.make_server(40)
+        with open(self.path + ".partial.json", "w") as fp:
+            fp.write("{")
+        self.download(server)
+        self.assertDownloaded(server)
+
+    def test_records_progress(self):
+        server = self.make_server(40)
+        server.failures = [8]
+        sha256 = hashlib.sha256(server.content).hexdigest()
+        download = ResumableDownload(self.url, self.path, sha256, 40)
+        download.load_state()
+        self.assertRaises(ConnectionResetError, download.fetch_chunk, 16, 32)
+        with open(download.state_path) as fp:
+            state = json.load(fp)
+        self.assertEqual(
+            {
+                "sha256": sha256,
+                "size": 40,
+                "chunk_size": 16,
+                "progress": {"16": 8},
+            },
+            state,
+        )
+
+    def test_raises_checksum_mismatch(self):
+        server = self.make_server(40)
+        self.assertRaises(
+            DownloadError,
+            download_file,
+            self.url,
+            self.path,
+            factory.make_string(),
+            40,
+        )
+        self.assertEqual([], os.listdir(os.path.dirname(self.path)))
+        self.assertEqual(3, len(server.requests))
+
+    def test_gives_up_after_max_attempts(self):
+        self.patch(ResumableDownload, "max_attempts", 2)
+        server = self.make_server(10)
+        server.failures = [0, 0]
+        error = self.assertRaises(DownloadError, self.download, server)
+        self.assertIsInstance(error.__cause__, ConnectionResetError)
+        self.assertEqual(2, len(server.requests))
+
+    def test_retries_incomplete_response(self):
+        server = self.make_server(10)
+        original_urlopen = server.urlopen
+
+        def urlopen(request, timeout=None):
+            response = original_urlopen(request, timeout=timeout)
+            if len(server.requests) == 1:
+                response.truncate(5)
+            return response
+
+        self.patch(resumable_download, "urlopen", urlopen)
+        self.download(server)
+        self.assertDownloaded(server)
+        self.assertEqual(["bytes=0-9", "bytes=5-9"], server.requests)
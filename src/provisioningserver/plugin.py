@@ -131,8 +131,21 @@ class ProvisioningServiceMaker:
         from provisioningserver.rackdservices.node_power_monitor_service import (
             NodePowerMonitorService,
         )
+        from provisioningserver.rpc.power import configure_power_thread_pools
 
-        node_monitor = NodePowerMonitorService(reactor)
+        with ClusterConfiguration.open() as config:
+            configure_power_thread_pools(
+                config.power_thread_pool_size,
+                config.power_thread_pool_size_by_type,
+            )
+            max_nodes_at_once_by_power_type = (
+                config.power_max_nodes_at_once_by_type
+            )
+
+        node_monitor = NodePowerMonitorService(
+            reactor,
+            max_nodes_at_once_by_power_type=max_nodes_at_once_by_power_type,
+        )
         node_monitor.setName("node_monitor")
         return node_monitor
 
@@ -25,12 +25,65 @@ METRICS_DEFINITIONS = [
         "Latency of Rack-Region RPC call",
         ["call"],
     ),
+    MetricDefinition(
+        "Gauge",
+        "maas_rack_region_rpc_calls_in_flight",
+        "Number of Rack-Region RPC calls in progress over each connection",
+        ["eventloop"],
+    ),
+    MetricDefinition(
+        "Counter",
+        "maas_rack_region_rpc_connection_chosen",
+        "Number of times each connection was chosen for Rack-Region RPC",
+        ["eventloop"],
+    ),
     MetricDefinition(
         "Histogram",
         "maas_tftp_file_transfer_latency",
         "Latency of TFTP file downloads",
         ["filename"],
     ),
+    MetricDefinition(
+        "Gauge",
+        "maas_power_thread_pool_queued",
+        "Number of power driver calls waiting for a thread",
+        ["power_type"],
+    ),
+    MetricDefinition(
+        "Gauge",
+        "maas_power_thread_pool_running",
+        "Number of power driver calls running in a thread",
+        ["power_type"],
+    ),
+    MetricDefinition(
+        "Histogram",
+        "maas_power_thread_pool_wait_time",
+        "Time power driver calls waited for a thread",
+        ["power_type"],
+    ),
+    MetricDefinition(
+        "Gauge",
+        "maas_power_poll_nodes",
+        "Number of nodes in the power polling schedule",
+        ["priority"],
+    ),
+    MetricDefinition(
+        "Gauge",
+        "maas_power_poll_due_nodes",
+        "Number of nodes due a power query in the last round of polling",
+    ),
+    MetricDefinition(
+        "Histogram",
+        "maas_power_poll_interval",
+        "Time until the next scheduled power query of a node",
+        ["priority"],
+        buckets=[15, 30, 60, 120, 300, 600, 1200, 2400],
+    ),
+    MetricDefinition(
+        "Histogram",
+        "maas_power_poll_lateness",
+        "Time between a power query being due and it starting",
+    ),
     # regiond metrics
     MetricDefinition(
         "Histogram",
@@ -64,6 +117,12 @@ METRICS_DEFINITIONS = [
         "Latency of Region-Rack RPC call",
         ["call"],
     ),
+    MetricDefinition(
+        "Counter",
+        "maas_region_rack_rpc_call_cache",
+        "Region-Rack RPC calls answered from the cache (hit) or not (miss)",
+        ["call", "result"],
+    ),
     MetricDefinition(
         "Histogram",
         "maas_websocket_call_latency",
@@ -83,6 +142,17 @@ METRICS_DEFINITIONS = [
         "HTTP request query latency",
         _WEBSOCKET_CALL_LABELS,
     ),
+    MetricDefinition(
+        "Gauge",
+        "maas_db_notify_queue_depth",
+        "Number of database notifications waiting to be handled",
+    ),
+    MetricDefinition(
+        "Histogram",
+        "maas_db_notify_processing_lag",
+        "Seconds from receiving a database notification to handling it",
+        ["channel"],
+    ),
     MetricDefinition(
         "Counter",
         "maas_virsh_fetch_description_failure",
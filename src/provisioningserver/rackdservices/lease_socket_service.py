@@ -12,11 +12,12 @@ from twisted.application.service import Service
 from twisted.internet import reactor, task
 from twisted.internet.defer import inlineCallbacks
 from twisted.internet.protocol import DatagramProtocol
+from twisted.protocols.amp import UnhandledCommand
 
 from provisioningserver.logger import get_maas_logger
 from provisioningserver.path import get_maas_data_path
 from provisioningserver.rpc.exceptions import NoConnectionsAvailable
-from provisioningserver.rpc.region import UpdateLease
+from provisioningserver.rpc.region import UpdateLease, UpdateLeases
 from provisioningserver.utils.twisted import pause, retries
 
 maaslog = get_maas_logger("lease_socket_service")
@@ -33,6 +34,11 @@ class LeaseSocketService(Service, DatagramProtocol):
     # None, or a Deferred that will fire when the processor exits.
     done = None
 
+    # The most notifications to send to the region in one `UpdateLeases`
+    # call. Notifications received between runs of the processor are sent
+    # together, up to this many at a time.
+    batch_size = 100
+
     def __init__(self, client_service, reactor):
         self.client_service = client_service
         self.reactor = reactor
@@ -84,32 +90,60 @@ class LeaseSocketService(Service, DatagramProtocol):
         self.notifications.append(notification)
 
     def processNotifications(self, clock=reactor):
-        """Process all notifications."""
+        """Process all notifications, in batches."""
 
-        def gen_notifications(notifications):
+        def gen_batches(notifications):
             while len(notifications) != 0:
-                yield notifications.popleft()
+                batch = []
+                while len(notifications) != 0 and len(batch) < self.batch_size:
+                    batch.append(notifications.popleft())
+                yield batch
 
         return task.coiterate(
-            self.processNotification(notification, clock=clock)
-            for notification in gen_notifications(self.notifications)
+            self.processNotificationBatch(batch, clock=clock)
+            for batch in gen_batches(self.notifications)
         )
 
     @inlineCallbacks
-    def processNotification(self, notification, clock=reactor):
-        """Send a notification to the region."""
-        client = None
+    def _getClient(self, clock=reactor):
+        """Return a client to the region, or None if there isn't one."""
         for elapsed, remaining, wait in retries(30, 10, clock):
             try:
                 client = yield self.client_service.getClientNow()
-                break
+                return client
             except NoConnectionsAvailable:
-                yield pause(wait, self.clock)
-        else:
-            maaslog.error(
-                "Can't send DHCP lease information, no RPC "
-                "connection to region."
+                yield pause(wait, clock)
+        maaslog.error(
+            "Can't send DHCP lease information, no RPC connection to region."
+        )
+        return None
+
+    @inlineCallbacks
+    def processNotificationBatch(self, notifications, clock=reactor):
+        """Send a batch of notifications to the region.
+
+        Regions that do not support `UpdateLeases` are sent each of the
+        notifications with `UpdateLease` instead.
+        """
+        client = yield self._getClient(clock=clock)
+        if client is None:
+            return
+
+        try:
+            yield client(
+                UpdateLeases,
+                cluster_uuid=client.localIdent,
+                updates=notifications,
             )
+        except UnhandledCommand:
+            for notification in notifications:
+                yield self.processNotification(notification, clock=clock)
+
+    @inlineCallbacks
+    def processNotification(self, notification, clock=reactor):
+        """Send a notification to the region."""
+        client = yield self._getClient(clock=clock)
+        if client is None:
             return
 
         # Notification contains all the required data except for the cluster
@@ -5,12 +5,17 @@
 
 
 from datetime import timedelta
+import random
 
+import attr
 from twisted.application.internet import TimerService
+from twisted.internet import reactor
 from twisted.internet.defer import inlineCallbacks
 from twisted.internet.error import ConnectionDone
 
+from provisioningserver.enum import POWER_QUERY_PRIORITY
 from provisioningserver.logger import get_maas_logger, LegacyLogger
+from provisioningserver.prometheus.metrics import PROMETHEUS_METRICS
 from provisioningserver.rpc import getRegionClient
 from provisioningserver.rpc.exceptions import (
     NoConnectionsAvailable,
@@ -23,16 +28,200 @@ maaslog = get_maas_logger("power_monitor_service")
 log = LegacyLogger()
 
 
+# The order in which nodes that are due a query are queried.
+PRIORITY_ORDER = (
+    POWER_QUERY_PRIORITY.HIGH,
+    POWER_QUERY_PRIORITY.NORMAL,
+    POWER_QUERY_PRIORITY.LOW,
+)
+
+
+@attr.s(eq=False)
+class PowerPollEntry:
+    """A node in a `PowerPollSchedule`."""
+
+    # The node's power parameters, as from `ListNodePowerParameters`.
+    node = attr.ib()
+    priority = attr.ib()
+    # Seconds between queries of the node.
+    interval = attr.ib()
+    # When the node is next due a query.
+    due = attr.ib()
+    # When the node stops being queried, unless the region hands it out
+    # again before then.
+    expires = attr.ib()
+    # The power state of the node, as last seen.
+    power_state = attr.ib()
+
+
+class PowerPollSchedule:
+    """When to query the power state of each node, and how often.
+
+    - Nodes that are changing state, with a `POWER_QUERY_PRIORITY.HIGH` hint
+      from the region, are queried every 30 seconds.
+    - Nodes whose power state isn't expected to change, with a `LOW` hint,
+      are queried half as often each time their power state is found to be
+      as it was, up to `max_interval`.
+    - Other nodes are queried every five minutes.
+
+    New nodes are given a random first query time within their interval,
+    so that the queries are spread evenly over time rather than made in a
+    burst every interval.
+
+    The region hands out each node every few minutes. A node that it stops
+    handing out to this rack, because it has been deleted or is now managed
+    by another rack, isn't queried once `lease_time` has passed since it was
+    last handed out.
+    """
+
+    intervals = {
+        POWER_QUERY_PRIORITY.HIGH: timedelta(seconds=30).total_seconds(),
+        POWER_QUERY_PRIORITY.NORMAL: timedelta(minutes=5).total_seconds(),
+        POWER_QUERY_PRIORITY.LOW: timedelta(minutes=5).total_seconds(),
+    }
+    max_interval = timedelta(minutes=40).total_seconds()
+    lease_time = timedelta(minutes=6).total_seconds()
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.entries = {}
+
+    def get_interval(self, priority):
+        return self.intervals[priority]
+
+    def update(self, nodes):
+        """Add or update `nodes`, as handed out by the region."""
+        now = self.clock.seconds()
+        for node in nodes:
+            priority = node.get("priority")
+            if priority not in self.intervals:
+                # From a region that doesn't send priority hints.
+                priority = POWER_QUERY_PRIORITY.NORMAL
+            interval = self.get_interval(priority)
+            entry = self.entries.get(node["system_id"])
+            if entry is None:
+                if (
+                    priority == POWER_QUERY_PRIORITY.HIGH
+                    or node["power_state"] == "unknown"
+                ):
+                    due = now
+                else:
+                    due = now + random.uniform(0, interval)
+                entry = self.entries[node["system_id"]] = PowerPollEntry(
+                    node=node,
+                    priority=priority,
+                    interval=interval,
+                    due=due,
+                    expires=None,
+                    power_state=node["power_state"],
+                )
+            elif (
+                priority != entry.priority
+                or node["power_state"] != entry.power_state
+            ):
+                # The node has changed since it was last seen, so stop
+                # backing off.
+                entry.priority = priority
+                entry.interval = interval
+                entry.due = min(entry.due, now + interval)
+                entry.power_state = node["power_state"]
+            entry.node = node
+            entry.expires = now + self.lease_time
+        self.update_metrics()
+
+    def get_due(self):
+        """Return the nodes that are due a query, most urgent first."""
+        now = self.clock.seconds()
+        due = []
+        for system_id, entry in list(self.entries.items()):
+            if now >= entry.expires + self.max_interval:
+                # Not handed out for long enough that what's known of the
+                # node is no longer of use.
+                del self.entries[system_id]
+            elif entry.due <= now < entry.expires:
+                due.append(entry)
+        due.sort(
+            key=lambda entry: (PRIORITY_ORDER.index(entry.priority), entry.due)
+        )
+        for entry in due:
+            PROMETHEUS_METRICS.update(
+                "maas_power_poll_lateness", "observe", value=now - entry.due
+            )
+        PROMETHEUS_METRICS.update(
+            "maas_power_poll_due_nodes", "set", value=len(due)
+        )
+        self.update_metrics()
+        return [entry.node for entry in due]
+
+    def record(self, node, power_state):
+        """Schedule the next query of `node`.
+
+        :param power_state: The power state that the query found, or None if
+            the query failed or was skipped.
+        """
+        entry = self.entries.get(node["system_id"])
+        if entry is None:
+            return
+        now = self.clock.seconds()
+        if (
+            entry.priority == POWER_QUERY_PRIORITY.LOW
+            and power_state is not None
+            and power_state == entry.power_state
+        ):
+            entry.interval = min(entry.interval * 2, self.max_interval)
+        else:
+            entry.interval = self.get_interval(entry.priority)
+        entry.power_state = power_state
+        # Keep to the node's place in the interval, so that queries stay
+        # spread out, unless it has fallen behind.
+        entry.due += entry.interval
+        if entry.due <= now:
+            entry.due = now + entry.interval
+        PROMETHEUS_METRICS.update(
+            "maas_power_poll_interval",
+            "observe",
+            value=entry.interval,
+            labels={"priority": entry.priority},
+        )
+
+    def update_metrics(self):
+        counts = dict.fromkeys(PRIORITY_ORDER, 0)
+        for entry in self.entries.values():
+            counts[entry.priority] += 1
+        for priority, count in counts.items():
+            PROMETHEUS_METRICS.update(
+                "maas_power_poll_nodes",
+                "set",
+                value=count,
+                labels={"priority": priority},
+            )
+
+
 class NodePowerMonitorService(TimerService):
-    """Service to monitor the power status of all nodes in this cluster."""
+    """Service to monitor the power status of all nodes in this cluster.
+
+    Every `check_interval` it gets the nodes that the region hands out to
+    this rack, and queries those that are due a query according to its
+    `PowerPollSchedule`.
+    """
 
     check_interval = timedelta(seconds=15).total_seconds()
     max_nodes_at_once = 5
 
-    def __init__(self, clock=None):
+    def __init__(self, clock=None, max_nodes_at_once_by_power_type=None):
         # Call self.query_nodes() every self.check_interval.
         super().__init__(self.check_interval, self.try_query_nodes)
         self.clock = clock
+        # Limits on the queries in progress at once for particular power
+        # types, instead of `max_nodes_at_once`. Nodes that are queried in a
+        # batch, as IPMI nodes with the same settings are, count as a single
+        # query.
+        if max_nodes_at_once_by_power_type is None:
+            max_nodes_at_once_by_power_type = {}
+        self.max_nodes_at_once_by_power_type = dict(
+            max_nodes_at_once_by_power_type
+        )
+        self.schedule = PowerPollSchedule(reactor if clock is None else clock)
 
     def try_query_nodes(self):
         """Attempt to query nodes' power states.
@@ -61,13 +250,20 @@ class NodePowerMonitorService(TimerService):
             )
             power_parameters = response["nodes"]
             if len(power_parameters) > 0:
-                yield query_all_nodes(
-                    power_parameters,
-                    max_concurrency=self.max_nodes_at_once,
-                    clock=self.clock,
-                )
+                self.schedule.update(power_parameters)
             else:
                 break
+        # Query the nodes whose turn it is.
+        nodes = self.schedule.get_due()
+        if len(nodes) > 0:
+            results = yield query_all_nodes(
+                nodes,
+                max_concurrency=self.max_nodes_at_once,
+                clock=self.clock,
+                max_concurrency_by_type=self.max_nodes_at_once_by_power_type,
+            )
+            for node, (success, power_state) in zip(nodes, results):
+                self.schedule.record(node, power_state if success else None)
 
     def query_nodes_failed(self, failure, localIdent):
         if failure.check(NoSuchCluster):
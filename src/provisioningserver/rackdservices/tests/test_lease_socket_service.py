@@ -8,7 +8,7 @@ import json
 import os
 import socket
 import time
-from unittest.mock import MagicMock, sentinel
+from unittest.mock import call, MagicMock, sentinel
 
 from testtools.matchers import Not, PathExists
 from twisted.application.service import Service
@@ -17,14 +17,14 @@ from twisted.internet.protocol import DatagramProtocol
 from twisted.internet.threads import deferToThread
 
 from maastesting.factory import factory
-from maastesting.matchers import MockCalledOnceWith
+from maastesting.matchers import MockCalledOnceWith, MockCallsMatch
 from maastesting.testcase import MAASTestCase, MAASTwistedRunTest
 from provisioningserver.rackdservices import lease_socket_service
 from provisioningserver.rackdservices.lease_socket_service import (
     LeaseSocketService,
 )
 from provisioningserver.rpc import clusterservice, getRegionClient
-from provisioningserver.rpc.region import UpdateLease
+from provisioningserver.rpc.region import UpdateLease, UpdateLeases
 from provisioningserver.rpc.testing import MockLiveClusterToRegionRPCFixture
 from provisioningserver.utils.twisted import DeferredValue, pause, retries
 
@@ -113,16 +113,18 @@ class TestLeaseSocketService(MAASTestCase):
         self.assertEqual([packet], list(service.notifications))
 
     @defer.inlineCallbacks
-    def test_processNotification_gets_called_with_notification(self):
+    def test_processNotificationBatch_gets_called_with_notification(self):
         socket_path = self.patch_socket_path()
         service = LeaseSocketService(sentinel.service, reactor)
         dv = DeferredValue()
 
-        # Mock processNotifcation to catch the call.
-        def mock_processNotification(*args, **kwargs):
+        # Mock processNotificationBatch to catch the call.
+        def mock_processNotificationBatch(*args, **kwargs):
             dv.set(args)
 
-        self.patch(service, "processNotification", mock_processNotification)
+        self.patch(
+            service, "processNotificationBatch", mock_processNotificationBatch
+        )
 
         # Start the service and stop it at the end of the test.
         service.startService()
@@ -135,23 +137,25 @@ class TestLeaseSocketService(MAASTestCase):
         yield deferToThread(self.send_notification, socket_path, packet)
         yield dv.get(timeout=10)
 
-        # Packet should be the argument passed to processNotifcation
-        self.assertEqual((packet,), dv.value)
+        # Packet should be the argument passed to processNotificationBatch.
+        self.assertEqual(([packet],), dv.value)
 
     @defer.inlineCallbacks
-    def test_processNotification_gets_called_multiple_times(self):
+    def test_processNotificationBatch_gets_notifications_in_order(self):
         socket_path = self.patch_socket_path()
         service = LeaseSocketService(sentinel.service, reactor)
-        dvs = [DeferredValue(), DeferredValue()]
+        notifications = []
+        dv = DeferredValue()
 
-        # Mock processNotifcation to catch the call.
-        def mock_processNotification(*args, **kwargs):
-            for dv in dvs:
-                if not dv.isSet:
-                    dv.set(args)
-                    break
+        # Mock processNotificationBatch to catch the calls.
+        def mock_processNotificationBatch(batch, **kwargs):
+            notifications.extend(batch)
+            if len(notifications) == 2:
+                dv.set(notifications)
 
-        self.patch(service, "processNotification", mock_processNotification)
+        self.patch(
+            service, "processNotificationBatch", mock_processNotificationBatch
+        )
 
         # Start the service and stop it at the end of the test.
         service.startService()
@@ -164,13 +168,83 @@ class TestLeaseSocketService(MAASTestCase):
         # Send notifications to the socket and wait for notifications.
         yield deferToThread(self.send_notification, socket_path, packet1)
         yield deferToThread(self.send_notification, socket_path, packet2)
-        yield dvs[0].get(timeout=10)
-        yield dvs[1].get(timeout=10)
+        yield dv.get(timeout=10)
+
+        # Packets should be passed to processNotificationBatch in order.
+        self.assertEqual([packet1, packet2], dv.value)
+
+    def test_processNotifications_limits_batch_size(self):
+        service = LeaseSocketService(sentinel.service, reactor)
+        service.batch_size = 2
+        batches = []
+        self.patch(
+            service, "processNotificationBatch"
+        ).side_effect = lambda batch, clock: batches.append(batch)
+        service.notifications.extend(range(5))
+        service.processNotifications()
+        self.assertEqual([[0, 1], [2, 3], [4]], batches)
+
+    def make_notification(self):
+        return {
+            "action": "commit",
+            "mac": factory.make_mac_address(),
+            "ip_family": "ipv4",
+            "ip": factory.make_ipv4_address(),
+            "timestamp": int(time.time()),
+            "lease_time": 30,
+            "hostname": factory.make_name("host"),
+        }
+
+    @defer.inlineCallbacks
+    def test_processNotificationBatch_send_to_region(self):
+        fixture = self.useFixture(MockLiveClusterToRegionRPCFixture())
+        protocol, connecting = fixture.makeEventLoop(UpdateLeases)
+        self.addCleanup((yield connecting))
+
+        client = getRegionClient()
+        rpc_service = MagicMock()
+        rpc_service.getClientNow.return_value = defer.succeed(client)
+        service = LeaseSocketService(rpc_service, reactor)
+
+        notifications = [self.make_notification() for _ in range(3)]
+        yield service.processNotificationBatch(notifications, clock=reactor)
+        self.assertThat(
+            protocol.UpdateLeases,
+            MockCalledOnceWith(
+                protocol,
+                cluster_uuid=client.localIdent,
+                updates=notifications,
+            ),
+        )
+
+    @defer.inlineCallbacks
+    def test_processNotificationBatch_falls_back_to_UpdateLease(self):
+        protocol, connecting = self.patch_rpc_UpdateLease()
+        self.addCleanup((yield connecting))
+
+        client = getRegionClient()
+        rpc_service = MagicMock()
+        rpc_service.getClientNow.return_value = defer.succeed(client)
+        service = LeaseSocketService(rpc_service, reactor)
 
-        # Packet should be the argument passed to processNotification in
-        # order.
-        self.assertEqual((packet1,), dvs[0].value)
-        self.assertEqual((packet2,), dvs[1].value)
+        notifications = [self.make_notification() for _ in range(2)]
+        yield service.processNotificationBatch(
+            [dict(notification) for notification in notifications],
+            clock=reactor,
+        )
+        self.assertThat(
+            protocol.UpdateLease,
+            MockCallsMatch(
+                *(
+                    call(
+                        protocol,
+                        cluster_uuid=client.localIdent,
+                        **notification
+                    )
+                    for notification in notifications
+                )
+            ),
+        )
 
     @defer.inlineCallbacks
     def test_processNotification_send_to_region(self):
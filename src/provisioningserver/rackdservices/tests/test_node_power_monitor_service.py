@@ -14,9 +14,10 @@ from twisted.internet.error import ConnectionDone
 from twisted.internet.task import Clock
 
 from maastesting.factory import factory
-from maastesting.matchers import MockCalledOnceWith
+from maastesting.matchers import MockCalledOnceWith, MockNotCalled
 from maastesting.testcase import MAASTestCase, MAASTwistedRunTest
 from maastesting.twisted import extract_result, TwistedLoggerFixture
+from provisioningserver.enum import POWER_QUERY_PRIORITY
 from provisioningserver.rackdservices import node_power_monitor_service as npms
 from provisioningserver.rpc import (
     clusterservice,
@@ -48,6 +49,21 @@ class TestNodePowerMonitorService(MAASTestCase):
             ),
         )
 
+    def test_init_copies_max_nodes_at_once_by_power_type(self):
+        by_power_type = {"ipmi": 20}
+        service = npms.NodePowerMonitorService(
+            max_nodes_at_once_by_power_type=by_power_type
+        )
+        self.assertEqual(
+            by_power_type, service.max_nodes_at_once_by_power_type
+        )
+        self.assertIsNot(
+            by_power_type, service.max_nodes_at_once_by_power_type
+        )
+        self.assertEqual(
+            {}, npms.NodePowerMonitorService().max_nodes_at_once_by_power_type
+        )
+
     def make_monitor_service(self):
         service = npms.NodePowerMonitorService(Clock())
         return service
@@ -76,6 +92,7 @@ class TestNodePowerMonitorService(MAASTestCase):
     def test_query_nodes_calls_query_all_nodes(self):
         service = self.make_monitor_service()
         service.max_nodes_at_once = sentinel.max_nodes_at_once
+        service.max_nodes_at_once_by_power_type = sentinel.by_power_type
 
         example_power_parameters = {
             "system_id": factory.make_UUID(),
@@ -83,6 +100,7 @@ class TestNodePowerMonitorService(MAASTestCase):
             "power_state": factory.make_name("power_state"),
             "power_type": factory.make_name("power_type"),
             "context": {},
+            "priority": POWER_QUERY_PRIORITY.HIGH,
         }
 
         rpc_fixture = self.useFixture(MockClusterToRegionRPCFixture())
@@ -95,6 +113,7 @@ class TestNodePowerMonitorService(MAASTestCase):
         ]
 
         query_all_nodes = self.patch(npms, "query_all_nodes")
+        query_all_nodes.return_value = succeed([(True, "on")])
 
         d = service.query_nodes(getRegionClient())
         io.flush()
@@ -106,8 +125,42 @@ class TestNodePowerMonitorService(MAASTestCase):
                 [example_power_parameters],
                 max_concurrency=sentinel.max_nodes_at_once,
                 clock=service.clock,
+                max_concurrency_by_type=sentinel.by_power_type,
             ),
         )
+        # The node's next query is scheduled.
+        entry = service.schedule.entries[example_power_parameters["system_id"]]
+        self.assertEqual("on", entry.power_state)
+        self.assertEqual(30, entry.due)
+
+    def test_query_nodes_only_queries_nodes_that_are_due(self):
+        service = self.make_monitor_service()
+        example_power_parameters = {
+            "system_id": factory.make_UUID(),
+            "hostname": factory.make_hostname(),
+            "power_state": "on",
+            "power_type": factory.make_name("power_type"),
+            "context": {},
+            "priority": POWER_QUERY_PRIORITY.LOW,
+        }
+        self.patch(npms.random, "uniform").return_value = 60
+        client = Mock()
+        client.side_effect = [
+            succeed({"nodes": [example_power_parameters]}),
+            succeed({"nodes": []}),
+        ]
+        query_all_nodes = self.patch(npms, "query_all_nodes")
+
+        d = service.query_nodes(client)
+
+        self.assertEqual(None, extract_result(d))
+        self.assertThat(query_all_nodes, MockNotCalled())
+        self.assertEqual(
+            60,
+            service.schedule.entries[
+                example_power_parameters["system_id"]
+            ].due,
+        )
 
     def test_query_nodes_copes_with_NoSuchCluster(self):
         service = self.make_monitor_service()
@@ -166,3 +219,117 @@ class TestNodePowerMonitorService(MAASTestCase):
             "Such a shame I can't divide by zero",
             maaslog.output,
         )
+
+
+class TestPowerPollSchedule(MAASTestCase):
+    def make_node(self, priority=None, power_state="on"):
+        return {
+            "system_id": factory.make_name("system_id"),
+            "hostname": factory.make_hostname(),
+            "power_state": power_state,
+            "power_type": "ipmi",
+            "context": {},
+            "priority": priority,
+        }
+
+    def make_schedule(self):
+        clock = Clock()
+        # Put new nodes half way through their first interval.
+        self.patch(npms.random, "uniform").side_effect = lambda a, b: b / 2
+        return npms.PowerPollSchedule(clock), clock
+
+    def test_high_priority_nodes_are_due_at_once(self):
+        schedule, clock = self.make_schedule()
+        node = self.make_node(POWER_QUERY_PRIORITY.HIGH)
+        schedule.update([node])
+        self.assertEqual([node], schedule.get_due())
+
+    def test_unknown_power_state_nodes_are_due_at_once(self):
+        schedule, clock = self.make_schedule()
+        node = self.make_node(POWER_QUERY_PRIORITY.LOW, power_state="unknown")
+        schedule.update([node])
+        self.assertEqual([node], schedule.get_due())
+
+    def test_spreads_new_nodes_over_their_interval(self):
+        schedule, clock = self.make_schedule()
+        node = self.make_node(POWER_QUERY_PRIORITY.NORMAL)
+        schedule.update([node])
+        self.assertEqual([], schedule.get_due())
+        clock.advance(150)
+        self.assertEqual([node], schedule.get_due())
+
+    def test_nodes_without_priority_are_normal(self):
+        schedule, clock = self.make_schedule()
+        node = self.make_node()
+        schedule.update([node])
+        entry = schedule.entries[node["system_id"]]
+        self.assertEqual(POWER_QUERY_PRIORITY.NORMAL, entry.priority)
+
+    def test_returns_high_priority_nodes_first(self):
+        schedule, clock = self.make_schedule()
+        low = self.make_node(POWER_QUERY_PRIORITY.LOW)
+        high = self.make_node(POWER_QUERY_PRIORITY.HIGH)
+        schedule.update([low, high])
+        clock.advance(150)
+        self.assertEqual([high, low], schedule.get_due())
+
+    def test_backs_off_low_priority_nodes_that_stay_the_same(self):
+        schedule, clock = self.make_schedule()
+        node = self.make_node(POWER_QUERY_PRIORITY.LOW)
+        schedule.update([node])
+        entry = schedule.entries[node["system_id"]]
+        intervals = []
+        for _ in range(5):
+            schedule.record(node, "on")
+            intervals.append(entry.interval)
+        self.assertEqual([600, 1200, 2400, 2400, 2400], intervals)
+
+    def test_does_not_back_off_normal_priority_nodes(self):
+        schedule, clock = self.make_schedule()
+        node = self.make_node(POWER_QUERY_PRIORITY.NORMAL)
+        schedule.update([node])
+        schedule.record(node, "on")
+        schedule.record(node, "on")
+        self.assertEqual(300, schedule.entries[node["system_id"]].interval)
+
+    def test_stops_backing_off_on_change(self):
+        schedule, clock = self.make_schedule()
+        node = self.make_node(POWER_QUERY_PRIORITY.LOW)
+        schedule.update([node])
+        entry = schedule.entries[node["system_id"]]
+        schedule.record(node, "on")
+        schedule.record(node, "off")
+        self.assertEqual(300, entry.interval)
+        schedule.record(node, "off")
+        schedule.record(node, None)
+        self.assertEqual(300, entry.interval)
+
+    def test_stops_backing_off_when_region_reports_change(self):
+        schedule, clock = self.make_schedule()
+        node = self.make_node(POWER_QUERY_PRIORITY.LOW)
+        schedule.update([node])
+        entry = schedule.entries[node["system_id"]]
+        schedule.record(node, "on")
+        schedule.record(node, "on")
+        schedule.update([dict(node, priority=POWER_QUERY_PRIORITY.HIGH)])
+        self.assertEqual(30, entry.interval)
+        self.assertEqual(30, entry.due)
+
+    def test_keeps_nodes_to_their_place_in_the_interval(self):
+        schedule, clock = self.make_schedule()
+        node = self.make_node(POWER_QUERY_PRIORITY.NORMAL)
+        schedule.update([node])
+        clock.advance(160)
+        schedule.record(node, "on")
+        self.assertEqual(450, schedule.entries[node["system_id"]].due)
+
+    def test_does_not_query_nodes_no_longer_handed_out(self):
+        schedule, clock = self.make_schedule()
+        node = self.make_node(POWER_QUERY_PRIORITY.HIGH)
+        schedule.update([node])
+        clock.advance(schedule.lease_time)
+        self.assertEqual([], schedule.get_due())
+        self.assertIn(node["system_id"], schedule.entries)
+        clock.advance(schedule.max_interval)
+        self.assertEqual([], schedule.get_due())
+        self.assertNotIn(node["system_id"], schedule.entries)
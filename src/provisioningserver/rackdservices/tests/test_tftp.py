@@ -44,7 +44,7 @@ from zope.interface.verify import verifyObject
 from maastesting.factory import factory
 from maastesting.matchers import MockCalledOnceWith, MockNotCalled
 from maastesting.testcase import MAASTestCase, MAASTwistedRunTest
-from maastesting.twisted import TwistedLoggerFixture
+from maastesting.twisted import extract_result, TwistedLoggerFixture
 from provisioningserver import boot
 from provisioningserver.boot import BytesReader
 from provisioningserver.boot.pxe import PXEBootMethod
@@ -170,6 +170,42 @@ class TestGetBootImage(MAASTestCase):
             )
         )
 
+    def test_prefers_exact_subarch_over_supported_subarches(self):
+        params = make_boot_image_params()
+        supporting_image = self.make_boot_image(
+            params, "commissioning", subarch="generic", subarches="hwe-x"
+        )
+        expected_image = self.make_boot_image(
+            params, "commissioning", subarch="hwe-x"
+        )
+        self.patch_list_boot_images([supporting_image, expected_image])
+        params = self.get_params_from_boot_image(expected_image)
+        self.assertEqual(expected_image, get_boot_image(params))
+
+    def test_returns_first_listed_image_for_duplicates(self):
+        params = make_boot_image_params()
+        images = [self.make_boot_image(params, "xinstall") for _ in range(2)]
+        images[1]["label"] = factory.make_name("label")
+        self.patch_list_boot_images(images)
+        params = self.get_params_from_boot_image(images[0])
+        self.assertIs(images[0], get_boot_image(params))
+
+    def test_indexes_boot_images_only_when_they_change(self):
+        index_boot_images = self.patch(
+            tftp_module,
+            "_index_boot_images",
+            Mock(wraps=tftp_module._index_boot_images),
+        )
+        images, expected_image = self.make_all_boot_images("xinstall")
+        self.patch_list_boot_images(images)
+        params = self.get_params_from_boot_image(expected_image)
+        get_boot_image(params)
+        get_boot_image(params)
+        self.assertEqual(1, index_boot_images.call_count)
+        self.patch_list_boot_images(list(images))
+        self.assertEqual(expected_image, get_boot_image(params))
+        self.assertEqual(2, index_boot_images.call_count)
+
 
 class TestBytesReader(MAASTestCase):
     """Tests for `BytesReader`."""
@@ -864,6 +900,103 @@ class TestTFTPBackend(MAASTestCase):
         )
 
 
+class TestTFTPBackendBootConfigCache(MAASTestCase):
+    def make_backend(self):
+        clock = Clock()
+        backend = TFTPBackend(self.make_dir(), Mock(), clock=clock)
+        backend.fetcher = Mock()
+        backend.fetcher.side_effect = lambda *args, **kwargs: succeed(
+            {"system_id": factory.make_name("system_id")}
+        )
+        return backend, clock
+
+    def make_params(self):
+        return {
+            "system_id": factory.make_name("rack"),
+            "mac": factory.make_mac_address(),
+            "arch": factory.make_name("arch"),
+            "remote_ip": factory.make_ip_address(),
+        }
+
+    def get_boot_config(self, backend, client, params):
+        return extract_result(backend.get_boot_config(client, params))
+
+    def test_fetches_boot_config(self):
+        backend, _ = self.make_backend()
+        client = Mock()
+        params = self.make_params()
+        config = self.get_boot_config(backend, client, params)
+        self.assertThat(
+            backend.fetcher,
+            MockCalledOnceWith(client, GetBootConfig, **params),
+        )
+        self.assertIn("system_id", config)
+
+    def test_reuses_boot_config_until_expiry(self):
+        backend, clock = self.make_backend()
+        params = self.make_params()
+        config = self.get_boot_config(backend, Mock(), params)
+        clock.advance(backend.boot_config_ttl - 1)
+        self.assertEqual(config, self.get_boot_config(backend, Mock(), params))
+        self.assertEqual(1, backend.fetcher.call_count)
+        clock.advance(1)
+        self.assertNotEqual(
+            config, self.get_boot_config(backend, Mock(), params)
+        )
+        self.assertEqual(2, backend.fetcher.call_count)
+
+    def test_returns_copy_of_boot_config(self):
+        backend, _ = self.make_backend()
+        params = self.make_params()
+        config = self.get_boot_config(backend, Mock(), params)
+        system_id = config.pop("system_id")
+        self.assertEqual(
+            {"system_id": system_id},
+            self.get_boot_config(backend, Mock(), params),
+        )
+
+    def test_caches_per_arguments(self):
+        backend, _ = self.make_backend()
+        self.get_boot_config(backend, Mock(), self.make_params())
+        self.get_boot_config(backend, Mock(), self.make_params())
+        self.assertEqual(2, backend.fetcher.call_count)
+
+    def test_does_not_cache_failures(self):
+        backend, _ = self.make_backend()
+        backend.fetcher.side_effect = [
+            fail(BootConfigNoResponse()),
+            succeed({}),
+        ]
+        params = self.make_params()
+        d = backend.get_boot_config(Mock(), params)
+        self.assertRaises(BootConfigNoResponse, extract_result, d)
+        self.assertEqual({}, self.get_boot_config(backend, Mock(), params))
+
+    def test_drops_expired_boot_configs(self):
+        backend, clock = self.make_backend()
+        old_params = self.make_params()
+        self.get_boot_config(backend, Mock(), old_params)
+        clock.advance(backend.boot_config_ttl)
+        self.get_boot_config(backend, Mock(), self.make_params())
+        self.assertEqual(1, len(backend.boot_configs))
+
+    def test_invalidate_boot_configs(self):
+        backend, _ = self.make_backend()
+        backend.fetcher.side_effect = [
+            succeed({"system_id": "a"}),
+            succeed({"system_id": "b"}),
+            succeed({"system_id": None}),
+        ]
+        params = [self.make_params() for _ in range(3)]
+        for param in params:
+            self.get_boot_config(backend, Mock(), param)
+        backend.invalidate_boot_configs(["a"])
+        # The config for "b" is kept; the one for an unknown node is not.
+        self.assertEqual(
+            [tuple(sorted(params[1].items()))], list(backend.boot_configs)
+        )
+
+
 class TestTFTPService(MAASTestCase):
     def test_tftp_service(self):
         # A TFTP service is configured and added to the top-level service.
@@ -45,41 +45,65 @@ maaslog = get_maas_logger("tftp")
 log = LegacyLogger()
 
 
+def _index_boot_images(boot_images):
+    """Index `boot_images` for `get_boot_image`.
+
+    :return: A tuple of two dicts, each mapping `(osystem, release, arch,
+        purpose, subarch)` to a boot image. The first is keyed on each
+        image's own subarchitecture, the second on each of its supported
+        subarchitectures. Where images share a key, the first one listed wins.
+    """
+    exact, supported = {}, {}
+    for image in boot_images:
+        key = (
+            image["osystem"],
+            image["release"],
+            image["architecture"],
+            image["purpose"],
+        )
+        exact.setdefault(key + (image["subarchitecture"],), image)
+        subarches = image.get("supported_subarches", "")
+        for subarch in subarches.split(","):
+            supported.setdefault(key + (subarch,), image)
+    return exact, supported
+
+
+# The list of boot images from `list_boot_images` that was last indexed, and
+# its index. `list_boot_images` returns the same list until the boot images
+# on disk change, so the index is only rebuilt then.
+_boot_image_index = None, None
+
+
 def get_boot_image(params):
     """Get the boot image for the params on this rack controller."""
+    global _boot_image_index
+
     # Match on purpose; enlist uses the commissioning purpose.
     purpose = params["purpose"]
     if purpose == "enlist":
         purpose = "commissioning"
 
-    # Get the matching boot images, minus subarchitecture.
     boot_images = list_boot_images()
-    boot_images = [
-        image
-        for image in boot_images
-        if (
-            image["osystem"] == params["osystem"]
-            and image["release"] == params["release"]
-            and image["architecture"] == params["arch"]
-            and image["purpose"] == purpose
-        )
-    ]
-
-    # See if exact subarchitecture match.
-    for image in boot_images:
-        if image["subarchitecture"] == params["subarch"]:
-            return image
-
-    # Not exact match check if subarchitecture is in the supported
-    # subarchitectures list.
-    for image in boot_images:
-        subarches = image.get("supported_subarches", "")
-        subarches = subarches.split(",")
-        if params["subarch"] in subarches:
-            return image
-
-    # No matching boot image was found.
-    return None
+    indexed_boot_images, index = _boot_image_index
+    if indexed_boot_images is not boot_images:
+        index = _index_boot_images(boot_images)
+        _boot_image_index = boot_images, index
+    exact, supported = index
+
+    key = (
+        params["osystem"],
+        params["release"],
+        params["arch"],
+        purpose,
+        params["subarch"],
+    )
+    # See if exact subarchitecture match; if not, check if subarchitecture
+    # is in the supported subarchitectures list. Otherwise no matching boot
+    # image was found.
+    image = exact.get(key)
+    if image is None:
+        image = supported.get(key)
+    return image
 
 
 def log_request(file_name, clock=reactor):
@@ -133,7 +157,12 @@ class TFTPBackend(FilesystemSynchronousBackend):
     fetch files at many similar paths which must not be passed on.
     """
 
-    def __init__(self, base_path, client_service):
+    # Number of seconds for which a response to `GetBootConfig` is reused.
+    # Firmware retries and asks for several config files for each boot, and
+    # each would otherwise be a round trip to the region.
+    boot_config_ttl = 30
+
+    def __init__(self, base_path, client_service, clock=reactor):
         """
         :param base_path: The root directory for this TFTP server.
         :param client_service: The RPC client service for the rack controller.
@@ -143,7 +172,11 @@ class TFTPBackend(FilesystemSynchronousBackend):
         super().__init__(base_path, can_read=True, can_write=False)
         self.client_to_remote = {}
         self.client_service = client_service
+        self.clock = clock
         self.fetcher = RPCFetcher()
+        # Maps the arguments to `GetBootConfig` to a tuple of when the
+        # response expires and the response.
+        self.boot_configs = {}
 
     def _get_new_client_for_remote(self, remote_ip):
         """Return a new client for the `remote_ip`.
@@ -273,6 +306,48 @@ class TFTPBackend(FilesystemSynchronousBackend):
                 params["label"] = boot_image["label"]
             return params
 
+    def get_boot_config(self, client, params):
+        """Return the region's response to `GetBootConfig` for `params`.
+
+        Responses are reused for `boot_config_ttl` seconds, or until they
+        are invalidated with `invalidate_boot_configs`.
+
+        :return: A `Deferred` that fires with a new copy of the response.
+        """
+        key = tuple(sorted(params.items()))
+        cached = self.boot_configs.get(key)
+        if cached is not None:
+            expires, config = cached
+            if expires > self.clock.seconds():
+                return succeed(dict(config))
+            del self.boot_configs[key]
+
+        def cache(config):
+            now = self.clock.seconds()
+            # Drop expired responses so that the cache only ever holds those
+            # from the last `boot_config_ttl` seconds.
+            for other_key, (expires, _) in list(self.boot_configs.items()):
+                if expires <= now:
+                    del self.boot_configs[other_key]
+            self.boot_configs[key] = (now + self.boot_config_ttl, config)
+            return dict(config)
+
+        d = self.fetcher(client, GetBootConfig, **params)
+        d.addCallback(cache)
+        return d
+
+    def invalidate_boot_configs(self, system_ids):
+        """Forget the cached boot configs for the nodes in `system_ids`.
+
+        Boot configs for unknown nodes are forgotten too, since one of them
+        may since have been created as one of `system_ids`.
+        """
+        system_ids = set(system_ids)
+        for key, (_, config) in list(self.boot_configs.items()):
+            system_id = config.get("system_id")
+            if system_id is None or system_id in system_ids:
+                del self.boot_configs[key]
+
     @deferred
     def get_kernel_params(self, params):
         """Return kernel parameters obtained from the API.
@@ -291,7 +366,7 @@ class TFTPBackend(FilesystemSynchronousBackend):
 
         def fetch(client, params):
             params["system_id"] = client.localIdent
-            d = self.fetcher(client, GetBootConfig, **params)
+            d = self.get_boot_config(client, params)
             d.addCallback(self.get_boot_image, client, params["remote_ip"])
             d.addCallback(lambda data: KernelParameters(**data))
             return d
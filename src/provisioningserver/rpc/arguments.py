@@ -97,13 +97,54 @@ class ParsedURL(amp.Argument):
         return urllib.parse.urlparse(inString.decode("ascii"))
 
 
-class StructureAsJSON(amp.Argument):
-    """Encode a structure on the wire as JSON, compressed with zlib.
+def _chunkKey(name, index):
+    """Return the key of the `index`th continuation of the value of `name`."""
+    return b"%s.%d" % (name, index)
+
 
-    The compressed size of the structure should not exceed
+class SplitValueMixin:
+    """Send values longer than AMP allows as several values.
+
+    AMP values can be no more than
     :py:data:`~twisted.protocols.amp.MAX_VALUE_LENGTH`, or ``0xffff`` bytes.
-    This is pretty hard to be sure of ahead of time, so only use this for
-    small structures that won't go near the limit.
+    A longer value is sent as the first ``0xffff`` bytes under the
+    argument's own name, then the rest in pieces of the same size under
+    ``name.2``, ``name.3``, and so on. Values that fit are sent as they
+    always were, so this only changes what goes on the wire for values that
+    couldn't be sent at all before.
+    """
+
+    def toBox(self, name, strings, objects, proto):
+        super().toBox(name, strings, objects, proto)
+        value = strings.get(name)
+        if value is not None and len(value) > amp.MAX_VALUE_LENGTH:
+            size = amp.MAX_VALUE_LENGTH
+            chunks = [
+                value[start : start + size]
+                for start in range(0, len(value), size)
+            ]
+            strings[name] = chunks[0]
+            for index, chunk in enumerate(chunks[1:], 2):
+                strings[_chunkKey(name, index)] = chunk
+
+    def fromBox(self, name, strings, objects, proto):
+        value = strings.get(name)
+        if value is not None and len(value) == amp.MAX_VALUE_LENGTH:
+            chunks = [value]
+            index = 2
+            while _chunkKey(name, index) in strings:
+                chunks.append(strings.pop(_chunkKey(name, index)))
+                index += 1
+            strings[name] = b"".join(chunks)
+        super().fromBox(name, strings, objects, proto)
+
+
+class StructureAsJSON(SplitValueMixin, amp.Argument):
+    """Encode a structure on the wire as JSON, compressed with zlib.
+
+    A structure whose compressed size exceeds
+    :py:data:`~twisted.protocols.amp.MAX_VALUE_LENGTH` is split over several
+    values; see `SplitValueMixin`.
     """
 
     def toString(self, inObject):
@@ -170,12 +211,14 @@ class AmpList(amp.AmpList):
         super().__init__(subargs, optional)
 
 
-class CompressedAmpList(AmpList):
+class CompressedAmpList(SplitValueMixin, AmpList):
     """An :py:class:`amp.AmpList` that's compressed on the wire.
 
     The serialised form is transparently compressed and decompressed with
     zlib. This can be useful when there's a lot of repetition in the list
-    being transmitted.
+    being transmitted. Lists that are too long for a single AMP value even
+    once compressed, like the host maps of large DHCP configurations, are
+    split over several values; see `SplitValueMixin`.
     """
 
     def toStringProto(self, inObject, proto):
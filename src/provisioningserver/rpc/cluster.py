@@ -15,6 +15,7 @@ __all__ = [
     "DescribePowerTypes",
     "GetPreseedData",
     "Identify",
+    "InvalidateBootConfigs",
     "ListBootImages",
     "ListOperatingSystems",
     "ListSupportedArchitectures",
@@ -539,8 +540,18 @@ class EvaluateTag(amp.Command):
         ),
         # A 3-part credential string for the web API.
         (b"credentials", amp.Unicode()),
-        # List of nodes the rack controller should evaluate.
-        (b"nodes", AmpList([(b"system_id", amp.Unicode())])),
+        # List of nodes the rack controller should evaluate, with the
+        # version of each node's details, so that details the rack
+        # controller has cached can be reused; since 3.2.
+        (
+            b"nodes",
+            AmpList(
+                [
+                    (b"system_id", amp.Unicode()),
+                    (b"details_version", amp.Integer(optional=True)),
+                ]
+            ),
+        ),
     ]
     response = []
     errors = []
@@ -830,3 +841,14 @@ class CheckIPs(amp.Command):
         )
     ]
     errors = {}
+
+
+class InvalidateBootConfigs(amp.Command):
+    """Forget the boot configs the rack has cached for the given nodes.
+
+    :since: 3.2
+    """
+
+    arguments = [(b"system_ids", amp.ListOf(amp.Unicode()))]
+    response = []
+    errors = {}
@@ -37,7 +37,7 @@ from zope.interface import implementer
 
 from apiclient.creds import convert_string_to_tuple
 from apiclient.utils import ascii_url
-from provisioningserver import concurrency
+from provisioningserver import concurrency, services
 from provisioningserver.config import ClusterConfiguration, is_dev_environment
 from provisioningserver.drivers import ArchitectureRegistry
 from provisioningserver.drivers.hardware.seamicro import (
@@ -54,7 +54,10 @@ from provisioningserver.drivers.power.recs import probe_and_enlist_recs
 from provisioningserver.drivers.power.registry import PowerDriverRegistry
 from provisioningserver.logger import get_maas_logger, LegacyLogger
 from provisioningserver.path import get_maas_data_path
-from provisioningserver.prometheus.metrics import set_global_labels
+from provisioningserver.prometheus.metrics import (
+    PROMETHEUS_METRICS,
+    set_global_labels,
+)
 from provisioningserver.rpc import (
     cluster,
     common,
@@ -937,6 +940,22 @@ class Cluster(RPCProtocol):
                 )
         return {}
 
+    @cluster.InvalidateBootConfigs.responder
+    def invalidate_boot_configs(self, system_ids):
+        """InvalidateBootConfigs()
+
+        Implementation of
+        :py:class:`~provisioningserver.rpc.cluster.InvalidateBootConfigs`.
+        """
+        try:
+            tftp = services.getServiceNamed("tftp")
+        except KeyError:
+            # TFTP service is not installed; nothing has been cached.
+            pass
+        else:
+            tftp.backend.invalidate_boot_configs(system_ids)
+        return {}
+
     @cluster.CheckIPs.responder
     def check_ips(self, ip_addresses):
         """CheckIPs()
@@ -1233,16 +1252,43 @@ class ClusterClientService(TimerService):
     def getClient(self):
         """Returns a :class:`common.Client` connected to a region.
 
-        The client is chosen at random.
+        Two connections are picked at random, and the client for the one
+        with the fewer calls in progress is chosen, so that a busy region
+        process isn't given more work while others are idle. Ties go to the
+        connection whose calls have been quickest lately. Picking from two
+        rather than all connections spreads calls over all region processes
+        when they're equally busy, as they are under light load.
 
         :raises: :py:class:`~.exceptions.NoConnectionsAvailable` when
             there are no open connections to a region controller.
         """
-        conns = list(self.connections.values())
-        if len(conns) == 0:
+        clients = [
+            (eventloop, common.Client(conn))
+            for eventloop, conn in self.connections.items()
+        ]
+        if len(clients) == 0:
             raise exceptions.NoConnectionsAvailable()
-        else:
-            return common.Client(random.choice(conns))
+        random.shuffle(clients)
+        for eventloop, client in clients:
+            PROMETHEUS_METRICS.update(
+                "maas_rack_region_rpc_calls_in_flight",
+                "set",
+                value=client.in_flight,
+                labels={"eventloop": eventloop},
+            )
+        eventloop, client = min(
+            clients[:2],
+            key=lambda item: (
+                item[1].in_flight,
+                0 if item[1].latency is None else item[1].latency,
+            ),
+        )
+        PROMETHEUS_METRICS.update(
+            "maas_rack_region_rpc_connection_chosen",
+            "inc",
+            labels={"eventloop": eventloop},
+        )
+        return client
 
     @deferred
     def getClientNow(self):
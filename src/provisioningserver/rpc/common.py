@@ -6,6 +6,8 @@
 
 from os import getpid
 from socket import gethostname
+from time import monotonic
+from weakref import WeakKeyDictionary
 
 from twisted.internet.defer import Deferred
 from twisted.protocols import amp
@@ -21,6 +23,60 @@ log = LegacyLogger()
 undefined = object()
 
 
+class CallStats:
+    """The calls in progress over a connection, and how long calls take."""
+
+    # The weight of each call in the moving average of the latency.
+    smoothing = 0.2
+
+    # Seconds after which the latency counts for half as much, unless calls
+    # have finished since. Connections that aren't used because their calls
+    # were slow are then used again in time, to find out if they still are.
+    half_life = 30
+
+    def __init__(self, clock=monotonic):
+        self.clock = clock
+        self.in_flight = 0
+        self._latency = None
+        self._measured_at = None
+
+    @property
+    def latency(self):
+        """Moving average of the latency of calls, in seconds, or None
+        until a call has finished."""
+        if self._latency is None:
+            return None
+        age = self.clock() - self._measured_at
+        return self._latency * 0.5 ** (age / self.half_life)
+
+    @latency.setter
+    def latency(self, latency):
+        self._latency = latency
+        self._measured_at = self.clock()
+
+    def started(self):
+        self.in_flight += 1
+
+    def finished(self, latency):
+        self.in_flight -= 1
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+
+
+# Maps connections to their `CallStats`.
+_call_stats = WeakKeyDictionary()
+
+
+def get_call_stats(conn):
+    """Return the `CallStats` for calls made over `conn`."""
+    stats = _call_stats.get(conn)
+    if stats is None:
+        stats = _call_stats[conn] = CallStats()
+    return stats
+
+
 class Identify(amp.Command):
     """Request the identity of the remote side, e.g. its UUID.
 
@@ -170,12 +226,42 @@ class Client:
         timeout = kwargs.pop("_timeout", undefined)
         if timeout is undefined:
             timeout = 120  # 2 minutes
-        if timeout is None or timeout <= 0:
-            return self._conn.callRemote(cmd, **kwargs)
-        else:
-            return deferWithTimeout(
-                timeout, self._conn.callRemote, cmd, **kwargs
-            )
+        stats = get_call_stats(self._conn)
+        stats.started()
+        started_at = monotonic()
+        try:
+            if timeout is None or timeout <= 0:
+                d = self._conn.callRemote(cmd, **kwargs)
+            else:
+                d = deferWithTimeout(
+                    timeout, self._conn.callRemote, cmd, **kwargs
+                )
+        except Exception:
+            stats.finished(monotonic() - started_at)
+            raise
+
+        if not isinstance(d, Deferred):
+            stats.finished(monotonic() - started_at)
+            return d
+
+        def finished(result):
+            stats.finished(monotonic() - started_at)
+            return result
+
+        return d.addBoth(finished)
+
+    @property
+    def in_flight(self):
+        """The number of calls in progress over the connection."""
+        return get_call_stats(self._conn).in_flight
+
+    @property
+    def latency(self):
+        """The moving average of the latency of calls over the connection.
+
+        This is None until a call over the connection has finished.
+        """
+        return get_call_stats(self._conn).latency
 
     @asynchronous
     def getHostCertificate(self):
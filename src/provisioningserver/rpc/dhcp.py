@@ -90,20 +90,19 @@ class DHCPState(DHCPStateBase):
 
     def requires_restart(self, other_state, is_dhcpv6_server=False):
         """Return True when this state differs from `other_state` enough to
-        require a restart."""
+        require a restart.
 
-        def gather_hosts_dhcp_snippets(hosts):
-            hosts_dhcp_snippets = list()
-            for _, host in hosts.items():
-                for dhcp_snippet in host["dhcp_snippets"]:
-                    hosts_dhcp_snippets.append(dhcp_snippet)
-            return sorted(hosts_dhcp_snippets, key=itemgetter("name"))
+        Changes to hosts, their DHCP snippets included, are applied over the
+        OMAPI instead; see `host_diff`. The exception is a change to a host
+        with an IPv6 address on the DHCPv4 server, which the OMAPI of that
+        server can't handle.
+        """
 
         def ipv6_hosts_require_restart(hosts):
             if is_dhcpv6_server:  # dhcpv4 can still manage ipv6 subnets
                 return False
 
-            for host in hosts.values():
+            for host in hosts:
                 ip = host.get("ip")
                 if ip is not None:
                     try:
@@ -112,31 +111,34 @@ class DHCPState(DHCPStateBase):
                         return True
             return False
 
-        # Currently the OMAPI doesn't allow you to add or remove arbitrary
-        # config options. So gather a list of DHCP snippets from
-        hosts_dhcp_snippets = gather_hosts_dhcp_snippets(self.hosts)
-        other_hosts_dhcp_snippets = gather_hosts_dhcp_snippets(
-            other_state.hosts
-        )
-
+        remove, add, modify = self.host_diff(other_state)
+        changed_hosts = remove + add + modify
+        changed_hosts.extend(other_state.hosts[host["mac"]] for host in modify)
         return (
             self.omapi_key != other_state.omapi_key
             or self.failover_peers != other_state.failover_peers
             or self.shared_networks != other_state.shared_networks
             or self.interfaces != other_state.interfaces
             or self.global_dhcp_snippets != other_state.global_dhcp_snippets
-            or hosts_dhcp_snippets != other_hosts_dhcp_snippets
-            or ipv6_hosts_require_restart(self.hosts)
-            or ipv6_hosts_require_restart(other_state.hosts)
+            or ipv6_hosts_require_restart(changed_hosts)
         )
 
     def host_diff(self, other_state):
         """Return tuple with the hosts that need to be removed, need to be
-        added, and need be updated."""
+        added, and need be updated.
+
+        The OMAPI can't change the DHCP snippets of a host, so a host whose
+        snippets have changed is removed and added again.
+        """
         remove, add, modify = [], [], []
         for mac, host in self.hosts.items():
             if mac not in other_state.hosts:
                 add.append(host)
+            elif _get_host_statements(host) != _get_host_statements(
+                other_state.hosts[mac]
+            ):
+                remove.append(other_state.hosts[mac])
+                add.append(host)
             elif host["ip"] != other_state.hosts[mac]["ip"]:
                 modify.append(host)
         for mac, host in other_state.hosts.items():
@@ -200,23 +202,45 @@ def _delete_config(server):
         sudo_delete_file(server.config_filename)
 
 
+def _get_host_statements(host):
+    """Return the DHCP snippets of `host` as dhcpd statements, or None."""
+    dhcp_snippets = host.get("dhcp_snippets")
+    if dhcp_snippets:
+        return "\n".join(
+            dhcp_snippet["value"]
+            for dhcp_snippet in sorted(dhcp_snippets, key=itemgetter("name"))
+        )
+    else:
+        return None
+
+
 @synchronous
 def _update_hosts(server, remove, add, modify):
-    """Update the hosts using the OMAPI."""
+    """Update the hosts using the OMAPI.
+
+    Each kind of change is sent as one pipelined batch.
+    """
     omapi_client = OmapiClient(server.omapi_key, server.ipv6)
     try:
-        for host in remove:
-            omapi_client.del_host(host["mac"])
+        if remove:
+            omapi_client.del_hosts([host["mac"] for host in remove])
     except OmapiError as e:
         raise CannotRemoveHostMap(str(e))
     try:
-        for host in add:
-            omapi_client.add_host(host["mac"], host["ip"])
+        if add:
+            omapi_client.add_hosts(
+                [
+                    (host["mac"], host["ip"], _get_host_statements(host))
+                    for host in add
+                ]
+            )
     except OmapiError as e:
         raise CannotCreateHostMap(str(e))
     try:
-        for host in modify:
-            omapi_client.update_host(host["mac"], host["ip"])
+        if modify:
+            omapi_client.update_hosts(
+                [(host["mac"], host["ip"]) for host in modify]
+            )
     except OmapiError as e:
         raise CannotModifyHostMap(str(e))
 
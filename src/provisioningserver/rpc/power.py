@@ -10,8 +10,10 @@ import sys
 from twisted.internet import reactor
 from twisted.internet.defer import (
     CancelledError,
+    Deferred,
     DeferredList,
     DeferredSemaphore,
+    fail,
     inlineCallbacks,
     returnValue,
     succeed,
@@ -20,6 +22,7 @@ from twisted.internet.task import deferLater
 
 from provisioningserver.drivers.power import get_error_message, PowerError
 from provisioningserver.drivers.power.registry import PowerDriverRegistry
+from provisioningserver.drivers.power.utils import power_thread_pools
 from provisioningserver.events import EVENT_TYPES, send_node_event
 from provisioningserver.logger import get_maas_logger, LegacyLogger
 from provisioningserver.rpc import getRegionClient
@@ -44,10 +47,26 @@ log = LegacyLogger()
 # meant to cope with broken BMCs.
 CHANGE_POWER_STATE_TIMEOUT = timedelta(minutes=5).total_seconds()
 
+# Deadline for querying the power state of a node, retries included. Calls
+# into a power driver that are still waiting for a thread when it passes are
+# never made, so a backlog behind BMCs that hang doesn't keep growing.
+QUERY_POWER_STATE_TIMEOUT = timedelta(minutes=3).total_seconds()
+
 # We could use a Registry here, but it seems kind of like overkill.
 power_action_registry = {}
 
 
+@asynchronous
+def configure_power_thread_pools(default_size, sizes=None):
+    """Set the sizes of the thread pools that power drivers run in.
+
+    :param default_size: The most threads for each power type.
+    :param sizes: A dict of the most threads for particular power types,
+        overriding `default_size`.
+    """
+    power_thread_pools.configure(default_size, sizes)
+
+
 @asynchronous
 def power_state_update(system_id, state):
     """Report to the region about a node's power state.
@@ -450,6 +469,20 @@ def maaslog_report_failure(node, failure):
         # log.err(failure, "Failed to refresh power state.")
 
 
+def report_node_power_state(node, d):
+    """Report and log the result of querying the given node.
+
+    :param d: A `Deferred` that will fire with the node's power state, or an
+        error condition, as from `get_power_state`.
+    """
+    d = report_power_state(d, node["system_id"], node["hostname"])
+    d.addCallbacks(
+        partial(maaslog_report_success, node),
+        partial(maaslog_report_failure, node),
+    )
+    return d
+
+
 def query_node(node, clock):
     """Calls `get_power_state` on the given node.
 
@@ -463,33 +496,146 @@ def query_node(node, clock):
         )
         return succeed(None)
     else:
-        d = get_power_state(
+        d = deferWithTimeout(
+            QUERY_POWER_STATE_TIMEOUT,
+            get_power_state,
             node["system_id"],
             node["hostname"],
             node["power_type"],
             node["context"],
             clock=clock,
         )
-        d = report_power_state(d, node["system_id"], node["hostname"])
-        d.addCallbacks(
-            partial(maaslog_report_success, node),
-            partial(maaslog_report_failure, node),
-        )
-        return d
+        d.addErrback(query_timed_out)
+        return report_node_power_state(node, d)
+
 
+def query_timed_out(failure):
+    """Turn a query that was cancelled by its deadline into a failure."""
+    failure.trap(CancelledError)
+    raise PowerActionFail(
+        "Timed out after %d seconds" % QUERY_POWER_STATE_TIMEOUT
+    )
+
+
+@inlineCallbacks
+def query_nodes(nodes, clock):
+    """Queries the given nodes at once, with the power driver's `query_many`.
 
-def query_all_nodes(nodes, max_concurrency=5, clock=reactor):
+    The nodes must all have the same power type, and power settings with the
+    same `get_query_group` key. Nodes that aren't in the result of the query
+    are queried on their own with `query_node`, which reports their errors.
+    Those are queried one at a time, so that they take no more than the one
+    place in the power type's concurrency limit held for the batch.
+
+    :return: A deferred, which fires with the result of each node's query,
+        as from a `DeferredList`.
+    """
+    power_driver = PowerDriverRegistry[nodes[0]["power_type"]]
+    contexts = {
+        node["system_id"]: node["context"]
+        for node in nodes
+        if node["system_id"] not in power_action_registry
+    }
+    states = {}
+    if len(contexts) > 1 and not power_driver.detect_missing_packages():
+        try:
+            states = yield deferWithTimeout(
+                QUERY_POWER_STATE_TIMEOUT, power_driver.query_many, contexts
+            )
+        except Exception as error:
+            maaslog.warning(
+                "Failed to query %d nodes at once, querying them one by "
+                "one: %s" % (len(contexts), error)
+            )
+    queries = []
+    for node in nodes:
+        if node["system_id"] in states:
+            d = succeed(states[node["system_id"]])
+            queries.append(report_node_power_state(node, d))
+        else:
+            try:
+                state = yield query_node(node, clock)
+            except Exception:
+                queries.append(fail())
+            else:
+                queries.append(succeed(state))
+    results = yield DeferredList(queries, consumeErrors=True)
+    returnValue(results)
+
+
+def _split_results(d, count):
+    """Return a deferred for each of the `count` results of `d`.
+
+    :param d: A deferred that fires with the results of a `DeferredList`.
+    """
+    results = [Deferred() for _ in range(count)]
+
+    def cb(outcomes):
+        for result, (success, value) in zip(results, outcomes):
+            if success:
+                result.callback(value)
+            else:
+                result.errback(value)
+
+    def eb(failure):
+        for result in results:
+            result.errback(failure)
+
+    d.addCallbacks(cb, eb)
+    return results
+
+
+def query_all_nodes(
+    nodes, max_concurrency=5, clock=reactor, max_concurrency_by_type=None
+):
     """Queries the given nodes for their power state.
 
     Nodes' states are reported back to the region.
 
+    Nodes whose power driver can query several at once are queried in
+    batches of up to `query_batch_size`, grouped by `get_query_group`. Each
+    power type has its own limit on the queries, single or batched, that are
+    in progress at once: from `max_concurrency_by_type` if the type is in
+    there, `max_concurrency` otherwise.
+
     :return: A deferred, which fires once all nodes have been queried,
-        successfully or not.
+        successfully or not, with the outcome of each node's query in the
+        order of `nodes`, as from a `DeferredList`. The outcome is the
+        node's power state, or None if it couldn't be queried.
     """
-    semaphore = DeferredSemaphore(tokens=max_concurrency)
-    queries = (
-        semaphore.run(query_node, node, clock)
-        for node in nodes
-        if node["power_type"] in PowerDriverRegistry
+    if max_concurrency_by_type is None:
+        max_concurrency_by_type = {}
+    semaphores = {}
+
+    def run(power_type, func, *args):
+        semaphore = semaphores.get(power_type)
+        if semaphore is None:
+            semaphore = semaphores[power_type] = DeferredSemaphore(
+                tokens=max_concurrency_by_type.get(power_type, max_concurrency)
+            )
+        return semaphore.run(func, *args)
+
+    queries = {}
+    groups = {}
+    for node in nodes:
+        power_driver = PowerDriverRegistry.get_item(node["power_type"])
+        if power_driver is None:
+            continue
+        group = power_driver.get_query_group(node["context"])
+        if group is None:
+            queries[node["system_id"]] = run(
+                node["power_type"], query_node, node, clock
+            )
+        else:
+            groups.setdefault((node["power_type"], group), []).append(node)
+    for (power_type, _), group_nodes in groups.items():
+        batch_size = PowerDriverRegistry[power_type].query_batch_size
+        for start in range(0, len(group_nodes), batch_size):
+            batch = group_nodes[start : start + batch_size]
+            d = run(power_type, query_nodes, batch, clock)
+            for node, query in zip(batch, _split_results(d, len(batch))):
+                queries[node["system_id"]] = query
+    return DeferredList(
+        [queries.get(node["system_id"], succeed(None)) for node in nodes],
+        consumeErrors=True,
     )
-    return DeferredList(queries, consumeErrors=True)
@@ -30,6 +30,7 @@ __all__ = [
     "RequestNodeInfoByMACAddress",
     "SendEvent",
     "SendEventMACAddress",
+    "SendEvents",
     "UpdateControllerState",
     "UpdateLastImageSync",
     "UpdateNodePowerState",
@@ -40,6 +41,7 @@ from twisted.protocols import amp
 from provisioningserver.rpc.arguments import (
     AmpList,
     Bytes,
+    CompressedAmpList,
     ParsedURL,
     StructureAsJSON,
 )
@@ -247,7 +249,8 @@ class ListNodePowerParameters(amp.Command):
     which MAAS has a query capability.
 
     It will return nodes in priority order. Those nodes at the beginning of
-    the list should be queried first.
+    the list should be queried first. Each node comes with a priority hint,
+    from `POWER_QUERY_PRIORITY`, that says how often it's worth querying.
 
     It may return an empty list. This means that all nodes have been recently
     queried. Take a break before asking again.
@@ -271,6 +274,8 @@ class ListNodePowerParameters(amp.Command):
                     # We can't define a tighter schema here because this is a highly
                     # variable bag of arguments from a variety of sources.
                     (b"context", StructureAsJSON()),
+                    # One of POWER_QUERY_PRIORITY; since 3.2.
+                    (b"priority", amp.Unicode(optional=True)),
                 ]
             ),
         )
@@ -380,6 +385,35 @@ class SendEventIPAddress(amp.Command):
     errors = {NoSuchNode: b"NoSuchNode", NoSuchEventType: b"NoSuchEventType"}
 
 
+class SendEvents(amp.Command):
+    """Send a batch of events.
+
+    Each event identifies its node by one of `system_id`, `mac_address` or
+    `ip_address`, and `age` is how many seconds ago it happened. Events for
+    nodes that the region doesn't know about are dropped.
+
+    :since: 3.2
+    """
+
+    arguments = [
+        (
+            b"events",
+            CompressedAmpList(
+                [
+                    (b"system_id", amp.Unicode(optional=True)),
+                    (b"mac_address", amp.Unicode(optional=True)),
+                    (b"ip_address", amp.Unicode(optional=True)),
+                    (b"type_name", amp.Unicode()),
+                    (b"description", amp.Unicode()),
+                    (b"age", amp.Float()),
+                ]
+            ),
+        ),
+    ]
+    response = []
+    errors = {NoSuchNode: b"NoSuchNode", NoSuchEventType: b"NoSuchEventType"}
+
+
 class ReportForeignDHCPServer(amp.Command):
     """Report a foreign DHCP server on a rack controller's interface.
 
@@ -501,6 +535,36 @@ class UpdateLease(amp.Command):
     errors = {NoSuchCluster: b"NoSuchCluster"}
 
 
+class UpdateLeases(amp.Command):
+    """Report many DHCP lease updates from a cluster controller at once.
+
+    Each update has the same fields as `UpdateLease`, and they are applied in
+    order.
+
+    :since: 3.2
+    """
+
+    arguments = [
+        (b"cluster_uuid", amp.Unicode()),
+        (
+            b"updates",
+            AmpList(
+                [
+                    (b"action", amp.Unicode()),
+                    (b"mac", amp.Unicode()),
+                    (b"ip_family", amp.Unicode()),
+                    (b"ip", amp.Unicode()),
+                    (b"timestamp", amp.Integer()),
+                    (b"lease_time", amp.Integer(optional=True)),
+                    (b"hostname", amp.Unicode(optional=True)),
+                ]
+            ),
+        ),
+    ]
+    response = []
+    errors = {NoSuchCluster: b"NoSuchCluster"}
+
+
 class UpdateServices(amp.Command):
     """Report service statuses that are monitored on the rackd.
 
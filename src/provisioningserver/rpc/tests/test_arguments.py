@@ -163,6 +163,37 @@ class TestCompressedAmpList(MAASTestCase):
         self.expectThat(len(encoded_compressed), LessThan(2 ** 16))
 
 
+class SampleBigCommand(amp.Command):
+    arguments = [
+        (b"hosts", arguments.CompressedAmpList([(b"host", amp.Unicode())])),
+        (b"data", arguments.StructureAsJSON(optional=True)),
+    ]
+
+
+class TestSplitValueMixin(MAASTestCase):
+    def round_trip(self, **kwargs):
+        box = amp.AmpBox(SampleBigCommand.makeArguments(kwargs, None))
+        [parsed] = amp.parseString(box.serialize())
+        return box, SampleBigCommand.parseArguments(parsed, None)
+
+    def test_sends_small_values_as_one(self):
+        hosts = [{"host": factory.make_name("host")}]
+        box, parsed = self.round_trip(hosts=hosts, data=None)
+        self.assertEqual({b"hosts"}, set(box))
+        self.assertEqual({"hosts": hosts, "data": None}, parsed)
+
+    def test_splits_values_too_long_for_amp(self):
+        # Random names, so that they don't compress well.
+        hosts = [{"host": factory.make_string(size=50)} for _ in range(3000)]
+        data = [factory.make_string(size=50) for _ in range(3000)]
+        box, parsed = self.round_trip(hosts=hosts, data=data)
+        self.assertIn(b"hosts.2", box)
+        self.assertIn(b"data.2", box)
+        for value in box.values():
+            self.assertLessEqual(len(value), amp.MAX_VALUE_LENGTH)
+        self.assertEqual({"hosts": hosts, "data": data}, parsed)
+
+
 class TestIPAddress(MAASTestCase):
 
     argument = arguments.IPAddress()
@@ -1226,6 +1226,49 @@ class TestClusterClientService(MAASTestCase):
             {common.Client(conn) for conn in service.connections.values()},
         )
 
+    def test_getClient_chooses_connection_with_fewest_calls_in_flight(self):
+        service = ClusterClientService(Clock())
+        conns = [DummyConnection() for _ in range(3)]
+        service.connections = {
+            sentinel.eventloop01: conns[0],
+            sentinel.eventloop02: conns[1],
+            sentinel.eventloop03: conns[2],
+        }
+        for conn, in_flight in zip(conns, (2, 1, 3)):
+            common.get_call_stats(conn).in_flight = in_flight
+        # Each time the better of two random connections is chosen, so the
+        # busiest one never is.
+        chosen = {service.getClient() for _ in range(50)}
+        self.assertEqual(
+            {common.Client(conns[0]), common.Client(conns[1])}, chosen
+        )
+
+    def test_getClient_prefers_quicker_connection(self):
+        service = ClusterClientService(Clock())
+        conns = [DummyConnection() for _ in range(2)]
+        service.connections = {
+            sentinel.eventloop01: conns[0],
+            sentinel.eventloop02: conns[1],
+        }
+        common.get_call_stats(conns[0]).latency = 0.5
+        common.get_call_stats(conns[1]).latency = 0.1
+        self.assertEqual(common.Client(conns[1]), service.getClient())
+
+    def test_getClient_spreads_calls_over_equally_busy_connections(self):
+        service = ClusterClientService(Clock())
+        conns = [DummyConnection() for _ in range(3)]
+        service.connections = {
+            sentinel.eventloop01: conns[0],
+            sentinel.eventloop02: conns[1],
+            sentinel.eventloop03: conns[2],
+        }
+        for conn, latency in zip(conns, (0.1, 0.2, 0.3)):
+            common.get_call_stats(conn).latency = latency
+        chosen = {service.getClient() for _ in range(50)}
+        self.assertEqual(
+            {common.Client(conns[0]), common.Client(conns[1])}, chosen
+        )
+
     def test_getClient_when_there_are_no_connections(self):
         service = ClusterClientService(Clock())
         service.connections = {}
@@ -2980,7 +3023,13 @@ class TestClusterProtocol_EvaluateTag(MAASTestCase):
             (consumer_key, resource_token, resource_secret)
         )
         rack_id = factory.make_name("rack")
-        nodes = [{"system_id": factory.make_name("node")} for _ in range(3)]
+        nodes = [
+            {
+                "system_id": factory.make_name("node"),
+                "details_version": self.getUniqueInteger(),
+            }
+            for _ in range(3)
+        ]
 
         conn_cluster = Cluster()
         conn_cluster.service = MagicMock()
@@ -3012,6 +3061,33 @@ class TestClusterProtocol_EvaluateTag(MAASTestCase):
             ),
         )
 
+    @inlineCallbacks
+    def test_accepts_nodes_without_details_version(self):
+        evaluate_tag = self.patch_autospec(clusterservice, "evaluate_tag")
+        system_id = factory.make_name("node")
+
+        conn_cluster = Cluster()
+        conn_cluster.service = MagicMock()
+        conn_cluster.service.maas_url = factory.make_simple_http_url()
+
+        yield call_responder(
+            conn_cluster,
+            cluster.EvaluateTag,
+            {
+                "system_id": factory.make_name("rack"),
+                "tag_name": factory.make_name("tag-name"),
+                "tag_definition": factory.make_name("tag-definition"),
+                "tag_nsmap": [],
+                "credentials": "abc:def:ghi",
+                "nodes": [{"system_id": system_id}],
+            },
+        )
+
+        self.assertEqual(
+            [{"system_id": system_id, "details_version": None}],
+            evaluate_tag.call_args[0][1],
+        )
+
 
 class MAASTestCaseThatWaitsForDeferredThreads(MAASTestCase):
     """Capture deferred threads and wait for them during teardown.
@@ -4336,6 +4412,41 @@ class TestClusterProtocol_DisableAndShutoffRackd(MAASTestCase):
         self.assertEqual(1, mock_call_and_check.call_count)
 
 
+class TestClusterProtocol_InvalidateBootConfigs(MAASTestCase):
+
+    run_tests_with = MAASTwistedRunTest.make_factory(timeout=5)
+
+    def test_is_registered(self):
+        protocol = Cluster()
+        responder = protocol.locateResponder(
+            cluster.InvalidateBootConfigs.commandName
+        )
+        self.assertIsNotNone(responder)
+
+    def test_invalidates_tftp_backend(self):
+        services = self.patch(clusterservice, "services")
+        tftp = services.getServiceNamed.return_value
+        system_ids = [factory.make_name("system_id") for _ in range(3)]
+        response = call_responder(
+            Cluster(),
+            cluster.InvalidateBootConfigs,
+            {"system_ids": system_ids},
+        )
+        self.assertEqual({}, response.result)
+        services.getServiceNamed.assert_called_once_with("tftp")
+        tftp.backend.invalidate_boot_configs.assert_called_once_with(
+            system_ids
+        )
+
+    def test_does_nothing_without_tftp_service(self):
+        services = self.patch(clusterservice, "services")
+        services.getServiceNamed.side_effect = KeyError("tftp")
+        response = call_responder(
+            Cluster(), cluster.InvalidateBootConfigs, {"system_ids": []}
+        )
+        self.assertEqual({}, response.result)
+
+
 class TestClusterProtocol_CheckIPs(MAASTestCaseThatWaitsForDeferredThreads):
 
     run_tests_with = MAASTwistedRunTest.make_factory(timeout=5)
@@ -10,7 +10,7 @@ from unittest.mock import ANY, sentinel
 
 from testtools import ExpectedException
 from testtools.matchers import Equals, Is, IsInstance, Not
-from twisted.internet.defer import Deferred
+from twisted.internet.defer import Deferred, fail
 from twisted.internet.protocol import connectionDone
 from twisted.protocols import amp
 from twisted.test.proto_helpers import StringTransport
@@ -83,6 +83,40 @@ class TestClient(MAASTestCase):
         ):
             client.address
 
+    def test_call_tracks_calls_in_flight(self):
+        conn, client = self.make_connection_and_client()
+        response = Deferred()
+        self.patch_autospec(conn, "callRemote").return_value = response
+        d = client(sentinel.command, _timeout=None)
+        self.assertEqual(1, client.in_flight)
+        self.assertIsNone(client.latency)
+        response.callback(sentinel.response)
+        self.assertIs(sentinel.response, extract_result(d))
+        self.assertEqual(0, client.in_flight)
+        self.assertIsNotNone(client.latency)
+
+    def test_call_stats_latency_decays_until_calls_finish(self):
+        now = [0]
+        stats = common.CallStats(clock=lambda: now[0])
+        stats.started()
+        stats.finished(2.0)
+        self.assertEqual(2.0, stats.latency)
+        now[0] += stats.half_life
+        self.assertEqual(1.0, stats.latency)
+        stats.started()
+        stats.finished(1.0)
+        self.assertEqual(1.0, stats.latency)
+        self.assertEqual(0, stats.in_flight)
+
+    def test_call_tracks_failed_calls(self):
+        conn, client = self.make_connection_and_client()
+        self.patch_autospec(conn, "callRemote").return_value = fail(
+            ZeroDivisionError()
+        )
+        d = client(sentinel.command, _timeout=None)
+        self.assertRaises(ZeroDivisionError, extract_result, d)
+        self.assertEqual(0, client.in_flight)
+
     def test_call_no_timeout(self):
         conn, client = self.make_connection_and_client()
         self.patch_autospec(conn, "callRemote")
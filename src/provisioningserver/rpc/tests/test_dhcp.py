@@ -424,7 +424,7 @@ class TestDHCPState(MAASTestCase):
         )
         self.assertTrue(new_state.requires_restart(state))
 
-    def test_requires_restart_True_when_hosts_dhcp_snippets_diff(self):
+    def test_requires_restart_False_when_hosts_dhcp_snippets_diff(self):
         (
             omapi_key,
             failover_peers,
@@ -452,7 +452,72 @@ class TestDHCPState(MAASTestCase):
             copy.deepcopy(interfaces),
             copy.deepcopy(global_dhcp_snippets),
         )
-        self.assertTrue(new_state.requires_restart(state))
+        self.assertFalse(new_state.requires_restart(state))
+
+    def test_requires_restart_False_when_unchanged_hosts_are_ipv6(self):
+        (
+            omapi_key,
+            failover_peers,
+            shared_networks,
+            hosts,
+            interfaces,
+            global_dhcp_snippets,
+        ) = self.make_args()
+        hosts.append(make_host(ipv6=True))
+        state = dhcp.DHCPState(
+            omapi_key,
+            failover_peers,
+            shared_networks,
+            hosts,
+            interfaces,
+            global_dhcp_snippets,
+        )
+        changed_hosts = copy.deepcopy(hosts)
+        changed_hosts[0]["ip"] = factory.make_ipv4_address()
+        changed_hosts.append(make_host())
+        new_state = dhcp.DHCPState(
+            omapi_key,
+            copy.deepcopy(failover_peers),
+            copy.deepcopy(shared_networks),
+            changed_hosts,
+            copy.deepcopy(interfaces),
+            copy.deepcopy(global_dhcp_snippets),
+        )
+        self.assertFalse(
+            new_state.requires_restart(state, is_dhcpv6_server=False)
+        )
+
+    def test_requires_restart_True_when_modified_host_was_ipv6(self):
+        (
+            omapi_key,
+            failover_peers,
+            shared_networks,
+            _,
+            interfaces,
+            global_dhcp_snippets,
+        ) = self.make_args()
+        host = make_host(ipv6=True)
+        state = dhcp.DHCPState(
+            omapi_key,
+            failover_peers,
+            shared_networks,
+            [host],
+            interfaces,
+            global_dhcp_snippets,
+        )
+        changed_host = copy.deepcopy(host)
+        changed_host["ip"] = factory.make_ipv4_address()
+        new_state = dhcp.DHCPState(
+            omapi_key,
+            copy.deepcopy(failover_peers),
+            copy.deepcopy(shared_networks),
+            [changed_host],
+            copy.deepcopy(interfaces),
+            copy.deepcopy(global_dhcp_snippets),
+        )
+        self.assertTrue(
+            new_state.requires_restart(state, is_dhcpv6_server=False)
+        )
 
     def test_host_diff_returns_removal_added_and_modify(self):
         (
@@ -490,6 +555,40 @@ class TestDHCPState(MAASTestCase):
             new_state.host_diff(state),
         )
 
+    def test_host_diff_removes_and_adds_hosts_with_changed_snippets(self):
+        (
+            omapi_key,
+            failover_peers,
+            shared_networks,
+            _,
+            interfaces,
+            global_dhcp_snippets,
+        ) = self.make_args()
+        host = make_host(dhcp_snippets=[])
+        state = dhcp.DHCPState(
+            omapi_key,
+            failover_peers,
+            shared_networks,
+            [host],
+            interfaces,
+            global_dhcp_snippets,
+        )
+        changed_host = copy.deepcopy(host)
+        changed_host["dhcp_snippets"] = make_host_dhcp_snippets(
+            allow_empty=False
+        )
+        new_state = dhcp.DHCPState(
+            omapi_key,
+            copy.deepcopy(failover_peers),
+            copy.deepcopy(shared_networks),
+            [changed_host],
+            copy.deepcopy(interfaces),
+            copy.deepcopy(global_dhcp_snippets),
+        )
+        self.assertEqual(
+            ([host], [changed_host], []), new_state.host_diff(state)
+        )
+
     def test_get_config_returns_config_and_calls_with_params(self):
         mock_get_config = self.patch_autospec(dhcp, "get_config")
         mock_get_config.return_value = sentinel.config
@@ -540,7 +639,7 @@ class TestUpdateHosts(MAASTestCase):
 
     def test_performs_operations(self):
         remove_host = make_host()
-        add_host = make_host()
+        add_host = make_host(dhcp_snippets=[])
         modify_host = make_host()
         omapi_cli = Mock()
         self.patch(dhcp, "OmapiClient").return_value = omapi_cli
@@ -548,16 +647,44 @@ class TestUpdateHosts(MAASTestCase):
         self.assertEqual(
             omapi_cli.mock_calls,
             [
-                call.del_host(remove_host["mac"]),
-                call.add_host(add_host["mac"], add_host["ip"]),
-                call.update_host(modify_host["mac"], modify_host["ip"]),
+                call.del_hosts([remove_host["mac"]]),
+                call.add_hosts([(add_host["mac"], add_host["ip"], None)]),
+                call.update_hosts([(modify_host["mac"], modify_host["ip"])]),
             ],
         )
 
+    def test_performs_operations_in_batches(self):
+        hosts = [make_host(dhcp_snippets=[]) for _ in range(3)]
+        omapi_cli = Mock()
+        self.patch(dhcp, "OmapiClient").return_value = omapi_cli
+        dhcp._update_hosts(Mock(), [], hosts, [])
+        self.assertEqual(
+            omapi_cli.mock_calls,
+            [
+                call.add_hosts(
+                    [(host["mac"], host["ip"], None) for host in hosts]
+                ),
+            ],
+        )
+
+    def test_adds_hosts_with_dhcp_snippets_as_statements(self):
+        host = make_host(
+            dhcp_snippets=[
+                {"name": "b", "description": "", "value": "option b;"},
+                {"name": "a", "description": "", "value": "option a;"},
+            ]
+        )
+        omapi_cli = Mock()
+        self.patch(dhcp, "OmapiClient").return_value = omapi_cli
+        dhcp._update_hosts(Mock(), [], [host], [])
+        omapi_cli.add_hosts.assert_called_once_with(
+            [(host["mac"], host["ip"], "option a;\noption b;")]
+        )
+
     def test_fail_remove(self):
         host = make_host()
         omapi_cli = Mock()
-        omapi_cli.del_host.side_effect = OmapiError("Fail")
+        omapi_cli.del_hosts.side_effect = OmapiError("Fail")
         self.patch(dhcp, "OmapiClient").return_value = omapi_cli
         err = self.assertRaises(
             exceptions.CannotRemoveHostMap,
@@ -572,7 +699,7 @@ class TestUpdateHosts(MAASTestCase):
     def test_fail_create(self):
         host = make_host()
         omapi_cli = Mock()
-        omapi_cli.add_host.side_effect = OmapiError("Fail")
+        omapi_cli.add_hosts.side_effect = OmapiError("Fail")
         self.patch(dhcp, "OmapiClient").return_value = omapi_cli
         err = self.assertRaises(
             exceptions.CannotCreateHostMap,
@@ -587,7 +714,7 @@ class TestUpdateHosts(MAASTestCase):
     def test_fail_modify(self):
         host = make_host()
         omapi_cli = Mock()
-        omapi_cli.update_host.side_effect = OmapiError("Fail")
+        omapi_cli.update_hosts.side_effect = OmapiError("Fail")
         self.patch(dhcp, "OmapiClient").return_value = omapi_cli
         err = self.assertRaises(
             exceptions.CannotModifyHostMap,
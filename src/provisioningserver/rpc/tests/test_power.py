@@ -1236,6 +1236,23 @@ class TestPowerQueryAsync(MAASTestCase):
             maaslog.output,
         )
 
+    @inlineCallbacks
+    def test_query_node_times_out(self):
+        self.patch(power, "QUERY_POWER_STATE_TIMEOUT", 0.01)
+        node = self.make_node()
+        get_power_state = self.patch(power, "get_power_state")
+        get_power_state.return_value = Deferred()
+        suppress_reporting(self)
+
+        with FakeLogger("maas.power", level=logging.DEBUG) as maaslog:
+            yield power.query_node(node, reactor)
+
+        self.assertDocTestMatches(
+            "%s: Could not query power state: Timed out after 0 seconds."
+            % node["hostname"],
+            maaslog.output,
+        )
+
     @inlineCallbacks
     def test_query_all_nodes_swallows_NoSuchNode(self):
         node1, node2 = self.make_nodes(2)
@@ -1300,3 +1317,214 @@ class TestPowerQueryAsync(MAASTestCase):
             [(True, node1["power_state"]), (True, node2["power_state"])],
             results,
         )
+
+    def patch_query_many(self, power_type="ipmi"):
+        power_driver = PowerDriverRegistry[power_type]
+        self.patch(power_driver, "detect_missing_packages").return_value = []
+        self.patch(
+            power_driver, "get_query_group"
+        ).side_effect = lambda context: context.get("group")
+        return self.patch(power_driver, "query_many")
+
+    def make_grouped_nodes(self, count=3, group=None, power_type="ipmi"):
+        if group is None:
+            group = factory.make_name("group")
+        nodes = [self.make_node(power_type=power_type) for _ in range(count)]
+        for node in nodes:
+            node["context"]["group"] = group
+        return nodes
+
+    @inlineCallbacks
+    def test_query_all_nodes_returns_results_in_order_of_nodes(self):
+        grouped_nodes = self.make_grouped_nodes(2)
+        query_many = self.patch_query_many()
+        query_many.return_value = succeed(
+            {node["system_id"]: "on" for node in grouped_nodes}
+        )
+        node = self.make_node(power_type="ipmi")
+        unknown_node = self.make_node()
+        unknown_node["power_type"] = factory.make_name("power_type")
+        get_power_state = self.patch(power, "get_power_state")
+        get_power_state.return_value = succeed("off")
+        suppress_reporting(self)
+
+        nodes = [grouped_nodes[0], node, unknown_node, grouped_nodes[1]]
+        results = yield power.query_all_nodes(nodes)
+        self.assertEqual(
+            [(True, "on"), (True, "off"), (True, None), (True, "on")],
+            results,
+        )
+
+    @inlineCallbacks
+    def test_query_all_nodes_queries_grouped_nodes_at_once(self):
+        nodes = self.make_grouped_nodes()
+        query_many = self.patch_query_many()
+        query_many.return_value = succeed(
+            {node["system_id"]: "on" for node in nodes}
+        )
+        get_power_state = self.patch(power, "get_power_state")
+        suppress_reporting(self)
+
+        results = yield power.query_all_nodes(nodes)
+        self.assertEqual([(True, "on")] * 3, results)
+        self.assertThat(
+            query_many,
+            MockCalledOnceWith(
+                {node["system_id"]: node["context"] for node in nodes}
+            ),
+        )
+        self.assertThat(get_power_state, MockNotCalled())
+
+    @inlineCallbacks
+    def test_query_all_nodes_queries_separate_groups_separately(self):
+        nodes = self.make_grouped_nodes(2) + self.make_grouped_nodes(2)
+        query_many = self.patch_query_many()
+        query_many.side_effect = lambda contexts: succeed(
+            {system_id: "off" for system_id in contexts}
+        )
+        suppress_reporting(self)
+
+        results = yield power.query_all_nodes(nodes)
+        self.assertEqual([(True, "off")] * 4, results)
+        self.assertThat(
+            query_many,
+            MockCallsMatch(
+                call(
+                    {node["system_id"]: node["context"] for node in nodes[:2]}
+                ),
+                call(
+                    {node["system_id"]: node["context"] for node in nodes[2:]}
+                ),
+            ),
+        )
+
+    @inlineCallbacks
+    def test_query_all_nodes_queries_groups_in_batches(self):
+        nodes = self.make_grouped_nodes(5)
+        self.patch(PowerDriverRegistry["ipmi"], "query_batch_size", 2)
+        query_many = self.patch_query_many()
+        query_many.side_effect = lambda contexts: succeed(
+            {system_id: "on" for system_id in contexts}
+        )
+        get_power_state = self.patch(power, "get_power_state")
+        get_power_state.return_value = succeed("on")
+        suppress_reporting(self)
+
+        results = yield power.query_all_nodes(nodes)
+        self.assertEqual([(True, "on")] * 5, results)
+        self.assertEqual(
+            [
+                [node["system_id"] for node in nodes[:2]],
+                [node["system_id"] for node in nodes[2:4]],
+            ],
+            [list(args[0]) for args, _ in query_many.call_args_list],
+        )
+        # A batch of one is queried on its own.
+        self.assertThat(
+            get_power_state,
+            MockCalledOnceWith(
+                nodes[4]["system_id"],
+                nodes[4]["hostname"],
+                nodes[4]["power_type"],
+                nodes[4]["context"],
+                clock=reactor,
+            ),
+        )
+
+    @inlineCallbacks
+    def test_query_all_nodes_queries_missing_grouped_nodes_alone(self):
+        node1, node2 = self.make_grouped_nodes(2)
+        query_many = self.patch_query_many()
+        query_many.return_value = succeed({node1["system_id"]: "on"})
+        get_power_state = self.patch(power, "get_power_state")
+        get_power_state.return_value = succeed("off")
+        suppress_reporting(self)
+
+        results = yield power.query_all_nodes([node1, node2])
+        self.assertEqual([(True, "on"), (True, "off")], results)
+        self.assertThat(
+            get_power_state,
+            MockCalledOnceWith(
+                node2["system_id"],
+                node2["hostname"],
+                node2["power_type"],
+                node2["context"],
+                clock=reactor,
+            ),
+        )
+
+    @inlineCallbacks
+    def test_query_all_nodes_queries_grouped_nodes_alone_on_failure(self):
+        node1, node2 = self.make_grouped_nodes(2)
+        query_many = self.patch_query_many()
+        error_message = factory.make_name("error")
+        query_many.return_value = fail(PowerError(error_message))
+        get_power_state = self.patch(power, "get_power_state")
+        get_power_state.side_effect = [succeed("on"), succeed("off")]
+        suppress_reporting(self)
+
+        with FakeLogger("maas.power", level=logging.DEBUG) as maaslog:
+            results = yield power.query_all_nodes([node1, node2])
+
+        self.assertEqual([(True, "on"), (True, "off")], results)
+        self.assertIn(error_message, maaslog.output)
+
+    def test_query_all_nodes_queries_grouped_nodes_alone_one_at_a_time(self):
+        nodes = self.make_grouped_nodes(3)
+        query_many = self.patch_query_many()
+        query_many.return_value = fail(PowerError())
+        queries = {node["system_id"]: Deferred() for node in nodes}
+        query_node = self.patch(power, "query_node")
+        query_node.side_effect = lambda node, clock: queries[node["system_id"]]
+        suppress_reporting(self)
+
+        d = power.query_all_nodes(nodes)
+        for node in nodes:
+            self.assertEqual(
+                node["system_id"], query_node.call_args[0][0]["system_id"]
+            )
+            queries[node["system_id"]].callback("on")
+        self.assertEqual([(True, "on")] * 3, extract_result(d))
+        self.assertEqual(3, query_node.call_count)
+
+    @inlineCallbacks
+    def test_query_all_nodes_skips_grouped_nodes_in_action_registry(self):
+        node1, node2, node3 = self.make_grouped_nodes(3)
+        power.power_action_registry[node1["system_id"]] = sentinel.action
+        self.addCleanup(power.power_action_registry.pop, node1["system_id"])
+        query_many = self.patch_query_many()
+        query_many.side_effect = lambda contexts: succeed(
+            {system_id: "on" for system_id in contexts}
+        )
+        suppress_reporting(self)
+
+        results = yield power.query_all_nodes([node1, node2, node3])
+        self.assertEqual([(True, None), (True, "on"), (True, "on")], results)
+        self.assertThat(
+            query_many,
+            MockCalledOnceWith(
+                {
+                    node2["system_id"]: node2["context"],
+                    node3["system_id"]: node3["context"],
+                }
+            ),
+        )
+
+    def test_query_all_nodes_limits_concurrency_per_power_type(self):
+        nodes = [self.make_node(power_type="ipmi") for _ in range(3)]
+        nodes += [self.make_node(power_type="redfish") for _ in range(3)]
+        queries = {node["system_id"]: Deferred() for node in nodes}
+        query_node = self.patch(power, "query_node")
+        query_node.side_effect = lambda node, clock: queries[node["system_id"]]
+
+        d = power.query_all_nodes(
+            nodes, max_concurrency=1, max_concurrency_by_type={"ipmi": 2}
+        )
+        self.assertEqual(
+            [node["system_id"] for node in nodes[:2] + nodes[3:4]],
+            [args[0]["system_id"] for args, _ in query_node.call_args_list],
+        )
+        for query in queries.values():
+            if not query.called:
+                query.callback("on")
+        self.assertEqual([(True, "on")] * 6, extract_result(d))
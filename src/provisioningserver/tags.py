@@ -8,9 +8,11 @@ from collections import OrderedDict
 from functools import partial
 import http.client
 import json
+import threading
 import urllib.error
 import urllib.parse
 import urllib.request
+import zlib
 
 import bson
 from lxml import etree
@@ -30,6 +32,11 @@ maaslog = get_maas_logger("tag_processing")
 # face of it, appears excessive.
 DEFAULT_BATCH_SIZE = 100
 
+# The most merged details, in bytes compressed, that are cached between
+# evaluations of tags. Merged details compress to a tenth of their size
+# or less, so this holds the details of several thousand nodes.
+DETAILS_CACHE_MAX_SIZE = 64 * 1024 * 1024
+
 
 def process_response(response):
     """All responses should be httplib.OK.
@@ -233,6 +240,97 @@ def merge_details_cleanly(details):
     return _details_do_merge(details, root)
 
 
+def dump_merged_details(doc):
+    """Serialize the merged details document `doc`, compressed.
+
+    The root of a merged document can have ancestors, which absolute XPath
+    expressions are evaluated from, so the whole document is serialized
+    along with the path to the root.
+    """
+    root = doc.getroot()
+    path = root.getroottree().getpath(root)
+    return zlib.compress(
+        path.encode("utf-8")
+        + b"\n"
+        + etree.tostring(root.getroottree().getroot())
+    )
+
+
+def load_merged_details(data):
+    """Load a merged details document serialized by `dump_merged_details`."""
+    path, xmldata = zlib.decompress(data).split(b"\n", 1)
+    tree = etree.ElementTree(etree.fromstring(xmldata))
+    [root] = tree.xpath(path.decode("utf-8"))
+    return etree.ElementTree(root)
+
+
+class MergedDetailsCache:
+    """A least-recently-used cache of merged details documents.
+
+    Documents are cached by node and by the version of the node's details
+    that the region sent with the node. A node's details are only fetched
+    from the region again once their version changes, so evaluating a tag
+    doesn't download the details of every node each time.
+
+    Tags are evaluated in threads, so the cache is safe to use from more
+    than one at once.
+    """
+
+    def __init__(self, max_size=DETAILS_CACHE_MAX_SIZE):
+        """
+        :param max_size: The most that's cached, in bytes compressed.
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, system_id, version):
+        """Return the cached document for `system_id` at `version`.
+
+        :return: The document, or None if that version isn't cached.
+        """
+        if version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(system_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(system_id)
+        return load_merged_details(entry[1])
+
+    def set(self, system_id, version, doc):
+        """Cache `doc` as the document for `system_id` at `version`.
+
+        Nothing is cached when `version` is None, as it is when the region
+        doesn't know the version of the node's details.
+        """
+        if version is None:
+            return
+        data = dump_merged_details(doc)
+        with self._lock:
+            self._discard(system_id)
+            self._entries[system_id] = version, data
+            self._size += len(data)
+            while self._size > self.max_size:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def discard(self, system_id):
+        """Remove the cached document for `system_id`, if there is one."""
+        with self._lock:
+            self._discard(system_id)
+
+    def _discard(self, system_id):
+        entry = self._entries.pop(system_id, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+
+# The details of nodes that this rack controller has evaluated tags for.
+merged_details_cache = MergedDetailsCache()
+
+
 def gen_batch_slices(count, size):
     """Generate `slice`s to split `count` objects into batches.
 
@@ -266,18 +364,35 @@ def gen_batches(things, batch_size):
     return (things[s] for s in slices)
 
 
-def gen_node_details(client, batches):
+def gen_node_details(client, batches, versions=None):
     """Fetch node details.
 
     This lazily fetches data in batches, but this detail is hidden
-    from callers.
+    from callers. Details that are cached at the version in `versions`
+    aren't fetched again.
 
+    :param versions: A ``{system-id: version}`` map of the versions of the
+        nodes' details, as sent by the region.
     :return: An iterator of ``(system-id, details-document)`` tuples.
     """
+    if versions is None:
+        versions = {}
     get_details = partial(get_details_for_nodes, client)
     for batch in batches:
-        for system_id, details in get_details(batch).items():
-            yield system_id, merge_details(details)
+        uncached = []
+        for system_id in batch:
+            doc = merged_details_cache.get(system_id, versions.get(system_id))
+            if doc is None:
+                uncached.append(system_id)
+            else:
+                yield system_id, doc
+        if len(uncached) > 0:
+            for system_id, details in get_details(uncached).items():
+                doc = merge_details(details)
+                merged_details_cache.set(
+                    system_id, versions.get(system_id), doc
+                )
+                yield system_id, doc
 
 
 def process_all(
@@ -288,6 +403,7 @@ def process_all(
     system_ids,
     xpath,
     batch_size=None,
+    versions=None,
 ):
     log.debug(
         "Processing {nums} system_ids for tag {name}.",
@@ -299,7 +415,7 @@ def process_all(
         batch_size = DEFAULT_BATCH_SIZE
 
     batches = gen_batches(system_ids, batch_size)
-    node_details = gen_node_details(client, batches)
+    node_details = gen_node_details(client, batches, versions)
     nodes_matched, nodes_unmatched = classify(
         partial(try_match_xpath, xpath, logger=maaslog), node_details
     )
@@ -325,7 +441,8 @@ def process_node_tags(
     """Update the nodes for a new/changed tag definition.
 
     :param rack_id: System ID for the rack controller.
-    :param nodes: List of nodes to process tags for.
+    :param nodes: List of nodes to process tags for, each with the version
+        of its details, if the region sent it.
     :param client: A `MAASClient` used to fetch the node's details via
         calls to the web API.
     :param tag_name: Name of the tag to update nodes for
@@ -336,6 +453,9 @@ def process_node_tags(
     # the server
     xpath = etree.XPath(tag_definition, namespaces=tag_nsmap)
     system_ids = [node["system_id"] for node in nodes]
+    versions = {
+        node["system_id"]: node.get("details_version") for node in nodes
+    }
     process_all(
         client,
         rack_id,
@@ -344,4 +464,5 @@ def process_node_tags(
         system_ids,
         xpath,
         batch_size=batch_size,
+        versions=versions,
     )
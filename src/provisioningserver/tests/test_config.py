@@ -652,6 +652,43 @@ class TestClusterConfiguration(MAASTestCase):
         # It's also stored in the configuration database.
         self.assertEqual({"tftp_port": example_port}, config.store)
 
+    def test_default_power_thread_pool_size(self):
+        config = ClusterConfiguration({})
+        self.assertEqual(10, config.power_thread_pool_size)
+
+    def test_set_and_get_power_thread_pool_size(self):
+        config = ClusterConfiguration({})
+        config.power_thread_pool_size = 3
+        self.assertEqual(3, config.power_thread_pool_size)
+        # It's also stored in the configuration database.
+        self.assertEqual({"power_thread_pool_size": 3}, config.store)
+
+    def test_default_power_thread_pool_size_by_type(self):
+        config = ClusterConfiguration({})
+        self.assertEqual({}, config.power_thread_pool_size_by_type)
+
+    def test_set_and_get_power_thread_pool_size_by_type(self):
+        config = ClusterConfiguration({})
+        config.power_thread_pool_size_by_type = {"ipmi": 20}
+        self.assertEqual({"ipmi": 20}, config.power_thread_pool_size_by_type)
+        # It's also stored in the configuration database.
+        self.assertEqual(
+            {"power_thread_pool_size_by_type": {"ipmi": 20}}, config.store
+        )
+
+    def test_default_power_max_nodes_at_once_by_type(self):
+        config = ClusterConfiguration({})
+        self.assertEqual({}, config.power_max_nodes_at_once_by_type)
+
+    def test_set_and_get_power_max_nodes_at_once_by_type(self):
+        config = ClusterConfiguration({})
+        config.power_max_nodes_at_once_by_type = {"ipmi": 20}
+        self.assertEqual({"ipmi": 20}, config.power_max_nodes_at_once_by_type)
+        # It's also stored in the configuration database.
+        self.assertEqual(
+            {"power_max_nodes_at_once_by_type": {"ipmi": 20}}, config.store
+        )
+
     def test_default_tftp_root(self):
         config = ClusterConfiguration({})
         self.assertTrue(config.tftp_root.endswith("boot-resources/current"))
@@ -5,19 +5,24 @@
 
 
 import random
-from unittest.mock import ANY, sentinel
+from unittest.mock import ANY, call, Mock, sentinel
 
 from testtools import ExpectedException
 from testtools.matchers import AllMatch, Equals, HasLength, Is, IsInstance
 from twisted.internet.defer import fail, inlineCallbacks, succeed
+from twisted.internet.task import Clock
+from twisted.protocols.amp import UnhandledCommand
 
 from maastesting.factory import factory
 from maastesting.matchers import (
     MockCalledOnce,
     MockCalledOnceWith,
+    MockCallsMatch,
     MockNotCalled,
 )
 from maastesting.testcase import MAASTestCase, MAASTwistedRunTest
+from maastesting.twisted import extract_result
+from provisioningserver import events
 from provisioningserver.events import (
     EVENT_DETAILS,
     EVENT_TYPES,
@@ -226,13 +231,14 @@ class TestSendEventMACAddress(MAASTestCase):
         self.patch(
             clusterservice, "get_all_interfaces_definition"
         ).return_value = {}
+        self.patch(NodeEventHub, "batch_interval", 0)
 
     def patch_rpc_methods(self, side_effect=None):
         fixture = self.useFixture(MockLiveClusterToRegionRPCFixture())
         protocol, connecting = fixture.makeEventLoop(
-            region.SendEventMACAddress, region.RegisterEventType
+            region.SendEvents, region.RegisterEventType
         )
-        protocol.SendEventMACAddress.side_effect = side_effect
+        protocol.SendEvents.side_effect = side_effect
         return protocol, connecting
 
     @inlineCallbacks
@@ -247,12 +253,19 @@ class TestSendEventMACAddress(MAASTestCase):
         yield NodeEventHub().logByMAC(event_name, mac_address, description)
 
         self.assertThat(
-            protocol.SendEventMACAddress,
+            protocol.SendEvents,
             MockCalledOnceWith(
                 ANY,
-                type_name=event_name,
-                mac_address=mac_address,
-                description=description,
+                events=[
+                    {
+                        "system_id": None,
+                        "mac_address": mac_address,
+                        "ip_address": None,
+                        "type_name": event_name,
+                        "description": description,
+                        "age": ANY,
+                    }
+                ],
             ),
         )
 
@@ -270,12 +283,19 @@ class TestSendEventMACAddress(MAASTestCase):
         yield NodeEventHub().logByMAC(event_name, mac_address, description)
 
         self.assertThat(
-            protocol.SendEventMACAddress,
+            protocol.SendEvents,
             MockCalledOnceWith(
                 ANY,
-                type_name=event_name,
-                mac_address=mac_address,
-                description=description,
+                events=[
+                    {
+                        "system_id": None,
+                        "mac_address": mac_address,
+                        "ip_address": None,
+                        "type_name": event_name,
+                        "description": description,
+                        "age": ANY,
+                    }
+                ],
             ),
         )
 
@@ -302,17 +322,17 @@ class TestSendEventMACAddress(MAASTestCase):
                 level=event_detail.level,
             ),
         )
-        self.assertThat(protocol.SendEventMACAddress, MockCalledOnce())
+        self.assertThat(protocol.SendEvents, MockCalledOnce())
 
         # Reset RPC call handlers.
         protocol.RegisterEventType.reset_mock()
-        protocol.SendEventMACAddress.reset_mock()
+        protocol.SendEvents.reset_mock()
 
         # On the second call, the event type is known to be registered, so the
         # log is sent to the region immediately.
         yield event_hub.logByMAC(event_name, mac_address, description)
         self.assertThat(protocol.RegisterEventType, MockNotCalled())
-        self.assertThat(protocol.SendEventMACAddress, MockCalledOnce())
+        self.assertThat(protocol.SendEvents, MockCalledOnce())
 
     @inlineCallbacks
     def test_updates_cache_if_event_type_not_found(self):
@@ -347,13 +367,14 @@ class TestSendEventIPAddress(MAASTestCase):
         self.patch(
             clusterservice, "get_all_interfaces_definition"
         ).return_value = {}
+        self.patch(NodeEventHub, "batch_interval", 0)
 
     def patch_rpc_methods(self, side_effect=None):
         fixture = self.useFixture(MockLiveClusterToRegionRPCFixture())
         protocol, connecting = fixture.makeEventLoop(
-            region.SendEventIPAddress, region.RegisterEventType
+            region.SendEvents, region.RegisterEventType
         )
-        protocol.SendEventIPAddress.side_effect = side_effect
+        protocol.SendEvents.side_effect = side_effect
         return protocol, connecting
 
     @inlineCallbacks
@@ -368,12 +389,19 @@ class TestSendEventIPAddress(MAASTestCase):
         yield NodeEventHub().logByIP(event_name, ip_address, description)
 
         self.assertThat(
-            protocol.SendEventIPAddress,
+            protocol.SendEvents,
             MockCalledOnceWith(
                 ANY,
-                type_name=event_name,
-                ip_address=ip_address,
-                description=description,
+                events=[
+                    {
+                        "system_id": None,
+                        "mac_address": None,
+                        "ip_address": ip_address,
+                        "type_name": event_name,
+                        "description": description,
+                        "age": ANY,
+                    }
+                ],
             ),
         )
 
@@ -391,12 +419,19 @@ class TestSendEventIPAddress(MAASTestCase):
         yield NodeEventHub().logByIP(event_name, ip_address, description)
 
         self.assertThat(
-            protocol.SendEventIPAddress,
+            protocol.SendEvents,
             MockCalledOnceWith(
                 ANY,
-                type_name=event_name,
-                ip_address=ip_address,
-                description=description,
+                events=[
+                    {
+                        "system_id": None,
+                        "mac_address": None,
+                        "ip_address": ip_address,
+                        "type_name": event_name,
+                        "description": description,
+                        "age": ANY,
+                    }
+                ],
             ),
         )
 
@@ -423,17 +458,17 @@ class TestSendEventIPAddress(MAASTestCase):
                 level=event_detail.level,
             ),
         )
-        self.assertThat(protocol.SendEventIPAddress, MockCalledOnce())
+        self.assertThat(protocol.SendEvents, MockCalledOnce())
 
         # Reset RPC call handlers.
         protocol.RegisterEventType.reset_mock()
-        protocol.SendEventIPAddress.reset_mock()
+        protocol.SendEvents.reset_mock()
 
         # On the second call, the event type is known to be registered, so the
         # log is sent to the region immediately.
         yield event_hub.logByIP(event_name, ip_address, description)
         self.assertThat(protocol.RegisterEventType, MockNotCalled())
-        self.assertThat(protocol.SendEventIPAddress, MockCalledOnce())
+        self.assertThat(protocol.SendEvents, MockCalledOnce())
 
     @inlineCallbacks
     def test_updates_cache_if_event_type_not_found(self):
@@ -456,3 +491,164 @@ class TestSendEventIPAddress(MAASTestCase):
             yield event_hub.logByIP(event_name, ip_address, description)
         # The event has been removed from the cache.
         self.assertThat(event_hub._types_registered, HasLength(0))
+
+
+class TestNodeEventHubBatches(MAASTestCase):
+    """Tests for the batching of events in `NodeEventHub`."""
+
+    def setUp(self):
+        super().setUp()
+        self.clock = Clock()
+        self.event_hub = NodeEventHub(clock=self.clock)
+        self.event_hub._types_registered.update(EVENT_DETAILS)
+        self.client = Mock(return_value=succeed({}))
+        self.patch(events, "getRegionClient").return_value = self.client
+
+    def make_event(self, event_type=None, **node):
+        if event_type is None:
+            event_type = EVENT_TYPES.NODE_PXE_REQUEST
+        if not node:
+            node["ip_address"] = factory.make_ip_address()
+        return dict(
+            node,
+            type_name=event_type,
+            description=factory.make_name("description"),
+        )
+
+    def log(self, event):
+        if "ip_address" in event:
+            return self.event_hub.logByIP(
+                event["type_name"], event["ip_address"], event["description"]
+            )
+        else:
+            return self.event_hub.logByMAC(
+                event["type_name"], event["mac_address"], event["description"]
+            )
+
+    def test_sends_events_together(self):
+        event1 = self.make_event()
+        event2 = self.make_event(mac_address=factory.make_mac_address())
+        d1 = self.log(event1)
+        self.clock.advance(0.25)
+        d2 = self.log(event2)
+        self.assertThat(self.client, MockNotCalled())
+        self.clock.advance(NodeEventHub.batch_interval - 0.25)
+        self.assertThat(
+            self.client,
+            MockCalledOnceWith(
+                region.SendEvents,
+                events=[
+                    dict(event1, age=NodeEventHub.batch_interval),
+                    dict(event2, age=NodeEventHub.batch_interval - 0.25),
+                ],
+            ),
+        )
+        self.assertIsNone(extract_result(d1))
+        self.assertIsNone(extract_result(d2))
+
+    def test_sends_full_batch_straight_away(self):
+        self.patch(NodeEventHub, "batch_size", 3)
+        events_sent = [self.make_event() for _ in range(4)]
+        for event in events_sent:
+            self.log(event)
+        self.assertThat(
+            self.client,
+            MockCalledOnceWith(
+                region.SendEvents,
+                events=[dict(event, age=0) for event in events_sent[:3]],
+            ),
+        )
+        self.client.reset_mock()
+        self.clock.advance(NodeEventHub.batch_interval)
+        self.assertThat(
+            self.client,
+            MockCalledOnceWith(
+                region.SendEvents,
+                events=[dict(events_sent[3], age=NodeEventHub.batch_interval)],
+            ),
+        )
+
+    def test_coalesces_repeated_file_requests(self):
+        ip_address = factory.make_ip_address()
+        event = self.make_event(
+            EVENT_TYPES.NODE_TFTP_REQUEST, ip_address=ip_address
+        )
+        other_event = self.make_event(
+            EVENT_TYPES.NODE_TFTP_REQUEST, ip_address=ip_address
+        )
+        d1 = self.log(event)
+        d2 = self.log(other_event)
+        d3 = self.log(event)
+        self.clock.advance(NodeEventHub.batch_interval)
+        self.assertThat(
+            self.client,
+            MockCalledOnceWith(
+                region.SendEvents,
+                events=[
+                    dict(event, age=NodeEventHub.batch_interval),
+                    dict(other_event, age=NodeEventHub.batch_interval),
+                ],
+            ),
+        )
+        self.assertIsNone(extract_result(d1))
+        self.assertIsNone(extract_result(d2))
+        self.assertIsNone(extract_result(d3))
+
+    def test_does_not_coalesce_other_events(self):
+        event = self.make_event(EVENT_TYPES.NODE_PXE_REQUEST)
+        self.log(event)
+        self.log(event)
+        self.clock.advance(NodeEventHub.batch_interval)
+        self.assertThat(
+            self.client,
+            MockCalledOnceWith(
+                region.SendEvents,
+                events=[dict(event, age=NodeEventHub.batch_interval)] * 2,
+            ),
+        )
+
+    def test_does_not_coalesce_with_events_already_sent(self):
+        event = self.make_event(EVENT_TYPES.NODE_HTTP_REQUEST)
+        self.log(event)
+        self.clock.advance(NodeEventHub.batch_interval)
+        self.log(event)
+        self.clock.advance(NodeEventHub.batch_interval)
+        self.assertThat(self.client, MockCallsMatch(ANY, ANY))
+
+    def test_failure_is_passed_to_all_events(self):
+        self.client.return_value = fail(ZeroDivisionError())
+        d1 = self.log(self.make_event())
+        d2 = self.log(self.make_event())
+        self.clock.advance(NodeEventHub.batch_interval)
+        self.assertRaises(ZeroDivisionError, extract_result, d1)
+        self.assertRaises(ZeroDivisionError, extract_result, d2)
+
+    def test_sends_events_one_by_one_to_regions_without_send_events(self):
+        def client(command, **kwargs):
+            if command is region.SendEvents:
+                return fail(UnhandledCommand())
+            elif command is region.SendEventIPAddress:
+                return fail(ZeroDivisionError())
+            else:
+                return succeed({})
+
+        self.client.side_effect = client
+        event1 = self.make_event()
+        event2 = self.make_event(mac_address=factory.make_mac_address())
+        d1 = self.log(event1)
+        d2 = self.log(event2)
+        self.clock.advance(NodeEventHub.batch_interval)
+        self.assertThat(
+            self.client,
+            MockCallsMatch(
+                call(region.SendEvents, events=ANY),
+                call(region.SendEventIPAddress, **event1),
+                call(region.SendEventMACAddress, **event2),
+            ),
+        )
+        self.assertRaises(ZeroDivisionError, extract_result, d1)
+        self.assertIsNone(extract_result(d2))
+
+    def test_flush_sends_nothing_when_no_events(self):
+        self.assertIsNone(extract_result(self.event_hub.flush()))
+        self.assertThat(self.client, MockNotCalled())
@@ -58,6 +58,7 @@ from provisioningserver.rackdservices.tftp_offload import TFTPOffloadService
 from provisioningserver.rackdservices.version_update_check import (
     VersionUpdateCheckService,
 )
+from provisioningserver.rpc import power
 from provisioningserver.rpc.clusterservice import ClusterClientCheckerService
 from provisioningserver.testing.config import ClusterConfigurationFixture
 
@@ -279,6 +280,37 @@ class TestProvisioningServiceMaker(MAASTestCase):
         node_monitor = service.getServiceNamed("node_monitor")
         self.assertIsInstance(node_monitor, NodePowerMonitorService)
 
+    def test_node_monitor_service_limits_queries_by_power_type(self):
+        self.useFixture(
+            ClusterConfigurationFixture(
+                power_max_nodes_at_once_by_type={"ipmi": 20}
+            )
+        )
+        options = Options()
+        service_maker = ProvisioningServiceMaker("Harry", "Hill")
+        service = service_maker.makeService(options, clock=None)
+        node_monitor = service.getServiceNamed("node_monitor")
+        self.assertEqual(
+            {"ipmi": 20}, node_monitor.max_nodes_at_once_by_power_type
+        )
+
+    def test_node_monitor_service_configures_power_thread_pools(self):
+        self.useFixture(
+            ClusterConfigurationFixture(
+                power_thread_pool_size=5,
+                power_thread_pool_size_by_type={"ipmi": 20},
+            )
+        )
+        configure_power_thread_pools = self.patch(
+            power, "configure_power_thread_pools"
+        )
+        options = Options()
+        service_maker = ProvisioningServiceMaker("Harry", "Hill")
+        service_maker.makeService(options, clock=None)
+        self.assertThat(
+            configure_power_thread_pools, MockCalledOnceWith(5, {"ipmi": 20})
+        )
+
     def test_networks_monitor_service(self):
         options = Options()
         service_maker = ProvisioningServiceMaker("Spike", "Milligan")
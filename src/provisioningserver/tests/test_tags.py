@@ -9,6 +9,7 @@ import http.client
 from itertools import chain
 import json
 from textwrap import dedent
+import threading
 from unittest.mock import call, MagicMock, sentinel
 import urllib.error
 import urllib.parse
@@ -454,6 +455,122 @@ class TestGenBatches(MAASTestCase):
             self.assertIn(max(lens) - min(lens), (0, 1))
 
 
+class TestMergedDetailsCache(MAASTestCase):
+    def make_doc(self):
+        return tags.merge_details(
+            {
+                "lshw": b"<list><node id='%s' /></list>"
+                % factory.make_name("node").encode("ascii"),
+                "lldp": b"<lldp><interface /></lldp>",
+            }
+        )
+
+    def assertSameDoc(self, expected, observed):
+        self.assertEqual(
+            etree.tostring(expected.getroot().getroottree()),
+            etree.tostring(observed.getroot().getroottree()),
+        )
+
+    def evaluate(self, xpath, doc):
+        result = xpath(doc)
+        if isinstance(result, list):
+            return [element.tag for element in result]
+        else:
+            return result
+
+    def test_dump_and_load_preserve_xpath_results(self):
+        self.useFixture(FakeLogger())
+        nsmap = {"lldp": "lldp", "lshw": "lshw"}
+        expressions = [
+            "/list/node",
+            "/list/list/node",
+            "node",
+            "//lldp:interface",
+            "count(ancestor::*)",
+        ]
+        for details in (
+            {"lshw": b"<list><node /></list>", "lldp": b"<lldp />"},
+            {"lshw": None, "lldp": b"<lldp><interface /></lldp>"},
+            {"lshw": b"not-xml", "lldp": None},
+        ):
+            doc = tags.merge_details(details)
+            loaded = tags.load_merged_details(tags.dump_merged_details(doc))
+            for expression in expressions:
+                xpath = etree.XPath(expression, namespaces=nsmap)
+                self.assertEqual(
+                    self.evaluate(xpath, doc),
+                    self.evaluate(xpath, loaded),
+                    "%s: %r" % (expression, details),
+                )
+
+    def test_get_returns_document_at_version(self):
+        cache = tags.MergedDetailsCache()
+        doc = self.make_doc()
+        cache.set("s1", 3, doc)
+        self.assertSameDoc(doc, cache.get("s1", 3))
+        self.assertIsNone(cache.get("s1", 4))
+        self.assertIsNone(cache.get("s1", None))
+        self.assertIsNone(cache.get("s2", 3))
+
+    def test_set_without_version_caches_nothing(self):
+        cache = tags.MergedDetailsCache()
+        cache.set("s1", None, self.make_doc())
+        self.assertIsNone(cache.get("s1", None))
+        self.assertEqual(0, cache._size)
+
+    def test_set_replaces_older_version(self):
+        cache = tags.MergedDetailsCache()
+        cache.set("s1", 1, self.make_doc())
+        doc = self.make_doc()
+        cache.set("s1", 2, doc)
+        self.assertIsNone(cache.get("s1", 1))
+        self.assertSameDoc(doc, cache.get("s1", 2))
+        self.assertEqual(len(tags.dump_merged_details(doc)), cache._size)
+
+    def test_set_evicts_least_recently_used(self):
+        doc = self.make_doc()
+        size = len(tags.dump_merged_details(doc))
+        cache = tags.MergedDetailsCache(max_size=size * 2)
+        cache.set("s1", 1, doc)
+        cache.set("s2", 1, doc)
+        cache.get("s1", 1)
+        cache.set("s3", 1, doc)
+        self.assertIsNotNone(cache.get("s1", 1))
+        self.assertIsNone(cache.get("s2", 1))
+        self.assertIsNotNone(cache.get("s3", 1))
+
+    def test_is_safe_to_use_from_many_threads(self):
+        doc = self.make_doc()
+        size = len(tags.dump_merged_details(doc))
+        cache = tags.MergedDetailsCache(max_size=size * 5)
+        errors = []
+
+        def use_cache(thread):
+            try:
+                for i in range(200):
+                    system_id = "s%d" % (i % 10)
+                    cache.set(system_id, thread, doc)
+                    cache.get(system_id, thread)
+                    if i % 7 == 0:
+                        cache.discard(system_id)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [
+            threading.Thread(target=use_cache, args=(thread,))
+            for thread in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertLessEqual(cache._size, cache.max_size)
+        self.assertEqual(
+            sum(len(data) for _, data in cache._entries.values()), cache._size
+        )
+
+
 class TestGenNodeDetails(MAASTestCase):
     def fake_merge_details(self):
         """Modify `merge_details` to return a simple textual token.
@@ -493,6 +610,25 @@ class TestGenNodeDetails(MAASTestCase):
             get_details_for_nodes.mock_calls,
         )
 
+    def test_fetches_only_details_that_arent_cached(self):
+        cache = self.patch(tags, "merged_details_cache")
+        cache.get.side_effect = lambda system_id, version: (
+            "cached:%s" % system_id if version == 1 else None
+        )
+        get_details_for_nodes = self.patch(tags, "get_details_for_nodes")
+        get_details_for_nodes.return_value = {"s2": {"foo": "<node />"}}
+        self.fake_merge_details()
+        node_details = tags.gen_node_details(
+            sentinel.client, [["s1", "s2"]], {"s1": 1, "s2": 2}
+        )
+        self.assertCountEqual(
+            [("s1", "cached:s1"), ("s2", "merged:foo")], node_details
+        )
+        self.assertThat(
+            get_details_for_nodes, MockCalledOnceWith(sentinel.client, ["s2"])
+        )
+        self.assertThat(cache.set, MockCalledOnceWith("s2", 2, "merged:foo"))
+
 
 class TestTagUpdating(MAASTestCase):
     def setUp(self):
@@ -667,3 +803,37 @@ class TestTagUpdating(MAASTestCase):
                 remove=["system-id2"],
             ),
         )
+
+    def test_process_node_tags_reuses_details_at_same_version(self):
+        self.patch(tags, "merged_details_cache", tags.MergedDetailsCache())
+        mock_get = self.patch(MAASClient, "get")
+        mock_get.side_effect = lambda *args, **kwargs: factory.make_response(
+            http.client.OK,
+            bson.BSON.encode({"lshw": b"<node />"}),
+            "application/bson",
+        )
+        mock_post = self.patch(MAASClient, "post")
+        mock_post.side_effect = lambda *args, **kwargs: factory.make_response(
+            http.client.OK, b'{"added": 1, "removed": 0}', "application/json"
+        )
+        nodes = [{"system_id": "system-id1", "details_version": 1}]
+        for _ in range(2):
+            tags.process_node_tags(
+                factory.make_name("rack"),
+                nodes,
+                factory.make_name("tag"),
+                "//lshw:node",
+                {"lshw": "lshw"},
+                self.fake_client(),
+            )
+        self.assertEqual(1, mock_get.call_count)
+        nodes[0]["details_version"] = 2
+        tags.process_node_tags(
+            factory.make_name("rack"),
+            nodes,
+            factory.make_name("tag"),
+            "//lshw:node",
+            {"lshw": "lshw"},
+            self.fake_client(),
+        )
+        self.assertEqual(2, mock_get.call_count)
@@ -195,3 +195,54 @@ class OneWayStringBool(formencode.validators.StringBool):
     def from_python(self, value):
         """Do nothing."""
         return value
+
+
+class DictOf(formencode.FancyValidator):
+    """A validator for a mapping of Unicode strings to values.
+
+    Each of the values is validated with `validator`.
+    """
+
+    __unpackargs__ = ("validator",)
+
+    accept_python = False
+    validator = None
+    messages = {
+        "badType": "The input must be a mapping (not a %(type)s: %(value)r)",
+        "badKey": "The keys must be Unicode strings (not %(key)r)",
+    }
+
+    def _check(self, value, state):
+        if not isinstance(value, dict):
+            raise formencode.Invalid(
+                self.message(
+                    "badType",
+                    state,
+                    value=value,
+                    type=type(value).__qualname__,
+                ),
+                value,
+                state,
+            )
+        for key in value:
+            if not isinstance(key, str):
+                raise formencode.Invalid(
+                    self.message("badKey", state, key=key), value, state
+                )
+
+    def _convert_to_python(self, value, state=None):
+        self._check(value, state)
+        return {
+            key: self.validator.to_python(item, state)
+            for key, item in value.items()
+        }
+
+    def _convert_from_python(self, value, state=None):
+        self._check(value, state)
+        return {
+            key: self.validator.from_python(item, state)
+            for key, item in value.items()
+        }
+
+    def empty_value(self, value):
+        return {}
@@ -360,3 +360,37 @@ class TestOneWayStringBool(MAASTestCase):
         validator = config.OneWayStringBool()
         self.assertFalse(validator.from_python(False))
         self.assertTrue(validator.from_python(True))
+
+
+class TestDictOf(MAASTestCase):
+    """Tests for `DictOf`."""
+
+    def test_converting_to_python_validates_values(self):
+        validator = config.DictOf(formencode.validators.Int(min=1))
+        self.assertEqual(
+            {"ipmi": 20, "redfish": 2},
+            validator.to_python({"ipmi": "20", "redfish": 2}),
+        )
+
+    def test_converting_to_python_rejects_invalid_values(self):
+        validator = config.DictOf(formencode.validators.Int(min=1))
+        with ExpectedException(formencode.Invalid):
+            validator.to_python({"ipmi": 0})
+
+    def test_converting_to_python_rejects_non_mappings(self):
+        validator = config.DictOf(formencode.validators.Number())
+        with ExpectedException(formencode.Invalid, "The input must be a .*"):
+            validator.to_python([("ipmi", 20)])
+
+    def test_converting_to_python_rejects_non_string_keys(self):
+        validator = config.DictOf(formencode.validators.Number())
+        with ExpectedException(formencode.Invalid, "The keys must be .*"):
+            validator.to_python({1: 20})
+
+    def test_converting_from_python(self):
+        validator = config.DictOf(formencode.validators.Number())
+        self.assertEqual({"ipmi": 20}, validator.from_python({"ipmi": 20}))
+
+    def test_empty_value(self):
+        validator = config.DictOf(formencode.validators.Number())
+        self.assertEqual({}, validator.to_python({}))